@@ -19,6 +19,9 @@ def merge_info(info1, info2):
     status["total_runs"] += status2["total_runs"]
     status["ok_runs"] += status2["ok_runs"]
     status["failed_runs"] += status2["failed_runs"]
+    for key in [ "http_connections", "rate_limiter", "metadata_cache", "request_metrics", "artifact_store", "watermarks", "export_journal", "worker_pool" ]:
+        if key in status2: # process-wide stats so latest wins
+            status[key] = status2[key]
 
     return info
 
@@ -13,15 +13,21 @@ from mlflow_export_import.common.click_options import (
     opt_stages,
     opt_export_permissions,
     opt_run_start_time,
-    opt_runs_until,
+    opt_until,
     opt_export_deleted_runs,
     opt_export_version_model,
     opt_notebook_formats,
     opt_use_threads,
+    opt_use_async,
+    opt_max_concurrent_requests,
+    opt_dedup_artifacts,
+    opt_watermark_file,
+    opt_resume
 )
 from mlflow_export_import.common.iterators import SearchExperimentsIterator
-from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import utils, io_utils, blob_store, watermarks, export_journal
 from mlflow_export_import.client.client_utils import create_mlflow_client
+from mlflow_export_import.client import request_metrics
 from mlflow_export_import.bulk.export_models import export_models
 from mlflow_export_import.bulk.export_experiments import export_experiments
 from mlflow_export_import.bulk.export_prompts import export_prompts
@@ -43,43 +49,20 @@ def export_all(
         export_permissions = False,
         notebook_formats = None,
         use_threads  =  False,
+        use_async = False,
+        max_concurrent_requests = None,
+        dedup_artifacts = False,
+        watermark_file = None,
+        resume = False,
         mlflow_client = None
     ):
     mlflow_client = mlflow_client or create_mlflow_client()
     start_time = time.time()
-    res_models = export_models(
-        mlflow_client = mlflow_client,
-        model_names = "all",
-        output_dir = output_dir,
-        stages = stages,
-        export_latest_versions = export_latest_versions,
-        export_all_runs = True,
-        export_deleted_runs = export_deleted_runs,
-        export_permissions = export_permissions,
-        run_start_time = run_start_time,
-        runs_until = runs_until,
-        export_version_model = export_version_model,
-        notebook_formats = notebook_formats,
-        use_threads = use_threads
-    )
-
-    # Only export those experiments not exported by above export_models()
-    exported_exp_names = res_models["experiments"]["experiment_names"]
-    all_exps = SearchExperimentsIterator(mlflow_client)
-    all_exp_names = [ exp.name for exp in all_exps ]
-    remaining_exp_names = list(set(all_exp_names) - set(exported_exp_names))
-
-    res_exps = export_experiments(
-        mlflow_client = mlflow_client,
-        experiments = remaining_exp_names,
-        output_dir = os.path.join(output_dir,"experiments"),
-        export_permissions = export_permissions,
-        run_start_time = run_start_time,
-        runs_until = runs_until,
-        export_deleted_runs = export_deleted_runs,
-        notebook_formats = notebook_formats,
-        use_threads = use_threads
-    )
+    with blob_store.activate(output_dir, dedup_artifacts) as store, watermarks.activate(watermark_file) as marks, \
+            export_journal.activate(output_dir, resume) as journal:
+        res_models, res_exps = _export_models_and_experiments(mlflow_client, output_dir, stages, export_latest_versions,
+            export_deleted_runs, export_version_model, export_permissions, run_start_time, runs_until, notebook_formats,
+            use_threads, use_async, max_concurrent_requests, dedup_artifacts, watermark_file, resume)
 
     # Export prompts (returns dict with status)
     res_prompts = None
@@ -128,6 +111,10 @@ def export_all(
             "export_permissions": export_permissions,
             "notebook_formats": notebook_formats,
             "use_threads": use_threads,
+            "use_async": use_async,
+            "dedup_artifacts": dedup_artifacts,
+            "watermark_file": watermark_file,
+            "resume": resume,
             "output_dir": output_dir,
         },
         "status": {
@@ -135,30 +122,88 @@ def export_all(
             "models": res_models,
             "experiments": res_exps,
             "prompts": res_prompts,
-            "evaluation_datasets": res_datasets
+            "evaluation_datasets": res_datasets,
+            "request_metrics": request_metrics.get_summary(),
+            "artifact_store": store.get_stats() if store else None,
+            "watermarks": marks.get_stats() if marks else None,
+            "export_journal": journal.get_stats()
         }
     }
     io_utils.write_export_file(output_dir, "manifest.json", __file__, {}, info_attr)
     _logger.info(f"Duration for entire tracking server export: {duration} seconds")
 
 
+def _export_models_and_experiments(mlflow_client, output_dir, stages, export_latest_versions, export_deleted_runs,
+        export_version_model, export_permissions, run_start_time, runs_until, notebook_formats,
+        use_threads, use_async, max_concurrent_requests, dedup_artifacts, watermark_file, resume):
+    res_models = export_models(
+        mlflow_client = mlflow_client,
+        model_names = "all",
+        output_dir = output_dir,
+        stages = stages,
+        export_latest_versions = export_latest_versions,
+        export_all_runs = True,
+        export_deleted_runs = export_deleted_runs,
+        export_permissions = export_permissions,
+        run_start_time = run_start_time,
+        runs_until = runs_until,
+        export_version_model = export_version_model,
+        notebook_formats = notebook_formats,
+        use_threads = use_threads,
+        use_async = use_async,
+        max_concurrent_requests = max_concurrent_requests,
+        dedup_artifacts = dedup_artifacts,
+        watermark_file = watermark_file,
+        resume = resume
+    )
+
+    # Only export those experiments not exported by above export_models()
+    exported_exp_names = res_models["experiments"]["experiment_names"]
+    all_exps = SearchExperimentsIterator(mlflow_client)
+    all_exp_names = [ exp.name for exp in all_exps ]
+    remaining_exp_names = list(set(all_exp_names) - set(exported_exp_names))
+
+    res_exps = export_experiments(
+        mlflow_client = mlflow_client,
+        experiments = remaining_exp_names,
+        output_dir = os.path.join(output_dir,"experiments"),
+        export_permissions = export_permissions,
+        run_start_time = run_start_time,
+        runs_until = runs_until,
+        export_deleted_runs = export_deleted_runs,
+        notebook_formats = notebook_formats,
+        use_threads = use_threads,
+        use_async = use_async,
+        max_concurrent_requests = max_concurrent_requests,
+        dedup_artifacts = dedup_artifacts,
+        watermark_file = watermark_file,
+        resume = resume
+    )
+    return res_models, res_exps
+
+
 @click.command()
 @opt_output_dir
 @opt_export_latest_versions
 @opt_stages
 @opt_run_start_time
-@opt_runs_until
+@opt_until
 @opt_export_deleted_runs
 @opt_export_version_model
 @opt_export_permissions
 @opt_notebook_formats
 @opt_use_threads
+@opt_use_async
+@opt_max_concurrent_requests
+@opt_dedup_artifacts
+@opt_watermark_file
+@opt_resume
 
 def main(output_dir, stages, export_latest_versions, run_start_time, runs_until,
         export_deleted_runs,
         export_version_model,
         export_permissions,
-        notebook_formats, use_threads
+        notebook_formats, use_threads, use_async, max_concurrent_requests, dedup_artifacts, watermark_file, resume
      ):
     _logger.info("Options:")
     for k,v in locals().items():
@@ -173,7 +218,12 @@ def main(output_dir, stages, export_latest_versions, run_start_time, runs_until,
         export_version_model = export_version_model,
         export_permissions = export_permissions,
         notebook_formats = notebook_formats,
-        use_threads = use_threads
+        use_threads = use_threads,
+        use_async = use_async,
+        max_concurrent_requests = max_concurrent_requests,
+        dedup_artifacts = dedup_artifacts,
+        watermark_file = watermark_file,
+        resume = resume
     )
 
 
@@ -7,7 +7,6 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import click
-import mlflow
 from mlflow.exceptions import RestException
 
 from mlflow_export_import.common.click_options import (
@@ -18,11 +17,19 @@ from mlflow_export_import.common.click_options import (
     opt_run_start_time,
     opt_until,
     opt_export_deleted_runs,
-    opt_use_threads
+    opt_use_threads,
+    opt_use_async,
+    opt_max_concurrent_requests,
+    opt_dedup_artifacts,
+    opt_watermark_file,
+    opt_resume
 )
 from mlflow_export_import.common import MlflowExportImportException
 from mlflow_export_import.common import utils, io_utils, mlflow_utils
 from mlflow_export_import.common import filesystem as _fs
+from mlflow_export_import.common import blob_store, watermarks, export_journal, worker_pool
+from mlflow_export_import.client import http_session, rate_limiter, metadata_cache, request_metrics
+from mlflow_export_import.client.client_utils import create_mlflow_client
 from mlflow_export_import.bulk import bulk_utils
 from mlflow_export_import.experiment.export_experiment import export_experiment
 
@@ -38,6 +45,11 @@ def export_experiments(
         notebook_formats = None,
         use_threads = False,
         logged_models_filter = None,
+        use_async = False,
+        max_concurrent_requests = None,
+        dedup_artifacts = False,
+        watermark_file = None,
+        resume = False,
         mlflow_client = None
     ):
     """
@@ -47,10 +59,18 @@ def export_experiments(
       - List of experiment IDs
       - Dictionary whose key is an experiment id and the value is a list of its run IDs
       - String with comma-delimited experiment names or IDs such as 'sklearn_wine,sklearn_iris' or '1,2'
+    :param use_threads: Export the experiments in parallel. Their runs are exported in one shared pool of
+                        the same size (see worker_pool) so that large experiments use all workers.
+    :param use_async: Fetch run metadata with the asyncio engine (requires 'aiohttp').
+    :param max_concurrent_requests: Maximum number of in-flight REST requests for the asyncio engine.
+    :param dedup_artifacts: Store artifacts in a content-addressed blob store under output_dir (see blob_store).
+    :param watermark_file: Only export runs, logged models and traces that are new or changed since the
+                           export that wrote this file, and update it (see watermarks).
+    :param resume: Skip the units completed by an interrupted export into output_dir (see export_journal).
     :return: Dictionary of summary information
     """
 
-    mlflow_client = mlflow_client or mlflow.MlflowClient()
+    mlflow_client = mlflow_client or create_mlflow_client()
     start_time = time.time()
     max_workers = utils.get_threads(use_threads)
     experiments_arg = _convert_dict_keys_to_list(experiments)
@@ -78,33 +98,28 @@ def export_experiments(
     utils.show_table("Experiments",table_data,columns)
     _logger.info("")
 
-    ok_runs = 0
-    failed_runs = 0
     export_results = []
-    futures = []
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        for exp_id_or_name in experiments:
-            run_ids = experiments_dct.get(exp_id_or_name, None)
-            future = executor.submit(_export_experiment,
-                mlflow_client,
-                exp_id_or_name,
-                output_dir,
-                export_permissions,
-                notebook_formats,
-                export_results,
-                run_start_time,
-                runs_until,
-                export_deleted_runs,
-                run_ids,
-                logged_models_filter
-            )
-            futures.append(future)
+    pool_stats = None
+    with blob_store.activate(output_dir, dedup_artifacts) as store, watermarks.activate(watermark_file) as marks, \
+            export_journal.activate(output_dir, resume) as journal:
+        if marks:
+            experiments_dct = marks.select_runs(mlflow_client, experiments, experiments_dct, _get_view_type(export_deleted_runs))
+            experiments = list(experiments_dct.keys())
+        if use_async:
+            results = _export_experiments_async(mlflow_client, experiments, experiments_dct, output_dir,
+                export_permissions, notebook_formats, export_results, run_start_time, runs_until,
+                export_deleted_runs, logged_models_filter, max_workers, max_concurrent_requests)
+        else:
+            with worker_pool.activate(max_workers) as pool:
+                results = _export_experiments_threaded(mlflow_client, experiments, experiments_dct, output_dir,
+                    export_permissions, notebook_formats, export_results, run_start_time, runs_until,
+                    export_deleted_runs, logged_models_filter, max_workers)
+                pool_stats = pool.get_stats() if pool else None
     duration = round(time.time() - start_time, 1)
     ok_runs = 0
     failed_runs = 0
     experiment_names = []
-    for future in futures:
-        result = future.result()
+    for result in results:
         ok_runs += result.ok_runs
         failed_runs += result.failed_runs
         experiment_names.append(result.name)
@@ -122,14 +137,26 @@ def export_experiments(
             "runs_until": runs_until,
             "export_deleted_runs": export_deleted_runs,
             "notebook_formats": notebook_formats,
-            "use_threads": use_threads
+            "use_threads": use_threads,
+            "use_async": use_async,
+            "dedup_artifacts": dedup_artifacts,
+            "watermark_file": watermark_file,
+            "resume": resume
         },
         "status": {
             "duration": duration,
             "experiments": len(experiments),
             "total_runs": total_runs,
             "ok_runs": ok_runs,
-            "failed_runs": failed_runs
+            "failed_runs": failed_runs,
+            "http_connections": http_session.get_stats(),
+            "rate_limiter": rate_limiter.get_stats(),
+            "metadata_cache": metadata_cache.get_stats(),
+            "request_metrics": request_metrics.get_summary(),
+            "artifact_store": store.get_stats() if store else None,
+            "watermarks": marks.get_stats() if marks else None,
+            "export_journal": journal.get_stats(),
+            "worker_pool": pool_stats
         }
     }
     mlflow_attr = { "experiments": export_results }
@@ -137,7 +164,7 @@ def export_experiments(
     # NOTE: Make sure we don't overwrite existing experiments.json generated by export_models when being called by export_all.
     # Merge this existing experiments.json with the new built by export_experiments.
     path = _fs.mk_local_path(os.path.join(output_dir, "experiments.json"))
-    if os.path.exists(path):
+    if os.path.exists(path) and not journal.is_stale_summary_file(path):
         from mlflow_export_import.bulk.experiments_merge_utils import merge_mlflow, merge_info
         root = io_utils.read_file(path)
         mlflow_attr = merge_mlflow(io_utils.get_mlflow(root), mlflow_attr)
@@ -145,6 +172,7 @@ def export_experiments(
         info_attr["note"] = "Merged by export_all from export_models and export_experiments"
 
     io_utils.write_export_file(output_dir, "experiments.json", __file__, mlflow_attr, info_attr)
+    journal.add_summary_file(path)
 
     _logger.info(f"{len(experiments)} experiments exported")
     _logger.info(f"{ok_runs}/{total_runs} runs succesfully exported")
@@ -155,6 +183,46 @@ def export_experiments(
     return info_attr
 
 
+def _export_experiments_threaded(mlflow_client, experiments, experiments_dct, output_dir, export_permissions,
+        notebook_formats, export_results, run_start_time, runs_until, export_deleted_runs, logged_models_filter, max_workers):
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for exp_id_or_name in experiments:
+            run_ids = experiments_dct.get(exp_id_or_name, None)
+            future = executor.submit(_export_experiment,
+                mlflow_client,
+                exp_id_or_name,
+                output_dir,
+                export_permissions,
+                notebook_formats,
+                export_results,
+                run_start_time,
+                runs_until,
+                export_deleted_runs,
+                run_ids,
+                logged_models_filter
+            )
+            futures.append(future)
+    return [ future.result() for future in futures ]
+
+
+def _export_experiments_async(mlflow_client, experiments, experiments_dct, output_dir, export_permissions,
+        notebook_formats, export_results, run_start_time, runs_until, export_deleted_runs, logged_models_filter,
+        max_workers, max_concurrent_requests):
+    from mlflow_export_import.bulk import export_experiments_async
+    options = export_experiments_async.Options(
+        output_dir = output_dir,
+        export_permissions = export_permissions,
+        notebook_formats = notebook_formats,
+        run_start_time = run_start_time,
+        runs_until = runs_until,
+        export_deleted_runs = export_deleted_runs,
+        logged_models_filter = logged_models_filter
+    )
+    return export_experiments_async.export_experiments(mlflow_client, experiments, experiments_dct, options,
+        export_results, max_workers, max_concurrent_requests)
+
+
 def _export_experiment(mlflow_client, exp_id_or_name, output_dir, export_permissions, notebook_formats, export_results,
         run_start_time, runs_until, export_deleted_runs, run_ids, logged_models_filter):
     ok_runs = -1; failed_runs = -1
@@ -200,6 +268,11 @@ def _export_experiment(mlflow_client, exp_id_or_name, output_dir, export_permiss
     return Result(exp_name, ok_runs, failed_runs)
 
 
+def _get_view_type(export_deleted_runs):
+    from mlflow.entities import ViewType
+    return ViewType.ALL if export_deleted_runs else None
+
+
 def _convert_dict_keys_to_list(obj):
     import collections
     if isinstance(obj, collections.abc.KeysView): # class dict_keys
@@ -223,8 +296,14 @@ class Result:
 @opt_export_deleted_runs
 @opt_notebook_formats
 @opt_use_threads
+@opt_use_async
+@opt_max_concurrent_requests
+@opt_dedup_artifacts
+@opt_watermark_file
+@opt_resume
 
-def main(experiments, output_dir, export_permissions, run_start_time, runs_until, export_deleted_runs, notebook_formats, use_threads):
+def main(experiments, output_dir, export_permissions, run_start_time, runs_until, export_deleted_runs, notebook_formats, use_threads,
+        use_async, max_concurrent_requests, dedup_artifacts, watermark_file, resume):
     _logger.info("Options:")
     for k,v in locals().items():
         _logger.info(f"  {k}: {v}")
@@ -236,7 +315,12 @@ def main(experiments, output_dir, export_permissions, run_start_time, runs_until
         runs_until = runs_until,
         export_deleted_runs = export_deleted_runs,
         notebook_formats = utils.string_to_list(notebook_formats),
-        use_threads = use_threads
+        use_threads = use_threads,
+        use_async = use_async,
+        max_concurrent_requests = max_concurrent_requests,
+        dedup_artifacts = dedup_artifacts,
+        watermark_file = watermark_file,
+        resume = resume
     )
 
 
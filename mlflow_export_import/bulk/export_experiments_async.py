@@ -0,0 +1,287 @@
+"""
+Asyncio engine for bulk experiment export.
+
+Run metadata (search runs, get run, metric histories and list artifacts) is fetched with
+AsyncMlflowHttpClient from one event loop so that many requests are in flight at once.
+Blocking work (artifact downloads, notebooks, logged models, traces and file writes) runs
+in a thread pool of 'max_workers' threads.
+The output is identical to the threaded export_experiments.
+"""
+
+import os
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from mlflow.entities import Run, Metric
+from mlflow.exceptions import RestException
+from mlflow.protos.service_pb2 import GetRun, GetMetricHistory
+from mlflow.utils.proto_json_utils import parse_dict
+
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common import utils, mlflow_utils, export_journal
+from mlflow_export_import.common.timestamp_utils import format_seconds, utc_str_to_millis
+from mlflow_export_import.client.client_utils import create_async_http_client, create_dbx_client
+from mlflow_export_import.experiment import export_experiment
+from mlflow_export_import.run import export_run
+
+_logger = utils.getLogger(__name__)
+
+_SEARCH_RUNS_MAX_RESULTS = 1000
+_METRIC_HISTORY_MAX_RESULTS = 25000 # NOTE: open source server returns no metrics if 'max_results' is not set
+_RUN_WINDOW_FACTOR = 4 # pending run tasks per concurrent request for each experiment
+
+
+@dataclass()
+class Options:
+    output_dir: str = None
+    export_permissions: bool = False
+    notebook_formats: list = None
+    run_start_time: str = None
+    runs_until: str = None
+    export_deleted_runs: bool = False
+    logged_models_filter: str = None
+
+
+def export_experiments(mlflow_client, experiments, experiments_dct, options, export_results,
+        max_workers = 1,
+        max_concurrent_requests = None
+    ):
+    """
+    :param mlflow_client: MLflow client.
+    :param experiments: List of experiment IDs or names.
+    :param experiments_dct: Dictionary whose key is an experiment ID and the value is a list of its run IDs.
+    :param options: Options.
+    :param export_results: List to which the experiment results are appended.
+    :param max_workers: Number of threads for blocking work such as artifact downloads.
+    :param max_concurrent_requests: Maximum number of in-flight REST requests.
+    :return: List of export_experiments.Result.
+    """
+    coro = _export_experiments(mlflow_client, experiments, experiments_dct, options, export_results,
+        max_workers, max_concurrent_requests)
+    return run_coroutine(coro)
+
+
+def run_coroutine(coro):
+    """
+    Run a coroutine to completion. If called from a running event loop (e.g. a Databricks
+    or Jupyter notebook) the coroutine is run in its own thread and event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+@dataclass()
+class _Context:
+    mlflow_client: object
+    dbx_client: object
+    http_client: object
+    executor: ThreadPoolExecutor
+    run_semaphore: asyncio.Semaphore
+    options: Options
+    run_start_time: int = None
+    runs_until: int = None
+
+    async def run_blocking(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+
+async def _export_experiments(mlflow_client, experiments, experiments_dct, options, export_results,
+        max_workers, max_concurrent_requests
+    ):
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        async with create_async_http_client(mlflow_client, max_concurrent_requests) as http_client:
+            ctx = _Context(
+                mlflow_client = mlflow_client,
+                dbx_client = create_dbx_client(mlflow_client),
+                http_client = http_client,
+                executor = executor,
+                run_semaphore = asyncio.Semaphore(http_client.max_concurrent_requests),
+                options = options,
+                run_start_time = utc_str_to_millis(options.run_start_time) if options.run_start_time else None,
+                runs_until = utc_str_to_millis(options.runs_until) if options.runs_until else None
+            )
+            return await asyncio.gather(*[
+                _export_experiment(ctx, exp_id_or_name, experiments_dct.get(exp_id_or_name), export_results)
+                    for exp_id_or_name in experiments
+            ])
+
+
+async def _export_experiment(ctx, exp_id_or_name, run_ids, export_results):
+    from mlflow_export_import.bulk.export_experiments import Result
+    ok_runs = -1; failed_runs = -1
+    exp_name = exp_id_or_name
+    try:
+        exp = await ctx.run_blocking(mlflow_utils.get_experiment, ctx.mlflow_client, exp_id_or_name)
+        exp_name = exp.name
+        start_time = time.time()
+        ok_runs, failed_runs = await _export_experiment_runs(ctx, exp, os.path.join(ctx.options.output_dir, exp.experiment_id), run_ids)
+        duration = round(time.time() - start_time, 1)
+        result = {
+            "id" : exp.experiment_id,
+            "name": exp.name,
+            "ok_runs": ok_runs,
+            "failed_runs": failed_runs,
+            "duration": duration
+        }
+        export_results.append(result)
+        _logger.info(f"Done exporting experiment: {result}")
+
+    except RestException as e:
+        mlflow_utils.dump_exception(e)
+        err_msg = { **{ "message": "Cannot export experiment", "experiment": exp_name }, ** mlflow_utils.mk_msg_RestException(e) }
+        _logger.error(err_msg)
+    except MlflowExportImportException as e:
+        err_msg = { "message": "Cannot export experiment", "experiment": exp_name, "MlflowExportImportException": e.kwargs }
+        _logger.error(err_msg)
+    except Exception as e:
+        err_msg = { "message": "Cannot export experiment", "experiment": exp_name, "Exception": e }
+        _logger.error(err_msg)
+    return Result(exp_name, ok_runs, failed_runs)
+
+
+async def _export_experiment_runs(ctx, exp, output_dir, run_ids):
+    msg = { "name": exp.name, "id": exp.experiment_id,
+        "mlflow.experimentType": exp.tags.get("mlflow.experimentType", None),
+        "lifecycle_stage": exp.lifecycle_stage
+    }
+    _logger.info(f"Exporting experiment: {msg}")
+    ok_run_ids = []
+    failed_run_ids = []
+
+    num_runs_exported = 0
+    results = {} # run index => (run ID, status)
+    pending = {} # task => run index
+    window = ctx.http_client.max_concurrent_requests * _RUN_WINDOW_FACTOR
+
+    async def _wait(return_when):
+        done, _ = await asyncio.wait(pending, return_when=return_when)
+        for task in done:
+            results[pending.pop(task)] = task.result()
+
+    async for run_id in _iter_run_ids(ctx, exp, run_ids):
+        if len(pending) >= window: # only create tasks for a window of runs
+            await _wait(asyncio.FIRST_COMPLETED)
+        pending[asyncio.ensure_future(_export_run(ctx, exp, run_id, output_dir))] = num_runs_exported
+        num_runs_exported += 1
+    if pending:
+        await _wait(asyncio.ALL_COMPLETED)
+
+    for j in range(num_runs_exported):
+        run_id, status = results.pop(j)
+        if status is True:
+            ok_run_ids.append(run_id)
+        elif status is False:
+            failed_run_ids.append(run_id)
+
+    await ctx.run_blocking(export_experiment._export_experiment_manifest,
+        ctx.mlflow_client, ctx.dbx_client, exp, output_dir,
+        ok_run_ids, failed_run_ids, num_runs_exported,
+        ctx.options.export_permissions, ctx.options.logged_models_filter)
+    return len(ok_run_ids), len(failed_run_ids)
+
+
+async def _iter_run_ids(ctx, exp, run_ids):
+    if run_ids is not None:
+        for run_id in run_ids:
+            yield run_id
+    else:
+        async for run_id in _search_run_ids(ctx, exp.experiment_id):
+            yield run_id
+
+
+async def _search_run_ids(ctx, experiment_id):
+    data = {
+        "experiment_ids": [ experiment_id ],
+        "max_results": _SEARCH_RUNS_MAX_RESULTS,
+        "run_view_type": "ALL" if ctx.options.export_deleted_runs else "ACTIVE_ONLY"
+    }
+    filter = export_experiment._mk_runs_filter(ctx.run_start_time, ctx.runs_until)
+    if filter:
+        data["filter"] = filter
+    while True:
+        rsp = await ctx.http_client.post("runs/search", data)
+        for run in rsp.get("runs", []):
+            yield run["info"]["run_id"]
+        page_token = rsp.get("next_page_token")
+        if not page_token:
+            break
+        data["page_token"] = page_token
+
+
+async def _export_run(ctx, exp, run_id, output_dir):
+    """
+    :return: Tuple of run ID and True if exported, False if failed or None if skipped.
+    """
+    run_dir = os.path.join(output_dir, f"runs/{run_id}")
+    if export_journal.get_completed("run", run_dir, run_id):
+        return run_id, True
+    async with ctx.run_semaphore:
+        start_time = time.time()
+        try:
+            run = _to_run(await ctx.http_client.get("runs/get", { "run_id": run_id }))
+            if run.info.experiment_id != exp.experiment_id:
+                msg = { "run_id": run_id, "run.experiment_id": run.info.experiment_id, "experiment_id": exp.experiment_id }
+                _logger.warning(f"Not exporting run since it doesn't belong to experiment: {msg}")
+                return run_id, False
+            if export_experiment._is_outside_time_window(run,
+                    ctx.run_start_time, ctx.options.run_start_time, ctx.runs_until, ctx.options.runs_until):
+                return run_id, None
+            if export_run.is_skipped_deleted_run(run, ctx.options.export_deleted_runs):
+                return run_id, False
+
+            histories, has_artifacts = await asyncio.gather(
+                _get_metric_histories(ctx, run),
+                _has_artifacts(ctx, run_id)
+            )
+            await ctx.run_blocking(export_run.write_run, ctx.mlflow_client, ctx.dbx_client, run, histories,
+                has_artifacts, run_dir, False, ctx.options.notebook_formats)
+            await ctx.run_blocking(export_journal.record, "run", run_dir, run_id)
+            dur = format_seconds(time.time()-start_time)
+            _logger.info(f"Exported run in {dur}: {export_run.mk_run_msg(run)}")
+            return run_id, True
+
+        except MlflowExportImportException as e:
+            err_msg = { "run_id": run_id, "experiment_id": exp.experiment_id, "MlflowExportImportException": e.kwargs }
+            _logger.error(f"Run export failed (1): {err_msg}")
+            return run_id, False
+        except Exception as e:
+            err_msg = { "run_id": run_id, "experiment_id": exp.experiment_id, "Exception": e }
+            _logger.error(f"Run export failed (2): {err_msg}")
+            return run_id, False
+
+
+async def _get_metric_histories(ctx, run):
+    keys = list(run.data.metrics.keys())
+    histories = await asyncio.gather(*[ _get_metric_history(ctx, run.info.run_id, key) for key in keys ])
+    return list(zip(keys, histories))
+
+
+async def _get_metric_history(ctx, run_id, key):
+    metrics = []
+    params = { "run_id": run_id, "metric_key": key, "max_results": _METRIC_HISTORY_MAX_RESULTS }
+    while True:
+        rsp = await ctx.http_client.get("metrics/get-history", params)
+        metrics += [ Metric.from_proto(m) for m in _parse(rsp, GetMetricHistory.Response()).metrics ]
+        page_token = rsp.get("next_page_token")
+        if not page_token:
+            return metrics
+        params["page_token"] = page_token
+
+
+async def _has_artifacts(ctx, run_id):
+    rsp = await ctx.http_client.get("artifacts/list", { "run_id": run_id })
+    return len(rsp.get("files", [])) > 0
+
+
+def _to_run(rsp):
+    return Run.from_proto(_parse(rsp, GetRun.Response()).run)
+
+
+def _parse(rsp, proto):
+    parse_dict(rsp, proto)
+    return proto
@@ -13,7 +13,8 @@ from mlflow_export_import.common.click_options import (
     opt_output_dir
 )
 from mlflow_export_import.common import MlflowExportImportException
-from mlflow_export_import.common import utils, io_utils, mlflow_utils
+from mlflow_export_import.client import metadata_cache
+from mlflow_export_import.common import utils, io_utils, mlflow_utils, watermarks, export_journal
 from mlflow_export_import.bulk.bulk_utils import get_logged_models, get_experiment_ids
 from mlflow_export_import.logged_model.export_logged_model import export_logged_model
 from mlflow_export_import.common.version_utils import has_logged_model_support
@@ -50,7 +51,7 @@ def export_logged_models(
     export_results = {
         exp_id: {
             "id": exp_id,
-            "name": mlflow_client.get_experiment(exp_id).name,
+            "name": metadata_cache.get_experiment(mlflow_client, exp_id).name,
             "logged_models": []} for exp_id in experiment_ids
     }
 
@@ -64,6 +65,10 @@ def export_logged_models(
         logged_models = [logged_model for logged_model in logged_models
                          if logged_model.source_run_id in logged_models_filter.get(str(logged_model.experiment_id), [])]
 
+    marks = watermarks.get_watermarks()
+    if marks:
+        logged_models = marks.filter_logged_models(logged_models)
+
     table_data = [ logged_model.name for logged_model in logged_models ]
     columns = ["Logged Model Name"]
     utils.show_table("Logged Models", table_data, columns)
@@ -78,6 +83,8 @@ def export_logged_models(
         )
         nums_logged_models_exported += 1
         export_results[logged_model.experiment_id]["logged_models"].append(logged_model.model_id)
+    if marks:
+        marks.commit_logged_models(logged_models, ok_logged_models)
 
     info_attr = {
         "num_total_logged_models": (nums_logged_models_exported),
@@ -109,16 +116,21 @@ def _export_logged_model(
         failed_logged_models
     ):
     try:
+        logged_model_dir = os.path.join(output_dir, logged_model.model_id)
+        if export_journal.get_completed("logged_model", logged_model_dir, logged_model.model_id):
+            ok_logged_models.append(logged_model.model_id)
+            return
         _logger.info(f"Exporting logged model: {logged_model.model_id}")
 
         is_success = export_logged_model(
             model_id=logged_model.model_id,
-            output_dir=os.path.join(output_dir, logged_model.model_id),
+            output_dir=logged_model_dir,
             mlflow_client=mlflow_client
         )
 
         if is_success:
             ok_logged_models.append(logged_model.model_id)
+            export_journal.record("logged_model", logged_model_dir, logged_model.model_id)
         else:
             failed_logged_models.append(logged_model.model_id)
 
@@ -15,14 +15,21 @@ from mlflow_export_import.common.click_options import (
     opt_export_all_runs,
     opt_export_permissions,
     opt_run_start_time,
-    opt_runs_until,
+    opt_until,
     opt_export_deleted_runs,
     opt_export_version_model,
     opt_notebook_formats,
-    opt_use_threads
+    opt_use_threads,
+    opt_use_async,
+    opt_max_concurrent_requests,
+    opt_dedup_artifacts,
+    opt_watermark_file,
+    opt_resume
 )
-from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import utils, io_utils, blob_store, watermarks, export_journal
+from mlflow_export_import.common.model_utils import list_model_versions
 from mlflow_export_import.client.client_utils import create_mlflow_client
+from mlflow_export_import.client import http_session, metadata_cache, request_metrics
 from mlflow_export_import.model.export_model import export_model
 from mlflow_export_import.bulk import export_experiments
 from mlflow_export_import.bulk.model_utils import get_experiments_runs_of_models
@@ -44,6 +51,11 @@ def export_models(
         export_version_model = False,
         notebook_formats = None,
         use_threads = False,
+        use_async = False,
+        max_concurrent_requests = None,
+        dedup_artifacts = False,
+        watermark_file = None,
+        resume = False,
         mlflow_client = None
     ):
     """
@@ -62,6 +74,12 @@ def export_models(
     :param export_version_model: Export version's cached MLflow model
     :param notebook_formats: Databricks notebook formats to export (comma separated)
     :param use_threads: Process in parallel using threads
+    :param use_async: Export the runs with the asyncio engine (requires 'aiohttp')
+    :param max_concurrent_requests: Maximum number of in-flight REST requests for the asyncio engine
+    :param dedup_artifacts: Store artifacts in a content-addressed blob store under output_dir (see blob_store)
+    :param watermark_file: Only export models, versions and runs that are new or changed since the export
+                           that wrote this file, and update it (see watermarks)
+    :param resume: Skip the units completed by an interrupted export into output_dir (see export_journal)
     :param mlflow_client: MLflow client
     :return: Dictionary of summary information
     """
@@ -71,35 +89,44 @@ def export_models(
             model_names = f.read().splitlines()
 
     mlflow_client = mlflow_client or create_mlflow_client()
-    exps_and_runs = get_experiments_runs_of_models(mlflow_client, model_names)
-    exp_ids = exps_and_runs.keys()
     start_time = time.time()
-    out_dir = os.path.join(output_dir, "experiments")
-    exps_to_export = exp_ids if export_all_runs else exps_and_runs
-    res_exps = export_experiments.export_experiments(
-        mlflow_client = mlflow_client,
-        experiments = exps_to_export,
-        output_dir = out_dir,
-        export_permissions = export_permissions,
-        run_start_time = run_start_time,
-        runs_until = runs_until,
-        export_deleted_runs = export_deleted_runs,
-        notebook_formats = notebook_formats,
-        use_threads = use_threads,
-        logged_models_filter = exps_and_runs if not export_all_runs else None
-    )
-    res_models = _export_models(
-        mlflow_client,
-        model_names,
-        os.path.join(output_dir,"models"),
-        notebook_formats,
-        stages,
-        use_threads = use_threads,
-        export_latest_versions = export_latest_versions,
-        export_version_model = export_version_model,
-        export_permissions = export_permissions,
-        export_deleted_runs = export_deleted_runs
-    )
+    with blob_store.activate(output_dir, dedup_artifacts) as store, watermarks.activate(watermark_file) as marks, \
+            export_journal.activate(output_dir, resume) as journal:
+        if marks:
+            model_names = _select_changed_models(mlflow_client, model_names, export_latest_versions, marks)
+        exps_and_runs = get_experiments_runs_of_models(mlflow_client, model_names)
+        exp_ids = exps_and_runs.keys()
+        out_dir = os.path.join(output_dir, "experiments")
+        exps_to_export = exp_ids if export_all_runs else exps_and_runs
+        res_exps = export_experiments.export_experiments(
+            mlflow_client = mlflow_client,
+            experiments = exps_to_export,
+            output_dir = out_dir,
+            export_permissions = export_permissions,
+            run_start_time = run_start_time,
+            runs_until = runs_until,
+            export_deleted_runs = export_deleted_runs,
+            notebook_formats = notebook_formats,
+            use_threads = use_threads,
+            logged_models_filter = exps_and_runs if not export_all_runs else None,
+            use_async = use_async,
+            max_concurrent_requests = max_concurrent_requests,
+            dedup_artifacts = dedup_artifacts,
+            watermark_file = watermark_file,
+            resume = resume
+        )
+        res_models = _export_models(
+            mlflow_client,
+            model_names,
+            os.path.join(output_dir,"models"),
+            notebook_formats,
+            stages,
+            use_threads = use_threads,
+            export_latest_versions = export_latest_versions,
+            export_version_model = export_version_model,
+            export_permissions = export_permissions,
+            export_deleted_runs = export_deleted_runs
+        )
     duration = round(time.time()-start_time, 1)
     _logger.info(f"Duration for total registered models and versions' runs export: {duration} seconds")
 
@@ -112,15 +139,36 @@ def export_models(
         "export_deleted_runs": export_deleted_runs,
         "notebook_formats": notebook_formats,
         "use_threads": use_threads,
+        "dedup_artifacts": dedup_artifacts,
+        "watermark_file": watermark_file,
+        "resume": resume,
         "output_dir": output_dir,
         "models": res_models,
-        "experiments": res_exps
+        "experiments": res_exps,
+        "request_metrics": request_metrics.get_summary(),
+        "artifact_store": store.get_stats() if store else None,
+        "watermarks": marks.get_stats() if marks else None,
+        "export_journal": journal.get_stats()
     }
     io_utils.write_export_file(output_dir, "manifest.json", __file__, {}, info_attr)
 
     return info_attr
 
 
+def _select_changed_models(mlflow_client, model_names, export_latest_versions, marks):
+    """
+    Keep the models whose metadata or versions changed since the export that wrote the watermark file.
+    """
+    changed_model_names = []
+    for model_name in bulk_utils.get_model_names(mlflow_client, model_names):
+        model = mlflow_client.get_registered_model(model_name)
+        versions = list_model_versions(mlflow_client, model_name, export_latest_versions)
+        if marks.select_model_versions(model_name, model.last_updated_timestamp, versions) is not None:
+            changed_model_names.append(model_name)
+    _logger.info(f"Found {len(changed_model_names)} new or changed models since the last export")
+    return changed_model_names
+
+
 def _export_models(
         mlflow_client,
         model_names,
@@ -134,6 +182,7 @@ def _export_models(
         export_deleted_runs = False
     ):
     max_workers = utils.get_threads(use_threads)
+    http_session.configure(pool_size=max_workers)
     start_time = time.time()
     model_names = bulk_utils.get_model_names(mlflow_client, model_names)
     _logger.info("Models to export:")
@@ -174,7 +223,9 @@ def _export_models(
         "num_ok_models": len(ok_models),
         "num_failed_models": len(failed_models),
         "duration": duration,
-        "failed_models": failed_models
+        "failed_models": failed_models,
+        "metadata_cache": metadata_cache.get_stats(),
+        "request_metrics": request_metrics.get_summary()
     }
     mlflow_attr = {
         "models": ok_models,
@@ -202,15 +253,20 @@ def _export_models(
 @opt_stages
 @opt_export_permissions
 @opt_run_start_time
-@opt_runs_until
+@opt_until
 @opt_export_deleted_runs
 @opt_export_version_model
 @opt_notebook_formats
 @opt_use_threads
+@opt_use_async
+@opt_max_concurrent_requests
+@opt_dedup_artifacts
+@opt_watermark_file
+@opt_resume
 
 def main(models, output_dir, stages, export_latest_versions, export_all_runs,
         export_permissions, run_start_time, runs_until, export_deleted_runs, export_version_model,
-        notebook_formats, use_threads
+        notebook_formats, use_threads, use_async, max_concurrent_requests, dedup_artifacts, watermark_file, resume
     ):
     _logger.info("Options:")
     for k,v in locals().items():
@@ -228,6 +284,11 @@ def main(models, output_dir, stages, export_latest_versions, export_all_runs,
         export_version_model = export_version_model,
         notebook_formats = utils.string_to_list(notebook_formats),
         use_threads = use_threads,
+        use_async = use_async,
+        max_concurrent_requests = max_concurrent_requests,
+        dedup_artifacts = dedup_artifacts,
+        watermark_file = watermark_file,
+        resume = resume
     )
 
 
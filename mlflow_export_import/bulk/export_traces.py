@@ -12,8 +12,9 @@ from mlflow_export_import.common.click_options import (
     opt_output_dir
 )
 from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.client import metadata_cache
 from mlflow_export_import.bulk.bulk_utils import get_experiment_ids, get_traces
-from mlflow_export_import.common import utils, mlflow_utils, io_utils
+from mlflow_export_import.common import utils, mlflow_utils, io_utils, watermarks, export_journal
 from mlflow_export_import.trace.export_trace import export_trace
 from mlflow_export_import.common.version_utils import has_trace_support
 
@@ -48,12 +49,15 @@ def export_traces(
     export_results = {
         exp_id: {
             "id": exp_id,
-            "name": mlflow_client.get_experiment(exp_id).name,
+            "name": metadata_cache.get_experiment(mlflow_client, exp_id).name,
             "traces": []} for exp_id in experiment_ids
     }
 
     try:
         traces = get_traces(mlflow_client, experiment_ids, run_id)
+        marks = watermarks.get_watermarks()
+        if marks:
+            traces = marks.filter_traces(traces)
 
         if len(traces) == 0:
             _logger.info(f"No traces found for experiment ids {experiment_ids})")
@@ -73,6 +77,8 @@ def export_traces(
             )
             nums_traces_exported += 1
             export_results[trace.info.experiment_id]["traces"].append(trace.info.request_id)
+        if marks:
+            marks.commit_traces(traces, ok_traces)
 
         info_attr = {
             "num_total_trace": nums_traces_exported,
@@ -106,15 +112,20 @@ def _export_trace(
     ):
 
     try:
+        trace_dir = os.path.join(output_dir, request_id)
+        if export_journal.get_completed("trace", trace_dir, request_id):
+            ok_traces.append(request_id)
+            return
         _logger.info(f"Exporting trace for experiment {request_id}")
         is_success = export_trace(
             request_id=request_id,
-            output_dir=os.path.join(output_dir, request_id),
+            output_dir=trace_dir,
             mlflow_client = mlflow_client
         )
 
         if is_success:
             ok_traces.append(request_id)
+            export_journal.record("trace", trace_dir, request_id)
         else:
             failed_traces.append(request_id)
 
@@ -7,7 +7,6 @@ from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 import click
 
-import mlflow
 from mlflow_export_import.common.click_options import (
     opt_input_dir, 
     opt_import_permissions,
@@ -16,7 +15,8 @@ from mlflow_export_import.common.click_options import (
     opt_experiment_rename_file,
     opt_use_threads
 )
-from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import utils, io_utils, destination_cache, worker_pool
+from mlflow_export_import.client.client_utils import create_mlflow_client
 from mlflow_export_import.experiment.import_experiment import import_experiment
 from mlflow_export_import.bulk import rename_utils
 
@@ -47,14 +47,34 @@ def import_experiments(
     """
 
     experiment_renames = rename_utils.get_renames(experiment_renames)
-    mlflow_client = mlflow_client or mlflow.MlflowClient()
+    mlflow_client = mlflow_client or create_mlflow_client()
+    max_workers = utils.get_threads(use_threads)
+    with destination_cache.activate(), worker_pool.activate(max_workers):
+        return _import_experiments(
+            mlflow_client,
+            input_dir,
+            import_permissions,
+            import_source_tags,
+            use_src_user_id,
+            experiment_renames,
+            max_workers
+        )
+
+
+def _import_experiments(mlflow_client,
+        input_dir,
+        import_permissions,
+        import_source_tags,
+        use_src_user_id,
+        experiment_renames,
+        max_workers
+    ):
     dct = io_utils.read_file_mlflow(os.path.join(input_dir, "experiments.json"))
     exps = dct["experiments"]
     _logger.info("Importing experiments:")
     for exp in exps:
         _logger.info(f"  Importing experiment: {exp}")
 
-    max_workers = utils.get_threads(use_threads)
     futures = []
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
         for exp in exps:
@@ -21,8 +21,10 @@ from mlflow_export_import.common.click_options import (
     opt_model_rename_file,
     opt_use_threads
 )
-from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import utils, io_utils, destination_cache
+from mlflow_export_import.common import artifact_transfer
 from mlflow_export_import.client.client_utils import create_mlflow_client
+from mlflow_export_import.client import http_session, rate_limiter, metadata_cache, request_metrics
 from mlflow_export_import.model.import_model import BulkModelImporter
 from mlflow_export_import.bulk.import_experiments import import_experiments
 from mlflow_export_import.bulk import rename_utils
@@ -46,34 +48,43 @@ def import_models(
     experiment_renames = rename_utils.get_renames(experiment_renames)
     model_renames = rename_utils.get_renames(model_renames)
     start_time = time.time()
-    exp_run_info_map, exp_info = _import_experiments(
-        mlflow_client,
-        input_dir,
-        experiment_renames,
-        import_permissions,
-        import_source_tags,
-        use_src_user_id,
-        use_threads
-    )
-    run_info_map = _flatten_run_info_map(exp_run_info_map)
-    model_res = _import_models(
-        mlflow_client,
-        input_dir,
-        run_info_map,
-        delete_model,
-        import_permissions,
-        import_source_tags,
-        model_renames,
-        experiment_renames,
-        verbose,
-        use_threads
-    )
-    
+    max_workers = utils.get_threads(use_threads)
+    http_session.configure(pool_size=max_workers)
+    with destination_cache.activate() as dst_cache:
+        exp_run_info_map, exp_info = _import_experiments(
+            mlflow_client,
+            input_dir,
+            experiment_renames,
+            import_permissions,
+            import_source_tags,
+            use_src_user_id,
+            use_threads
+        )
+        run_info_map = _flatten_run_info_map(exp_run_info_map)
+        model_res = _import_models(
+            mlflow_client,
+            input_dir,
+            run_info_map,
+            delete_model,
+            import_permissions,
+            import_source_tags,
+            model_renames,
+            experiment_renames,
+            verbose,
+            use_threads
+        )
+
     duration = round(time.time()-start_time, 1)
     dct = { 
         "duration": duration, 
         "experiments_import": exp_info, 
-        "models_import": model_res
+        "models_import": model_res,
+        "destination_cache": dst_cache.get_stats(),
+        "http_connections": http_session.get_stats(),
+        "rate_limiter": rate_limiter.get_stats(),
+        "metadata_cache": metadata_cache.get_stats(),
+        "request_metrics": request_metrics.get_summary(),
+        "artifact_transfers": artifact_transfer.get_stats()
     }
     _logger.info("\nImport report:")
     _logger.info(f"{json.dumps(dct,indent=2)}\n")
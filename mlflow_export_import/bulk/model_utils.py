@@ -1,8 +1,10 @@
+import re
 import mlflow
 
 from mlflow_export_import.common import utils
 from mlflow_export_import.bulk import bulk_utils
 from mlflow_export_import.common.iterators import SearchModelVersionsIterator
+from mlflow_export_import.common import run_resolver
 
 _logger = utils.getLogger(__name__)
 
@@ -13,23 +15,40 @@ def get_experiments_runs_of_models(client, model_names, show_experiments=False,
     _logger.info(f"{len(model_names)} Models:")
     for model_name in model_names:
         _logger.info(f"  {model_name}")
+    versions = [ (model_name, vr) for model_name in model_names
+        for vr in SearchModelVersionsIterator(client, filter=f"name='{model_name}'") ]
+    run_experiment_ids = { vr.run_id: _get_source_experiment_id(vr) for _, vr in versions }
+    runs, errors = run_resolver.get_runs(client, [ vr.run_id for _, vr in versions ], run_experiment_ids=run_experiment_ids)
     exps_and_runs = {}
-    for model_name in model_names:
-        versions = SearchModelVersionsIterator(client, filter=f"name='{model_name}'")
-        for vr in versions:
-            try:
-                run = client.get_run(vr.run_id)
-                exps_and_runs.setdefault(run.info.experiment_id,[]).append(run.info.run_id)
-            except mlflow.exceptions.MlflowException as e:
-                if e.error_code == "RESOURCE_DOES_NOT_EXIST":
-                    _logger.warning(f"run '{vr.run_id}' of version {vr.version} of model '{model_name}' does not exist")
-                else:
-                    _logger.warning(f"run '{vr.run_id}' of version {vr.version} of model '{model_name}': Error.code: {e.error_code}. Error.message: {e.message}")
+    for model_name, vr in versions:
+        run = runs.get(vr.run_id)
+        if run:
+            exps_and_runs.setdefault(run.info.experiment_id,[]).append(run.info.run_id)
+            continue
+        e = errors.get(vr.run_id)
+        if isinstance(e, mlflow.exceptions.MlflowException):
+            if e.error_code == "RESOURCE_DOES_NOT_EXIST":
+                _logger.warning(f"run '{vr.run_id}' of version {vr.version} of model '{model_name}' does not exist")
+            else:
+                _logger.warning(f"run '{vr.run_id}' of version {vr.version} of model '{model_name}': Error.code: {e.error_code}. Error.message: {e.message}")
+        elif e is not None:
+            raise e
     if show_experiments:
         show_experiments_runs_of_models(exps_and_runs, show_runs)
     return exps_and_runs
 
 
+def _get_source_experiment_id(vr):
+    """
+    Return the experiment ID of a version's run as shown by its source
+    (e.g. 'mlflow-artifacts:/1/<run_id>/artifacts/model') or None.
+    """
+    if not vr.run_id or not vr.source:
+        return None
+    match = re.search(rf"/(\d+)/{re.escape(vr.run_id)}/artifacts(/|$)", vr.source)
+    return match.group(1) if match else None
+
+
 def show_experiments_runs_of_models(exps_and_runs, show_runs=False):
     _logger.info("Experiments for models:")
     for k,v in exps_and_runs.items():
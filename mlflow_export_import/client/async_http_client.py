@@ -0,0 +1,188 @@
+"""
+Asyncio HTTP client for MLflow and Databricks REST APIs.
+Requires the optional 'aiohttp' package: pip install mlflow-export-import[async].
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common import utils
+from . import http_session
+from . import rate_limiter
+from . import request_metrics
+from .http_client import resolve_host_token, mk_headers, _TIMEOUT
+
+_logger = utils.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENT_REQUESTS = 100
+
+
+class AsyncHttpClient():
+    """
+    Asyncio wrapper for HTTP calls for MLflow Databricks APIs.
+    The number of in-flight requests is bounded by a semaphore and all requests share one keep-alive connection pool.
+    Idempotent GET calls are retried per http_session.RetryPolicy and throttled calls (429) go through the
+    process-wide rate limiter (see rate_limiter).
+
+    Usage:
+        async with AsyncMlflowHttpClient(host, token) as client:
+            rsp = await client.get("runs/get", { "run_id": run_id })
+    """
+    def __init__(self, api_name, host=None, token=None,
+            max_concurrent_requests = DEFAULT_MAX_CONCURRENT_REQUESTS,
+            retry_policy = None
+        ):
+        """
+        :param api_name: Name of base API such as 'api/2.0' or 'api/2.0/mlflow'.
+        :param host: Host name of tracking server such as 'http://localhost:5000' or 'databricks://my_profile'.
+        :param token: Databricks token if using Databricks.
+        :param max_concurrent_requests: Maximum number of in-flight requests.
+        :param retry_policy: http_session.RetryPolicy for GET calls.
+        """
+        (host, token) = resolve_host_token(host, token)
+        self.host = host
+        self.api_name = api_name
+        self.api_uri = os.path.join(host, api_name)
+        self.token = token
+        self.max_concurrent_requests = max_concurrent_requests
+        self.retry_policy = retry_policy or http_session.RetryPolicy()
+        self._semaphore = None
+        self._session = None
+
+    async def __aenter__(self):
+        aiohttp = _import_aiohttp()
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        self._session = aiohttp.ClientSession(
+            connector = aiohttp.TCPConnector(limit=self.max_concurrent_requests),
+            headers = mk_headers(self.token),
+            timeout = aiohttp.ClientTimeout(total=_TIMEOUT)
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+
+    async def get(self, resource, params=None):
+        """ Executes an HTTP GET call
+        :param resource: Relative path name of resource such as runs/get
+        :param params: Dict of query parameters
+        """
+        return await self._request("GET", resource, params=_mk_query_params(params))
+
+    async def post(self, resource, data=None):
+        """ Executes an HTTP POST call
+        :param resource: Relative path name of resource such as runs/search
+        :param data: Request payload as dict
+        """
+        return await self._request("POST", resource, data=json.dumps(data) if data else None)
+
+
+    async def _request(self, method, resource, params=None, data=None):
+        if self._session is None:
+            raise MlflowExportImportException(f"{self.__class__.__name__} must be opened with 'async with'")
+        uri = self._mk_uri(resource)
+        limiter = rate_limiter.get_rate_limiter()
+        max_retries = self.retry_policy.max_retries
+        is_idempotent = method in http_session.IDEMPOTENT_METHODS
+        endpoint = request_metrics.mk_endpoint(method, self.api_name, resource)
+        bytes_sent = len(data) if data else 0
+        seconds = 0.0
+        attempt = 0
+        while True:
+            await asyncio.sleep(limiter.reserve())
+            async with self._semaphore:
+                start = time.perf_counter()
+                try:
+                    async with self._session.request(method, uri, params=params, data=data) as rsp:
+                        status, text = rsp.status, await rsp.text()
+                        retry_after = rsp.headers.get("Retry-After")
+                except (_import_aiohttp().ClientConnectionError, asyncio.TimeoutError) as e:
+                    status, text, retry_after = None, str(e), None
+                    if not is_idempotent or attempt >= max_retries:
+                        request_metrics.record(endpoint, seconds + time.perf_counter() - start, bytes_sent, 0, attempt, error=True)
+                        raise MlflowExportImportException(e, f"HTTP {method} '{uri}' failed")
+                seconds += time.perf_counter() - start
+            if rate_limiter.is_throttle_response(status, retry_after):
+                limiter.on_throttle(retry_after)
+            if status is not None and 200 <= status <= 299:
+                request_metrics.record(endpoint, seconds, bytes_sent, len(text), attempt)
+                return self._json_loads(text, method, uri, status)
+            if status is not None:
+                is_retryable = rate_limiter.is_throttled(status) or \
+                    (is_idempotent and status in self.retry_policy.status_forcelist)
+                if not is_retryable or attempt >= max_retries:
+                    request_metrics.record(endpoint, seconds, bytes_sent, len(text), attempt, error=True)
+                    msg = { "http_status_code": status, "uri": uri, "params": params, "response": text }
+                    raise MlflowExportImportException(json.dumps(msg), http_status_code=status)
+            if not rate_limiter.is_throttle_response(status, retry_after): # else paused by the rate limiter
+                await asyncio.sleep(self._backoff(attempt))
+            attempt += 1
+
+
+    def get_api_uri(self):
+        return self.api_uri
+
+    def get_token(self):
+        return self.token
+
+    def _mk_uri(self, resource):
+        return f"{self.api_uri}/{resource}"
+
+    def _backoff(self, attempt):
+        backoff = self.retry_policy.backoff_factor * (2 ** attempt)
+        return min(backoff + random.uniform(0, backoff/2), self.retry_policy.backoff_max)
+
+    def _json_loads(self, text, method, uri, status):
+        if not text:
+            return {}
+        try:
+            return json.loads(text)
+        except json.decoder.JSONDecodeError as e:
+            msg = { "uri": uri, "method": method, "exception": str(e), "response": text }
+            raise MlflowExportImportException(msg, http_status_code=status)
+
+    def __repr__(self):
+        return self.api_uri
+
+
+class AsyncDatabricksHttpClient(AsyncHttpClient):
+    """
+    Databricks API asyncio client: api/2.0
+    """
+    def __init__(self, host=None, token=None, **kwargs):
+        super().__init__("api/2.0", host, token, **kwargs)
+
+
+class AsyncMlflowHttpClient(AsyncHttpClient):
+    """
+    MLflow API asyncio client: api/2.0/mlflow
+    """
+    def __init__(self, host=None, token=None, **kwargs):
+        super().__init__("api/2.0/mlflow", host, token, **kwargs)
+
+
+def _mk_query_params(params):
+    if not params:
+        return None
+    def _fmt(v):
+        return str(v).lower() if isinstance(v, bool) else str(v)
+    return { k:_fmt(v) for k,v in params.items() if v is not None }
+
+
+def _import_aiohttp():
+    try:
+        import aiohttp
+        return aiohttp
+    except ImportError as e:
+        raise MlflowExportImportException(e,
+            "The asyncio engine requires the 'aiohttp' package. Install it with: pip install mlflow-export-import[async]")
@@ -28,14 +28,26 @@ def create_dbx_client(mlflow_client):
         return None
 
 
+def create_async_http_client(mlflow_client, max_concurrent_requests=None):
+    """
+    Create asyncio MLflow HTTP client from MlflowClient. Must be opened with 'async with'.
+    """
+    from . async_http_client import AsyncMlflowHttpClient, DEFAULT_MAX_CONCURRENT_REQUESTS
+    creds = mlflow_client._tracking_client.store.get_host_creds()
+    return AsyncMlflowHttpClient(creds.host, creds.token,
+        max_concurrent_requests = max_concurrent_requests or DEFAULT_MAX_CONCURRENT_REQUESTS)
+
+
 def create_mlflow_client():
     """
-    Create MLflowClient. If MLFLOW_TRACKING_URI is UC, then set MlflowClient.tracking_uri to the non-UC variant.
+    Create MLflowClient whose calls go through the process-wide rate limiter.
+    If MLFLOW_TRACKING_URI is UC, then set MlflowClient.tracking_uri to the non-UC variant.
     """
+    from . rate_limited_mlflow_client import RateLimitedMlflowClient
     registry_uri = mlflow.get_registry_uri()
     if registry_uri:
         tracking_uri = mlflow.get_tracking_uri()
         nonuc_tracking_uri = tracking_uri.replace("databricks-uc","databricks") # NOTE: legacy
-        return mlflow.MlflowClient(nonuc_tracking_uri, registry_uri)
+        return RateLimitedMlflowClient(nonuc_tracking_uri, registry_uri)
     else:
-        return mlflow.MlflowClient()
+        return RateLimitedMlflowClient()
@@ -1,16 +1,50 @@
 from abc import abstractmethod, ABCMeta
 import os
 import json
+import time
 import requests
 import click
 from mlflow_export_import.common import MlflowExportImportException
 from . import USER_AGENT
 from . import mlflow_auth_utils
 from . import databricks_cli_utils
+from . import http_session
+from . import rate_limiter
+from . import request_metrics
 
 _TIMEOUT = 120 # per mlflow.MlflowClient
 
 
+def resolve_host_token(host=None, token=None):
+    """
+    Resolve the host and token from an explicit host, a Databricks profile or the MLflow tracking URI.
+    :param host: Host name of tracking server such as 'http://localhost:5000' or 'databricks://my_profile'.
+    :param token: Databricks token if using Databricks.
+    :return: Tuple of host and token.
+    """
+    if host:
+        # Assume 'host' is a Databricks profile
+        if not host.startswith("http"):
+            profile = host.replace("databricks://","")
+            (host, token) = databricks_cli_utils.get_host_token_for_profile(profile)
+    else:
+        (host, token) = mlflow_auth_utils.get_mlflow_host_token()
+
+    if host is None:
+        raise MlflowExportImportException(
+            "MLflow tracking URI (MLFLOW_TRACKING_URI environment variable) is not configured correctly",
+            http_status_code=401
+        )
+    return host, token
+
+
+def mk_headers(token=None):
+    headers = { "User-Agent": USER_AGENT, "Content-Type": "application/json" }
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return headers
+
+
 class BaseHttpClient(metaclass=ABCMeta):
     """
     Base HTTP client class.
@@ -73,6 +107,7 @@ class BaseHttpClient(metaclass=ABCMeta):
 class HttpClient(BaseHttpClient):
     """
     Wrapper for HTTP calls for MLflow Databricks APIs.
+    Calls go through the process-wide pooled keep-alive session (see http_session) and rate limiter (see rate_limiter).
     """
     def __init__(self, api_name, host=None, token=None):
         """
@@ -80,28 +115,15 @@ class HttpClient(BaseHttpClient):
         :param host: Host name of tracking server such as 'http://localhost:5000' or 'databricks://my_profile'.
         :param token: Databricks token if using Databricks.
         """
-        if host:
-            # Assume 'host' is a Databricks profile
-            if not host.startswith("http"):
-                profile = host.replace("databricks://","")
-                (host, token) = databricks_cli_utils.get_host_token_for_profile(profile)
-        else:
-            (host, token) = mlflow_auth_utils.get_mlflow_host_token()
-
-        if host is None:
-            raise MlflowExportImportException(
-                "MLflow tracking URI (MLFLOW_TRACKING_URI environment variable) is not configured correctly",
-                http_status_code=401
-            )
+        (host, token) = resolve_host_token(host, token)
         self.host = host
+        self.api_name = api_name
         self.api_uri = os.path.join(host, api_name)
         self.token = token
 
 
     def _get(self, resource, params=None):
-        uri = self._mk_uri(resource)
-        rsp = requests.get(uri, headers=self._mk_headers(), data=params, timeout=_TIMEOUT)
-        return self._check_response(rsp, params)
+        return self._request("GET", resource, params)
 
 
     def get(self, resource, params=None):
@@ -114,7 +136,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _post(self, resource, data=None):
-        return self._mutator(requests.post, resource, data)
+        return self._request("POST", resource, data)
 
     def post(self, resource, data=None):
         """ Executes an HTTP POST call
@@ -126,7 +148,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _put(self, resource, data=None):
-        return self._mutator(requests.put, resource, data)
+        return self._request("PUT", resource, data)
 
     def put(self, resource, data=None):
         """ Executes an HTTP PUT call
@@ -138,7 +160,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _patch(self, resource, data=None):
-        return self._mutator(requests.patch, resource, data)
+        return self._request("PATCH", resource, data)
 
     def patch(self, resource, data=None):
         """ Executes an HTTP PATCH call
@@ -150,9 +172,7 @@ class HttpClient(BaseHttpClient):
 
 
     def _delete(self, resource):
-        uri = self._mk_uri(resource)
-        rsp = requests.delete(uri, headers=self._mk_headers(), timeout=_TIMEOUT)
-        return self._check_response(rsp)
+        return self._request("DELETE", resource)
 
     def delete(self, resource):
         """ Executes an HTTP POST call
@@ -161,10 +181,33 @@ class HttpClient(BaseHttpClient):
         return json.loads(self._delete(resource).text)
 
 
-    def _mutator(self, method, resource, data=None):
+    def _request(self, method, resource, data=None):
         uri = self._mk_uri(resource)
-        rsp = method(uri, headers=self._mk_headers(), data=data, timeout=_TIMEOUT)
-        return self._check_response(rsp)
+        session = http_session.get_session()
+        limiter = rate_limiter.get_rate_limiter()
+        max_retries = http_session.get_retry_policy().max_retries
+        endpoint = request_metrics.mk_endpoint(method, self.api_name, resource)
+        bytes_sent = len(data) if data else 0
+        seconds, retries = 0.0, 0
+        for attempt in range(max_retries+1):
+            limiter.acquire()
+            http_session.count_request()
+            start = time.perf_counter()
+            try:
+                rsp = session.request(method, uri, headers=self._mk_headers(), data=data, timeout=_TIMEOUT)
+            except requests.exceptions.RequestException:
+                request_metrics.record(endpoint, seconds + time.perf_counter() - start, bytes_sent, 0, retries + attempt, error=True)
+                raise
+            seconds += time.perf_counter() - start
+            retries += _get_num_retries(rsp)
+            retry_after = rsp.headers.get("Retry-After")
+            if rate_limiter.is_throttle_response(rsp.status_code, retry_after):
+                limiter.on_throttle(retry_after)
+            if not rate_limiter.is_throttled(rsp.status_code) or attempt >= max_retries:
+                break
+        request_metrics.record(endpoint, seconds, bytes_sent, len(rsp.content), retries + attempt,
+            error=rsp.status_code < 200 or rsp.status_code > 299)
+        return self._check_response(rsp, data if method == "GET" else None)
 
 
     def get_api_uri(self):
@@ -178,10 +221,7 @@ class HttpClient(BaseHttpClient):
         return json.dumps(data) if data else None
 
     def _mk_headers(self):
-        headers = { "User-Agent": USER_AGENT, "Content-Type": "application/json" }
-        if self.token:
-            headers["Authorization"] = f"Bearer {self.token}"
-        return headers
+        return mk_headers(self.token)
 
     def _mk_uri(self, resource):
         return f"{self.api_uri}/{resource}"
@@ -218,6 +258,12 @@ class HttpClient(BaseHttpClient):
         return self.api_uri
 
 
+def _get_num_retries(rsp):
+    """ Number of retries urllib3 made for the response (connection errors and retryable statuses). """
+    retries = getattr(rsp.raw, "retries", None)
+    return len(retries.history) if retries is not None else 0
+
+
 class DatabricksHttpClient(HttpClient):
     """
     Databricks API client: api/2.0
@@ -0,0 +1,180 @@
+"""
+Process-wide pooled keep-alive HTTP sessions shared by all HttpClient instances.
+
+HttpClient objects are created per run, per model, etc. so the connection pool lives here
+and not in the client. One HTTPAdapter (and its urllib3 pool manager) is shared by all threads,
+while each thread gets its own requests.Session mounting that adapter since a Session is not
+guaranteed to be thread-safe.
+"""
+
+import os
+import threading
+from dataclasses import dataclass, field
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from mlflow_export_import.common import utils
+
+_logger = utils.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10 # per requests.adapters.DEFAULT_POOLSIZE
+
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "PUT", "DELETE", "OPTIONS"])
+
+
+@dataclass()
+class RetryPolicy:
+    """
+    Retry/backoff policy for idempotent HTTP calls (GET, PUT, DELETE).
+    Non-idempotent calls (POST, PATCH) are never retried since the server may have processed them.
+    Throttled calls (429) are retried for all methods by the caller through the rate limiter (see rate_limiter).
+    Default values can be overridden with MLFLOW_EXPORT_IMPORT_HTTP_* environment variables.
+    """
+    max_retries: int = field(default_factory=lambda: int(os.environ.get("MLFLOW_EXPORT_IMPORT_HTTP_MAX_RETRIES", 3)))
+    backoff_factor: float = field(default_factory=lambda: float(os.environ.get("MLFLOW_EXPORT_IMPORT_HTTP_BACKOFF_FACTOR", 0.5)))
+    backoff_max: float = field(default_factory=lambda: float(os.environ.get("MLFLOW_EXPORT_IMPORT_HTTP_BACKOFF_MAX", 60)))
+    status_forcelist: tuple = (500, 502, 503, 504)
+
+    def to_retry(self):
+        """ Convert to urllib3 Retry. """
+        kwargs = {
+            "total": self.max_retries,
+            "backoff_factor": self.backoff_factor,
+            "status_forcelist": self.status_forcelist,
+            "allowed_methods": IDEMPOTENT_METHODS,
+            "respect_retry_after_header": False, # Retry-After of throttled calls is handled by the rate limiter
+            "raise_on_status": False # return last response so HttpClient can raise MlflowExportImportException
+        }
+        try:
+            return Retry(backoff_max=self.backoff_max, **kwargs)
+        except TypeError: # urllib3 < 2.0 has no 'backoff_max' argument
+            return Retry(**kwargs)
+
+
+class _SessionPool:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pool_size = DEFAULT_POOL_SIZE
+        self._retry_policy = RetryPolicy()
+        self._adapter = None
+        self._generation = 0 # bumped when the adapter is rebuilt so that thread sessions are remounted
+        self._retired_requests = 0 # pool requests and connections of the replaced adapters
+        self._retired_connections = 0
+        self._num_requests = 0
+
+    def configure(self, pool_size=None, retry_policy=None):
+        """
+        :param pool_size: Maximum number of keep-alive connections per host. Never shrinks.
+        :param retry_policy: RetryPolicy for idempotent calls.
+        """
+        with self._lock:
+            changed = False
+            if pool_size and pool_size > self._pool_size:
+                self._pool_size = pool_size
+                changed = True
+            if retry_policy and retry_policy != self._retry_policy:
+                self._retry_policy = retry_policy
+                changed = True
+            if changed and self._adapter:
+                self._retire_adapter(self._adapter)
+                self._adapter = None
+                self._generation += 1
+            _logger.debug(f"HTTP session pool: pool_size={self._pool_size} retry_policy={self._retry_policy}")
+
+    def get_session(self):
+        """ Return the calling thread's session mounted with the shared pooled adapter. """
+        local = self._local
+        if getattr(local, "generation", None) != self._generation or local.session is None:
+            adapter = self._get_adapter()
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            local.session = session
+            local.generation = self._generation
+        return local.session
+
+    def get_retry_policy(self):
+        return self._retry_policy
+
+    def count_request(self):
+        with self._lock:
+            self._num_requests += 1
+
+    def get_stats(self):
+        """
+        Return connection reuse statistics.
+        'new_connections' is the number of TCP/TLS connections opened and 'reused_connections'
+        the number of requests (including urllib3 retries) served by an existing keep-alive connection.
+        """
+        with self._lock:
+            pool_requests, new_connections = _count_requests(self._adapter) if self._adapter else (0, 0)
+            pool_requests += self._retired_requests
+            new_connections += self._retired_connections
+            return {
+                "pool_size": self._pool_size,
+                "requests": self._num_requests,
+                "new_connections": new_connections,
+                "reused_connections": max(pool_requests - new_connections, 0)
+            }
+
+    def _retire_adapter(self, adapter):
+        """
+        Keep the statistics of a replaced adapter and close it. Connections still used by in-flight
+        requests are closed by urllib3 when they are released instead of going back to the closed pool.
+        """
+        pool_requests, new_connections = _count_requests(adapter)
+        self._retired_requests += pool_requests
+        self._retired_connections += new_connections
+        adapter.close()
+
+    def _get_adapter(self):
+        with self._lock:
+            if self._adapter is None:
+                self._adapter = HTTPAdapter(
+                    pool_connections = self._pool_size,
+                    pool_maxsize = self._pool_size,
+                    max_retries = self._retry_policy.to_retry()
+                )
+            return self._adapter
+
+
+def _count_requests(adapter):
+    """ Return the number of requests and of new connections of the pools of an adapter. """
+    pool_requests, new_connections = 0, 0
+    pools = adapter.poolmanager.pools
+    for key in list(pools.keys()):
+        pool = pools.get(key)
+        if pool:
+            pool_requests += pool.num_requests
+            new_connections += pool.num_connections
+    return pool_requests, new_connections
+
+
+_session_pool = _SessionPool()
+
+
+def configure(pool_size=None, retry_policy=None):
+    """
+    Configure the process-wide session pool.
+    :param pool_size: Pool size - typically the number of worker threads (see utils.get_threads()).
+    :param retry_policy: RetryPolicy for idempotent calls.
+    """
+    _session_pool.configure(pool_size, retry_policy)
+
+
+def get_session():
+    return _session_pool.get_session()
+
+
+def get_retry_policy():
+    return _session_pool.get_retry_policy()
+
+
+def count_request():
+    _session_pool.count_request()
+
+
+def get_stats():
+    return _session_pool.get_stats()
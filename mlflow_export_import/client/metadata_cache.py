@@ -0,0 +1,205 @@
+"""
+Process-wide LRU/TTL cache for idempotent MLflow metadata reads (experiments, runs, registered models and model versions).
+
+Concurrent threads asking for the same key share one in-flight request (single-flight).
+Keys include the client's tracking (or registry) URI so that source and destination servers never collide.
+None results and exceptions are never cached. Cached entities are shared between threads and must not be mutated.
+Callers that modify an entity through the client should call the matching invalidate function.
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+
+from mlflow_export_import.common import utils
+
+_logger = utils.getLogger(__name__)
+
+
+class _InFlight:
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.exception = None
+
+
+class MetadataCache:
+    """
+    Thread-safe bounded LRU cache whose entries expire after a TTL.
+    """
+    def __init__(self, max_size=None, ttl=None):
+        """
+        :param max_size: Maximum number of entries. 0 disables the cache.
+        :param ttl: Seconds an entry stays valid.
+        """
+        self.max_size = max_size if max_size is not None else int(os.environ.get("MLFLOW_EXPORT_IMPORT_CACHE_SIZE", 10000))
+        self.ttl = ttl if ttl is not None else float(os.environ.get("MLFLOW_EXPORT_IMPORT_CACHE_TTL", 300))
+        self._lock = threading.Lock()
+        self._entries = OrderedDict() # key => (expiration_time, value)
+        self._in_flight = {}
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    def get(self, key, loader):
+        """
+        Return the cached value for key or load it with loader().
+        If another thread is already loading the key, wait for its result instead of calling loader().
+        """
+        if self.max_size <= 0:
+            return loader()
+        is_owner = False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            in_flight = self._in_flight.get(key)
+            if in_flight:
+                self._coalesced += 1
+            else:
+                self._misses += 1
+                in_flight = self._in_flight[key] = _InFlight()
+                is_owner = True
+        if not is_owner:
+            in_flight.event.wait()
+            if in_flight.exception:
+                raise in_flight.exception
+            return in_flight.value
+        try:
+            in_flight.value = loader()
+            return in_flight.value
+        except Exception as e:
+            in_flight.exception = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+                if in_flight.exception is None and in_flight.value is not None:
+                    self._put(key, in_flight.value)
+            in_flight.event.set()
+
+    def peek(self, key):
+        """ Return the cached value for key or None without loading it. """
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            return None
+
+    def put(self, key, value):
+        """ Add a value loaded by other means such as a batched search. """
+        if self.max_size <= 0 or value is None:
+            return
+        with self._lock:
+            self._put(key, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "hit_ratio": round((self._hits + self._coalesced) / lookups, 3) if lookups else None
+            }
+
+    def _put(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+
+_cache = MetadataCache()
+
+
+def configure(max_size=None, ttl=None):
+    """
+    Replace the process-wide cache.
+    :param max_size: Maximum number of entries. 0 disables the cache.
+    :param ttl: Seconds an entry stays valid.
+    """
+    global _cache
+    _cache = MetadataCache(max_size, ttl)
+
+
+def get_stats():
+    return _cache.get_stats()
+
+
+# == Cached reads
+
+def get_experiment(mlflow_client, experiment_id):
+    return _cache.get(_mk_key(mlflow_client, "experiment", experiment_id),
+        lambda: mlflow_client.get_experiment(experiment_id))
+
+
+def get_run(mlflow_client, run_id):
+    return _cache.get(_mk_key(mlflow_client, "run", run_id),
+        lambda: mlflow_client.get_run(run_id))
+
+
+def get_registered_model(mlflow_client, model_name):
+    return _cache.get(_mk_registry_key(mlflow_client, "registered_model", model_name),
+        lambda: mlflow_client.get_registered_model(model_name))
+
+
+def get_model_version(mlflow_client, model_name, version):
+    return _cache.get(_mk_registry_key(mlflow_client, "model_version", model_name, str(version)),
+        lambda: mlflow_client.get_model_version(model_name, version))
+
+
+def get_cached_run(mlflow_client, run_id):
+    """ Return the cached run or None. Never calls the server. """
+    return _cache.peek(_mk_key(mlflow_client, "run", run_id))
+
+
+def put_run(mlflow_client, run):
+    _cache.put(_mk_key(mlflow_client, "run", run.info.run_id), run)
+
+
+# == Invalidation
+
+def invalidate_experiment(mlflow_client, experiment_id):
+    _cache.invalidate(_mk_key(mlflow_client, "experiment", experiment_id))
+
+
+def invalidate_run(mlflow_client, run_id):
+    _cache.invalidate(_mk_key(mlflow_client, "run", run_id))
+
+
+def invalidate_registered_model(mlflow_client, model_name):
+    _cache.invalidate(_mk_registry_key(mlflow_client, "registered_model", model_name))
+
+
+def invalidate_model_version(mlflow_client, model_name, version):
+    _cache.invalidate(_mk_registry_key(mlflow_client, "model_version", model_name, str(version)))
+
+
+def _mk_key(mlflow_client, kind, *args):
+    return (kind, getattr(mlflow_client, "tracking_uri", None), *args)
+
+
+def _mk_registry_key(mlflow_client, kind, *args):
+    return (kind, getattr(mlflow_client, "_registry_uri", None), *args)
@@ -0,0 +1,117 @@
+"""
+MlflowClient whose public calls go through the process-wide rate limiter
+and are recorded by the per-endpoint request metrics (see request_metrics).
+"""
+
+import os
+import re
+import time
+import threading
+import mlflow
+from mlflow.environment_variables import MLFLOW_HTTP_REQUEST_MAX_RETRIES
+from mlflow.exceptions import MlflowException, RestException
+
+from mlflow_export_import.common import utils
+from . import rate_limiter
+from . import http_session
+from . import request_metrics
+
+_logger = utils.getLogger(__name__)
+
+_local = threading.local()
+
+
+class RateLimitedMlflowClient(mlflow.MlflowClient):
+    """
+    Each public method call first takes a token from the shared rate limiter.
+    MLflow's own HTTP retries are turned off by default (MLFLOW_HTTP_REQUEST_MAX_RETRIES=0, unless set) so that
+    a call rejected by the server with 429 reaches the shared limiter at once and makes all workers back off.
+    Throttled calls, and calls failing with a connection error or a RetryPolicy.status_forcelist response,
+    are retried up to RetryPolicy.max_retries times.
+    Calls made from within another public method (e.g. MlflowClient.search_runs calling its tracking client)
+    are not limited a second time.
+    """
+    def __init__(self, *args, **kwargs):
+        os.environ.setdefault(MLFLOW_HTTP_REQUEST_MAX_RETRIES.name, "0")
+        super().__init__(*args, **kwargs)
+
+    def __getattribute__(self, name):
+        attr = super().__getattribute__(name)
+        if name.startswith("_") or not callable(attr):
+            return attr
+        wrapped = super().__getattribute__("__dict__").setdefault("_wrapped_methods", {})
+        cached = wrapped.get(name)
+        if cached is None or cached[0] != attr: # the method may have been replaced on the instance
+            cached = (attr, _rate_limited(attr))
+            wrapped[name] = cached
+        return cached[1]
+
+
+def _rate_limited(method):
+    def wrapper(*args, **kwargs):
+        if getattr(_local, "depth", 0) > 0:
+            return method(*args, **kwargs)
+        limiter = rate_limiter.get_rate_limiter()
+        retry_policy = http_session.get_retry_policy()
+        endpoint = f"MlflowClient.{method.__name__}"
+        seconds, error, attempt = 0.0, False, 0
+        _local.depth = 1
+        try:
+            for attempt in range(retry_policy.max_retries+1):
+                limiter.acquire()
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                except MlflowException as e:
+                    throttled = is_throttle_exception(e)
+                    if not (throttled or is_transient_exception(e, retry_policy)) or attempt >= retry_policy.max_retries:
+                        error = True
+                        raise
+                    _logger.warning(f"Retrying MlflowClient.{method.__name__} (attempt {attempt+1}): {e.message}")
+                    if throttled:
+                        limiter.on_throttle()
+                    else:
+                        time.sleep(min(retry_policy.backoff_factor * 2 ** attempt, retry_policy.backoff_max))
+                except Exception:
+                    error = True
+                    raise
+                finally:
+                    seconds += time.perf_counter() - start
+        finally:
+            _local.depth = 0
+            request_metrics.record(endpoint, seconds, retries=attempt, error=error)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def is_throttle_exception(e):
+    """
+    Whether the MLflow exception is due to server throttling.
+    MLflow raises a RestException for a 429 response or an MlflowException
+    with urllib3's 'too many 429 error responses' message when its own retries are exhausted.
+    """
+    if isinstance(e, RestException):
+        return e.error_code == rate_limiter.THROTTLE_ERROR_CODE or e.get_http_status_code() == rate_limiter.THROTTLE_STATUS_CODE
+    return f"too many {rate_limiter.THROTTLE_STATUS_CODE} error responses" in str(e)
+
+
+def is_transient_exception(e, retry_policy):
+    """
+    Whether the MLflow exception is due to a connection error or a transient server error.
+    MLflow raises a RestException for a JSON error response, or an MlflowException whose message is
+    'API request to ... failed with (timeout) exception' for a connection error or timeout,
+    '... failed with error code 503 != 200' for a non-JSON error response
+    or urllib3's 'too many 503 error responses' when its own retries are exhausted.
+    """
+    if isinstance(e, RestException):
+        return e.get_http_status_code() in retry_policy.status_forcelist
+    message = str(e)
+    if _CONNECTION_ERROR_PATTERN.search(message):
+        return True
+    match = _STATUS_PATTERN.search(message)
+    return match is not None and int(match.group(1) or match.group(2)) in retry_policy.status_forcelist
+
+
+_CONNECTION_ERROR_PATTERN = re.compile(r"^API request to \S+ failed with (timeout )?exception")
+_STATUS_PATTERN = re.compile(r"failed with error code (\d+) != 200|too many (\d+) error responses")
@@ -0,0 +1,178 @@
+"""
+Process-wide, server-aware rate limiter shared by all worker threads.
+
+Every HttpClient call and every call of a RateLimitedMlflowClient (see client_utils.create_mlflow_client)
+first takes a token from one shared token bucket. When the server throttles a call (HTTP 429, or 503
+with a Retry-After header) all workers pause for the Retry-After interval and the rate is cut in half (at most
+once per second so that a burst of 429s from concurrent workers counts as one throttle).
+The rate then ramps back up linearly.
+
+If no maximum rate is configured the limiter is transparent until the first throttle.
+Its rate is then seeded from the observed request rate and it becomes transparent again once the
+rate has ramped up to twice that value.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+from mlflow_export_import.common import utils
+
+_logger = utils.getLogger(__name__)
+
+THROTTLE_STATUS_CODE = 429
+THROTTLE_ERROR_CODE = "REQUEST_LIMIT_EXCEEDED"
+
+DEFAULT_THROTTLE_PAUSE = 1.0 # seconds to pause when the server throttles without Retry-After
+_DECREASE_INTERVAL = 1.0 # minimum number of seconds between two rate decreases
+_RATE_WINDOW = 5.0 # seconds of request history used to measure the observed rate
+
+
+class RateLimiter:
+    """
+    Token bucket (implemented as a generic cell rate algorithm) with additive-increase/multiplicative-decrease
+    of the rate. Thread-safe.
+    """
+    def __init__(self, max_rate=None, min_rate=None, ramp_up=None, decrease_factor=0.5):
+        """
+        :param max_rate: Maximum requests per second. None or 0 means no limit.
+        :param min_rate: Rate floor after throttling.
+        :param ramp_up: Requests per second added to the rate for each second without throttling.
+        :param decrease_factor: Factor by which the rate is multiplied when throttled.
+        """
+        self.max_rate = max_rate if max_rate is not None else float(os.environ.get("MLFLOW_EXPORT_IMPORT_RATE_LIMIT", 0))
+        self.max_rate = self.max_rate or None
+        self.min_rate = min_rate if min_rate is not None else float(os.environ.get("MLFLOW_EXPORT_IMPORT_RATE_LIMIT_MIN", 1))
+        self.ramp_up = ramp_up if ramp_up is not None else float(os.environ.get("MLFLOW_EXPORT_IMPORT_RATE_LIMIT_RAMP_UP", 1))
+        self.decrease_factor = decrease_factor
+        self._lock = threading.Lock()
+        self._rate = self.max_rate
+        self._ceiling = self.max_rate
+        self._tat = 0.0 # theoretical arrival time of the next request
+        self._paused_until = 0.0
+        self._last_update = time.monotonic()
+        self._last_decrease = 0.0
+        self._recent = deque()
+        self._num_requests = 0
+        self._num_throttles = 0
+        self._wait_time = 0.0
+
+    def reserve(self):
+        """
+        Reserve a token without blocking.
+        :return: Number of seconds the caller must wait before sending its request.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._ramp_up(now)
+            self._num_requests += 1
+            self._recent.append(now)
+            while self._recent and self._recent[0] < now - _RATE_WINDOW:
+                self._recent.popleft()
+            start = max(now, self._paused_until)
+            if self._rate is not None:
+                interval = 1.0 / self._rate
+                burst = max(self._rate, 1.0) * interval # allow up to one second of burst
+                tat = max(self._tat, start)
+                start = max(start, tat + interval - burst)
+                self._tat = tat + interval
+            delay = start - now
+            self._wait_time += delay
+            return delay
+
+    def acquire(self):
+        """ Block until a token is available. """
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_throttle(self, retry_after=None):
+        """
+        Notify the limiter that the server throttled a request.
+        :param retry_after: Value of the Retry-After header (seconds or HTTP date) if any.
+        """
+        pause = parse_retry_after(retry_after)
+        with self._lock:
+            now = time.monotonic()
+            self._num_throttles += 1
+            self._paused_until = max(self._paused_until, now + (pause if pause is not None else DEFAULT_THROTTLE_PAUSE))
+            if now - self._last_decrease < _DECREASE_INTERVAL:
+                return
+            self._last_decrease = now
+            self._ramp_up(now)
+            if self._rate is None:
+                observed = len(self._recent) / min(_RATE_WINDOW, max(now - self._recent[0], 1.0)) if self._recent else self.min_rate
+                self._rate = observed
+                self._ceiling = 2 * observed
+            self._rate = max(self._rate * self.decrease_factor, self.min_rate)
+            self._tat = min(self._tat, now) # drop reservations made at the old rate
+            _logger.warning(f"Server is throttling requests - pausing {round(self._paused_until-now, 1)} seconds and lowering rate to {round(self._rate, 2)} requests/second")
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "max_rate": self.max_rate,
+                "rate": round(self._rate, 2) if self._rate is not None else None,
+                "requests": self._num_requests,
+                "throttles": self._num_throttles,
+                "wait_time": round(self._wait_time, 1)
+            }
+
+    def _ramp_up(self, now):
+        elapsed = now - self._last_update
+        self._last_update = now
+        if self._rate is None or now < self._paused_until:
+            return
+        self._rate += self.ramp_up * elapsed
+        if self._rate >= self._ceiling:
+            self._rate = self.max_rate # back to the configured rate or unlimited
+
+
+def parse_retry_after(retry_after):
+    """
+    :param retry_after: Retry-After header value - either seconds or an HTTP date.
+    :return: Seconds to wait or None if not set or not parsable.
+    """
+    if retry_after is None:
+        return None
+    try:
+        return max(float(retry_after), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttled(status_code):
+    return status_code == THROTTLE_STATUS_CODE
+
+
+def is_throttle_response(status_code, retry_after=None):
+    """ Whether the response asks the client to slow down: 429 or 503 with Retry-After. """
+    return is_throttled(status_code) or (status_code == 503 and retry_after is not None)
+
+
+_rate_limiter = RateLimiter()
+
+
+def configure(max_rate=None, min_rate=None, ramp_up=None):
+    """
+    Replace the process-wide rate limiter.
+    :param max_rate: Maximum requests per second. None or 0 means no limit.
+    :param min_rate: Rate floor after throttling.
+    :param ramp_up: Requests per second added to the rate for each second without throttling.
+    """
+    global _rate_limiter
+    _rate_limiter = RateLimiter(max_rate, min_rate, ramp_up)
+
+
+def get_rate_limiter():
+    return _rate_limiter
+
+
+def get_stats():
+    return _rate_limiter.get_stats()
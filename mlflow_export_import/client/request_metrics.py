@@ -0,0 +1,164 @@
+"""
+Process-wide per-endpoint request instrumentation.
+
+HttpClient, AsyncHttpClient and RateLimitedMlflowClient record every call: count, errors, retries,
+bytes sent and received and a latency histogram. Artifact downloads and uploads are recorded under
+the 'artifacts/download' and 'artifacts/upload' pseudo-endpoints.
+The summary is written to the 'info' stanza of the bulk export manifests and printed in the import report.
+"""
+
+import math
+import time
+import threading
+from contextlib import contextmanager
+
+_HISTOGRAM_BASE = 1.1 # ratio between bucket bounds - percentiles are accurate within 10%
+
+
+class _Histogram:
+    """ Log-scale latency histogram with constant memory. """
+    def __init__(self):
+        self.buckets = {}
+
+    def add(self, millis):
+        idx = int(math.log(millis, _HISTOGRAM_BASE)) if millis > 1 else 0
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+
+    def percentile(self, pct, count):
+        rank = math.ceil(count * pct / 100)
+        total = 0
+        for idx in sorted(self.buckets.keys()):
+            total += self.buckets[idx]
+            if total >= rank:
+                return round(_HISTOGRAM_BASE ** (idx + 0.5), 1) # geometric middle of the bucket
+        return None
+
+
+class _EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.total_millis = 0.0
+        self.max_millis = 0.0
+        self.histogram = _Histogram()
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency_millis": {
+                "total": round(self.total_millis),
+                "mean": round(self.total_millis / self.count, 1) if self.count else None,
+                "p50": self.histogram.percentile(50, self.count),
+                "p95": self.histogram.percentile(95, self.count),
+                "p99": self.histogram.percentile(99, self.count),
+                "max": round(self.max_millis, 1)
+            }
+        }
+
+
+class RequestMetrics:
+    """ Thread-safe registry of per-endpoint statistics. """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, bytes_sent=0, bytes_received=0, retries=0, error=False):
+        """
+        :param endpoint: Endpoint name such as 'GET api/2.0/mlflow/runs/get' or 'MlflowClient.get_run'.
+        :param seconds: Latency in seconds.
+        :param bytes_sent: Request body size.
+        :param bytes_received: Response body size.
+        :param retries: Number of retries of the call.
+        :param error: Whether the call failed.
+        """
+        millis = seconds * 1000
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None:
+                stats = self._endpoints[endpoint] = _EndpointStats()
+            stats.count += 1
+            stats.errors += 1 if error else 0
+            stats.retries += retries
+            stats.bytes_sent += bytes_sent or 0
+            stats.bytes_received += bytes_received or 0
+            stats.total_millis += millis
+            stats.max_millis = max(stats.max_millis, millis)
+            stats.histogram.add(millis)
+
+    def get_summary(self):
+        """
+        :return: Dictionary of endpoint statistics ordered by descending total latency.
+        """
+        with self._lock:
+            items = sorted(self._endpoints.items(), key=lambda x: x[1].total_millis, reverse=True)
+            return { endpoint: stats.to_dict() for endpoint, stats in items }
+
+    def reset(self):
+        with self._lock:
+            self._endpoints = {}
+
+
+class Measurement:
+    """ Mutable holder for the byte and retry counts of a measured call. """
+    def __init__(self, bytes_sent=0):
+        self.bytes_sent = bytes_sent
+        self.bytes_received = 0
+        self.retries = 0
+
+
+_metrics = RequestMetrics()
+
+
+def record(endpoint, seconds, bytes_sent=0, bytes_received=0, retries=0, error=False):
+    _metrics.record(endpoint, seconds, bytes_sent, bytes_received, retries, error)
+
+
+@contextmanager
+def measure(endpoint, bytes_sent=0):
+    """
+    Record the latency of the enclosed block. Raising an exception counts as an error.
+
+    Usage:
+        with request_metrics.measure("artifacts/download") as m:
+            ...
+            m.bytes_received = size
+    """
+    m = Measurement(bytes_sent)
+    start = time.perf_counter()
+    error = False
+    try:
+        yield m
+    except BaseException:
+        error = True
+        raise
+    finally:
+        _metrics.record(endpoint, time.perf_counter() - start, m.bytes_sent, m.bytes_received, m.retries, error)
+
+
+def get_summary():
+    return _metrics.get_summary()
+
+
+def reset():
+    _metrics.reset()
+
+
+def mk_endpoint(method, api_name, resource):
+    """
+    Build an endpoint name with IDs and names in the resource path replaced by '{id}' so that
+    for example 'permissions/experiments/123' and 'permissions/experiments/456' are one endpoint.
+    """
+    resource = resource.split("?")[0]
+    segments = [ seg if _is_word(seg) else "{id}" for seg in resource.split("/") ]
+    return f"{method} {api_name}/{'/'.join(segments)}"
+
+
+def _is_word(segment):
+    return segment.replace("-", "").replace("_", "").isalpha()
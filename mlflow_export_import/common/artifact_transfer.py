@@ -0,0 +1,393 @@
+"""
+Artifact transfer engine.
+
+Downloads an artifact tree with a concurrent tree walk feeding a bounded pool of per-file downloads.
+Each file is written to a '.part' file, verified against the listed size and then renamed. An interrupted
+export resumes per file: files already downloaded with the listed size are skipped and partly downloaded
+files are downloaded again from the start. Failed listings and files are retried individually on connection errors, timeouts and 429 or 5xx responses.
+
+Uploads a local directory with a bounded pool of per-file uploads. Files of at least
+MLFLOW_MULTIPART_UPLOAD_MINIMUM_FILE_SIZE bytes are split into parts uploaded concurrently when the
+artifact repository supports multipart uploads (S3, GCS, Azure and the 'mlflow-artifacts' proxy).
+"""
+
+import os
+import math
+import time
+import posixpath
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from requests.exceptions import HTTPError, ConnectionError as RequestsConnectionError, Timeout, RetryError
+from mlflow.environment_variables import (
+    MLFLOW_MULTIPART_UPLOAD_MINIMUM_FILE_SIZE,
+    MLFLOW_MULTIPART_UPLOAD_CHUNK_SIZE,
+    MLFLOW_HTTP_REQUEST_TIMEOUT
+)
+from mlflow.exceptions import MlflowException, _UnsupportedMultipartUploadException
+from mlflow.entities.multipart_upload import MultipartUploadPart
+from mlflow.store.artifact.artifact_repo import MultipartUploadMixin
+from mlflow.store.artifact.artifact_repository_registry import get_artifact_repository
+
+from mlflow_export_import.common import utils
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common.timestamp_utils import format_seconds
+from mlflow_export_import.client import request_metrics, http_session
+
+_logger = utils.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_MAX_RETRIES = 3
+PART_SUFFIX = ".part"
+_PROGRESS_SECONDS = 30
+_BACKOFF_SECONDS = 1
+_CONNECT_TIMEOUT_SECONDS = 10
+
+
+def get_max_workers():
+    """ Number of concurrent artifact transfers set by MLFLOW_EXPORT_IMPORT_ARTIFACT_THREADS. """
+    return int(os.environ.get("MLFLOW_EXPORT_IMPORT_ARTIFACT_THREADS", DEFAULT_MAX_WORKERS))
+
+
+def get_max_retries():
+    """ Number of retries of a failed file transfer set by MLFLOW_EXPORT_IMPORT_ARTIFACT_RETRIES. """
+    return int(os.environ.get("MLFLOW_EXPORT_IMPORT_ARTIFACT_RETRIES", DEFAULT_MAX_RETRIES))
+
+
+def get_multipart_min_size():
+    """ Minimum size of a file uploaded in parts, MLflow's MLFLOW_MULTIPART_UPLOAD_MINIMUM_FILE_SIZE. """
+    return MLFLOW_MULTIPART_UPLOAD_MINIMUM_FILE_SIZE.get()
+
+
+class TransferStats:
+    """
+    Thread-safe progress counters of an artifact transfer.
+    """
+    def __init__(self, name):
+        self.name = name
+        self.files = 0
+        self.skipped_files = 0
+        self.multipart_files = 0
+        self.bytes = 0
+        self.retries = 0
+        self.start_time = time.time()
+        self.last_log_time = self.start_time
+        self._lock = threading.Lock()
+
+    def add_file(self, num_bytes, skipped=False, multipart=False):
+        with self._lock:
+            self.files += 1
+            self.bytes += num_bytes
+            if skipped:
+                self.skipped_files += 1
+            if multipart:
+                self.multipart_files += 1
+            now = time.time()
+            if now - self.last_log_time >= _PROGRESS_SECONDS:
+                self.last_log_time = now
+                _logger.info(f"Transferring artifacts: {self.to_dict()}")
+
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    def to_dict(self):
+        duration = time.time() - self.start_time
+        return {
+            "artifacts": self.name,
+            "files": self.files,
+            "skipped_files": self.skipped_files,
+            "multipart_files": self.multipart_files,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "duration": format_seconds(duration),
+            "mb_per_second": _mb_per_second(self.bytes, duration)
+        }
+
+
+class _Totals:
+    """
+    Process-wide totals of the completed transfers of one direction for the bulk reports.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def add(self, stats):
+        with self._lock:
+            self.trees += 1
+            self.files += stats.files
+            self.skipped_files += stats.skipped_files
+            self.multipart_files += stats.multipart_files
+            self.bytes += stats.bytes
+            self.retries += stats.retries
+            self.seconds += time.time() - stats.start_time
+
+    def reset(self):
+        self.trees = 0
+        self.files = 0
+        self.skipped_files = 0
+        self.multipart_files = 0
+        self.bytes = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "trees": self.trees,
+                "files": self.files,
+                "skipped_files": self.skipped_files,
+                "multipart_files": self.multipart_files,
+                "bytes": self.bytes,
+                "retries": self.retries,
+                "seconds": round(self.seconds, 1),
+                "mb_per_second": _mb_per_second(self.bytes, self.seconds)
+            }
+
+
+_totals = { "download": _Totals(), "upload": _Totals() }
+
+
+def get_stats():
+    """
+    Return the process-wide download and upload totals. 'mb_per_second' is the average throughput
+    of a transfer: the bytes divided by the summed durations of the artifact trees.
+    """
+    return { direction: totals.to_dict() for direction, totals in _totals.items() }
+
+
+def reset_stats():
+    for totals in _totals.values():
+        with totals._lock:
+            totals.reset()
+
+
+def _mb_per_second(num_bytes, seconds):
+    return round(num_bytes / seconds / 1_000_000, 2) if seconds else None
+
+
+def download_artifacts(artifact_uri, dst_path, tracking_uri=None, max_workers=None, max_retries=None):
+    """
+    Download the artifact tree of an artifact URI into a local directory.
+
+    :param artifact_uri: Artifact URI, e.g. a run's artifact_uri or a logged model's artifact_location.
+    :param dst_path: Local destination directory. The tree's files are written directly under it.
+    :param tracking_uri: Tracking URI used to resolve 'mlflow-artifacts:' and 'runs:' URIs.
+    :param max_workers: Number of concurrent listings and downloads. Default is MLFLOW_EXPORT_IMPORT_ARTIFACT_THREADS or 8.
+    :param max_retries: Number of retries of a failed file. Default is MLFLOW_EXPORT_IMPORT_ARTIFACT_RETRIES or 3.
+    :return: TransferStats.
+    """
+    repo = get_artifact_repository(artifact_uri, tracking_uri=tracking_uri)
+    max_workers = max_workers or get_max_workers()
+    max_retries = get_max_retries() if max_retries is None else max_retries
+    stats = TransferStats(artifact_uri)
+    os.makedirs(dst_path, exist_ok=True)
+
+    with request_metrics.measure("artifacts/download") as m:
+        try:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list_artifacts = lambda path: _with_retries(lambda: repo.list_artifacts(path), path or ".", max_retries, stats)
+                listings = { executor.submit(list_artifacts, None) }
+                downloads = set()
+                while listings:
+                    done, listings = wait(listings, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        for file_info in future.result():
+                            if file_info.is_dir:
+                                os.makedirs(_mk_local_path(dst_path, file_info.path), exist_ok=True)
+                                listings.add(executor.submit(list_artifacts, file_info.path))
+                            else:
+                                downloads.add(executor.submit(_download_file, repo, file_info, dst_path, max_retries, stats))
+                for future in downloads:
+                    future.result()
+        finally:
+            m.bytes_received = stats.bytes
+            m.retries = stats.retries
+            _totals["download"].add(stats)
+    _logger.info(f"Downloaded artifacts: {stats.to_dict()}")
+    return stats
+
+
+def _download_file(repo, file_info, dst_path, max_retries, stats):
+    local_path = _mk_local_path(dst_path, file_info.path)
+    expected_size = file_info.file_size
+    if expected_size is not None and os.path.isfile(local_path) and os.path.getsize(local_path) == expected_size:
+        stats.add_file(expected_size, skipped=True)
+        return
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    part_path = local_path + PART_SUFFIX
+
+    def download():
+        repo._download_file(file_info.path, part_path)
+        size = os.path.getsize(part_path)
+        if expected_size is not None and size != expected_size:
+            raise _IncompleteDownloadException(
+                f"Downloaded artifact '{file_info.path}' has {size} bytes but {expected_size} bytes were listed")
+        os.replace(part_path, local_path)
+        return size
+
+    stats.add_file(_with_retries(download, file_info.path, max_retries, stats))
+
+
+def upload_artifacts(local_dir, artifact_uri, tracking_uri=None, max_workers=None, max_retries=None, replacements=None):
+    """
+    Upload the files of a local directory to an artifact URI.
+
+    :param local_dir: Local directory. Its files are uploaded directly under artifact_uri.
+    :param artifact_uri: Artifact URI, e.g. a run's artifact_uri or a logged model's artifact_location.
+    :param tracking_uri: Tracking URI used to resolve 'mlflow-artifacts:' and 'runs:' URIs.
+    :param replacements: Dict of file path relative to local_dir (with '/' separators) to a local file with the
+                         same name uploaded in its place, e.g. patched copies of files that must not be modified.
+    :param max_workers: Number of concurrent file uploads and of concurrent parts of multipart uploads.
+                        Default is MLFLOW_EXPORT_IMPORT_ARTIFACT_THREADS or 8.
+    :param max_retries: Number of retries of a failed file or part. Default is MLFLOW_EXPORT_IMPORT_ARTIFACT_RETRIES or 3.
+    :return: TransferStats.
+    """
+    repo = get_artifact_repository(artifact_uri, tracking_uri=tracking_uri)
+    max_workers = max_workers or get_max_workers()
+    max_retries = get_max_retries() if max_retries is None else max_retries
+    stats = TransferStats(artifact_uri)
+
+    with request_metrics.measure("artifacts/upload") as m:
+        try:
+            # parts get their own pool since a file upload waits for its parts
+            with ThreadPoolExecutor(max_workers=max_workers) as executor, \
+                    ThreadPoolExecutor(max_workers=max_workers) as part_executor:
+                uploader = _Uploader(repo, max_retries, stats, part_executor)
+                futures = []
+                for dir, _, names in os.walk(local_dir):
+                    rel_dir = os.path.relpath(dir, local_dir)
+                    artifact_dir = None if rel_dir == "." else posixpath.join(*rel_dir.split(os.sep))
+                    for name in names:
+                        local_file = os.path.join(dir, name)
+                        if replacements:
+                            local_file = replacements.get(posixpath.join(artifact_dir or "", name), local_file)
+                        futures.append(executor.submit(uploader.upload_file, local_file, artifact_dir))
+                for future in futures:
+                    future.result()
+        finally:
+            m.bytes_sent = stats.bytes
+            m.retries = stats.retries
+            _totals["upload"].add(stats)
+    _logger.info(f"Uploaded artifacts: {stats.to_dict()}")
+    return stats
+
+
+class _Uploader:
+    """
+    Per-file uploads of an artifact tree. Remembers when the repository rejects multipart uploads
+    so that the other large files go straight to single uploads.
+    """
+    def __init__(self, repo, max_retries, stats, part_executor):
+        self.repo = repo
+        self.max_retries = max_retries
+        self.stats = stats
+        self.part_executor = part_executor
+        self.multipart_supported = isinstance(repo, MultipartUploadMixin)
+
+    def upload_file(self, local_file, artifact_dir):
+        size = os.path.getsize(local_file)
+        path = posixpath.join(artifact_dir or "", os.path.basename(local_file))
+        if self.multipart_supported and size >= get_multipart_min_size():
+            try:
+                self._upload_multipart(local_file, artifact_dir, path, size)
+                self.stats.add_file(size, multipart=True)
+                return
+            except _UnsupportedMultipartUploadException:
+                self.multipart_supported = False
+                _logger.info(f"Artifact repository does not support multipart uploads. Uploading '{path}' in one piece.")
+        _with_retries(lambda: self.repo.log_artifact(local_file, artifact_dir), path, self.max_retries, self.stats)
+        self.stats.add_file(size)
+
+    def _upload_multipart(self, local_file, artifact_dir, path, size):
+        chunk_size = MLFLOW_MULTIPART_UPLOAD_CHUNK_SIZE.get()
+        num_parts = max(math.ceil(size / chunk_size), 1)
+        create = self._create_multipart_upload(local_file, num_parts, artifact_dir, path)
+        try:
+            futures = [ self.part_executor.submit(_with_retries,
+                    lambda cred=cred, idx=idx: _upload_part(cred, local_file, chunk_size * idx, chunk_size),
+                    f"{path} (part {cred.part_number})", self.max_retries, self.stats)
+                for idx, cred in enumerate(create.credentials) ]
+            parts = sorted([ f.result() for f in futures ], key=lambda part: part.part_number)
+            _with_retries(lambda: self.repo.complete_multipart_upload(local_file, create.upload_id, parts, artifact_dir),
+                path, self.max_retries, self.stats)
+        except Exception:
+            try:
+                self.repo.abort_multipart_upload(local_file, create.upload_id, artifact_dir)
+            except Exception as e:
+                _logger.warning(f"Cannot abort multipart upload of artifact '{path}': {e}")
+            raise
+
+    def _create_multipart_upload(self, local_file, num_parts, artifact_dir, path):
+        def create():
+            try:
+                return self.repo.create_multipart_upload(local_file, num_parts, artifact_dir)
+            except HTTPError as e:
+                if _is_unsupported_multipart_error(e):
+                    raise _UnsupportedMultipartUploadException()
+                raise
+        try:
+            return _with_retries(create, path, self.max_retries, self.stats)
+        except NotImplementedError:
+            raise _UnsupportedMultipartUploadException()
+
+
+def _upload_part(credential, local_file, start_byte, size):
+    with open(local_file, "rb") as f:
+        f.seek(start_byte)
+        data = f.read(size)
+    rsp = http_session.get_session().put(credential.url, data=data, headers=credential.headers,
+        timeout=(_CONNECT_TIMEOUT_SECONDS, MLFLOW_HTTP_REQUEST_TIMEOUT.get()))
+    rsp.raise_for_status()
+    return MultipartUploadPart(part_number=credential.part_number, etag=rsp.headers.get("ETag", ""), url=credential.url)
+
+
+def _is_unsupported_multipart_error(e):
+    try:
+        message = e.response.json().get("message", "")
+    except Exception:
+        return False
+    return isinstance(message, str) and message.startswith(_UnsupportedMultipartUploadException.MESSAGE)
+
+
+def _with_retries(func, path, max_retries, stats):
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt == max_retries or not _is_retryable(e):
+                raise
+            stats.add_retry()
+            _logger.warning(f"Retrying artifact '{path}' after attempt {attempt+1}/{max_retries+1} failed: {e}")
+            time.sleep(min(_BACKOFF_SECONDS * 2 ** attempt, 30))
+
+
+def _is_retryable(e):
+    """ Connection errors, timeouts, 429 and 5xx responses and incomplete downloads are transient. """
+    if isinstance(e, (RequestsConnectionError, Timeout, RetryError, ConnectionError, TimeoutError, _IncompleteDownloadException)):
+        return True
+    if isinstance(e, _UnsupportedMultipartUploadException):
+        return False
+    if isinstance(e, HTTPError):
+        status = e.response.status_code if e.response is not None else None
+    elif isinstance(e, MlflowException):
+        status = e.get_http_status_code()
+    else:
+        return False
+    return status is not None and (status == 429 or status >= 500)
+
+
+class _IncompleteDownloadException(MlflowExportImportException):
+    pass
+
+
+def mk_dst_path(output_dir, artifact_uri):
+    """
+    Return the destination directory of an artifact URI under output_dir named after the URI's last path segment,
+    the layout of mlflow.artifacts.download_artifacts(artifact_uri=..., dst_path=output_dir).
+    """
+    return os.path.join(output_dir, posixpath.basename(artifact_uri.rstrip("/")))
+
+
+def _mk_local_path(dst_path, artifact_path):
+    return os.path.join(dst_path, *artifact_path.split("/"))
@@ -0,0 +1,224 @@
+"""
+Content-addressed artifact store of an export tree.
+
+With deduplication enabled, artifact files are stored once under '<output_dir>/blobs/sha256/<ab>/<sha256>' and each
+exported run, logged model or model version 'cached' model gets an 'artifacts.json' manifest mapping its artifact
+paths to blob hashes instead of an 'artifacts' directory. A run exported twice (e.g. under 'models' and 'experiments')
+reuses the manifest of its first export without downloading its artifacts again.
+
+Importers call local_artifacts() which yields a local directory with the artifacts of either layout.
+"""
+
+import os
+import uuid
+import shutil
+import hashlib
+import posixpath
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import filesystem as _fs
+from mlflow_export_import.common import artifact_transfer
+from mlflow_export_import.common import MlflowExportImportException
+
+_logger = utils.getLogger(__name__)
+
+BLOBS_DIR = "blobs"
+MANIFEST_FILE = "artifacts.json"
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+class BlobStore:
+    """
+    Thread-safe content-addressed blob store rooted at an export directory.
+    """
+    def __init__(self, root):
+        """
+        :param root: Export output directory. Blobs are written under its 'blobs' subdirectory.
+        """
+        self.root = _fs.mk_local_path(root)
+        self.blobs_dir = os.path.join(self.root, BLOBS_DIR)
+        self._lock = threading.Lock()
+        self._manifests = {} # artifact_uri => files of its manifest
+        self._stats = { "blobs": 0, "blob_bytes": 0, "duplicate_files": 0, "duplicate_bytes": 0,
+            "reused_manifests": 0, "reused_bytes": 0 }
+
+    def mk_blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, "sha256", sha256[:2], sha256)
+
+    def export_artifacts(self, artifact_uri, manifest_dir, tracking_uri=None, reuse=True):
+        """
+        Download the artifact tree of an artifact URI into the store and write its manifest.
+
+        :param artifact_uri: Artifact URI, e.g. a run's artifact_uri or a logged model's artifact_location.
+        :param manifest_dir: Directory of the 'artifacts.json' manifest, e.g. the run's export directory.
+        :param tracking_uri: Tracking URI used to resolve 'mlflow-artifacts:' and 'runs:' URIs.
+        :param reuse: Reuse the manifest of an earlier export of the same artifact URI. Do not set for
+                      artifact URIs whose content can still change such as those of active runs.
+        """
+        with self._lock:
+            files = self._manifests.get(artifact_uri) if reuse else None
+            if files is not None:
+                self._stats["reused_manifests"] += 1
+                self._stats["reused_bytes"] += sum(f["size"] for f in files)
+        if files is None:
+            staging_dir = self._mk_tmp_dir()
+            try:
+                artifact_transfer.download_artifacts(artifact_uri, staging_dir, tracking_uri=tracking_uri)
+                files = self._add_files(staging_dir)
+            finally:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+            with self._lock:
+                self._manifests[artifact_uri] = files
+        self._write_manifest(manifest_dir, artifact_uri, files)
+
+    def ingest(self, local_dir, artifact_uri=None):
+        """
+        Move the files of a local directory into the store and replace them with a manifest in local_dir.
+        """
+        local_dir = _fs.mk_local_path(local_dir)
+        files = self._add_files(local_dir)
+        for dir, dirs, _ in os.walk(local_dir, topdown=False):
+            for name in dirs:
+                path = os.path.join(dir, name)
+                if not os.listdir(path):
+                    os.rmdir(path)
+        self._write_manifest(local_dir, artifact_uri, files)
+
+    def get_stats(self):
+        with self._lock:
+            return { "root": self.root, **self._stats }
+
+    def _add_files(self, local_dir):
+        files = []
+        for dir, _, names in os.walk(local_dir):
+            for name in sorted(names):
+                path = os.path.join(dir, name)
+                files.append(self._add_file(path, posixpath.join(*os.path.relpath(path, local_dir).split(os.sep))))
+        return sorted(files, key=lambda f: f["path"])
+
+    def _add_file(self, local_file, artifact_path):
+        sha256 = _hash_file(local_file)
+        size = os.path.getsize(local_file)
+        blob_path = self.mk_blob_path(sha256)
+        with self._lock:
+            is_new = not os.path.exists(blob_path)
+            if is_new:
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                os.replace(local_file, blob_path)
+                self._stats["blobs"] += 1
+                self._stats["blob_bytes"] += size
+            else:
+                self._stats["duplicate_files"] += 1
+                self._stats["duplicate_bytes"] += size
+        if not is_new:
+            os.remove(local_file)
+        return { "path": artifact_path, "sha256": sha256, "size": size }
+
+    def _write_manifest(self, manifest_dir, artifact_uri, files):
+        manifest_dir = _fs.mk_local_path(manifest_dir)
+        os.makedirs(manifest_dir, exist_ok=True)
+        mlflow_attr = {
+            "blob_store": posixpath.join(*os.path.relpath(self.root, manifest_dir).split(os.sep)),
+            "artifact_uri": artifact_uri,
+            "files": files
+        }
+        io_utils.write_export_file(manifest_dir, MANIFEST_FILE, __file__, mlflow_attr)
+
+    def _mk_tmp_dir(self):
+        tmp_dir = os.path.join(self.blobs_dir, "tmp")
+        os.makedirs(tmp_dir, exist_ok=True)
+        return tempfile.mkdtemp(dir=tmp_dir, prefix=uuid.uuid4().hex[:8])
+
+
+def _hash_file(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+# == Process-wide store of the running export
+
+_store = utils.ProcessWide()
+
+
+def activate(output_dir, enabled=True):
+    """
+    Deduplicate the artifacts exported in the enclosed block into a store rooted at output_dir (see utils.ProcessWide).
+
+    :param output_dir: Export output directory.
+    :param enabled: If false, no store is created and the block runs with the current store if any.
+    :return: The active BlobStore or None.
+    """
+    create = (lambda: BlobStore(output_dir)) if enabled else None
+    return _store.activate(create, _close)
+
+
+def _close(store):
+    shutil.rmtree(os.path.join(store.blobs_dir, "tmp"), ignore_errors=True)
+    _logger.info(f"Deduplicated artifacts: {store.get_stats()}")
+
+
+def get_store():
+    """ Return the active BlobStore or None if artifacts are not deduplicated. """
+    return _store.get()
+
+
+# == Import
+
+@contextmanager
+def local_artifacts(input_dir, artifacts_dir="artifacts"):
+    """
+    Yield the local directory of the artifacts of an exported run, logged model or model version, or None if
+    there are none. With an 'artifacts.json' manifest the files are resolved from the blob store and hard linked
+    (copied if links are not supported) into a temporary directory together with the files of artifacts_dir.
+    The yielded files may be links to the blobs and must not be modified in place.
+
+    :param input_dir: Export directory of the run, logged model or model version.
+    :param artifacts_dir: Artifacts subdirectory of input_dir of the plain layout.
+    """
+    input_dir = _fs.mk_local_path(input_dir)
+    path = os.path.join(input_dir, artifacts_dir)
+    manifest_path = os.path.join(input_dir, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        yield path if os.path.exists(path) else None
+        return
+    manifest = io_utils.read_file_mlflow(manifest_path)
+    root = os.path.normpath(os.path.join(input_dir, *manifest["blob_store"].split("/")))
+    store = BlobStore(root)
+    tmp_dir = _mk_local_tmp_dir(store)
+    try:
+        for file in manifest["files"]:
+            blob_path = store.mk_blob_path(file["sha256"])
+            if not os.path.exists(blob_path):
+                raise MlflowExportImportException(
+                    f"Blob '{blob_path}' of artifact '{file['path']}' in '{manifest_path}' does not exist", http_status_code=404)
+            _link(blob_path, os.path.join(tmp_dir, *file["path"].split("/")))
+        if os.path.exists(path): # e.g. Databricks notebooks exported next to the manifest
+            for dir, _, names in os.walk(path):
+                for name in names:
+                    src = os.path.join(dir, name)
+                    _link(src, os.path.join(tmp_dir, os.path.relpath(src, path)))
+        yield tmp_dir
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _mk_local_tmp_dir(store):
+    """ Create the temporary directory next to the blobs so that they can be hard linked. """
+    try:
+        return store._mk_tmp_dir()
+    except OSError: # read-only export tree
+        return tempfile.mkdtemp()
+
+
+def _link(src, dst):
+    os.makedirs(os.path.dirname(dst), exist_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
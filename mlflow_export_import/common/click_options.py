@@ -195,6 +195,63 @@ def opt_use_threads(function):
         show_default=True)(function)
     return function
 
+def opt_use_async(function):
+    function = click.option("--use-async",
+        help="Fetch run metadata with an asyncio engine (requires 'aiohttp'). Artifacts are still downloaded with threads (see --use-threads).",
+        type=bool,
+        default=False,
+        show_default=True
+    )(function)
+    return function
+
+def opt_dedup_artifacts(function):
+    function = click.option("--dedup-artifacts",
+        help="Store artifact files once in a content-addressed 'blobs' directory of the output directory and \
+write per-run 'artifacts.json' manifests referencing them. Runs exported several times are downloaded once.",
+        type=bool,
+        default=False,
+        show_default=True
+    )(function)
+    return function
+
+def opt_watermark_file(function):
+    function = click.option("--watermark-file",
+        help="Incremental export: JSON file recording what was exported. Only runs, logged models, traces and model \
+versions which are new or changed since the export that wrote it are exported, and it is then updated. \
+Created by the first export.",
+        type=str,
+        required=False
+    )(function)
+    return function
+
+def opt_resume(function):
+    function = click.option("--resume",
+        help="Resume an interrupted export into the same output directory: skip the runs, logged models, traces \
+and model versions recorded as completed in its 'export_journal.jsonl' file.",
+        type=bool,
+        default=False,
+        show_default=True
+    )(function)
+    return function
+
+def opt_max_concurrent_requests(function):
+    function = click.option("--max-concurrent-requests",
+        help="Maximum number of in-flight REST requests for --use-async.",
+        type=int,
+        default=100,
+        show_default=True
+    )(function)
+    return function
+
+def opt_metrics_format(function):
+    function = click.option("--metrics-format",
+        help="Metric history format. 'json' writes the histories in run.json. 'npz' (NumPy) and 'parquet' write them as \
+columns in a sidecar file referenced by run.json. Default is MLFLOW_EXPORT_IMPORT_METRICS_FORMAT or 'json'.",
+        type=click.Choice(["json", "npz", "parquet"], case_sensitive=False),
+        required=False
+    )(function)
+    return function
+
 def opt_delete_model(function):
     function = click.option("--delete-model",
         help="If the model exists, first delete the model and all its versions.",
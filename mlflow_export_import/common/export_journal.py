@@ -0,0 +1,148 @@
+"""
+Completion journal of a bulk export for crash-safe resumption.
+
+The bulk exporters append one JSON line per completed unit (run, logged model, trace or registered model version)
+to '<output_dir>/export_journal.jsonl' once the unit's files are written, and flush it to disk. With resume enabled,
+an export into the same output directory skips the units of the journal and only exports the missing and failed ones.
+A line torn by a crash is ignored, so its unit is exported again. Within such a unit the artifact transfer
+engine resumes per file: files already downloaded with the listed size are skipped and interrupted ones are
+downloaded again.
+"""
+
+import os
+import json
+import time
+import posixpath
+import threading
+
+from mlflow_export_import.common import utils
+from mlflow_export_import.common import filesystem as _fs
+
+_logger = utils.getLogger(__name__)
+
+JOURNAL_FILE = "export_journal.jsonl"
+
+
+class ExportJournal:
+    """
+    Thread-safe append-only journal of the completed units of an export.
+    """
+    def __init__(self, root, resume=False):
+        """
+        :param root: Export output directory. Unit directories are recorded relative to it.
+        :param resume: Load the units completed by an earlier export. Otherwise the journal is started afresh.
+        """
+        self.root = _fs.mk_local_path(root)
+        self.path = os.path.join(self.root, JOURNAL_FILE)
+        self._lock = threading.Lock()
+        self.resume = resume
+        self._completed = _load(self.path) if resume else {}
+        self._summary_files = set() # summary files such as experiments.json written by this export
+        self._stats = { "resumed_units": len(self._completed), "skipped_units": 0, "recorded_units": 0 }
+        os.makedirs(self.root, exist_ok=True)
+        self._file = open(self.path, "a" if resume else "w", encoding="utf-8")
+
+    def get_completed(self, kind, output_dir, id):
+        """
+        Return the journal entry of a completed unit or None if it still needs to be exported.
+
+        :param kind: Unit kind such as 'run', 'logged_model', 'trace' or 'model_version'.
+        :param output_dir: Export directory of the unit.
+        :param id: ID of the unit.
+        """
+        key = (kind, self._mk_path(output_dir), str(id))
+        with self._lock:
+            entry = self._completed.get(key)
+            if entry is None or not os.path.exists(_fs.mk_local_path(output_dir)):
+                return None
+            self._stats["skipped_units"] += 1
+        _logger.info(f"Skipping {kind} '{id}' completed by an earlier export")
+        return entry
+
+    def record(self, kind, output_dir, id, data=None):
+        """
+        Durably record a completed unit.
+
+        :param data: Optional JSON-serializable result of the unit returned by get_completed() on resume.
+        """
+        entry = { "kind": kind, "path": self._mk_path(output_dir), "id": str(id), "time": round(time.time(), 3) }
+        if data is not None:
+            entry["data"] = data
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._completed[(kind, entry["path"], entry["id"])] = entry
+            self._stats["recorded_units"] += 1
+
+    def add_summary_file(self, path):
+        with self._lock:
+            self._summary_files.add(os.path.abspath(path))
+
+    def is_stale_summary_file(self, path):
+        """ Return True if resuming and the summary file was written by the interrupted export. """
+        with self._lock:
+            return self.resume and os.path.abspath(path) not in self._summary_files
+
+    def get_stats(self):
+        with self._lock:
+            return { "path": self.path, **self._stats }
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+    def _mk_path(self, output_dir):
+        path = os.path.relpath(os.path.abspath(_fs.mk_local_path(output_dir)), os.path.abspath(self.root))
+        return posixpath.join(*path.split(os.sep))
+
+
+def _load(path):
+    completed = {}
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for j, line in enumerate(f):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                _logger.warning(f"Ignoring incomplete line {j+1} of export journal '{path}'")
+                continue
+            completed[(entry["kind"], entry["path"], entry["id"])] = entry
+    _logger.info(f"Resuming export: {len(completed)} units completed according to '{path}'")
+    return completed
+
+
+# == Process-wide journal of the running export
+
+_journal = utils.ProcessWide()
+
+
+def activate(output_dir, resume=False):
+    """
+    Journal the units exported in the enclosed block (see utils.ProcessWide).
+
+    :param output_dir: Export output directory.
+    :param resume: Skip the units completed by an earlier export into output_dir.
+    :return: The active ExportJournal.
+    """
+    return _journal.activate(lambda: ExportJournal(output_dir, resume), ExportJournal.close)
+
+
+def get_journal():
+    """ Return the active ExportJournal or None outside of bulk exports. """
+    return _journal.get()
+
+
+def get_completed(kind, output_dir, id):
+    """ Return the journal entry of a completed unit or None if it needs to be exported or no journal is active. """
+    journal = _journal.get()
+    return journal.get_completed(kind, output_dir, id) if journal else None
+
+
+def record(kind, output_dir, id, data=None):
+    """ Record a completed unit if a journal is active. """
+    journal = _journal.get()
+    if journal:
+        journal.record(kind, output_dir, id, data)
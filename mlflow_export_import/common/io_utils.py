@@ -7,12 +7,15 @@ from mlflow_export_import.common.timestamp_utils import ts_now_seconds, ts_now_f
 from mlflow_export_import.common import filesystem as _fs
 from mlflow_export_import.common.source_tags import ExportFields
 from mlflow_export_import.common.pkg_version import get_version
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common.json_stream import write_json, read_json, StreamedObject, JsonStream
 
 
 export_file_version = "2"
+max_export_file_version = "3" # run.json with a metrics sidecar file
 
 
-def _mk_system_attr(script):
+def _mk_system_attr(script, file_version=None):
     """
     Create system JSON stanza containing internal export information.
     """
@@ -21,7 +24,7 @@ def _mk_system_attr(script):
     dct = {
         "package_version": get_version(),
         "script": os.path.basename(script),
-        "export_file_version": export_file_version,
+        "export_file_version": file_version or export_file_version,
         "export_time": ts_now_seconds,
         "_export_time": ts_now_fmt_utc,
         "mlflow_version": mlflow.__version__,
@@ -44,15 +47,16 @@ def _mk_system_attr(script):
     return { ExportFields.SYSTEM: dct }
 
 
-def write_export_file(dir, file, script, mlflow_attr, info_attr=None):
+def write_export_file(dir, file, script, mlflow_attr, info_attr=None, file_version=None):
     """
     Write standard formatted JSON file.
+    :param file_version: Export file version if the file needs a newer version than 'export_file_version'.
     """
     dir = _fs.mk_local_path(dir)
     path = os.path.join(dir, file)
     info_attr = { ExportFields.INFO: info_attr} if info_attr else {}
     mlflow_attr = { ExportFields.MLFLOW: mlflow_attr}
-    mlflow_attr = { **_mk_system_attr(script), **info_attr, **mlflow_attr }
+    mlflow_attr = { **_mk_system_attr(script, file_version), **info_attr, **mlflow_attr }
     os.makedirs(dir, exist_ok=True)
     write_file(path, mlflow_attr)
 
@@ -64,11 +68,12 @@ def _is_yaml(path, file_type=None):
 def write_file(path, content, file_type=None):
     """
     Write to JSON, YAML or text file.
+    JSON content can contain generators and StreamedObject values which are written incrementally.
     """
     path = _fs.mk_local_path(path)
     if path.endswith(".json"):
         with open(path, "w", encoding="utf-8") as f:
-            f.write(json.dumps(content, indent=2)+"\n")
+            write_json(f, content)
     elif _is_yaml(path, file_type):
         with open(path, "w", encoding="utf-8") as f:
             yaml.dump(content, f)
@@ -77,10 +82,14 @@ def write_file(path, content, file_type=None):
             f.write(content)
 
 
-def read_file(path, file_type=None):
+def read_file(path, file_type=None, stream_keys=None):
     """
     Read a JSON, YAML or text file.
+    :param stream_keys: List of JSON key paths (e.g. [["mlflow", "metrics"]]) whose values are not loaded
+                        but returned as JsonStream instances parsed incrementally when iterated.
     """
+    if stream_keys:
+        return read_json(_fs.mk_local_path(path), stream_keys)
     with open(_fs.mk_local_path(path), "r", encoding="utf-8") as f:
         if path.endswith(".json"):
             return json.loads(f.read())
@@ -90,6 +99,18 @@ def read_file(path, file_type=None):
             return f.read()
 
 
+def check_export_file_version(export_dct, path):
+    """
+    Raise an exception if the export file was written by a newer version of this package.
+    Files without a version or with an older version can be read.
+    """
+    version = export_dct.get(ExportFields.SYSTEM, {}).get("export_file_version")
+    if version and int(version) > int(max_export_file_version):
+        raise MlflowExportImportException(
+            f"Export file '{path}' has export_file_version {version} but this package can only read versions up to {max_export_file_version}",
+            http_status_code=400)
+
+
 def get_info(export_dct):
     return export_dct[ExportFields.INFO]
 
@@ -98,8 +119,13 @@ def get_mlflow(export_dct):
     return export_dct[ExportFields.MLFLOW]
 
 
-def read_file_mlflow(path):
-    dct = read_file(path)
+def read_file_mlflow(path, stream_keys=None):
+    """
+    :param stream_keys: List of key paths relative to the 'mlflow' stanza to stream. See read_file().
+    """
+    if stream_keys:
+        stream_keys = [ [ExportFields.MLFLOW, *keys] for keys in stream_keys ]
+    dct = read_file(path, stream_keys=stream_keys)
     return dct[ExportFields.MLFLOW]
 
 
@@ -1,30 +1,63 @@
+import os
+import queue
+import threading
+from functools import partial
 from packaging import version
 import mlflow
 
+_STOP = object() # end of pages marker
+
 
 class BaseIterator():
     """
     Base class to iterate for 'search' methods that return PageList.
+
+    With prefetching the next pages are fetched by a background thread while the current page is consumed
+    so that the consumer does not stall on page boundaries.
+    Default values can be overridden with the MLFLOW_EXPORT_IMPORT_PREFETCH_PAGES and MLFLOW_EXPORT_IMPORT_PAGE_SIZE environment variables.
     """
-    def __init__(self, search_method, max_results=None, filter=None):
+    def __init__(self, search_method, max_results=None, filter=None, prefetch=None):
+        """
+        :param search_method: Search method of MlflowClient.
+        :param max_results: Page size. None means the server's default.
+        :param filter: Search filter.
+        :param prefetch: Number of pages to fetch ahead of the consumer. 0 disables prefetching.
+        """
         self.search_method = search_method
         self.filter = filter
-        self.max_results = max_results
+        self.max_results = max_results or _get_int_env("MLFLOW_EXPORT_IMPORT_PAGE_SIZE")
+        self.prefetch = prefetch if prefetch is not None else (_get_int_env("MLFLOW_EXPORT_IMPORT_PREFETCH_PAGES") or 0)
         self.idx = 0
         self.paged_list = None
         self.kwargs = { "max_results": self.max_results } if self.max_results else {}
+        self._pages = None
+        self._stop = None
+        self._thread = None
 
     def _call_iter(self):
+        return self._mk_first_call()()
+
+    def _mk_first_call(self):
         if version.parse(mlflow.__version__) < version.parse("2.2.1"):
-            return self.search_method(filter_string=self.filter)  #7623 - https://mlflow.org/docs/2.1.1/python_api/mlflow.client.html
+            return partial(self.search_method, filter_string=self.filter)  #7623 - https://mlflow.org/docs/2.1.1/python_api/mlflow.client.html
         else:
-            return self.search_method(filter_string=self.filter, **self.kwargs) # https://mlflow.org/docs/latest/python_api/mlflow.client.html
+            return partial(self.search_method, filter_string=self.filter, **self.kwargs) # https://mlflow.org/docs/latest/python_api/mlflow.client.html
 
     def _call_next(self):
         return self.search_method(filter_string=self.filter, page_token=self.paged_list.token, **self.kwargs)
 
     def __iter__(self):
-        self.paged_list = self._call_iter()
+        self.idx = 0
+        if self.prefetch > 0:
+            self.close()
+            self._pages = queue.Queue(maxsize=self.prefetch)
+            self._stop = threading.Event()
+            next_call = partial(self.search_method, filter_string=self.filter, **self.kwargs)
+            self._thread = threading.Thread(target=_prefetch_pages, args=(self._mk_first_call(), next_call, self._pages, self._stop), daemon=True)
+            self._thread.start()
+            self.paged_list = self._next_prefetched_page()
+        else:
+            self.paged_list = self._call_iter()
         return self
 
     def __next__(self):
@@ -32,6 +65,12 @@ class BaseIterator():
             chunk = self.paged_list[self.idx]
             self.idx += 1
             return chunk
+        elif self._pages is not None:
+            self.paged_list = self._next_prefetched_page()
+            if len(self.paged_list) == 0:
+                raise StopIteration
+            self.idx = 1
+            return self.paged_list[0]
         elif self.paged_list.token is None or self.paged_list.token == "":
             raise StopIteration
         else:
@@ -41,6 +80,58 @@ class BaseIterator():
             self.idx = 1
             return self.paged_list[0]
 
+    def close(self):
+        """ Stop the prefetching thread if the iterator is abandoned before its end. """
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+            self._pages = None
+
+    def __del__(self):
+        self.close()
+
+    def _next_prefetched_page(self):
+        page = self._pages.get()
+        if page is _STOP:
+            self._pages.put(_STOP) # later calls also see the end
+            return []
+        if isinstance(page, Exception):
+            self.close()
+            raise page
+        return page
+
+
+def _prefetch_pages(first_call, next_call, pages, stop):
+    """
+    Fetch pages in the background. Each page needs the previous page's token so pages are fetched sequentially.
+    Does not reference the iterator so that an abandoned iterator can be garbage collected (which stops the thread).
+    """
+    try:
+        paged_list = first_call()
+        while not stop.is_set():
+            if not _put(pages, paged_list, stop) or not paged_list.token:
+                break
+            paged_list = next_call(page_token=paged_list.token)
+    except Exception as e:
+        _put(pages, e, stop)
+    _put(pages, _STOP, stop)
+
+
+def _put(pages, item, stop):
+    """ Put item into the bounded queue unless the consumer stopped the iterator. """
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            pass
+    return False
+
+
+def _get_int_env(name):
+    value = os.environ.get(name)
+    return int(value) if value else None
+
 
 class SearchExperimentsIterator(BaseIterator):
     """
@@ -49,8 +140,8 @@ class SearchExperimentsIterator(BaseIterator):
         for experiment in experiments:
             print(experiment)
     """
-    def __init__(self, client, view_type=None, max_results=None, filter=None):
-        super().__init__(client.search_experiments, max_results=max_results, filter=filter)
+    def __init__(self, client, view_type=None, max_results=None, filter=None, prefetch=None):
+        super().__init__(client.search_experiments, max_results=max_results, filter=filter, prefetch=prefetch)
         if view_type:
             self.kwargs["view_type"] = view_type
 
@@ -62,8 +153,8 @@ class SearchRegisteredModelsIterator(BaseIterator):
         for model in models:
             print(model)
     """
-    def __init__(self, client, max_results=None, filter=None):
-        super().__init__(client.search_registered_models, max_results=max_results, filter=filter)
+    def __init__(self, client, max_results=None, filter=None, prefetch=None):
+        super().__init__(client.search_registered_models, max_results=max_results, filter=filter, prefetch=prefetch)
 
 
 class SearchModelVersionsIterator(BaseIterator):
@@ -73,25 +164,146 @@ class SearchModelVersionsIterator(BaseIterator):
         for vr in versions:
             print(vr)
     """
-    def __init__(self, client, max_results=None, filter=None):
-        super().__init__(client.search_model_versions, max_results=max_results, filter=filter)
+    def __init__(self, client, max_results=None, filter=None, prefetch=None):
+        super().__init__(client.search_model_versions, max_results=max_results, filter=filter, prefetch=prefetch)
 
 
 class SearchRunsIterator(BaseIterator):
-    def __init__(self, client, experiment_ids, max_results=None, filter=None, view_type=None):
-        super().__init__(client.search_runs, max_results=max_results, filter=filter)
+    def __init__(self, client, experiment_ids, max_results=None, filter=None, view_type=None, prefetch=None):
+        super().__init__(client.search_runs, max_results=max_results, filter=filter, prefetch=prefetch)
         self.kwargs["experiment_ids"] = experiment_ids
         if view_type:
             self.kwargs["run_view_type"] = view_type
 
 class SearchLoggedModelsIterator(BaseIterator):
-    def __init__(self, client, experiment_ids, max_results=None, filter=None):
-        super().__init__(client.search_logged_models, max_results=max_results, filter=filter)
+    def __init__(self, client, experiment_ids, max_results=None, filter=None, prefetch=None):
+        super().__init__(client.search_logged_models, max_results=max_results, filter=filter, prefetch=prefetch)
         self.kwargs["experiment_ids"] = experiment_ids
 
 class SearchTracesIterator(BaseIterator):
-    def __init__(self, client, experiment_ids, run_id=None, max_results=None, filter=None):
-        super().__init__(client.search_traces, max_results=max_results, filter=filter)
+    def __init__(self, client, experiment_ids, run_id=None, max_results=None, filter=None, prefetch=None):
+        super().__init__(client.search_traces, max_results=max_results, filter=filter, prefetch=prefetch)
         self.kwargs["experiment_ids"] = experiment_ids
         if version.parse(mlflow.__version__) >= version.parse("2.17.0"):
-            self.kwargs["run_id"] = run_id
\ No newline at end of file
+            self.kwargs["run_id"] = run_id
+
+class ShardedSearchRunsIterator():
+    """
+    Enumerate the runs of experiments with parallel searches over disjoint start_time windows.
+    Page tokens can only be followed one after another so a single search pages through a huge experiment serially.
+    The experiments' start_time range is split into 'num_shards' windows that are each paged through by a worker thread.
+    Runs are returned in no particular order.
+
+    Usage:
+        runs = ShardedSearchRunsIterator(client, experiment_id, num_shards=8)
+        for run in runs:
+            print(run)
+    """
+    def __init__(self, client, experiment_ids, max_results=None, filter=None, view_type=None, num_shards=None, max_workers=None):
+        """
+        :param num_shards: Number of start_time windows.
+        :param max_workers: Number of worker threads. Defaults to the number of shards.
+        """
+        self.client = client
+        self.experiment_ids = experiment_ids
+        self.max_results = max_results
+        self.filter = filter
+        self.view_type = view_type
+        self.num_shards = num_shards or get_num_run_search_shards() or DEFAULT_NUM_RUN_SEARCH_SHARDS
+        self.max_workers = max_workers or self.num_shards
+        self._runs = None
+        self._stop = None
+
+    def get_windows(self):
+        """
+        :return: List of (start, end) start_time windows in millis - start inclusive and end exclusive.
+        """
+        first_run = self._get_first_run("ASC")
+        if first_run is None:
+            return []
+        start = first_run.info.start_time
+        end = self._get_first_run("DESC").info.start_time + 1
+        width = -(-(end - start) // self.num_shards) # ceiling
+        return [ (lo, min(lo + width, end)) for lo in range(start, end, width) ]
+
+    def mk_window_filter(self, window):
+        filter = f"attributes.start_time >= {window[0]} AND attributes.start_time < {window[1]}"
+        return f"{self.filter} AND {filter}" if self.filter else filter
+
+    def __iter__(self):
+        self.close()
+        self._runs = queue.Queue(maxsize=max(self.max_results or 1000, 1000))
+        self._stop = threading.Event()
+        iterators = [ SearchRunsIterator(self.client, self.experiment_ids, self.max_results, self.mk_window_filter(window), self.view_type)
+            for window in self.get_windows() ]
+        threading.Thread(target=_enumerate_shards, args=(iterators, self.max_workers, self._runs, self._stop), daemon=True).start()
+        return self
+
+    def __next__(self):
+        if self._runs is None:
+            raise StopIteration
+        run = self._runs.get()
+        if run is _STOP:
+            self._runs.put(_STOP)
+            raise StopIteration
+        if isinstance(run, Exception):
+            self.close()
+            raise run
+        return run
+
+    def close(self):
+        """ Stop the worker threads if the iterator is abandoned before its end. """
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+            self._runs = None
+
+    def __del__(self):
+        self.close()
+
+    def _get_first_run(self, order):
+        kwargs = { "run_view_type": self.view_type } if self.view_type else {}
+        runs = self.client.search_runs(self.experiment_ids, filter_string=self.filter or "", max_results=1,
+            order_by=[f"attributes.start_time {order}"], **kwargs)
+        return runs[0] if runs else None
+
+
+def _enumerate_shards(iterators, max_workers, runs, stop):
+    """
+    Page through each shard's SearchRunsIterator in a worker thread and merge the runs into one queue.
+    The first shard error is passed to the consumer as soon as it happens and stops the other shards.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+    failed = threading.Event()
+    def enumerate_shard(iterator):
+        for run in iterator:
+            if failed.is_set() or not _put(runs, run, stop):
+                return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [ executor.submit(enumerate_shard, iterator) for iterator in iterators ]
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        errors = [ future.exception() for future in done if future.exception() ]
+        if errors:
+            failed.set()
+            for future in not_done:
+                future.cancel()
+            _put(runs, errors[0], stop) # the consumer raises it
+    _put(runs, _STOP, stop)
+
+
+DEFAULT_NUM_RUN_SEARCH_SHARDS = 8
+
+
+def get_num_run_search_shards():
+    """ Number of run search shards set by MLFLOW_EXPORT_IMPORT_RUN_SEARCH_SHARDS. None or 1 means no sharding. """
+    return _get_int_env("MLFLOW_EXPORT_IMPORT_RUN_SEARCH_SHARDS")
+
+
+def mk_search_runs_iterator(client, experiment_ids, max_results=None, filter=None, view_type=None):
+    """
+    Create a ShardedSearchRunsIterator if MLFLOW_EXPORT_IMPORT_RUN_SEARCH_SHARDS is greater than 1 else a SearchRunsIterator.
+    """
+    num_shards = get_num_run_search_shards()
+    if num_shards and num_shards > 1:
+        return ShardedSearchRunsIterator(client, experiment_ids, max_results, filter, view_type, num_shards=num_shards)
+    return SearchRunsIterator(client, experiment_ids, max_results, filter, view_type)
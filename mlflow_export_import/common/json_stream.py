@@ -0,0 +1,304 @@
+"""
+Streaming JSON serialization and parsing for export files too large to hold in memory several times over.
+
+Writing: generators (and other iterators) are written as JSON arrays and StreamedObject as a JSON object,
+one item at a time. Everything else is written as with json.dumps(content, indent=2).
+
+Reading: the array items or object entries at a key path are parsed one at a time, and values that are
+not needed are skipped without being built, so memory is bounded by the largest single item. The byte offset
+of a skipped streamed value is recorded so that iterating it later seeks to it instead of re-parsing the file.
+"""
+
+import io
+import re
+import json
+from contextlib import contextmanager
+from collections.abc import Iterator
+
+from mlflow_export_import.common import MlflowExportImportException
+
+_INDENT = "  "
+_CHUNK_SIZE = 1 << 16
+_NON_WHITESPACE_RE = re.compile(r"[^ \t\n\r]")
+_SKIP_RE = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{}]') # complete string, unterminated string or bracket
+_decoder = json.JSONDecoder()
+
+
+class StreamedObject:
+    """
+    JSON object written incrementally from an iterable of (key, value) pairs.
+    """
+    def __init__(self, pairs):
+        self.pairs = pairs
+
+
+# == Writer
+
+def write_json(f, content):
+    """
+    Write content as indented JSON to a text file object, streaming generators and StreamedObject values.
+    Streams can be nested in dicts and in other streams. Lists and tuples are written in one piece.
+    """
+    for chunk in _iter_encode(content, 0):
+        f.write(chunk)
+    f.write("\n")
+
+
+def _iter_encode(obj, level):
+    if not _has_stream(obj):
+        chunk = json.dumps(obj, indent=2)
+        yield chunk.replace("\n", "\n" + _INDENT*level) if level else chunk
+    elif isinstance(obj, (dict, StreamedObject)):
+        yield from _iter_encode_container(_items(obj), level, "{", "}", _encode_entry)
+    else:
+        yield from _iter_encode_container(obj, level, "[", "]", _iter_encode)
+
+
+def _iter_encode_container(items, level, start, end, encode):
+    separator = start + "\n" + _INDENT*(level+1)
+    for item in items:
+        yield separator
+        yield from encode(item, level+1)
+        separator = ",\n" + _INDENT*(level+1)
+    yield start + end if separator.startswith(start) else "\n" + _INDENT*level + end
+
+
+def _encode_entry(item, level):
+    key, value = item
+    yield json.dumps(key if isinstance(key, str) else json.dumps(key)) + ": "
+    yield from _iter_encode(value, level)
+
+
+def _items(obj):
+    return obj.items() if isinstance(obj, dict) else obj.pairs
+
+
+def _has_stream(obj):
+    if isinstance(obj, (StreamedObject, Iterator)):
+        return True
+    return isinstance(obj, dict) and any(_has_stream(value) for value in obj.values())
+
+
+# == Reader
+
+class _JsonReader:
+    """
+    Incremental JSON parser over a text file object.
+    """
+    def __init__(self, f, path, offset=0):
+        """
+        :param f: Text file object opened with newline="" so that character and byte positions match.
+        :param offset: Byte offset of the current position of f.
+        """
+        self.f = f
+        self.path = path
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.base = offset # byte offset of buf[0]
+
+    def _fill(self, size=None):
+        chunk = self.f.read(size or _CHUNK_SIZE)
+        self.base += _num_bytes(self.buf[:self.pos])
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def tell(self):
+        """ Byte offset of the current position. """
+        return self.base + _num_bytes(self.buf[:self.pos])
+
+    def _error(self, msg):
+        return MlflowExportImportException(f"Cannot parse JSON file '{self.path}': {msg}", http_status_code=400)
+
+    def peek(self):
+        """ Skip whitespace and return the next character or '' at end of file. """
+        while True:
+            m = _NON_WHITESPACE_RE.search(self.buf, self.pos)
+            if m:
+                self.pos = m.start()
+                return self.buf[self.pos]
+            self.pos = len(self.buf)
+            if self.eof:
+                return ""
+            self._fill()
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise self._error(f"expected '{char}' but found '{self.peek()}'")
+        self.pos += 1
+
+    def decode(self):
+        """ Parse the next value. Reads geometrically larger chunks until the value is complete. """
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+                if end < len(self.buf) or self.eof: # a number at the buffer end may continue in the file
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError as e:
+                if self.eof:
+                    raise self._error(e)
+            self._fill(max(_CHUNK_SIZE, len(self.buf) - self.pos))
+
+    def skip(self):
+        """ Skip the next value without building it. """
+        if self.peek() not in ("[", "{"):
+            self.decode()
+            return
+        depth = 0
+        while True:
+            m = _SKIP_RE.search(self.buf, self.pos)
+            if m is None or m.group() == '"': # need more data
+                if self.eof:
+                    raise self._error("unexpected end of file")
+                self.pos = m.start() if m else len(self.buf)
+                self._fill()
+                continue
+            self.pos = m.end()
+            token = m.group()
+            if token in ("[", "{"):
+                depth += 1
+            elif token in ("]", "}"):
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def iter_container(self):
+        """
+        Iterate the next array or object. Yields None before each array item and the key before each object value.
+        The caller must consume the item or value (decode, skip or iterate) before resuming.
+        """
+        start = self.peek()
+        if start not in ("[", "{"):
+            raise self._error(f"expected array or object but found '{start}'")
+        end = "]" if start == "[" else "}"
+        self.pos += 1
+        if self.peek() == end:
+            self.pos += 1
+            return
+        while True:
+            if start == "{":
+                key = self.decode()
+                self.expect(":")
+                yield key
+            else:
+                yield None
+            char = self.peek()
+            self.pos += 1
+            if char == end:
+                return
+            if char != ",":
+                raise self._error(f"expected ',' or '{end}' but found '{char}'")
+
+    def seek(self, keys):
+        """ Move to the value at the key path. """
+        for key in keys:
+            for k in self.iter_container():
+                if k == key:
+                    break
+                self.skip()
+            else:
+                raise self._error(f"key '{key}' not found")
+
+    def iter_items(self):
+        """ Parse the array items or the object (key, value) pairs of the next value one at a time. """
+        is_object = self.peek() == "{"
+        for key in self.iter_container():
+            value = self.decode()
+            yield (key, value) if is_object else value
+
+    def read(self, path, stream_paths, open_stream):
+        """ Parse the next value replacing the values at stream_paths (key paths through objects) with streams. """
+        if path in stream_paths:
+            self.peek()
+            offset = self.tell()
+            self.skip()
+            return open_stream(path, offset)
+        if not any(p[:len(path)] == path for p in stream_paths) or self.peek() != "{":
+            return self.decode()
+        return { key: self.read(path + (key,), stream_paths, open_stream) for key in self.iter_container() }
+
+
+def _num_bytes(text):
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+def _open(path):
+    return open(path, "r", encoding="utf-8", newline="")
+
+
+class JsonStream:
+    """
+    Lazily parsed JSON array or object of a file. Iterating yields the array items or the object keys,
+    and items() yields the object (key, value) pairs. Each pass re-reads the file from the value's
+    byte offset if known, else from the start of the file.
+    """
+    def __init__(self, path, keys, offset=None):
+        self.path = path
+        self.keys = tuple(keys)
+        self.offset = offset
+
+    @contextmanager
+    def _open_reader(self):
+        """ Yield a reader positioned at the value. """
+        if self.offset is None:
+            with _open(self.path) as f:
+                reader = _JsonReader(f, self.path)
+                reader.seek(self.keys)
+                yield reader
+            return
+        with open(self.path, "rb") as raw:
+            raw.seek(self.offset)
+            with io.TextIOWrapper(raw, encoding="utf-8", newline="") as f:
+                yield _JsonReader(f, self.path, self.offset)
+
+    def _iter(self, keys_only=False):
+        with self._open_reader() as reader:
+            if keys_only and reader.peek() == "{":
+                for key in reader.iter_container():
+                    reader.skip()
+                    yield key
+            else:
+                yield from reader.iter_items()
+
+    def items(self):
+        return self._iter()
+
+    def flat_items(self):
+        """
+        For an object of arrays such as run.json 'metrics', yield (key, item) for each item of each array
+        in one pass, so that memory is bounded by a single item rather than a single array.
+        """
+        with self._open_reader() as reader:
+            for key in reader.iter_container():
+                for _ in reader.iter_container():
+                    yield key, reader.decode()
+
+    def __iter__(self):
+        return self._iter(keys_only=True)
+
+    def __repr__(self):
+        return f"JsonStream({self.path!r}, {list(self.keys)!r}, offset={self.offset})"
+
+
+def iter_json(path, *keys):
+    """
+    Parse the array items or the object (key, value) pairs at a key path of a JSON file one at a time.
+    """
+    return JsonStream(path, keys).items()
+
+
+def read_json(path, stream_keys):
+    """
+    Read a JSON file, replacing the values at the stream_keys key paths with JsonStream instances
+    that are skipped during the read and parsed only when iterated, starting at their byte offset.
+    """
+    stream_paths = [ tuple(keys) for keys in stream_keys ]
+    with _open(path) as f:
+        reader = _JsonReader(f, path)
+        dct = reader.read((), stream_paths, lambda keys, offset: JsonStream(path, keys, offset))
+        if reader.peek():
+            raise reader._error("extra data after JSON document")
+        return dct
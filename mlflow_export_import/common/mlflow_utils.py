@@ -5,7 +5,7 @@ from mlflow.exceptions import RestException
 
 from mlflow_export_import.common import MlflowExportImportException
 from mlflow_export_import.common.iterators import SearchModelVersionsIterator
-from mlflow_export_import.common import utils
+from mlflow_export_import.common import utils, destination_cache
 
 _logger = utils.getLogger(__name__)
 
@@ -25,12 +25,18 @@ def set_experiment(mlflow_client, dbx_client, exp_name, tags=None):
     """
     Set experiment name.
     For Databricks, create the workspace directory if it doesn't exist.
+    Within an import with an active destination_cache the experiment is resolved once.
     :return: Experiment
     """
     if utils.calling_databricks():
         if not exp_name.startswith("/"):
             raise MlflowExportImportException(f"Cannot create experiment '{exp_name}'. Databricks experiment must start with '/'.")
         create_workspace_dir(dbx_client, os.path.dirname(exp_name))
+    return destination_cache.get_experiment(mlflow_client, exp_name,
+        lambda: _set_experiment(mlflow_client, exp_name, tags))
+
+
+def _set_experiment(mlflow_client, exp_name, tags):
     try:
         if not tags: tags = {}
         tags = utils.create_mlflow_tags_for_databricks_import(tags)
@@ -55,6 +61,7 @@ def delete_experiment(mlflow_client, exp_id_or_name):
     exp = get_experiment(mlflow_client, exp_id_or_name)
     _logger.info(f"Deleting experiment: name={exp.name} experiment_id={exp.experiment_id}")
     mlflow_client.delete_experiment(exp.experiment_id)
+    destination_cache.invalidate_experiment(mlflow_client, exp.name)
 
 
 def delete_model(mlflow_client, model_name):
@@ -83,11 +90,14 @@ def set_experiment_description(client, experiment_id, description):
 def create_workspace_dir(dbx_client, workspace_dir):
     """
     Create Databricks workspace directory.
+    Within an import with an active destination_cache the directory is created once.
     """
-    _logger.info(f"Creating Databricks workspace directory '{workspace_dir}'")
     if not workspace_dir.startswith("/"):
         raise MlflowExportImportException(f"Cannot create workspace directory '{workspace_dir}'. Databricks directory must start with '/'.")
-    dbx_client.post("workspace/mkdirs", { "path": workspace_dir })
+    def _create():
+        _logger.info(f"Creating Databricks workspace directory '{workspace_dir}'")
+        dbx_client.post("workspace/mkdirs", { "path": workspace_dir })
+    destination_cache.create_workspace_dir(dbx_client, workspace_dir, _create)
 
 
 # == Context Manager
@@ -10,6 +10,7 @@ from mlflow_export_import.common.iterators import SearchModelVersionsIterator
 from mlflow_export_import.common.timestamp_utils import fmt_ts_millis, adjust_timestamps
 from mlflow_export_import.common import utils
 from mlflow_export_import.common import filesystem as _filesystem
+from mlflow_export_import.common import blob_store
 from mlflow_export_import.common import ws_permissions_utils, uc_permissions_utils
 from mlflow_export_import.client.client_utils import create_http_client, create_dbx_client
 
@@ -104,6 +105,9 @@ def export_version_model(client, version, output_dir):
         artifact_uri = download_uri,
         dst_path = _filesystem.mk_local_path(output_dir)
     )
+    store = blob_store.get_store()
+    if store:
+        store.ingest(output_dir, download_uri)
     return download_uri
 
 
@@ -0,0 +1,113 @@
+"""
+Batched run lookup: resolve many run IDs with a few concurrent 'search_runs' calls
+with an 'attributes.run_id IN (...)' filter instead of one 'get_run' call per run.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from mlflow.entities import ViewType
+
+from mlflow_export_import.common import utils
+from mlflow_export_import.client import metadata_cache
+
+_logger = utils.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100 # run IDs per search
+DEFAULT_MAX_WORKERS = 8
+MAX_EXPERIMENT_IDS = 100 # experiment IDs per search
+
+
+def get_runs(mlflow_client, run_ids, experiment_ids=None, run_experiment_ids=None, batch_size=None, max_workers=None):
+    """
+    Get runs by ID with batched searches executed concurrently.
+    Runs are only searched within the experiments the caller knows. They are never searched in all experiments.
+    Found runs are added to the metadata cache and runs already cached are not searched again.
+    Run IDs that are not found by the searches (e.g. runs outside of their experiments or without a known
+    experiment) are fetched with concurrent 'get_run' calls so that missing runs fail with the same exception as before.
+
+    :param mlflow_client: MLflow client.
+    :param run_ids: Run IDs.
+    :param experiment_ids: Experiments to search for all run IDs.
+    :param run_experiment_ids: Dictionary of run ID to the experiment ID it is searched in. Takes precedence over 'experiment_ids'.
+    :param batch_size: Number of run IDs per search. Default is MLFLOW_EXPORT_IMPORT_RUN_BATCH_SIZE or 100.
+    :param max_workers: Number of concurrent searches and 'get_run' calls.
+    :return: Tuple of dict of run ID to run and dict of run ID to exception for runs that could not be fetched.
+    """
+    batch_size = batch_size or int(os.environ.get("MLFLOW_EXPORT_IMPORT_RUN_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+    max_workers = max_workers or DEFAULT_MAX_WORKERS
+    runs, errors = {}, {}
+    run_ids = list(dict.fromkeys(run_ids)) # unique with order preserved
+    for run_id in run_ids:
+        run = metadata_cache.get_cached_run(mlflow_client, run_id) if run_id else None
+        if run:
+            runs[run_id] = run
+    missing_ids = [ run_id for run_id in run_ids if run_id and run_id not in runs ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if missing_ids:
+            batches = _mk_batches(missing_ids, experiment_ids, run_experiment_ids or {}, batch_size)
+            for found in executor.map(lambda batch: _search_batch(mlflow_client, *batch), batches):
+                runs.update(found)
+            _logger.info(f"Resolved {len(runs)}/{len(run_ids)} runs with batched searches")
+
+        fallback_ids = [ run_id for run_id in run_ids if run_id not in runs ]
+        for run_id, run, e in executor.map(lambda run_id: _get_run(mlflow_client, run_id), fallback_ids):
+            if run:
+                runs[run_id] = run
+            else:
+                errors[run_id] = e
+    for run in runs.values():
+        metadata_cache.put_run(mlflow_client, run)
+    return runs, errors
+
+
+def _mk_batches(run_ids, experiment_ids, run_experiment_ids, batch_size):
+    """
+    Group run IDs into searches of at most 'batch_size' run IDs each with the experiments they are searched in.
+    Runs of the same experiment are grouped together. Runs without a known experiment are not searched.
+    :return: List of tuples of run IDs and list of experiment ID chunks.
+    """
+    def get_experiment_ids(run_id):
+        exp_id = run_experiment_ids.get(run_id)
+        return (exp_id,) if exp_id else tuple(experiment_ids or [])
+    keyed = sorted((get_experiment_ids(run_id), run_id) for run_id in run_ids)
+    batches = []
+    for batch in _chunk([ (exp_ids, run_id) for exp_ids, run_id in keyed if exp_ids ], batch_size):
+        exp_ids = list(dict.fromkeys(exp_id for exp_ids, _ in batch for exp_id in exp_ids))
+        exp_chunks = _chunk(exp_ids, MAX_EXPERIMENT_IDS)
+        if len(exp_chunks) < batch_size: # else one get_run per run is cheaper
+            batches.append(([ run_id for _, run_id in batch ], exp_chunks))
+    return batches
+
+
+def _get_run(mlflow_client, run_id):
+    try:
+        return run_id, mlflow_client.get_run(run_id), None
+    except Exception as e:
+        return run_id, None, e
+
+
+def _search_batch(mlflow_client, run_ids, exp_chunks):
+    """
+    Search a batch of run IDs in each chunk of experiments until all are found.
+    Errors are not raised since the caller falls back to 'get_run' for runs not found.
+    """
+    found = {}
+    remaining = list(run_ids)
+    for exp_ids in exp_chunks:
+        filter = "attributes.run_id IN ({})".format(", ".join(f"'{run_id}'" for run_id in remaining))
+        try:
+            runs = mlflow_client.search_runs(exp_ids, filter_string=filter, run_view_type=ViewType.ALL, max_results=len(remaining))
+        except Exception as e:
+            _logger.warning(f"Batched run search failed: {e}")
+            return found
+        for run in runs:
+            found[run.info.run_id] = run
+        remaining = [ run_id for run_id in remaining if run_id not in found ]
+        if not remaining:
+            break
+    return found
+
+
+def _chunk(lst, size):
+    return [ lst[j:j+size] for j in range(0, len(lst), size) ]
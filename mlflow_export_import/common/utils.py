@@ -1,4 +1,6 @@
 import os
+import threading
+from contextlib import contextmanager
 import pandas as pd
 from tabulate import tabulate
 
@@ -100,18 +102,6 @@ def get_user_id():
     return _get_user()
 
 
-def nested_tags(dst_client, run_ids_mapping):
-    """
-    Set the new parentRunId for new imported child runs.
-    """
-    for _,v in run_ids_mapping.items():
-        src_parent_run_id = v.get("src_parent_run_id",None)
-        if src_parent_run_id:
-            dst_run_id = v["dst_run_id"]
-            dst_parent_run_id = run_ids_mapping[src_parent_run_id]["dst_run_id"]
-            dst_client.set_tag(dst_run_id, "mlflow.parentRunId", dst_parent_run_id)
-
-
 def show_table(title, lst, columns):
     print(title)
     df = pd.DataFrame(lst, columns = columns)
@@ -124,4 +114,44 @@ def get_user():
 
 
 def get_threads(use_threads=False):
-    return os.cpu_count() or 4 if use_threads else 1
+    return (os.cpu_count() or 4) if use_threads else 1
+
+
+class ProcessWide:
+    """
+    Holder of the process-wide object of the running export or import (journal, blob store, watermarks,
+    destination cache or worker pool) that its threads look up with get().
+    The object is created by the outermost activate() block and kept by nested ones (e.g. export_all calling
+    export_models), so one export or import at a time can run in a process.
+    """
+    def __init__(self):
+        self._obj = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def activate(self, create, close=None):
+        """
+        Activate an object for the enclosed block unless one is already active.
+
+        :param create: Function returning the new object. If None, nothing is activated and the block runs
+                       with the current object if any.
+        :param close: Function called with the object when the block that created it exits.
+        :return: The active object or None.
+        """
+        with self._lock:
+            is_owner = create is not None and self._obj is None
+            if is_owner:
+                self._obj = create()
+            obj = self._obj
+        try:
+            yield obj
+        finally:
+            if is_owner:
+                with self._lock:
+                    self._obj = None
+                if close:
+                    close(obj)
+
+    def get(self):
+        """ Return the active object or None. """
+        return self._obj
@@ -0,0 +1,307 @@
+"""
+Watermarks of incremental (delta) exports.
+
+A watermark file records for each exported experiment the fingerprint of its exported runs, the last update time of
+its logged models and the timestamp of its newest trace, and for each registered model the last update time of the
+model and of its versions. An export run with a watermark file only exports the runs, logged models, traces and model
+versions that are new or changed since the export that wrote it, and then updates it.
+
+The experiment.json of a delta export lists its new, changed and deleted runs in its 'delta' info attribute so that
+import_experiment can replace the runs imported from an earlier export (see apply_run_delta).
+
+Run fingerprints cover the run's status, end time, lifecycle stage, name, params, tags and latest metric values.
+Trace tags or assessments set on already exported traces are not detected.
+"""
+
+import os
+import copy
+import json
+import hashlib
+import threading
+from mlflow.exceptions import RestException
+
+from mlflow_export_import.common import utils, io_utils, mlflow_utils
+from mlflow_export_import.common import filesystem as _fs
+from mlflow_export_import.common.iterators import mk_search_runs_iterator
+from mlflow_export_import.common.source_tags import ExportTags
+from mlflow_export_import.common import MlflowExportImportException
+
+_logger = utils.getLogger(__name__)
+
+_SOURCE_RUN_ID_TAG = f"{ExportTags.PREFIX_RUN_INFO}.run_id"
+
+
+class Watermarks:
+    """
+    Thread-safe watermark state of an export. Values are read from the state of the previous export and
+    committed into the new state only for objects that were successfully exported.
+    """
+    def __init__(self, path):
+        """
+        :param path: Watermark JSON file. It does not need to exist for the first export.
+        """
+        self.path = _fs.mk_local_path(path)
+        self._lock = threading.Lock()
+        self._previous = io_utils.read_file(self.path) if os.path.exists(self.path) else {}
+        self._previous.setdefault("experiments", {})
+        self._previous.setdefault("models", {})
+        self._state = copy.deepcopy(self._previous)
+        self._pending = {} # experiment ID => fingerprints and selected runs of this export
+        self._required_run_ids = set() # runs of new or changed model versions
+        self._stats = { "new_runs": 0, "changed_runs": 0, "unchanged_runs": 0, "deleted_runs": 0,
+            "skipped_logged_models": 0, "skipped_traces": 0, "unchanged_models": 0, "skipped_versions": 0 }
+
+    # == Runs
+
+    def select_runs(self, mlflow_client, experiments, experiments_dct=None, view_type=None):
+        """
+        Select the new and changed runs of experiments.
+
+        :param experiments: Experiment IDs or names.
+        :param experiments_dct: Dictionary of experiment ID to the run IDs to consider. If None all runs are considered.
+        :param view_type: ViewType of the runs search.
+        :return: Dictionary of experiment ID to the list of run IDs to export.
+        """
+        selected = {}
+        for exp_id_or_name in experiments:
+            run_ids = experiments_dct.get(exp_id_or_name) if experiments_dct else None
+            try:
+                exp = mlflow_utils.get_experiment(mlflow_client, exp_id_or_name)
+            except (RestException, MlflowExportImportException) as e:
+                _logger.warning(f"Cannot select runs of experiment '{exp_id_or_name}': {e}")
+                selected[exp_id_or_name] = run_ids # reported by the experiment export
+                continue
+            selected[exp.experiment_id] = self._select_experiment_runs(mlflow_client, exp, run_ids, view_type)
+        return selected
+
+    def _select_experiment_runs(self, mlflow_client, exp, run_ids, view_type):
+        exp_id = exp.experiment_id
+        previous_runs = self._previous["experiments"].get(exp_id, {}).get("runs", {})
+        run_ids = set(run_ids) if run_ids is not None else None
+        kwargs = { "view_type": view_type } if view_type else {}
+        fingerprints = {}
+        new_run_ids, changed_run_ids = [], []
+        for run in mk_search_runs_iterator(mlflow_client, exp_id, **kwargs):
+            run_id = run.info.run_id
+            fingerprints[run_id] = mk_run_fingerprint(run)
+            if run_ids is not None and run_id not in run_ids:
+                continue
+            if run_id not in previous_runs:
+                new_run_ids.append(run_id)
+            elif previous_runs[run_id] != fingerprints[run_id] or run_id in self._required_run_ids:
+                changed_run_ids.append(run_id)
+        deleted_run_ids = sorted(set(previous_runs) - set(fingerprints))
+        with self._lock:
+            self._pending[exp_id] = {
+                "fingerprints": fingerprints,
+                "selected": set(new_run_ids + changed_run_ids),
+                "delta": { "new_runs": new_run_ids, "changed_runs": changed_run_ids, "deleted_runs": deleted_run_ids }
+            }
+            self._stats["new_runs"] += len(new_run_ids)
+            self._stats["changed_runs"] += len(changed_run_ids)
+            self._stats["deleted_runs"] += len(deleted_run_ids)
+            self._stats["unchanged_runs"] += len(fingerprints) - len(new_run_ids) - len(changed_run_ids)
+        _logger.info(f"Experiment '{exp.name}' (ID: {exp_id}): {len(new_run_ids)} new, {len(changed_run_ids)} changed " \
+            f"and {len(deleted_run_ids)} deleted runs since the last export")
+        return new_run_ids + changed_run_ids
+
+    def commit_runs(self, exp, ok_run_ids):
+        """
+        Record the fingerprints of the successfully exported runs of an experiment.
+
+        :return: The experiment's delta (new, changed and deleted run IDs) or None if its runs were not selected.
+        """
+        with self._lock:
+            pending = self._pending.get(exp.experiment_id)
+            if pending is None:
+                return None
+            previous_runs = self._previous["experiments"].get(exp.experiment_id, {}).get("runs", {})
+            ok_run_ids = set(ok_run_ids)
+            exp_state = self._state["experiments"].setdefault(exp.experiment_id, {})
+            exp_state["name"] = exp.name
+            exp_state["last_update_time"] = exp.last_update_time
+            exp_state["runs"] = { run_id: fingerprint if run_id in ok_run_ids else previous_runs[run_id]
+                for run_id, fingerprint in pending["fingerprints"].items()
+                    if run_id in ok_run_ids or run_id in previous_runs }
+            return pending["delta"]
+
+    def _get_selected_run_ids(self, exp_id):
+        pending = self._pending.get(exp_id)
+        return pending["selected"] if pending else set()
+
+    # == Logged models
+
+    def filter_logged_models(self, logged_models):
+        """
+        Keep the logged models that are new, changed or produced by a selected run.
+        """
+        kept = []
+        with self._lock:
+            for logged_model in logged_models:
+                exp_id = str(logged_model.experiment_id)
+                previous = self._previous["experiments"].get(exp_id, {}).get("logged_models", {})
+                if previous.get(logged_model.model_id) != logged_model.last_updated_timestamp \
+                        or logged_model.source_run_id in self._get_selected_run_ids(exp_id):
+                    kept.append(logged_model)
+            self._stats["skipped_logged_models"] += len(logged_models) - len(kept)
+        return kept
+
+    def commit_logged_models(self, logged_models, ok_model_ids):
+        ok_model_ids = set(ok_model_ids)
+        with self._lock:
+            for logged_model in logged_models:
+                if logged_model.model_id in ok_model_ids:
+                    exp_state = self._state["experiments"].setdefault(str(logged_model.experiment_id), {})
+                    exp_state.setdefault("logged_models", {})[logged_model.model_id] = logged_model.last_updated_timestamp
+
+    # == Traces
+
+    def filter_traces(self, traces):
+        """
+        Keep the traces newer than the newest trace of the previous export of their experiment.
+        """
+        with self._lock:
+            kept = [ trace for trace in traces
+                if trace.info.timestamp_ms > self._previous["experiments"].get(trace.info.experiment_id, {}).get("traces_timestamp_ms", -1) ]
+            self._stats["skipped_traces"] += len(traces) - len(kept)
+        return kept
+
+    def commit_traces(self, traces, ok_trace_ids):
+        """
+        Advance the trace watermark of each experiment up to, but excluding, its oldest failed trace.
+        """
+        ok_trace_ids = set(ok_trace_ids)
+        by_experiment = {}
+        for trace in traces:
+            by_experiment.setdefault(trace.info.experiment_id, []).append(trace)
+        with self._lock:
+            for exp_id, exp_traces in by_experiment.items():
+                ok = [ t.info.timestamp_ms for t in exp_traces if t.info.request_id in ok_trace_ids ]
+                failed = [ t.info.timestamp_ms for t in exp_traces if t.info.request_id not in ok_trace_ids ]
+                exp_state = self._state["experiments"].setdefault(exp_id, {})
+                timestamp_ms = exp_state.get("traces_timestamp_ms", -1)
+                if failed:
+                    ok = [ ts for ts in ok if ts < min(failed) ]
+                exp_state["traces_timestamp_ms"] = max([ timestamp_ms ] + ok)
+
+    # == Registered models
+
+    def select_model_versions(self, model_name, model_last_updated_timestamp, versions):
+        """
+        Select the new and changed versions of a registered model and require the export of their runs.
+
+        :param versions: ModelVersion objects of the model.
+        :return: The selected versions or None if neither the model nor its versions changed.
+        """
+        with self._lock:
+            previous = self._previous["models"].get(model_name, {})
+            previous_versions = previous.get("versions", {})
+            selected = [ vr for vr in versions if previous_versions.get(str(vr.version)) != vr.last_updated_timestamp ]
+            self._stats["skipped_versions"] += len(versions) - len(selected)
+            if not selected and previous.get("last_updated_timestamp") == model_last_updated_timestamp:
+                self._stats["unchanged_models"] += 1
+                return None
+            self._required_run_ids.update(vr.run_id for vr in selected if vr.run_id)
+            return selected
+
+    def filter_model_versions(self, model_name, versions):
+        """ Keep the new and changed versions of a model without updating the statistics. """
+        previous_versions = self._previous["models"].get(model_name, {}).get("versions", {})
+        return [ vr for vr in versions if previous_versions.get(str(vr.version)) != vr.last_updated_timestamp ]
+
+    def commit_model(self, model_name, model_last_updated_timestamp, versions, failed_versions):
+        """
+        :param versions: Exported ModelVersion objects.
+        :param failed_versions: Versions (numbers) which failed to export.
+        """
+        failed_versions = { str(v) for v in failed_versions }
+        with self._lock:
+            model_state = self._state["models"].setdefault(model_name, {})
+            if not failed_versions:
+                model_state["last_updated_timestamp"] = model_last_updated_timestamp
+            model_versions = model_state.setdefault("versions", {})
+            for vr in versions:
+                if str(vr.version) not in failed_versions:
+                    model_versions[str(vr.version)] = vr.last_updated_timestamp
+
+    # ==
+
+    def get_stats(self):
+        with self._lock:
+            return { "path": self.path, **self._stats }
+
+    def save(self):
+        """ Atomically write the new state to the watermark file. """
+        dir = os.path.dirname(self.path)
+        if dir:
+            os.makedirs(dir, exist_ok=True)
+        tmp_path = f"{self.path}.tmp.json"
+        with self._lock:
+            io_utils.write_file(tmp_path, self._state)
+        os.replace(tmp_path, self.path)
+
+
+def mk_run_fingerprint(run):
+    """
+    Short hash of the run fields whose change requires the run to be exported again.
+    """
+    dct = {
+        "status": run.info.status,
+        "end_time": run.info.end_time,
+        "lifecycle_stage": run.info.lifecycle_stage,
+        "run_name": run.info.run_name,
+        "params": run.data.params,
+        "tags": run.data.tags,
+        "metrics": run.data.metrics
+    }
+    return hashlib.sha256(json.dumps(dct, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+# == Process-wide watermarks of the running export
+
+_watermarks = utils.ProcessWide()
+
+
+def activate(path):
+    """
+    Export only new and changed objects in the enclosed block and update the watermark file when it exits
+    (see utils.ProcessWide).
+
+    :param path: Watermark file. If None, no watermarks are activated and everything is exported.
+    :return: The active Watermarks or None.
+    """
+    create = (lambda: Watermarks(path)) if path is not None else None
+    return _watermarks.activate(create, _close)
+
+
+def _close(watermarks):
+    watermarks.save()
+    _logger.info(f"Watermarks: {watermarks.get_stats()}")
+
+
+def get_watermarks():
+    """ Return the active Watermarks or None if the export is not incremental. """
+    return _watermarks.get()
+
+
+# == Import
+
+def apply_run_delta(mlflow_client, experiment_id, delta, run_ids_map):
+    """
+    Delete the destination runs imported from an earlier export of the changed and deleted source runs of a
+    delta export. Destination runs are matched by their 'mlflow_exim.run_info.run_id' source tag, so the earlier
+    and the delta export must have been imported with import_source_tags.
+
+    :param delta: 'delta' info attribute of the delta export's experiment.json.
+    :param run_ids_map: Dictionary of source run ID to the 'dst_run_id' of the runs imported from the delta export.
+    :return: Number of deleted destination runs.
+    """
+    imported_run_ids = { dct["dst_run_id"] for dct in run_ids_map.values() }
+    num_deleted = 0
+    for src_run_id in delta.get("changed_runs", []) + delta.get("deleted_runs", []):
+        filter = f"tags.`{_SOURCE_RUN_ID_TAG}` = '{src_run_id}'"
+        for run in mk_search_runs_iterator(mlflow_client, experiment_id, filter=filter):
+            if run.info.run_id not in imported_run_ids:
+                mlflow_client.delete_run(run.info.run_id)
+                num_deleted += 1
+    return num_deleted
@@ -0,0 +1,95 @@
+"""
+Process-wide bounded thread pool for exporting and importing the runs of experiments.
+
+bulk/export_experiments exports experiments in parallel and each experiment submits its runs to this one shared
+pool, so that a huge experiment keeps all workers busy after the small ones are done while the total number of
+concurrent run exports never exceeds the pool size. Experiment threads only wait for their runs.
+bulk/import_experiments and import_experiment import runs the same way.
+"""
+
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from mlflow_export_import.common import utils
+from mlflow_export_import.client import http_session
+
+_logger = utils.getLogger(__name__)
+
+_WINDOW_FACTOR = 4 # queued tasks per worker for each caller of imap()
+
+
+class WorkerPool:
+    """
+    Bounded thread pool whose tasks are submitted through imap() with a bounded number of queued tasks per caller.
+    """
+    def __init__(self, max_workers):
+        self.max_workers = max_workers
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="run-worker",
+            initializer=self._init_worker)
+        self._lock = threading.Lock()
+        self._stats = { "max_workers": max_workers, "tasks": 0 }
+
+    def _init_worker(self):
+        self._local.is_worker = True
+
+    def imap(self, func, iterable):
+        """
+        Apply func to the items of iterable in the pool and yield the results in the order of the items.
+        At most a few tasks per worker are queued so that iterable is consumed lazily. A call from a
+        pool worker runs the tasks in that worker since waiting for other workers could deadlock the pool.
+        """
+        if getattr(self._local, "is_worker", False):
+            yield from map(func, iterable)
+            return
+        window = self.max_workers * _WINDOW_FACTOR
+        futures = collections.deque()
+        for item in iterable:
+            futures.append(self._executor.submit(func, item))
+            with self._lock:
+                self._stats["tasks"] += 1
+            if len(futures) >= window:
+                yield futures.popleft().result()
+        while futures:
+            yield futures.popleft().result()
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+# == Process-wide pool
+
+_pool = utils.ProcessWide()
+
+
+def activate(max_workers):
+    """
+    Run the run exports or imports of the enclosed block in a shared pool (see utils.ProcessWide).
+    The pooled HTTP session is sized to match a new pool.
+
+    :param max_workers: Number of workers. If 1 or less, no pool is created and runs are processed sequentially.
+    :return: The active WorkerPool or None.
+    """
+    create = (lambda: _create_pool(max_workers)) if max_workers > 1 else None
+    return _pool.activate(create, WorkerPool.shutdown)
+
+
+def _create_pool(max_workers):
+    http_session.configure(pool_size=max_workers)
+    return WorkerPool(max_workers)
+
+
+def get_pool():
+    """ Return the active WorkerPool or None if runs are processed sequentially. """
+    return _pool.get()
+
+
+def imap(func, iterable):
+    """ Apply func to the items of iterable in the active pool, or sequentially if there is none, in order. """
+    pool = _pool.get()
+    return pool.imap(func, iterable) if pool else map(func, iterable)
@@ -16,10 +16,13 @@ from mlflow_export_import.common.click_options import (
     opt_run_start_time,
     opt_until,
     opt_export_deleted_runs,
-    opt_check_nested_runs
+    opt_check_nested_runs,
+    opt_metrics_format,
+    opt_use_threads
 )
-from mlflow_export_import.common.iterators import SearchRunsIterator
+from mlflow_export_import.common.iterators import mk_search_runs_iterator
 from mlflow_export_import.common import utils, io_utils, mlflow_utils
+from mlflow_export_import.common import run_resolver, watermarks, export_journal, worker_pool
 from mlflow_export_import.common import ws_permissions_utils
 from mlflow_export_import.common.timestamp_utils import fmt_ts_millis, utc_str_to_millis
 from mlflow_export_import.common.version_utils import has_trace_support, has_logged_model_support
@@ -45,7 +48,9 @@ def export_experiment(
         check_nested_runs = False,
         notebook_formats = None,
         logged_models_filter = None,
-        mlflow_client = None
+        mlflow_client = None,
+        metrics_format = None,
+        use_threads = False
     ):
     """
     :param: experiment_id_or_name: Experiment ID or name.
@@ -60,6 +65,9 @@ def export_experiment(
     :param: notebook_formats: List of notebook formats to export. Values are SOURCE, HTML, JUPYTER or DBC.
     :param: logged_models_filter: filter based on run_ids under experiment
     :param: mlflow_client: MLflow client.
+    :param: metrics_format: Run metric history format: 'json', 'npz' or 'parquet'. Default is MLFLOW_EXPORT_IMPORT_METRICS_FORMAT or 'json'.
+    :param: use_threads: Export the runs in parallel. Within a bulk export the runs are submitted to its shared
+        worker pool (see worker_pool) whether set or not.
     :return: Number of successful and number of failed runs.
     """
     mlflow_client = mlflow_client or create_mlflow_client()
@@ -81,32 +89,43 @@ def export_experiment(
     ok_run_ids = []
     failed_run_ids = []
     num_runs_exported = 0
-    if run_ids:
+    if run_ids is not None:
         runs = _get_runs(mlflow_client, run_ids, exp, failed_run_ids)
         if check_nested_runs: # ZZ
             runs = nested_runs_utils.get_nested_runs(mlflow_client, runs) # 
     else:
         kwargs = {}
-        filters = []
-        if run_start_time:
-            filters.append(f"start_time > {run_start_time}")
-        if runs_until:
-            filters.append(f"start_time < {runs_until}")
-        # Note: " AND ".join() works correctly for both single and multiple filters
-        # Single filter: " AND ".join(["a"]) returns "a"
-        # Multiple filters: " AND ".join(["a", "b"]) returns "a AND b"
-        if filters:
-            kwargs["filter"] = " AND ".join(filters)
+        filter = _mk_runs_filter(run_start_time, runs_until)
+        if filter:
+            kwargs["filter"] = filter
         if export_deleted_runs:
             from mlflow.entities import ViewType
             kwargs["view_type"] = ViewType.ALL
-        runs = SearchRunsIterator(mlflow_client, exp.experiment_id, **kwargs)
+        runs = mk_search_runs_iterator(mlflow_client, exp.experiment_id, **kwargs)
+
+    def export_one(run):
+        return run.info.run_id, _export_run(mlflow_client, run, output_dir,
+            run_start_time, run_start_time_str, runs_until, runs_until_str, export_deleted_runs, notebook_formats, metrics_format)
+
+    with worker_pool.activate(utils.get_threads(use_threads)):
+        for run_id, status in worker_pool.imap(export_one, runs):
+            num_runs_exported += 1
+            if status is True:
+                ok_run_ids.append(run_id)
+            elif status is False:
+                failed_run_ids.append(run_id)
+
+    _export_experiment_manifest(mlflow_client, dbx_client, exp, output_dir,
+        ok_run_ids, failed_run_ids, num_runs_exported, export_permissions, logged_models_filter)
+    return len(ok_run_ids), len(failed_run_ids)
 
-    for run in runs:
-        _export_run(mlflow_client, run, output_dir, ok_run_ids, failed_run_ids,
-            run_start_time, run_start_time_str, runs_until, runs_until_str, export_deleted_runs, notebook_formats)
-        num_runs_exported += 1
 
+def _export_experiment_manifest(mlflow_client, dbx_client, exp, output_dir,
+        ok_run_ids, failed_run_ids, num_runs_exported, export_permissions, logged_models_filter
+    ):
+    """
+    Export the experiment's logged models and traces and write experiment.json once its runs have been exported.
+    """
     info_attr = {
         "num_total_runs": (num_runs_exported),
         "num_ok_runs": len(ok_run_ids),
@@ -120,6 +139,11 @@ def export_experiment(
 
     mlflow_attr = { "experiment": exp_dct , "runs": ok_run_ids }
 
+    marks = watermarks.get_watermarks()
+    delta = marks.commit_runs(exp, ok_run_ids) if marks else None
+    if delta is not None:
+        info_attr["delta"] = delta
+
     # Export Logged Models
     if has_logged_model_support():
         ok_logged_models, failed_logged_models = export_logged_models.export_logged_models(
@@ -155,16 +179,52 @@ def export_experiment(
     else:
         _logger.info(f"{len(ok_run_ids)}/{num_runs_exported} runs succesfully exported {msg}")
         _logger.info(f"{len(failed_run_ids)}/{num_runs_exported} runs failed {msg}")
-    return len(ok_run_ids), len(failed_run_ids)
 
 
 def _export_run(mlflow_client, run, output_dir,
-        ok_run_ids, failed_run_ids,
         run_start_time, run_start_time_str,
         runs_until, runs_until_str,
-        export_deleted_runs, notebook_formats
+        export_deleted_runs, notebook_formats, metrics_format=None
     ):
-    # Skip runs outside the time window
+    """
+    :return: True if exported, False if failed or None if skipped.
+    """
+    if _is_outside_time_window(run, run_start_time, run_start_time_str, runs_until, runs_until_str):
+        return None
+    run_dir = os.path.join(output_dir, f'runs/{run.info.run_id}')
+    if export_journal.get_completed("run", run_dir, run.info.run_id):
+        return True
+    is_success = export_run(
+        run_id = run.info.run_id,
+        output_dir = run_dir,
+        export_deleted_runs = export_deleted_runs,
+        notebook_formats = notebook_formats,
+        mlflow_client = mlflow_client,
+        metrics_format = metrics_format
+    )
+    if is_success:
+        export_journal.record("run", run_dir, run.info.run_id)
+    return bool(is_success)
+
+
+def _mk_runs_filter(run_start_time, runs_until):
+    """
+    Build the search_runs filter for the run start time window (millis).
+    :return: Filter string or None if there is no time window.
+    """
+    filters = []
+    if run_start_time:
+        filters.append(f"start_time > {run_start_time}")
+    if runs_until:
+        filters.append(f"start_time < {runs_until}")
+    # Note: " AND ".join() works correctly for both single and multiple filters
+    # Single filter: " AND ".join(["a"]) returns "a"
+    # Multiple filters: " AND ".join(["a", "b"]) returns "a AND b"
+    return " AND ".join(filters) if filters else None
+
+
+def _is_outside_time_window(run, run_start_time, run_start_time_str, runs_until, runs_until_str):
+    """ Skip runs outside the time window """
     if (run_start_time and run.info.start_time < run_start_time) or (runs_until and run.info.start_time >= runs_until):
         msg = {
             "run_id": {run.info.run_id},
@@ -176,25 +236,18 @@ def _export_run(mlflow_client, run, output_dir,
         if runs_until and run.info.start_time >= runs_until:
             msg["runs_until"] = runs_until_str
         _logger.info(f"Not exporting run: {msg}")
-        return
-    is_success = export_run(
-        run_id = run.info.run_id,
-        output_dir = os.path.join(output_dir, f'runs/{run.info.run_id}'),
-        export_deleted_runs = export_deleted_runs,
-        notebook_formats = notebook_formats,
-        mlflow_client = mlflow_client
-    )
-    if is_success:
-        ok_run_ids.append(run.info.run_id)
-    else:
-        failed_run_ids.append(run.info.run_id)
+        return True
+    return False
 
 
 def _get_runs(mlflow_client, run_ids, exp, failed_run_ids):
     runs = []
+    resolved_runs, errors = run_resolver.get_runs(mlflow_client, run_ids, experiment_ids=[exp.experiment_id])
     for run_id in run_ids:
         try:
-            run = mlflow_client.get_run(run_id)
+            if run_id in errors:
+                raise errors[run_id]
+            run = resolved_runs[run_id]
             if run.info.experiment_id == exp.experiment_id:
                 runs.append(run)
             else:
@@ -222,8 +275,10 @@ def _get_runs(mlflow_client, run_ids, exp, failed_run_ids):
 @opt_export_deleted_runs
 @opt_check_nested_runs
 @opt_notebook_formats
+@opt_metrics_format
+@opt_use_threads
 
-def main(experiment, output_dir, run_ids, export_permissions, run_start_time, runs_until, export_deleted_runs, check_nested_runs, notebook_formats):
+def main(experiment, output_dir, run_ids, export_permissions, run_start_time, runs_until, export_deleted_runs, check_nested_runs, notebook_formats, metrics_format, use_threads):
     _logger.info("Options:")
     for k,v in locals().items():
         _logger.info(f"  {k}: {v}")
@@ -240,7 +295,9 @@ def main(experiment, output_dir, run_ids, export_permissions, run_start_time, ru
         runs_until = runs_until,
         export_deleted_runs = export_deleted_runs,
         check_nested_runs = check_nested_runs,
-        notebook_formats = utils.string_to_list(notebook_formats)
+        notebook_formats = utils.string_to_list(notebook_formats),
+        metrics_format = metrics_format,
+        use_threads = use_threads
     )
 
 
@@ -3,8 +3,10 @@ Imports an experiment to a directory.
 """
 
 import os
+from dataclasses import dataclass
 import click
-from mlflow.entities import RunStatus
+from mlflow.entities import Run, RunStatus
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
 
 from mlflow_export_import.common.click_options import (
     opt_experiment_name,
@@ -12,17 +14,19 @@ from mlflow_export_import.common.click_options import (
     opt_import_source_tags,
     opt_import_permissions,
     opt_use_src_user_id,
-    opt_dst_notebook_dir
+    opt_dst_notebook_dir,
+    opt_use_threads
 )
 from mlflow_export_import.client.client_utils import create_mlflow_client, create_dbx_client
 from mlflow_export_import.common import utils, mlflow_utils, io_utils
-from mlflow_export_import.common import ws_permissions_utils
+from mlflow_export_import.common import ws_permissions_utils, watermarks, destination_cache, worker_pool
 from mlflow_export_import.common.source_tags import (
     set_source_tags_for_field,
     mk_source_tags_mlflow_tag,
     fmt_timestamps
 )
-from mlflow_export_import.run.import_run import import_run
+from mlflow_export_import.run.import_run import import_run, read_run
+from mlflow_export_import.run import run_utils
 from mlflow_export_import.logged_model.import_logged_model import import_logged_model
 from mlflow_export_import.trace.import_trace import import_trace
 
@@ -36,6 +40,7 @@ def import_experiment(
         import_permissions = False,
         use_src_user_id = False,
         dst_notebook_dir = None,
+        use_threads = False,
         mlflow_client = None
     ):
     """
@@ -46,11 +51,33 @@ def import_experiment(
     :param use_src_user_id: Set the destination user ID to the source user ID.
                             Source user ID is ignored when importing into Databricks.
     :param dst_notebook_dir: Destination Databricks workspace directory if importing notebook.
+    :param use_threads: Import runs in parallel, parent runs before their nested runs.
     :param mlflow_client: MLflow client.
     :return: Dictionary of source run_id (key) to destination run.info object (value).
     """
 
     mlflow_client = mlflow_client or create_mlflow_client()
+    max_workers = utils.get_threads(use_threads)
+    with destination_cache.activate(), worker_pool.activate(max_workers):
+        return _import_experiment(
+            mlflow_client,
+            experiment_name,
+            input_dir,
+            import_source_tags,
+            import_permissions,
+            use_src_user_id,
+            dst_notebook_dir
+        )
+
+
+def _import_experiment(mlflow_client,
+        experiment_name,
+        input_dir,
+        import_source_tags,
+        import_permissions,
+        use_src_user_id,
+        dst_notebook_dir
+    ):
     dbx_client = create_dbx_client(mlflow_client)
 
     path = io_utils.mk_manifest_json_path(input_dir, "experiment.json")
@@ -83,60 +110,15 @@ def import_experiment(
     run_info_map = {}
     imported_logged_models = []
     imported_traces = []
-    for src_run_id in run_ids:
-        dst_run, src_parent_run_id = import_run(
-            mlflow_client = mlflow_client,
-            experiment_name = experiment_name,
-            input_dir = os.path.join(input_dir, f'runs/{src_run_id}'),
-            dst_notebook_dir = dst_notebook_dir,
-            import_source_tags = import_source_tags,
-            use_src_user_id = use_src_user_id
-        )
-        dst_run_id = dst_run.info.run_id
-        run_ids_map[src_run_id] = { "dst_run_id": dst_run_id, "src_parent_run_id": src_parent_run_id }
-        run_info_map[src_run_id] = dst_run.info
-
-        src_run_dct = io_utils.read_file_mlflow(os.path.join(input_dir, f'runs/{src_run_id}/run.json'))
-
-        # Logged Models
-        if "model_inputs" in src_run_dct["inputs"]:
-            for model in src_run_dct["inputs"]["model_inputs"]:
-                import_logged_model(
-                    input_dir = os.path.join(f"{input_dir}/logged_models", model['model_id']),
-                    experiment_name = experiment_name,
-                    run_id = dst_run_id,
-                    mlflow_client = mlflow_client,
-                    model_type = "input",
-                    step = model['step'],
-                )
-                imported_logged_models.append(model['model_id'])
-
-        if "outputs" in src_run_dct:
-            for model in src_run_dct["outputs"]["model_outputs"]:
-                import_logged_model(
-                    input_dir = os.path.join(f"{input_dir}/logged_models", model['model_id']),
-                    experiment_name = experiment_name,
-                    run_id = dst_run_id,
-                    mlflow_client = mlflow_client,
-                    model_type = "output",
-                    step = model['step'],
-                )
-                imported_logged_models.append(model['model_id'])
-
-        # in logged models after logging the metrics, run status is changing back to Finished. So setting the status again.
-        default_status = RunStatus.to_string(RunStatus.FINISHED)
-        mlflow_client.set_terminated(dst_run_id, src_run_dct.get("info", default_status).get("status", default_status))
-
-        # Import traces associated to the run
-        if src_run_dct.get("traces"):
-            for trace_id in src_run_dct["traces"]:
-                import_trace(
-                    input_dir=os.path.join(f"{input_dir}/traces", trace_id),
-                    experiment_name=experiment_name,
-                    run_id=dst_run_id,
-                    mlflow_client=mlflow_client,
-                )
-                imported_traces.append(trace_id)
+    not_imported_run_ids = []
+    for res in _import_runs(mlflow_client, experiment_name, input_dir, run_ids, import_source_tags, use_src_user_id, dst_notebook_dir):
+        if isinstance(res, _FailedRun):
+            not_imported_run_ids.append(res.src_run_id)
+            continue
+        run_ids_map[res.src_run_id] = { "dst_run_id": res.dst_run.info.run_id, "src_parent_run_id": res.src_parent_run_id }
+        run_info_map[res.src_run_id] = res.dst_run.info
+        imported_logged_models += res.logged_models
+        imported_traces += res.traces
 
     ## Importing the logged models that are not part of run
     if mlflow_dct.get("logged_models"):
@@ -161,11 +143,170 @@ def import_experiment(
     _logger.info(f"Imported {len(run_ids)} runs into experiment '{experiment_name}' from '{input_dir}'")
     if len(failed_run_ids) > 0:
         _logger.warning(f"{len(failed_run_ids)} failed runs were not imported - see '{path}'")
-    utils.nested_tags(mlflow_client, run_ids_map)
+    if len(not_imported_run_ids) > 0:
+        _logger.warning(f"{len(not_imported_run_ids)} runs could not be imported into experiment '{experiment_name}': {not_imported_run_ids}")
+    delta = info.get("delta")
+    if delta:
+        _apply_run_delta(mlflow_client, exp, delta, run_ids_map, import_source_tags)
 
     return run_info_map
 
 
+@dataclass()
+class _ImportedRun:
+    src_run_id: str
+    dst_run: Run
+    src_parent_run_id: str
+    logged_models: list
+    traces: list
+
+
+@dataclass()
+class _FailedRun:
+    src_run_id: str
+    reason: str
+
+
+def _import_runs(mlflow_client, experiment_name, input_dir, run_ids, import_source_tags, use_src_user_id, dst_notebook_dir):
+    """
+    Import the runs of an experiment in the active worker pool, parent runs before their nested runs.
+
+    A nested run whose parent run is part of the export waits until its parent has been imported and is then
+    imported with the destination parent run ID among its initial tags. Other runs are imported right away.
+    A nested run whose parent run failed to import or is missing from the export, or whose parent links form
+    a cycle, is imported without waiting for its parent. Only the run.json content of waiting runs is kept in memory.
+
+    :return: Generator of _ImportedRun, or _FailedRun for the runs that could not be imported.
+    """
+    src_run_ids = set(run_ids)
+    dst_run_ids = {} # source run ID => destination run ID of the imported runs
+    failed_runs = {} # source run ID => reason of the runs that could not be imported
+
+    def _import(item, force):
+        """ Import a run with its logged models and traces, or return it as waiting for its parent. """
+        src_run_id, src_dct = item
+        run_dir = os.path.join(input_dir, "runs", src_run_id)
+        if src_dct is None and not os.path.exists(os.path.join(run_dir, "run.json")):
+            return _FailedRun(src_run_id, "is missing from the export")
+        try:
+            src_dct = src_dct or read_run(run_dir)
+            src_parent_run_id = io_utils.get_mlflow(src_dct)["tags"].get(MLFLOW_PARENT_RUN_ID)
+            dst_parent_run_id = None
+            if src_parent_run_id in src_run_ids and src_parent_run_id != src_run_id:
+                dst_parent_run_id = dst_run_ids.get(src_parent_run_id)
+                reason = failed_runs.get(src_parent_run_id)
+                if reason:
+                    _logger.warning(f"Importing run {src_run_id} without its parent run link since parent run {src_parent_run_id} {reason}")
+                elif dst_parent_run_id is None and not force:
+                    return src_run_id, src_dct
+            return _import_run_and_dependents(mlflow_client, experiment_name, input_dir, run_dir, src_dct,
+                dst_parent_run_id, import_source_tags, use_src_user_id, dst_notebook_dir)
+        except Exception as e:
+            return _FailedRun(src_run_id, f"failed to import: {e}")
+
+    pending = [ (src_run_id, None) for src_run_id in run_ids ]
+    force = False
+    while pending:
+        waiting = []
+        for res in worker_pool.imap(lambda item: _import(item, force), pending):
+            if isinstance(res, _ImportedRun):
+                dst_run_ids[res.src_run_id] = res.dst_run.info.run_id
+                yield res
+            elif isinstance(res, _FailedRun):
+                _logger.error(f"Run {res.src_run_id} of experiment '{experiment_name}' {res.reason}")
+                failed_runs[res.src_run_id] = res.reason
+                yield res
+            else:
+                waiting.append(res)
+        if len(waiting) == len(pending): # parents of waiting runs are waiting themselves
+            waiting_run_ids = [ src_run_id for src_run_id, _ in waiting ]
+            _logger.warning(f"Parent run links of runs {waiting_run_ids} of experiment '{experiment_name}' form a cycle. Importing them without waiting for their parent runs.")
+            force = True
+        pending = waiting
+
+
+def _import_run_and_dependents(mlflow_client, experiment_name, input_dir, run_dir, src_dct, dst_parent_run_id,
+        import_source_tags, use_src_user_id, dst_notebook_dir
+    ):
+    """
+    Import a run and then the logged models and traces that depend on it.
+    """
+    dst_run, src_parent_run_id = import_run(
+        mlflow_client = mlflow_client,
+        experiment_name = experiment_name,
+        input_dir = run_dir,
+        dst_notebook_dir = dst_notebook_dir,
+        import_source_tags = import_source_tags,
+        use_src_user_id = use_src_user_id,
+        fetch_run = False,
+        src_dct = src_dct,
+        dst_parent_run_id = dst_parent_run_id
+    )
+    dst_run_id = dst_run.info.run_id
+    src_run_dct = io_utils.get_mlflow(src_dct)
+
+    # Logged Models
+    logged_models = []
+    if "model_inputs" in src_run_dct["inputs"]:
+        for model in src_run_dct["inputs"]["model_inputs"]:
+            import_logged_model(
+                input_dir = os.path.join(f"{input_dir}/logged_models", model['model_id']),
+                experiment_name = experiment_name,
+                run_id = dst_run_id,
+                mlflow_client = mlflow_client,
+                model_type = "input",
+                step = model['step'],
+            )
+            logged_models.append(model['model_id'])
+
+    if "outputs" in src_run_dct:
+        for model in src_run_dct["outputs"]["model_outputs"]:
+            import_logged_model(
+                input_dir = os.path.join(f"{input_dir}/logged_models", model['model_id']),
+                experiment_name = experiment_name,
+                run_id = dst_run_id,
+                mlflow_client = mlflow_client,
+                model_type = "output",
+                step = model['step'],
+            )
+            logged_models.append(model['model_id'])
+
+    # in logged models after logging the metrics, run status is changing back to Finished. So setting the status again.
+    if logged_models:
+        default_status = RunStatus.to_string(RunStatus.FINISHED)
+        run_utils.set_terminated(mlflow_client, dst_run_id, src_run_dct.get("info", default_status).get("status", default_status))
+
+    # Import traces associated to the run
+    traces = []
+    if src_run_dct.get("traces"):
+        for trace_id in src_run_dct["traces"]:
+            import_trace(
+                input_dir=os.path.join(f"{input_dir}/traces", trace_id),
+                experiment_name=experiment_name,
+                run_id=dst_run_id,
+                mlflow_client=mlflow_client,
+            )
+            traces.append(trace_id)
+
+    src_run_id = src_run_dct["info"]["run_id"]
+    return _ImportedRun(src_run_id, dst_run, src_parent_run_id, logged_models, traces)
+
+
+def _apply_run_delta(mlflow_client, exp, delta, run_ids_map, import_source_tags):
+    """
+    Replace the runs imported from an earlier export by those of a delta (incremental) export.
+    """
+    num_replaced_runs = len(delta.get("changed_runs", [])) + len(delta.get("deleted_runs", []))
+    if num_replaced_runs == 0:
+        return
+    if not import_source_tags:
+        _logger.warning(f"Cannot replace {num_replaced_runs} changed or deleted runs of experiment '{exp.name}' " \
+            "imported from an earlier export without the 'import_source_tags' option")
+        return
+    num_deleted = watermarks.apply_run_delta(mlflow_client, exp.experiment_id, delta, run_ids_map)
+    _logger.info(f"Deleted {num_deleted} runs of experiment '{exp.name}' imported from an earlier export")
+
+
 @click.command()
 @opt_experiment_name
 @opt_input_dir
@@ -173,8 +314,9 @@ def import_experiment(
 @opt_import_source_tags
 @opt_use_src_user_id
 @opt_dst_notebook_dir
+@opt_use_threads
 
-def main(input_dir, experiment_name, import_source_tags, use_src_user_id, dst_notebook_dir, import_permissions):
+def main(input_dir, experiment_name, import_source_tags, use_src_user_id, dst_notebook_dir, import_permissions, use_threads):
     _logger.info("Options:")
     for k,v in locals().items():
         _logger.info(f"  {k}: {v}")
@@ -184,7 +326,8 @@ def main(input_dir, experiment_name, import_source_tags, use_src_user_id, dst_no
         import_source_tags = import_source_tags,
         import_permissions = import_permissions,
         use_src_user_id = use_src_user_id,
-        dst_notebook_dir = dst_notebook_dir
+        dst_notebook_dir = dst_notebook_dir,
+        use_threads = use_threads
     )
 
 
@@ -13,6 +13,7 @@ from mlflow.exceptions import RestException
 from mlflow_export_import.client.client_utils import create_mlflow_client
 from mlflow_export_import.common import filesystem as _fs
 from mlflow_export_import.common import io_utils
+from mlflow_export_import.common import artifact_transfer, blob_store
 from mlflow_export_import.common import utils, logged_model_utils
 from mlflow_export_import.common.click_options import (
     opt_model_id,
@@ -55,10 +56,19 @@ def export_logged_model(
 
         if len(artifacts) > 0:
             fs.mkdirs(output_dir)
-            mlflow.artifacts.download_artifacts(
-                artifact_uri=logged_model.artifact_location,
-                dst_path=_fs.mk_local_path(output_dir),
-                tracking_uri=mlflow_client._tracking_client.tracking_uri)
+            store = blob_store.get_store()
+            if store:
+                from mlflow.entities import LoggedModelStatus
+                store.export_artifacts(
+                    artifact_uri=logged_model.artifact_location,
+                    manifest_dir=output_dir,
+                    tracking_uri=mlflow_client._tracking_client.tracking_uri,
+                    reuse=logged_model.status == LoggedModelStatus.READY)
+            else:
+                artifact_transfer.download_artifacts(
+                    artifact_uri=logged_model.artifact_location,
+                    dst_path=artifact_transfer.mk_dst_path(_fs.mk_local_path(output_dir), logged_model.artifact_location),
+                    tracking_uri=mlflow_client._tracking_client.tracking_uri)
 
         msg = {"model_id": model_id, "name": logged_model.name, "experiment_id": logged_model.experiment_id}
         dur = format_seconds(time.time() - start_time)
@@ -3,6 +3,7 @@ Imports a logged model from a directory
 """
 
 import os
+import tempfile
 import click
 import mlflow
 from mlflow.entities import RunStatus
@@ -14,8 +15,9 @@ from mlflow_export_import.common.click_options import (
     opt_experiment_name
 )
 from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common import artifact_transfer, blob_store
 from mlflow_export_import.client.client_utils import create_mlflow_client
-from mlflow_export_import.logged_model.logged_model_utils import update_logged_model_mlmodel_data
+from mlflow_export_import.logged_model.logged_model_utils import patch_logged_model_mlmodel
 from mlflow_export_import.logged_model.logged_model_importer import _import_inputs, _log_metrics
 from mlflow_export_import.common.version_utils import has_logged_model_support
 from mlflow_export_import.client.client_utils import create_mlflow_client, create_dbx_client
@@ -36,7 +38,6 @@ def import_logged_model(
     :param experiment_name: Name of the experiment to add Logged Model to.
     :param run_id: Run id to add Logged Model to.
     :param mlmodel_fix: Add correct run ID in destination MLmodel artifact.
-                        Can be expensive for deeply nested artifacts.
     :param model_type: Type of logged model to a run. Possible values output or input.
     :param step: Step to add Logged Model to run.
     :param mlflow_client: MLflow client.
@@ -85,12 +86,13 @@ def import_logged_model(
                 mlflow_client.log_outputs(run_id=run_id,
                                          models=[LoggedModelOutput(logged_model.model_id, step=step if step else 0)])
 
-        path = _fs.mk_local_path(os.path.join(input_dir, "artifacts"))
-
-        if os.path.exists(path):
-            mlflow_client.log_model_artifacts(logged_model.model_id, path)
-            if mlmodel_fix:
-                update_logged_model_mlmodel_data(mlflow_client, logged_model, os.path.join(path, "MLmodel"))
+        with blob_store.local_artifacts(input_dir) as path, tempfile.TemporaryDirectory() as staging_dir:
+            if path:
+                artifact_transfer.upload_artifacts(
+                    local_dir=path,
+                    artifact_uri=logged_model.artifact_location,
+                    tracking_uri=mlflow_client._tracking_client.tracking_uri,
+                    replacements=patch_logged_model_mlmodel(logged_model, path, staging_dir) if mlmodel_fix else None)
 
         mlflow_client.finalize_logged_model(logged_model.model_id, src_logged_model_dct["status"])
         mlflow_client.set_terminated(run_id, RunStatus.to_string(RunStatus.FINISHED))
@@ -108,7 +110,7 @@ def import_logged_model(
 @opt_input_dir
 @opt_experiment_name
 @click.option("--mlmodel-fix",
-    help="Add correct run ID in destination MLmodel artifact. Can be expensive for deeply nested artifacts.",
+    help="Add correct run ID in destination MLmodel artifact.",
     type=bool,
     default=True,
     show_default=True
@@ -1,19 +1,26 @@
 
 import os
-import tempfile
 from mlflow_export_import.common import io_utils
 
 
-def update_logged_model_mlmodel_data(mlflow_client, logged_model, local_path):
+def patch_logged_model_mlmodel(logged_model, local_dir, staging_dir):
+    """
+    Write a copy of the logged model's MLmodel file with its destination IDs, to be uploaded in place of
+    the original (see artifact_transfer.upload_artifacts) which may be a hard link to the export's blob store.
+
+    :return: Dict of 'MLmodel' to its patched copy, or an empty dict if there is no MLmodel file.
+    """
+    local_path = os.path.join(local_dir, "MLmodel")
+    if not os.path.exists(local_path):
+        return {}
     mlmodel = io_utils.read_file(local_path, "yaml")
     mlmodel["run_id"] = logged_model.source_run_id
     mlmodel["model_id"] = logged_model.model_id
     mlmodel["model_uuid"] = logged_model.model_id
     mlmodel["artifact_path"] = logged_model.artifact_location
-    with tempfile.TemporaryDirectory() as tmp_dir:
-        output_path = os.path.join(tmp_dir, "MLmodel")
-        io_utils.write_file(output_path, mlmodel, "yaml")
-        mlflow_client.log_model_artifact(logged_model.model_id, output_path)
+    output_path = os.path.join(staging_dir, "MLmodel")
+    io_utils.write_file(output_path, mlmodel, "yaml")
+    return { "MLmodel": output_path }
 
 
 
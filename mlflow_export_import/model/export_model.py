@@ -8,6 +8,7 @@ from dataclasses import dataclass
 from mlflow.exceptions import RestException
 
 from mlflow_export_import.client.client_utils import create_mlflow_client
+from mlflow_export_import.client import metadata_cache
 from mlflow_export_import.common.click_options import (
     opt_model,
     opt_output_dir,
@@ -19,7 +20,7 @@ from mlflow_export_import.common.click_options import (
     opt_export_permissions,
     opt_export_version_model
 )
-from mlflow_export_import.common import utils, io_utils, model_utils
+from mlflow_export_import.common import utils, io_utils, model_utils, watermarks, export_journal
 from mlflow_export_import.common.timestamp_utils import adjust_timestamps
 from mlflow_export_import.common import MlflowExportImportException
 from mlflow_export_import.run.export_run import export_run
@@ -97,10 +98,20 @@ def export_model(
 def _export_model(mlflow_client, model_name, output_dir, opts):
     ori_versions = model_utils.list_model_versions(mlflow_client, model_name, opts.export_latest_versions)
     msg = "latest" if opts.export_latest_versions else "all"
+    marks = watermarks.get_watermarks()
+    if marks:
+        ori_versions = marks.filter_model_versions(model_name, ori_versions)
+        msg = f"new or changed {msg}"
     _logger.info(f"Exporting model '{model_name}': found {len(ori_versions)} '{msg}' versions")
 
     model = model_utils.get_registered_model(mlflow_client, model_name, opts.export_permissions)
+    model_last_updated_timestamp = model.get("last_updated_timestamp")
     versions, failed_versions = _export_versions(mlflow_client, model, ori_versions, output_dir, opts)
+    if marks:
+        exported_versions = { str(vr["version"]) for vr in versions }
+        marks.commit_model(model_name, model_last_updated_timestamp,
+            [ vr for vr in ori_versions if str(vr.version) in exported_versions ],
+            [ failed["version"]["version"] for failed in failed_versions ])
     _adjust_model(model, versions)
 
     info_attr = {
@@ -134,6 +145,10 @@ def _export_versions(mlflow_client, model_dct, versions, output_dir, opts):
 
 
 def _export_version(mlflow_client, vr, output_dir, aliases, output_versions, failed_versions, j, num_versions, opts):
+    completed = export_journal.get_completed("model_version", output_dir, vr.version)
+    if completed:
+        output_versions.append(completed["data"])
+        return
     _output_dir = os.path.join(output_dir, vr.run_id)
     msg = { "name": vr.name, "version": vr.version, "stage": vr.current_stage, "aliases": aliases }
     _logger.info(f"Exporting model verson {j+1}/{num_versions}: {msg} to '{_output_dir}'")
@@ -167,6 +182,7 @@ def _export_version(mlflow_client, vr, output_dir, aliases, output_versions, fai
         else:
             _add_metadata_to_version(mlflow_client, vr_dct, run)
             output_versions.append(vr_dct)
+            export_journal.record("model_version", output_dir, vr.version, vr_dct)
 
     except RestException as e:
         err_msg = { "model": vr.name, "version": vr.version, "run_id": vr.run_id, "RestException": e.json  }
@@ -185,7 +201,7 @@ def _export_version(mlflow_client, vr, output_dir, aliases, output_versions, fai
 
 def _add_metadata_to_version(mlflow_client, vr_dct, run):
     vr_dct["_run_artifact_uri"] = run.info.artifact_uri
-    experiment = mlflow_client.get_experiment(run.info.experiment_id)
+    experiment = metadata_cache.get_experiment(mlflow_client, run.info.experiment_id)
     vr_dct["_experiment_name"] = experiment.name
 
 
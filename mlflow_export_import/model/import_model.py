@@ -5,7 +5,6 @@ Imports a registered model, its versions and the version's run.
 import os
 import click
 
-import mlflow
 from mlflow.exceptions import RestException
 
 from mlflow_export_import.common.click_options import (
@@ -17,12 +16,12 @@ from mlflow_export_import.common.click_options import (
     opt_import_source_tags,
     opt_verbose
 )
-from mlflow_export_import.common import utils, io_utils, model_utils
+from mlflow_export_import.common import utils, io_utils, model_utils, mlflow_utils, destination_cache
 from mlflow_export_import.common import filesystem as _fs
-from mlflow_export_import.common.mlflow_utils import MlflowTrackingUriTweak
 from mlflow_export_import.common.source_tags import set_source_tags_for_field, fmt_timestamps
 from mlflow_export_import.common import MlflowExportImportException
 from mlflow_export_import.client.client_utils import create_mlflow_client, create_dbx_client
+from mlflow_export_import.client import metadata_cache
 from mlflow_export_import.run.import_run import import_run
 from mlflow_export_import.bulk import rename_utils
 
@@ -161,16 +160,17 @@ class ModelImporter(BaseModelImporter):
         """
         model_dct = self._import_model(model_name, input_dir, delete_model)
         _logger.info("Importing versions:")
-        for vr in model_dct.get("versions",[]):
-            try:
-                run_id = self._import_run(input_dir, experiment_name, vr)
-                if run_id:
-                    self.import_version(model_name, vr, run_id)
-            except RestException as e:
-                msg = { "model": model_name, "version": vr["version"], "src_run_id": vr["run_id"], "experiment": experiment_name, "RestException": str(e) }
-                _logger.error(f"Failed to import model version: {msg}")
-                import traceback
-                traceback.print_exc()
+        with destination_cache.activate():
+            for vr in model_dct.get("versions",[]):
+                try:
+                    run_id = self._import_run(input_dir, experiment_name, vr)
+                    if run_id:
+                        self.import_version(model_name, vr, run_id)
+                except RestException as e:
+                    msg = { "model": model_name, "version": vr["version"], "src_run_id": vr["run_id"], "experiment": experiment_name, "RestException": str(e) }
+                    _logger.error(f"Failed to import model version: {msg}")
+                    import traceback
+                    traceback.print_exc()
         if verbose:
             model_utils.dump_model_versions(self.mlflow_client, model_name)
 
@@ -200,7 +200,6 @@ class ModelImporter(BaseModelImporter):
         )
 
         dst_run_id = dst_run.info.run_id
-        run = self.mlflow_client.get_run(dst_run_id)
 
         ## Import Logged model specific to run
         if "models" in vr["source"]:
@@ -212,6 +211,8 @@ class ModelImporter(BaseModelImporter):
                 mlflow_client = self.mlflow_client,
             )
 
+        # NOTE: fetch the run once fully imported (including its logged model outputs) so that import_version() hits the cache
+        run = metadata_cache.get_run(self.mlflow_client, dst_run_id)
         _logger.info( "    Destination run - imported run:")
         _logger.info(f"      run_id: {dst_run_id}")
         _logger.info(f"      run_artifact_uri: {run.info.artifact_uri}")
@@ -219,7 +220,7 @@ class ModelImporter(BaseModelImporter):
 
 
     def import_version(self, model_name, src_vr, dst_run_id):
-        dst_run = self.mlflow_client.get_run(dst_run_id)
+        dst_run = metadata_cache.get_run(self.mlflow_client, dst_run_id)
         model_id = None
         if "models" in src_vr["source"]:
             model_id = dst_run.outputs.model_outputs[0].model_id
@@ -284,8 +285,7 @@ class BulkModelImporter(BaseModelImporter):
                 dst_run_id = dst_run_info.run_id
                 exp_name = rename_utils.rename(vr["_experiment_name"], self.experiment_renames, "experiment")
                 try:
-                    with MlflowTrackingUriTweak(self.mlflow_client):
-                        mlflow.set_experiment(exp_name)
+                    mlflow_utils.set_experiment(self.mlflow_client, self.dbx_client, exp_name)
                     self.import_version(model_name, vr, dst_run_id)
                 except RestException as e:
                     msg = { "model": model_name, "version": vr.get("version",[]), "experiment": exp_name, "run_id": dst_run_id, "exception": str(e) }
@@ -298,7 +298,7 @@ class BulkModelImporter(BaseModelImporter):
         src_run_id = src_vr["run_id"]
         model_id = None
         if "models" in src_vr["source"]: # 3.x logged models
-            model_id = self.mlflow_client.get_run(dst_run_id).outputs.model_outputs[0].model_id
+            model_id = metadata_cache.get_run(self.mlflow_client, dst_run_id).outputs.model_outputs[0].model_id
             dst_source = _get_logged_model_artifact_path(model_id)
         else:
             model_path = _extract_model_path(src_vr["source"], src_run_id)  # get path to model artifact
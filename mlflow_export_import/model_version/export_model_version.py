@@ -7,6 +7,7 @@ import time
 import click
 
 from mlflow_export_import.client.client_utils import create_mlflow_client, create_http_client
+from mlflow_export_import.client import metadata_cache
 from mlflow_export_import.common import utils, io_utils, model_utils
 from mlflow_export_import.common.timestamp_utils import adjust_timestamps, format_seconds
 from mlflow_export_import.run.export_run import export_run
@@ -58,8 +59,8 @@ def export_model_version(
     """
     mlflow_client = mlflow_client or create_mlflow_client()
 
-    _model = mlflow_client.get_registered_model(model_name)
-    vr = mlflow_client.get_model_version(model_name, version)
+    _model = metadata_cache.get_registered_model(mlflow_client, model_name)
+    vr = metadata_cache.get_model_version(mlflow_client, model_name, version)
     vr_dct = model_utils.model_version_to_dict(vr)
 
     _export_registered_model(mlflow_client, model_name, export_permissions, output_dir)
@@ -7,18 +7,22 @@ import time
 import traceback
 import click
 import mlflow
+from mlflow.entities import RunStatus
 
 from mlflow_export_import.common import utils
 from mlflow_export_import.common.click_options import (
     opt_run_id,
     opt_output_dir,
-    opt_notebook_formats
+    opt_notebook_formats,
+    opt_metrics_format
 )
 from mlflow.exceptions import RestException
 from mlflow_export_import.common import filesystem as _fs
 from mlflow_export_import.common import io_utils
+from mlflow_export_import.common import artifact_transfer, blob_store
 from mlflow_export_import.common.timestamp_utils import adjust_timestamps, format_seconds
 from mlflow_export_import.client.client_utils import create_mlflow_client, create_dbx_client
+from mlflow_export_import.run import metric_history
 from mlflow_export_import.notebook.download_notebook import download_notebook
 from mlflow_export_import.logged_model.export_logged_model import export_logged_model
 
@@ -36,7 +40,8 @@ def export_run(
         notebook_formats = None,
         raise_exception = False,
         mlflow_client = None,
-        export_logged_models = False
+        export_logged_models = False,
+        metrics_format = None
     ):
     """
     :param run_id: Run ID.
@@ -46,6 +51,8 @@ def export_run(
     :param raise_exception: Raise an exception instead of just logging error and returning None.
     :param mlflow_client: MLflow client.
     :param export_logged_models: Export logged models.
+    :param metrics_format: Metric history format: 'json' (in run.json), 'npz' or 'parquet' (sidecar file referenced by run.json).
+                           Default is MLFLOW_EXPORT_IMPORT_METRICS_FORMAT or 'json'.
     :return: Run or None if the run was not exported due to export_deleted_runs or errors.
     """
 
@@ -54,82 +61,21 @@ def export_run(
 
     if notebook_formats is None:
         notebook_formats = []
+    metrics_format = metric_history.get_metrics_format(metrics_format)
 
     start_time = time.time()
     experiment_id = None
     try:
         run = mlflow_client.get_run(run_id)
-        dst_path = os.path.join(output_dir, "artifacts")
-        msg = { "run_id": run.info.run_id, "dst_path": dst_path }
-        if run.info.lifecycle_stage == "deleted" and not export_deleted_runs:
-            _logger.warning(f"Not exporting run '{run.info.run_id} because its lifecycle_stage is '{run.info.lifecycle_stage}'")
+        if is_skipped_deleted_run(run, export_deleted_runs):
             return None
         experiment_id = run.info.experiment_id
-        msg = { "run_id": run.info.run_id, "lifecycle_stage": run.info.lifecycle_stage, "experiment_id": run.info.experiment_id }
-        tags = run.data.tags
-        tags = dict(sorted(tags.items()))
-
-        info = utils.strip_underscores(run.info)
-        adjust_timestamps(info, ["start_time", "end_time"])
-        mlflow_attr = {
-            "info": info,
-            "params": run.data.params,
-            "metrics": _get_metrics_with_steps(mlflow_client, run),
-            "tags": tags,
-            "inputs": {
-                "dataset_inputs": _inputs_to_dict(run.inputs),
-            },
-        }
-
-        if hasattr(run, "outputs"):
-            mlflow_attr["inputs"]["model_inputs"] = [utils.strip_underscores(model) for model in run.inputs.model_inputs]
-            mlflow_attr["outputs"] = { "model_outputs": [utils.strip_underscores(model) for model in run.outputs.model_outputs]}
-
-            if export_logged_models:
-
-                # Export Run model inputs
-                for logged_model in run.inputs.model_inputs:
-                    export_logged_model(
-                        model_id=logged_model.model_id,
-                        output_dir=os.path.join(output_dir, logged_model.model_id),
-                        mlflow_client=mlflow_client
-                    )
-
-                # Export Run model outputs
-                for logged_model in run.outputs.model_outputs:
-                    export_logged_model(
-                        model_id=logged_model.model_id,
-                        output_dir=os.path.join(output_dir, logged_model.model_id),
-                        mlflow_client=mlflow_client
-                    )
-
-
-        io_utils.write_export_file(output_dir, "run.json", __file__, mlflow_attr)
-        fs = _fs.get_filesystem(".")
-
-        # copy artifacts
-        _logger.info(f"Exporting run: {msg}")
-        artifacts = mlflow_client.list_artifacts(run.info.run_id)
-
-        if skip_download_run_artifacts:
-            _logger.warning(f"Not downloading run artifacts for run {run.info.run_id}")
-        else:
-            if len(artifacts) > 0: # Because of https://github.com/mlflow/mlflow/issues/2839
-                fs.mkdirs(dst_path)
-                mlflow.artifacts.download_artifacts(
-                    run_id = run.info.run_id,
-                    dst_path = _fs.mk_local_path(dst_path),
-                    tracking_uri = mlflow_client._tracking_client.tracking_uri)
-        notebook = tags.get(MLFLOW_DATABRICKS_NOTEBOOK_PATH)
-
-        # export notebook as artifact
-        if notebook is not None:
-            if len(notebook_formats) > 0:
-                _export_notebook(dbx_client, output_dir, notebook, notebook_formats, run, fs)
-        elif len(notebook_formats) > 0:
-            _logger.warning(f"No notebooks to export for run '{run_id}' since tag '{MLFLOW_DATABRICKS_NOTEBOOK_PATH}' is not set.")
+        histories = metric_history.iter_metric_histories(mlflow_client, run.info.run_id, run.data.metrics.keys())
+        has_artifacts = len(mlflow_client.list_artifacts(run.info.run_id)) > 0
+        write_run(mlflow_client, dbx_client, run, histories, has_artifacts, output_dir,
+            skip_download_run_artifacts, notebook_formats, export_logged_models, metrics_format)
         dur = format_seconds(time.time()-start_time)
-        _logger.info(f"Exported run in {dur}: {msg}")
+        _logger.info(f"Exported run in {dur}: {mk_run_msg(run)}")
         return run
 
     except RestException as e:
@@ -147,15 +93,135 @@ def export_run(
         return None
 
 
-def _get_metrics_with_steps(mlflow_client, run):
-    metrics_with_steps = {}
-    for metric in run.data.metrics.keys():
-        metric_history = mlflow_client.get_metric_history(run.info.run_id,metric)
-        lst = [utils.strip_underscores(m) for m in metric_history]
-        for x in lst:
-            del x["key"]
-        metrics_with_steps[metric] = lst
-    return metrics_with_steps
+def is_skipped_deleted_run(run, export_deleted_runs):
+    """ Return True (with a warning) if the run is deleted and deleted runs are not exported. """
+    if run.info.lifecycle_stage == "deleted" and not export_deleted_runs:
+        _logger.warning(f"Not exporting run '{run.info.run_id} because its lifecycle_stage is '{run.info.lifecycle_stage}'")
+        return True
+    return False
+
+
+def mk_run_msg(run):
+    return { "run_id": run.info.run_id, "lifecycle_stage": run.info.lifecycle_stage, "experiment_id": run.info.experiment_id }
+
+
+def write_run(mlflow_client, dbx_client, run, histories, has_artifacts, output_dir,
+        skip_download_run_artifacts = False,
+        notebook_formats = None,
+        export_logged_models = False,
+        metrics_format = None
+    ):
+    """
+    Write an already fetched run to its export directory: run.json, its metric histories, artifacts,
+    notebook and logged models. Used by export_run and the asyncio export engine so that both write
+    the same export.
+
+    :param run: Run.
+    :param histories: Iterable of (metric key, list of Metric) tuples in run.json order, consumed one history
+                      at a time while run.json or the metrics file is written (see metric_history.iter_metric_histories).
+    :param has_artifacts: The run has artifacts.
+    :param metrics_format: Metric history format: 'json', 'npz' or 'parquet'. Default is MLFLOW_EXPORT_IMPORT_METRICS_FORMAT or 'json'.
+    """
+    metrics_format = metric_history.get_metrics_format(metrics_format)
+    mlflow_attr, file_version = _run_to_dict_with_metrics(run, histories, output_dir, metrics_format)
+
+    if hasattr(run, "outputs") and export_logged_models:
+
+        # Export Run model inputs
+        for logged_model in run.inputs.model_inputs:
+            export_logged_model(
+                model_id=logged_model.model_id,
+                output_dir=os.path.join(output_dir, logged_model.model_id),
+                mlflow_client=mlflow_client
+            )
+
+        # Export Run model outputs
+        for logged_model in run.outputs.model_outputs:
+            export_logged_model(
+                model_id=logged_model.model_id,
+                output_dir=os.path.join(output_dir, logged_model.model_id),
+                mlflow_client=mlflow_client
+            )
+
+    io_utils.write_export_file(output_dir, "run.json", __file__, mlflow_attr, file_version=file_version)
+
+    # copy artifacts
+    _logger.info(f"Exporting run: {mk_run_msg(run)}")
+    _export_artifacts(mlflow_client, dbx_client, run, output_dir, has_artifacts,
+        skip_download_run_artifacts, notebook_formats or [])
+
+
+def _run_to_dict_with_metrics(run, histories, output_dir, metrics_format):
+    """
+    Build the 'mlflow' stanza of run.json with the metric histories inline or in a sidecar file.
+    :return: The stanza and the export file version (None for the default version).
+    """
+    if metrics_format == "json":
+        metrics_with_steps = io_utils.StreamedObject(
+            (key, metric_history.history_to_dicts(history)) for key, history in histories)
+        return _run_to_dict(run, metrics_with_steps), None
+    metrics_file = metric_history.write_metrics_file(output_dir, histories, metrics_format)
+    return _run_to_dict(run, None, metrics_file), metric_history.METRICS_FILE_EXPORT_FILE_VERSION
+
+
+def _run_to_dict(run, metrics_with_steps, metrics_file=None):
+    """
+    Build the 'mlflow' stanza of run.json.
+    """
+    tags = run.data.tags
+    tags = dict(sorted(tags.items()))
+
+    info = utils.strip_underscores(run.info)
+    adjust_timestamps(info, ["start_time", "end_time"])
+    mlflow_attr = {
+        "info": info,
+        "params": run.data.params,
+        "metrics": metrics_with_steps,
+        "tags": tags,
+        "inputs": {
+            "dataset_inputs": _inputs_to_dict(run.inputs),
+        },
+    }
+    if metrics_file:
+        del mlflow_attr["metrics"]
+        mlflow_attr["metrics_file"] = metrics_file
+    if hasattr(run, "outputs"):
+        mlflow_attr["inputs"]["model_inputs"] = [utils.strip_underscores(model) for model in run.inputs.model_inputs]
+        mlflow_attr["outputs"] = { "model_outputs": [utils.strip_underscores(model) for model in run.outputs.model_outputs]}
+    return mlflow_attr
+
+
+def _export_artifacts(mlflow_client, dbx_client, run, output_dir, has_artifacts, skip_download_run_artifacts, notebook_formats):
+    """
+    Download the run's artifacts and its Databricks notebook.
+    """
+    fs = _fs.get_filesystem(".")
+    dst_path = os.path.join(output_dir, "artifacts")
+    if skip_download_run_artifacts:
+        _logger.warning(f"Not downloading run artifacts for run {run.info.run_id}")
+    else:
+        if has_artifacts: # Because of https://github.com/mlflow/mlflow/issues/2839
+            store = blob_store.get_store()
+            if store:
+                store.export_artifacts(
+                    artifact_uri = run.info.artifact_uri,
+                    manifest_dir = output_dir,
+                    tracking_uri = mlflow_client._tracking_client.tracking_uri,
+                    reuse = run.info.status != RunStatus.to_string(RunStatus.RUNNING))
+            else:
+                fs.mkdirs(dst_path)
+                artifact_transfer.download_artifacts(
+                    artifact_uri = run.info.artifact_uri,
+                    dst_path = _fs.mk_local_path(dst_path),
+                    tracking_uri = mlflow_client._tracking_client.tracking_uri)
+    notebook = run.data.tags.get(MLFLOW_DATABRICKS_NOTEBOOK_PATH)
+
+    # export notebook as artifact
+    if notebook is not None:
+        if len(notebook_formats) > 0:
+            _export_notebook(dbx_client, output_dir, notebook, notebook_formats, run, fs)
+    elif len(notebook_formats) > 0:
+        _logger.warning(f"No notebooks to export for run '{run.info.run_id}' since tag '{MLFLOW_DATABRICKS_NOTEBOOK_PATH}' is not set.")
 
 
 def _export_notebook(dbx_client, output_dir, notebook, notebook_formats, run, fs):
@@ -188,8 +254,9 @@ def _inputs_to_dict(inputs):
 @opt_run_id
 @opt_output_dir
 @opt_notebook_formats
+@opt_metrics_format
 
-def main(run_id, output_dir, notebook_formats):
+def main(run_id, output_dir, notebook_formats, metrics_format):
     _logger.info("Options:")
     for k,v in locals().items():
         _logger.info(f"  {k}: {v}")
@@ -197,7 +264,8 @@ def main(run_id, output_dir, notebook_formats):
         run_id = run_id,
         output_dir = output_dir,
         notebook_formats = utils.string_to_list(notebook_formats),
-        export_logged_models = True
+        export_logged_models = True,
+        metrics_format = metrics_format
     )
 
 
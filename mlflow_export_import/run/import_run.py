@@ -3,11 +3,13 @@ Imports a run from a directory.
 """
 
 import os
+import time
+import tempfile
 import click
 import base64
 
 from mlflow.entities.lifecycle_stage import LifecycleStage
-from mlflow.entities import Dataset, DatasetInput, InputTag, RunStatus
+from mlflow.entities import Dataset, DatasetInput, InputTag, Run, RunInfo, RunStatus
 from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
 
 from mlflow_export_import.common.click_options import (
@@ -20,6 +22,8 @@ from mlflow_export_import.common.click_options import (
 from mlflow_export_import.common import utils, mlflow_utils, io_utils
 from mlflow_export_import.common import filesystem as _fs
 from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common import artifact_transfer, blob_store
+from mlflow_export_import.common.source_tags import ExportFields
 from mlflow_export_import.client.client_utils import create_mlflow_client, create_dbx_client, create_http_client
 from mlflow_export_import.logged_model.import_logged_model import import_logged_model
 from . import run_data_importer
@@ -35,6 +39,9 @@ def import_run(
         use_src_user_id = False,
         mlmodel_fix = True,
         import_logged_models = False,
+        fetch_run = True,
+        src_dct = None,
+        dst_parent_run_id = None,
         mlflow_client = None
     ):
     """
@@ -43,13 +50,18 @@ def import_run(
     :param input_dir: Directory that contains the exported run.
     :param dst_notebook_dir: Databricks destination workpsace directory for notebook.
     :param import_source_tags: Import source information for MLFlow objects and create tags in destination object.
-    :param mlmodel_fix: Add correct run ID in destination MLmodel artifact.
-                        Can be expensive for deeply nested artifacts.
+    :param mlmodel_fix: Add correct run ID in destination MLmodel artifacts.
+                        Patched copies of the exported MLmodel files are uploaded in place of the originals.
     :param use_src_user_id: Set the destination user ID to the source user ID.
                             Source user ID is ignored when importing into
                             Databricks since setting it is not allowed.
     :param dst_notebook_dir: Databricks destination workspace directory for notebook import.
     :param import_logged_models: Import logged models into destination object.
+    :param fetch_run: Return the imported run as fetched from the tracking server. Otherwise its info
+                      is built locally and its data is empty, which saves one request per run.
+    :param src_dct: Content of the run's run.json if already read with read_run().
+    :param dst_parent_run_id: Destination ID of the parent run of a nested run. It is set as the
+                              'mlflow.parentRunId' tag when the run is created.
     :param mlflow_client: MLflow client.
     :return: The run and its parent run ID if the run is a nested run.
     """
@@ -68,29 +80,37 @@ def import_run(
     _logger.info(f"Importing run from '{input_dir}'")
 
     exp = mlflow_utils.set_experiment(mlflow_client, dbx_client, experiment_name)
-    src_run_path = os.path.join(input_dir, "run.json")
-    src_run_dct = io_utils.read_file_mlflow(src_run_path)
+    src_dct = src_dct or read_run(input_dir)
+    src_run_dct = io_utils.get_mlflow(src_dct)
     in_databricks = "DATABRICKS_RUNTIME_VERSION" in os.environ
 
-    run = mlflow_client.create_run(exp.experiment_id)
+    tags = { MLFLOW_PARENT_RUN_ID: dst_parent_run_id } if dst_parent_run_id else None
+    run = mlflow_client.create_run(exp.experiment_id, tags=tags)
     run_id = run.info.run_id
+    data_logger = None
     try:
-        run_data_importer.import_run_data(
+        # params, metrics and tags are logged in the background while the artifacts are uploaded
+        data_logger = run_data_importer.start_import_run_data(
             mlflow_client,
             src_run_dct,
             run_id,
             import_source_tags,
             src_run_dct["info"]["user_id"],
             use_src_user_id,
-            in_databricks
+            in_databricks,
+            input_dir,
+            dst_parent_run_id = dst_parent_run_id
         )
         _import_inputs(mlflow_client, src_run_dct, run_id)
 
-        path = _fs.mk_local_path(os.path.join(input_dir, "artifacts"))
-        if os.path.exists(path):
-            mlflow_client.log_artifacts(run_id, path)
-        if mlmodel_fix:
-            run_utils.update_mlmodel_run_id(mlflow_client, run_id)
+        with blob_store.local_artifacts(input_dir) as path, tempfile.TemporaryDirectory() as staging_dir:
+            if path:
+                artifact_transfer.upload_artifacts(
+                    local_dir = path,
+                    artifact_uri = run.info.artifact_uri,
+                    tracking_uri = mlflow_client._tracking_client.tracking_uri,
+                    replacements = run_utils.patch_mlmodel_run_ids(path, run_id, staging_dir) if mlmodel_fix else None)
+        data_logger.wait()
 
         if "model_inputs" in src_run_dct["inputs"] and import_logged_models:
             for model in src_run_dct["inputs"]["model_inputs"]:
@@ -114,13 +134,20 @@ def import_run(
                     step=model["step"],
                 )
         default_status = RunStatus.to_string(RunStatus.FINISHED)
-        mlflow_client.set_terminated(run_id, src_run_dct.get("info", default_status).get("status", default_status))
-        run = mlflow_client.get_run(run_id)
-        if src_run_dct["info"]["lifecycle_stage"] == LifecycleStage.DELETED:
-            mlflow_client.delete_run(run.info.run_id)
-            run = mlflow_client.get_run(run.info.run_id)
+        status = src_run_dct.get("info", default_status).get("status", default_status)
+        end_time = int(time.time() * 1000)
+        run_utils.set_terminated(mlflow_client, run_id, status, end_time)
+        lifecycle_stage = src_run_dct["info"]["lifecycle_stage"]
+        if lifecycle_stage == LifecycleStage.DELETED:
+            mlflow_client.delete_run(run_id)
+        if fetch_run:
+            run = mlflow_client.get_run(run_id)
+        else:
+            run = _mk_imported_run(run, status, end_time, lifecycle_stage)
     except Exception as e:
-        mlflow_client.set_terminated(run_id, RunStatus.to_string(RunStatus.FAILED))
+        if data_logger:
+            data_logger.abort()
+        run_utils.set_terminated(mlflow_client, run_id, RunStatus.to_string(RunStatus.FAILED))
         import traceback
         traceback.print_exc()
         raise MlflowExportImportException(e, f"Importing run {run_id} of experiment '{exp.name}' failed")
@@ -133,6 +160,23 @@ def import_run(
     return res
 
 
+def read_run(run_dir):
+    """
+    Read the run.json of an exported run with its metrics streamed from their byte offset.
+    """
+    path = os.path.join(run_dir, "run.json")
+    dct = io_utils.read_file(path, stream_keys=[[ExportFields.MLFLOW, "metrics"]])
+    io_utils.check_export_file_version(dct, path)
+    return dct
+
+
+def _mk_imported_run(run, status, end_time, lifecycle_stage):
+    info = run.info
+    info = RunInfo(info.run_id, info.experiment_id, info.user_id, status, info.start_time, end_time,
+        lifecycle_stage, info.artifact_uri, info.run_name)
+    return Run(info, run.data)
+
+
 def _upload_databricks_notebook(dbx_client, input_dir, src_run_dct, dst_notebook_dir):
     run_id = src_run_dct["info"]["run_id"]
     tag_key = "mlflow.databricks.notebookPath"
@@ -182,7 +226,7 @@ def _import_inputs(mlflow_client, src_run_dct, run_id):
 @opt_use_src_user_id
 @opt_dst_notebook_dir
 @click.option("--mlmodel-fix",
-    help="Add correct run ID in destination MLmodel artifact. Can be expensive for deeply nested artifacts.",
+    help="Add correct run ID in destination MLmodel artifacts.",
     type=bool,
     default=True,
     show_default=True
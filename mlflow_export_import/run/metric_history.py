@@ -0,0 +1,221 @@
+"""
+Fetch the metric histories of a run and write or read them as a columnar sidecar file of run.json.
+
+Open source MLflow has no endpoint returning the histories of several metric keys of a run in one
+request ('metrics/get-history-bulk' and 'metrics/get-history-bulk-interval' return one key for several
+runs, and the latter downsamples), so the per-key 'get_metric_history' calls are fanned out concurrently.
+'MlflowClient.get_metric_history' follows the 'next_page_token' of long histories.
+"""
+
+import os
+from operator import attrgetter
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from mlflow_export_import.common import utils
+from mlflow_export_import.common import filesystem as _fs
+from mlflow_export_import.common import MlflowExportImportException
+
+_logger = utils.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+METRICS_FORMATS = [ "json", "npz", "parquet" ]
+DEFAULT_METRICS_FORMAT = "json"
+METRICS_FILE_EXPORT_FILE_VERSION = "3" # run.json references a metrics sidecar file
+_COLUMNS = [ "value", "timestamp", "step" ]
+_DTYPES = { "value": np.float64, "timestamp": np.int64, "step": np.int64 }
+_CHUNK_POINTS = 1 << 16
+
+
+def get_max_workers():
+    """ Number of concurrent metric history requests per run set by MLFLOW_EXPORT_IMPORT_METRIC_HISTORY_THREADS. """
+    return int(os.environ.get("MLFLOW_EXPORT_IMPORT_METRIC_HISTORY_THREADS", DEFAULT_MAX_WORKERS))
+
+
+def fetch_metric_histories(mlflow_client, run_id, keys, max_workers=None):
+    """
+    Fetch the histories of a run's metrics.
+
+    :param mlflow_client: MLflow client.
+    :param run_id: Run ID.
+    :param keys: Metric keys.
+    :param max_workers: Number of concurrent requests. Default is MLFLOW_EXPORT_IMPORT_METRIC_HISTORY_THREADS or 8.
+    :return: Dict of metric key to list of Metric entities in keys order.
+    """
+    return dict(iter_metric_histories(mlflow_client, run_id, keys, max_workers))
+
+
+def iter_metric_histories(mlflow_client, run_id, keys, max_workers=None):
+    """
+    Fetch the histories of a run's metrics one key at a time in keys order.
+    At most max_workers histories are fetched ahead of the consumer, so only those and the consumed
+    one are held in memory.
+
+    :param mlflow_client: MLflow client.
+    :param run_id: Run ID.
+    :param keys: Metric keys.
+    :param max_workers: Number of concurrent requests. Default is MLFLOW_EXPORT_IMPORT_METRIC_HISTORY_THREADS or 8.
+    :return: Iterator of (metric key, list of Metric entities) tuples.
+    """
+    keys = list(keys)
+    max_workers = min(max_workers or get_max_workers(), len(keys))
+    get_history = lambda key: mlflow_client.get_metric_history(run_id, key)
+    if max_workers <= 1:
+        for key in keys:
+            yield key, get_history(key)
+        return
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        try:
+            for key in keys:
+                pending.append((key, executor.submit(get_history, key)))
+                if len(pending) > max_workers:
+                    key, future = pending.popleft()
+                    yield key, future.result()
+            while pending:
+                key, future = pending.popleft()
+                yield key, future.result()
+        finally:
+            for _, future in pending: # consumer stopped early or a fetch failed
+                future.cancel()
+
+
+def get_metric_histories(mlflow_client, run_id, keys, max_workers=None):
+    """
+    Get the histories of a run's metrics as run.json dicts.
+
+    :return: Dict of metric key to list of {"value", "timestamp", "step"} dicts in keys order.
+    """
+    histories = iter_metric_histories(mlflow_client, run_id, keys, max_workers)
+    return { key: history_to_dicts(history) for key, history in histories }
+
+
+def history_to_dicts(metric_history):
+    """
+    Convert Metric entities to run.json dicts (the utils.strip_underscores fields minus 'key').
+    The fields are looked up once per history instead of once per point.
+    """
+    if not metric_history:
+        return []
+    attrs = [ attr for attr in vars(metric_history[0]) if attr != "_key" ]
+    names = [ attr.lstrip("_") for attr in attrs ]
+    get_values = attrgetter(*attrs)
+    return [ dict(zip(names, get_values(m))) for m in metric_history ]
+
+
+def get_metrics_format(metrics_format=None):
+    """
+    Return the metric history export format. Default is MLFLOW_EXPORT_IMPORT_METRICS_FORMAT or 'json'.
+    """
+    metrics_format = (metrics_format or os.environ.get("MLFLOW_EXPORT_IMPORT_METRICS_FORMAT") or DEFAULT_METRICS_FORMAT).lower()
+    if metrics_format not in METRICS_FORMATS:
+        raise MlflowExportImportException(
+            f"Unknown metrics format '{metrics_format}'. Values are: {', '.join(METRICS_FORMATS)}.",
+            http_status_code=400)
+    return metrics_format
+
+
+def write_metrics_file(output_dir, histories, metrics_format):
+    """
+    Write metric histories as 'value', 'timestamp' and 'step' columns to 'metrics.npz' or 'metrics.parquet'.
+    The points of each key are contiguous and the keys are in run.json order.
+    Histories are consumed one at a time and kept as compact columns ('parquet' files are written
+    _CHUNK_POINTS rows at a time), so the Metric entities of only one history are held in memory.
+
+    :param output_dir: Run export directory.
+    :param histories: Iterable of (metric key, list of Metric entities) tuples, e.g. iter_metric_histories().
+    :param metrics_format: 'npz' or 'parquet'.
+    :return: The run.json 'metrics_file' stanza: file path relative to the run directory, format and number of points per key.
+    """
+    if metrics_format not in ("npz", "parquet"):
+        raise MlflowExportImportException(f"Cannot write metrics file with format '{metrics_format}'", http_status_code=400)
+    path = f"metrics.{metrics_format}"
+    local_path = os.path.join(_fs.mk_local_path(output_dir), path)
+    os.makedirs(os.path.dirname(local_path), exist_ok=True)
+    keys = {}
+    chunks = { column: [ np.array([], dtype=_DTYPES[column]) ] for column in _COLUMNS }
+    num_points = 0
+    writer = None
+    if metrics_format == "parquet":
+        pa, pq = _import_pyarrow()
+        schema = pa.schema([ (column, pa.from_numpy_dtype(_DTYPES[column])) for column in _COLUMNS ])
+        writer = pq.ParquetWriter(local_path, schema)
+    try:
+        for key, history in histories:
+            keys[key] = len(history)
+            for column, values in _to_columns(history).items():
+                chunks[column].append(values)
+            num_points += len(history)
+            if writer and num_points >= _CHUNK_POINTS:
+                writer.write_table(pa.table(_concatenate(chunks), schema=schema))
+                chunks = { column: chunks[column][:1] for column in _COLUMNS }
+                num_points = 0
+        if writer:
+            if num_points > 0 or not keys:
+                writer.write_table(pa.table(_concatenate(chunks), schema=schema))
+        else:
+            np.savez(local_path, **_concatenate(chunks))
+    finally:
+        if writer:
+            writer.close()
+    return {
+        "path": path,
+        "format": metrics_format,
+        "keys": keys
+    }
+
+
+def _to_columns(history):
+    """ Convert Metric entities to numpy 'value', 'timestamp' and 'step' columns of 24 bytes per point. """
+    get_values = attrgetter(*_COLUMNS)
+    points = [ get_values(m) for m in history ]
+    values = zip(*points) if points else ([] for _ in _COLUMNS)
+    return { column: np.array(v, dtype=_DTYPES[column]) for column, v in zip(_COLUMNS, values) }
+
+
+def _concatenate(chunks):
+    return { column: np.concatenate(arrays) for column, arrays in chunks.items() }
+
+
+def iter_metrics_file(input_dir, metrics_file, chunk_size=None):
+    """
+    Read the metric points of a run.json 'metrics_file' stanza one at a time.
+    Points are converted to Python objects chunk_size at a time, and 'parquet' files are also read
+    chunk_size rows at a time, so memory does not grow with the length of the histories.
+
+    :param input_dir: Run export directory.
+    :param metrics_file: The run.json 'metrics_file' stanza.
+    :param chunk_size: Number of points converted at a time. Default is 65536.
+    :return: Iterator of (key, value, timestamp, step) tuples.
+    """
+    local_path = os.path.join(_fs.mk_local_path(input_dir), metrics_file["path"])
+    keys = ( key for key, num_points in metrics_file["keys"].items() for _ in range(num_points) )
+    for values, timestamps, steps in _iter_column_chunks(local_path, metrics_file["format"], chunk_size or _CHUNK_POINTS):
+        # keys is zipped last so that zip() does not consume a key past the end of the chunk
+        for value, timestamp, step, key in zip(values, timestamps, steps, keys):
+            yield key, value, timestamp, step
+
+
+def _iter_column_chunks(local_path, metrics_format, chunk_size):
+    if metrics_format == "npz":
+        with np.load(local_path) as arrays:
+            columns = [ arrays[column] for column in _COLUMNS ] # compact numpy arrays of 24 bytes per point
+        for start in range(0, len(columns[0]), chunk_size):
+            yield [ column[start:start+chunk_size].tolist() for column in columns ]
+    elif metrics_format == "parquet":
+        _, pq = _import_pyarrow()
+        for batch in pq.ParquetFile(local_path).iter_batches(batch_size=chunk_size, columns=_COLUMNS):
+            yield [ batch.column(column).to_pylist() for column in _COLUMNS ]
+    else:
+        raise MlflowExportImportException(f"Cannot read metrics file with format '{metrics_format}'", http_status_code=400)
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+        return pyarrow, pyarrow.parquet
+    except ImportError as e:
+        raise MlflowExportImportException(e, "The 'parquet' metrics format requires the 'pyarrow' package")
@@ -2,96 +2,272 @@
 Module to handle importing MLflow run data (params, metrics and tags).
 Focus is on data that exceed API limits.
 See: https://www.mlflow.org/docs/latest/rest-api.html#request-limits.
+
+Params, metrics and tags are packed together into as few 'log_batch' requests as the limits allow
+(1000 entities of which at most 100 params and tags per request), so that a small run is imported
+with a single request instead of one request per kind.
+
+Metric points are read lazily from the export and each batch is built, sent and discarded in turn,
+so memory stays flat and time is linear in the length of the metric histories.
+
+RunDataLogger sends the batches in the background with several 'log_batch' requests in flight,
+so that import_run overlaps the run data with the artifact upload and waits for both once.
 """
 
-import math
-import mlflow
+import os
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from mlflow.entities import Metric, Param, RunTag
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+from mlflow.utils.validation import (
+    MAX_PARAMS_TAGS_PER_BATCH,
+    MAX_METRICS_PER_BATCH,
+    MAX_ENTITIES_PER_BATCH,
+    MAX_BATCH_LOG_REQUEST_SIZE
+)
 
 from mlflow_export_import.common import utils
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common.json_stream import JsonStream
 from mlflow_export_import.common.source_tags import ExportTags
 from mlflow_export_import.common.source_tags import mk_source_tags_mlflow_tag, mk_source_tags
+from mlflow_export_import.run import metric_history
 
+_MAX_BATCH_BYTES = MAX_BATCH_LOG_REQUEST_SIZE // 2 # headroom for the JSON escaping of values
+_ENTITY_OVERHEAD_BYTES = 100 # field names and numbers of an entity's JSON
 
-def _log_data(run_dct, run_id, batch_size, get_data, log_data, args_get_data=None):
-    metadata = get_data(run_dct, args_get_data)
-    num_batches = int(math.ceil(len(metadata) / batch_size))
-    res = []
-    for j in range(num_batches):
-        start = j * batch_size
-        end = start + batch_size
-        batch = metadata[start:end]
-        log_data(run_id, batch)
-        res = res + batch
-
-
-def _log_params(client, run_dct, run_id, batch_size):
-    def get_data(run_dct, args):
-        return [ Param(k,v) for k,v in run_dct["params"].items() ]
-    def log_data(run_id, params):
-        client.log_batch(run_id, params=params)
-    _log_data(run_dct, run_id, batch_size, get_data, log_data)
-
-
-def _log_metrics(client, run_dct, run_id, batch_size):
-
-    def get_data(run_dct, args=None):
-        metrics = []
-        for metric,steps in  run_dct["metrics"].items():
-            for step in steps:
-                metrics.append(Metric(metric,step["value"],step["timestamp"],step["step"]))
-        return metrics
-
-    def log_data(run_id, metrics):
-        client.log_batch(run_id, metrics=metrics)
-
-    _log_data(run_dct, run_id, batch_size, get_data, log_data)
-
-
-def _log_tags(client, run_dct, run_id, batch_size, import_source_tags, in_databricks, src_user_id, use_src_user_id):
-
-    def get_data(run_dct, args):
-        tags = run_dct["tags"]
-        if import_source_tags:
-            source_mlflow_tags = mk_source_tags_mlflow_tag(tags)
-            info =  run_dct["info"]
-            source_info_tags = mk_source_tags(info, f"{ExportTags.PREFIX_RUN_INFO}")
-            tags = { **tags, **source_mlflow_tags, **source_info_tags }
-        tags = utils.create_mlflow_tags_for_databricks_import(tags) # remove "mlflow" tags that cannot be imported into Databricks
-        tags = [ RunTag(k,v) for k,v in tags.items() ]
-        if not in_databricks:
-            utils.set_dst_user_id(tags, args["src_user_id"], args["use_src_user_id"])
-        return tags
-
-    def log_data(run_id, tags):
-        client.log_batch(run_id, tags=tags)
-
-    args_get = {
-        "in_databricks": in_databricks,
-        "src_user_id": src_user_id,
-        "use_src_user_id": use_src_user_id
-    }
-
-    _log_data(run_dct, run_id, batch_size, get_data, log_data, args_get)
-
-
-def import_run_data(mlflow_client, run_dct, run_id, import_source_tags, src_user_id, use_src_user_id, in_databricks):
-    from mlflow.utils.validation import MAX_PARAMS_TAGS_PER_BATCH, MAX_METRICS_PER_BATCH
-    _log_params(mlflow_client, run_dct, run_id, MAX_PARAMS_TAGS_PER_BATCH)
-    _log_metrics(mlflow_client, run_dct, run_id, MAX_METRICS_PER_BATCH)
-    _log_tags(
-        mlflow_client,
-        run_dct,
-        run_id,
-        MAX_PARAMS_TAGS_PER_BATCH,
-        import_source_tags,
-        in_databricks,
-        src_user_id,
-        use_src_user_id
-)
+DEFAULT_MAX_WORKERS = 4
+
+_logger = utils.getLogger(__name__)
+
+
+def get_max_workers():
+    """ Number of concurrent 'log_batch' requests per run set by MLFLOW_EXPORT_IMPORT_LOG_BATCH_THREADS. """
+    return int(os.environ.get("MLFLOW_EXPORT_IMPORT_LOG_BATCH_THREADS", DEFAULT_MAX_WORKERS))
+
+
+def _get_params(run_dct):
+    return [ Param(k,v) for k,v in run_dct["params"].items() ]
+
+
+def _iter_metrics(run_dct, input_dir=None):
+    """
+    Lazily read the metric points of a run export, from its metrics sidecar file or run.json.
+    """
+    if "metrics_file" in run_dct:
+        for metric, value, timestamp, step in metric_history.iter_metrics_file(input_dir, run_dct["metrics_file"]):
+            yield Metric(metric, value, timestamp, step)
+        return
+    metrics = run_dct["metrics"]
+    if isinstance(metrics, JsonStream):
+        points = metrics.flat_items()
+    else:
+        points = ( (metric, step) for metric, steps in metrics.items() for step in steps )
+    for metric, step in points:
+        yield Metric(metric, step["value"], step["timestamp"], step["step"])
+
+
+def _get_tags(run_dct, import_source_tags, in_databricks, src_user_id, use_src_user_id, dst_parent_run_id=None):
+    tags = run_dct["tags"]
+    if import_source_tags:
+        source_mlflow_tags = mk_source_tags_mlflow_tag(tags)
+        info =  run_dct["info"]
+        source_info_tags = mk_source_tags(info, f"{ExportTags.PREFIX_RUN_INFO}")
+        tags = { **tags, **source_mlflow_tags, **source_info_tags }
+    tags = utils.create_mlflow_tags_for_databricks_import(tags) # remove "mlflow" tags that cannot be imported into Databricks
+    if dst_parent_run_id:
+        tags = { **tags, MLFLOW_PARENT_RUN_ID: dst_parent_run_id }
+    tags = [ RunTag(k,v) for k,v in tags.items() ]
+    if not in_databricks:
+        utils.set_dst_user_id(tags, src_user_id, use_src_user_id)
+    return tags
+
+
+def _entity_size(entity):
+    if isinstance(entity, Metric): # numbers fit in the overhead
+        return _ENTITY_OVERHEAD_BYTES + len(entity.key)
+    return _ENTITY_OVERHEAD_BYTES + len(entity.key) + len(str(entity.value))
+
+
+def pack_batches(params, metrics, tags,
+        max_entities = MAX_ENTITIES_PER_BATCH,
+        max_params_tags = MAX_PARAMS_TAGS_PER_BATCH,
+        max_metrics = MAX_METRICS_PER_BATCH,
+        max_bytes = _MAX_BATCH_BYTES
+    ):
+    """
+    Pack params, metrics and tags into the fewest 'log_batch' requests within the API limits.
+    Each batch takes as many params and tags as allowed and is filled up with metrics.
+
+    :param params: Iterable of Param.
+    :param metrics: Iterable of Metric.
+    :param tags: Iterable of RunTag.
+    :return: Generator of (params, metrics, tags) lists.
+    """
+    params_tags = itertools.chain(((p, None) for p in params), ((None, t) for t in tags))
+    metrics = iter(metrics)
+    pending_param_tag = next(params_tags, None)
+    pending_metric = next(metrics, None)
+    while pending_param_tag or pending_metric:
+        batch_params, batch_metrics, batch_tags = [], [], []
+        num_entities = 0
+        num_bytes = 0
+        while pending_param_tag and len(batch_params) + len(batch_tags) < max_params_tags and num_entities < max_entities:
+            param, tag = pending_param_tag
+            size = _entity_size(param or tag)
+            if num_entities and num_bytes + size > max_bytes:
+                break
+            if param:
+                batch_params.append(param)
+            else:
+                batch_tags.append(tag)
+            num_entities += 1
+            num_bytes += size
+            pending_param_tag = next(params_tags, None)
+        while pending_metric and len(batch_metrics) < max_metrics and num_entities < max_entities:
+            size = _entity_size(pending_metric)
+            if num_entities and num_bytes + size > max_bytes:
+                break
+            batch_metrics.append(pending_metric)
+            num_entities += 1
+            num_bytes += size
+            pending_metric = next(metrics, None)
+        yield batch_params, batch_metrics, batch_tags
+
+
+def _iter_batches(run_dct, import_source_tags, src_user_id, use_src_user_id, in_databricks, input_dir, dst_parent_run_id=None):
+    params = _get_params(run_dct)
+    metrics = _iter_metrics(run_dct, input_dir)
+    tags = _get_tags(run_dct, import_source_tags, in_databricks, src_user_id, use_src_user_id, dst_parent_run_id)
+    return pack_batches(params, metrics, tags)
+
+
+def import_run_data(mlflow_client, run_dct, run_id, import_source_tags, src_user_id, use_src_user_id, in_databricks, input_dir=None):
+    """
+    :param input_dir: Run export directory containing the metrics sidecar file referenced by run.json if any.
+    :return: Number of 'log_batch' requests.
+    """
+    num_requests = 0
+    for batch_params, batch_metrics, batch_tags in _iter_batches(run_dct, import_source_tags, src_user_id, use_src_user_id, in_databricks, input_dir):
+        mlflow_client.log_batch(run_id, metrics=batch_metrics, params=batch_params, tags=batch_tags)
+        num_requests += 1
+    return num_requests
+
+
+def start_import_run_data(mlflow_client, run_dct, run_id, import_source_tags, src_user_id, use_src_user_id, in_databricks,
+        input_dir=None, max_workers=None, dst_parent_run_id=None
+    ):
+    """
+    Start importing the run data in the background. Call wait() on the returned RunDataLogger before terminating the run.
+
+    :param max_workers: Number of concurrent 'log_batch' requests. Default is MLFLOW_EXPORT_IMPORT_LOG_BATCH_THREADS or 4.
+                        If 1, the run data is imported before returning.
+    :param dst_parent_run_id: Destination ID of the parent run of a nested run, which replaces the source
+                              'mlflow.parentRunId' tag so that it does not overwrite the tag set at run creation.
+    :return: RunDataLogger.
+    """
+    batches = _iter_batches(run_dct, import_source_tags, src_user_id, use_src_user_id, in_databricks, input_dir, dst_parent_run_id)
+    data_logger = RunDataLogger(mlflow_client, run_id, max_workers)
+    data_logger.start(batches)
+    return data_logger
+
+
+class RunDataLogger:
+    """
+    Sends the 'log_batch' requests of a run with up to max_workers requests in flight and collects their errors.
+
+    A batch with the first points of a metric key is sent alone once the batches in flight are done, since
+    tracking stores create the key's latest value on its first point and concurrent first points can conflict.
+    Long histories therefore go out concurrently while runs with many short histories are sent in order.
+    """
+    def __init__(self, mlflow_client, run_id, max_workers=None):
+        self.mlflow_client = mlflow_client
+        self.run_id = run_id
+        self.max_workers = max(max_workers or get_max_workers(), 1)
+        self.num_requests = 0
+        self._errors = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._stopped = threading.Event()
+        self._executor = None
+        self._producer = None
+
+    def start(self, batches):
+        if self.max_workers == 1:
+            self._produce(batches)
+            return
+        # one more worker for the producer, which builds the batches and sends the fencing ones
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers + 1, thread_name_prefix="log-batch")
+        self._producer = self._executor.submit(self._produce, batches)
+
+    def wait(self):
+        """
+        Wait for all the batches to be logged.
+        :raises MlflowExportImportException: If a batch could not be logged.
+        """
+        self._join()
+        if self._errors:
+            errors = self._errors
+            raise MlflowExportImportException(errors[0],
+                f"{len(errors)} 'log_batch' requests failed for run '{self.run_id}'",
+                num_errors = len(errors),
+                errors = [ str(e) for e in errors[:10] ])
+
+    def abort(self):
+        """ Stop sending batches and wait for the ones in flight, ignoring errors. """
+        self._stopped.set()
+        self._join()
+
+    def _join(self):
+        if self._producer:
+            self._producer.result()
+            self._producer = None
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _produce(self, batches):
+        seen_keys = set()
+        try:
+            for batch in batches:
+                if self._stopped.is_set():
+                    break
+                new_keys = { m.key for m in batch[1] } - seen_keys
+                if new_keys or not self._executor:
+                    self._drain()
+                    seen_keys |= new_keys
+                    self._send(batch)
+                else:
+                    self._slots.acquire()
+                    self._executor.submit(self._send, batch, True)
+        except Exception as e: # e.g. unreadable export files
+            self._add_error(e)
+        self._drain()
+
+    def _drain(self):
+        """ Wait for the batches in flight. """
+        for _ in range(self.max_workers):
+            self._slots.acquire()
+        for _ in range(self.max_workers):
+            self._slots.release()
+
+    def _send(self, batch, release_slot=False):
+        params, metrics, tags = batch
+        try:
+            if not self._stopped.is_set():
+                self.mlflow_client.log_batch(self.run_id, metrics=metrics, params=params, tags=tags)
+                with self._lock:
+                    self.num_requests += 1
+        except Exception as e:
+            self._add_error(e)
+        finally:
+            if release_slot:
+                self._slots.release()
 
+    def _add_error(self, e):
+        _logger.warning(f"Cannot log run data of run '{self.run_id}': {e}")
+        with self._lock:
+            self._errors.append(e)
+        self._stopped.set()
 
-if __name__ == "__main__":
-    import sys
-    client = mlflow.MlflowClient()
-    _log_metrics(client, sys.argv[1],100)
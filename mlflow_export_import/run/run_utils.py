@@ -1,8 +1,7 @@
 
 import os
-import tempfile
-from mlflow_export_import.common import mlflow_utils, io_utils
-from mlflow_export_import.common.find_artifacts import find_run_model_names
+import posixpath
+from mlflow_export_import.common import io_utils
 
 def get_model_name(artifact_path):
     idx = artifact_path.find("artifacts")
@@ -10,24 +9,43 @@ def get_model_name(artifact_path):
     return artifact_path[idx:]
 
 
-def update_mlmodel_run_id(mlflow_client, run_id):
+def patch_mlmodel_run_ids(local_dir, run_id, staging_dir):
     """
-    :param: mlflow_client
-    :param: run_id
-    Workaround to fix the run_id in the destination MLmodel file since there is no method to get all model artifacts of a run.
-    Since an MLflow run does not keep track of its models, there is no method to retrieve the artifact path to all its models.
-    This workaround recursively searches the run's root artifact directory for all MLmodel files, and assumes their directory
-    represents a path to the model.
+    Write copies of the MLmodel files of a local artifact tree with their 'run_id' set to the destination run ID,
+    to be uploaded in place of the originals (see artifact_transfer.upload_artifacts). The originals are not
+    modified since they may be the export itself or hard links to its blob store.
+    Like find_artifacts.find_run_model_names(), 'metadata' directories are skipped.
+
+    :param local_dir: Local artifact directory of the run.
+    :param run_id: Destination run ID.
+    :param staging_dir: Directory of the patched copies.
+    :return: Dict of MLmodel path relative to local_dir to its patched copy.
     """
-    mlmodel_paths = find_run_model_names(mlflow_client, run_id)
-    for model_path in mlmodel_paths:
-        download_uri = f"runs:/{run_id}/{model_path}/MLmodel"
-        local_path = mlflow_utils.download_artifacts(mlflow_client, download_uri)
-        mlmodel = io_utils.read_file(local_path, "yaml")
+    replacements = {}
+    for dir, dirs, names in os.walk(local_dir):
+        dirs[:] = [ d for d in dirs if d != "metadata" ]
+        if "MLmodel" not in names:
+            continue
+        mlmodel = io_utils.read_file(os.path.join(dir, "MLmodel"), "yaml")
+        if not isinstance(mlmodel, dict) or mlmodel.get("run_id") == run_id:
+            continue
         mlmodel["run_id"] = run_id
-        with tempfile.TemporaryDirectory() as dir:
-            output_path = os.path.join(dir, "MLmodel")
-            io_utils.write_file(output_path, mlmodel, "yaml")
-            if model_path == "MLmodel":
-                model_path = ""
-            mlflow_client.log_artifact(run_id, output_path, model_path)
+        rel_dir = os.path.relpath(dir, local_dir)
+        output_path = os.path.join(staging_dir, rel_dir, "MLmodel")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        io_utils.write_file(output_path, mlmodel, "yaml")
+        path = "MLmodel" if rel_dir == "." else posixpath.join(*rel_dir.split(os.sep), "MLmodel")
+        replacements[path] = output_path
+    return replacements
+
+
+def set_terminated(mlflow_client, run_id, status, end_time=None):
+    """
+    Set the final status and end time of an imported run.
+
+    :param mlflow_client: MLflow client.
+    :param run_id: Destination run ID.
+    :param status: Run status string, e.g. 'FINISHED'.
+    :param end_time: End time in milliseconds. Default is the current time.
+    """
+    mlflow_client.set_terminated(run_id, status, end_time)
@@ -11,6 +11,7 @@ from mlflow.exceptions import RestException, MlflowException
 from mlflow_export_import.client.client_utils import create_mlflow_client
 from mlflow_export_import.common import filesystem as _fs
 from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import artifact_transfer
 from mlflow_export_import.common.click_options import (
     opt_request_id,
     opt_output_dir
@@ -63,9 +64,10 @@ def export_trace(
             artifacts = mlflow.artifacts.list_artifacts(artifact_uri = trace.info.tags["mlflow.artifactLocation"])
 
             if len(artifacts) > 0:
-                mlflow.artifacts.download_artifacts(
-                    artifact_uri = trace.info.tags["mlflow.artifactLocation"],
-                    dst_path = _fs.mk_local_path(output_dir),
+                artifact_location = trace.info.tags["mlflow.artifactLocation"]
+                artifact_transfer.download_artifacts(
+                    artifact_uri = artifact_location,
+                    dst_path = artifact_transfer.mk_dst_path(_fs.mk_local_path(output_dir), artifact_location),
                     tracking_uri = mlflow_client._tracking_client.tracking_uri
                 )
 
@@ -33,7 +33,10 @@ setup(
     packages=find_packages(exclude=["tests", "tests.*"]),
     zip_safe = False,
     install_requires = CORE_REQUIREMENTS,
-    extras_require= { "tests": [ "mlflow[databricks]>=2.9.2", "pytest","pytest-html>=3.2.0", "shortuuid>=1.0.11" ] },
+    extras_require= {
+        "tests": [ "mlflow[databricks]>=2.9.2", "pytest","pytest-html>=3.2.0", "shortuuid>=1.0.11" ],
+        "async": [ "aiohttp>=3.8" ]
+    },
     license = "Apache License 2.0",
     keywords = "mlflow ml ai",
     classifiers = [
@@ -1,3 +1,5 @@
+import os
+import tempfile
 import mlflow
 from mlflow.models.signature import infer_signature
 
@@ -43,9 +45,11 @@ def create_run(client, experiment_id):
             mlflow.set_tag("my_tag", "my_val")
             mlflow.sklearn.log_model(model, "model",  signature=signature)
             mlflow.set_tag("south_america", "aconcagua")
-            with open("info.txt", "w", encoding="utf-8") as f:
-                f.write("Hi artifact")
-            mlflow.log_artifact("info.txt")
+            with tempfile.TemporaryDirectory() as dir:
+                path = os.path.join(dir, "info.txt")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("Hi artifact")
+                mlflow.log_artifact(path)
     return client.get_run(run.info.run_id)
 
 
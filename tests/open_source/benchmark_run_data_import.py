@@ -0,0 +1,119 @@
+"""
+Benchmark importing the run data of long metric histories (up to 10M points and more).
+
+Writes a run export with one metric history per size in the given format, imports its run data with
+run_data_importer.import_run_data() against a client that only counts the log_batch requests, and
+reports the duration, throughput and peak traced memory. Time should grow linearly with the number
+of points and the peak memory should stay flat.
+
+  python -m tests.open_source.benchmark_run_data_import --points 1000000,10000000 --metrics-format npz
+"""
+
+import os
+import time
+import tempfile
+import tracemalloc
+import click
+import numpy as np
+
+from mlflow_export_import.common import io_utils
+from mlflow_export_import.common.json_stream import StreamedObject
+from mlflow_export_import.common.source_tags import ExportFields
+from mlflow_export_import.run import metric_history, run_data_importer
+
+
+class _CountingClient:
+    def __init__(self):
+        self.requests = 0
+        self.metrics = 0
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        self.requests += 1
+        self.metrics += len(metrics)
+
+
+def _mk_run_dct(info=None):
+    return {
+        "info": info or { "run_id": "bench", "user_id": "bench" },
+        "params": { f"param_{j}": "value" for j in range(10) },
+        "tags": { f"tag_{j}": "value" for j in range(10) }
+    }
+
+
+def _write_export(output_dir, num_points, metrics_format):
+    """ Write a run.json and metrics sidecar file without holding the history in memory as Python objects. """
+    run_dct = _mk_run_dct()
+    if metrics_format == "json":
+        points = ( { "value": 0.1*j, "timestamp": 1700000000000 + j, "step": j } for j in range(num_points) )
+        run_dct["metrics"] = StreamedObject([ ("metric", points) ])
+    else:
+        steps = np.arange(num_points, dtype=np.int64)
+        columns = { "value": steps * 0.1, "timestamp": steps + 1700000000000, "step": steps }
+        path = os.path.join(output_dir, f"metrics.{metrics_format}")
+        if metrics_format == "npz":
+            np.savez(path, **columns)
+        else:
+            pa, pq = metric_history._import_pyarrow()
+            pq.write_table(pa.table(columns), path)
+        del steps, columns
+        run_dct["metrics_file"] = { "path": os.path.basename(path), "format": metrics_format, "keys": { "metric": num_points } }
+    io_utils.write_export_file(output_dir, "run.json", __file__, run_dct)
+
+
+def _import(input_dir):
+    src_dct = io_utils.read_file(os.path.join(input_dir, "run.json"), stream_keys=[[ExportFields.MLFLOW, "metrics"]])
+    client = _CountingClient()
+    run_data_importer.import_run_data(client, io_utils.get_mlflow(src_dct), "bench", False, "bench", False, False, input_dir)
+    return client
+
+
+def run_benchmark(num_points, metrics_format, trace_memory):
+    with tempfile.TemporaryDirectory() as input_dir:
+        _write_export(input_dir, num_points, metrics_format)
+        if trace_memory:
+            tracemalloc.start()
+        start = time.time()
+        try:
+            client = _import(input_dir)
+            duration = time.time() - start
+            peak = tracemalloc.get_traced_memory()[1] if trace_memory else None
+        finally:
+            if trace_memory:
+                tracemalloc.stop()
+    assert client.metrics == num_points
+    return {
+        "points": num_points,
+        "format": metrics_format,
+        "seconds": round(duration, 2),
+        "points_per_second": int(num_points / duration) if duration else None,
+        "log_batch_requests": client.requests,
+        "peak_mb": round(peak / 1e6, 1) if peak is not None else None
+    }
+
+
+@click.command()
+@click.option("--points",
+    help="Comma-delimited numbers of metric points.",
+    type=str,
+    default="1000000,10000000",
+    show_default=True
+)
+@click.option("--metrics-format",
+    help="Metric history export format: 'json', 'npz' or 'parquet'.",
+    type=click.Choice(metric_history.METRICS_FORMATS),
+    default="npz",
+    show_default=True
+)
+@click.option("--trace-memory",
+    help="Report the peak memory traced with tracemalloc, which slows the import down several times.",
+    type=bool,
+    default=False,
+    show_default=True
+)
+def main(points, metrics_format, trace_memory):
+    for num_points in [ int(n) for n in points.split(",") ]:
+        print(run_benchmark(num_points, metrics_format, trace_memory))
+
+
+if __name__ == "__main__":
+    main()
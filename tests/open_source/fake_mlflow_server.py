@@ -0,0 +1,1092 @@
+"""
+In-process fake MLflow tracking server for offline performance and regression tests.
+
+Serves the subset of the MLflow REST API used by mlflow-export-import (experiments, runs, metric histories,
+registered models, model versions and proxied 'mlflow-artifacts' artifacts including multipart uploads)
+from an in-memory store.
+Latency, jitter, throttling (429), server errors (503) and response payload padding can be injected per endpoint.
+
+Usage:
+    with FakeMlflowServer() as server:
+        server.configure("runs/get", latency=0.05, jitter=0.01, throttle_rate=0.1, retry_after=0.2)
+        server.populate(num_experiments=2, num_runs=100)
+        client = mlflow.MlflowClient(server.uri)
+
+or with the 'fake_server' pytest fixture:
+    from tests.open_source.fake_mlflow_server import fake_server
+"""
+
+import re
+import json
+import hashlib
+import time
+import uuid
+import random
+import posixpath
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, unquote
+import pytest
+
+DEFAULT_ENDPOINT = "*"
+ARTIFACTS_ENDPOINT = "mlflow-artifacts/artifacts"
+MULTIPART_ENDPOINT = "mlflow-artifacts/mpu"
+
+_API_PREFIXES = [ "/api/2.0/mlflow/", "/api/3.0/mlflow/", "/ajax-api/2.0/mlflow/" ]
+_ARTIFACTS_PREFIX = "/api/2.0/mlflow-artifacts/artifacts"
+_MULTIPART_PREFIX = "/api/2.0/mlflow-artifacts/mpu"
+_UNSUPPORTED_MULTIPART_MESSAGE = "Multipart upload is not supported for the current artifact repository"
+_VIEW_TYPES = { 1: "ACTIVE_ONLY", 2: "DELETED_ONLY", 3: "ALL" }
+_MAX_RESULTS = 1000
+
+
+@dataclass()
+class EndpointConfig:
+    """
+    Fault and load injection for an endpoint.
+    """
+    latency: float = 0.0 # seconds added to each request
+    jitter: float = 0.0 # latency varies uniformly by +/- jitter seconds
+    throttle_rate: float = 0.0 # fraction of requests rejected with 429
+    retry_after: float = None # Retry-After header of throttled responses
+    error_rate: float = 0.0 # fraction of requests failing with 503
+    payload_size: int = 0 # bytes of padding added to JSON responses
+
+
+class FakeServerException(Exception):
+    def __init__(self, error_code, message, http_status_code=400):
+        super().__init__(message)
+        self.error_code = error_code
+        self.message = message
+        self.http_status_code = http_status_code
+
+
+def _not_found(message):
+    return FakeServerException("RESOURCE_DOES_NOT_EXIST", message, 404)
+
+
+def _already_exists(message):
+    return FakeServerException("RESOURCE_ALREADY_EXISTS", message, 400)
+
+
+def _invalid(message):
+    return FakeServerException("INVALID_PARAMETER_VALUE", message, 400)
+
+
+class FakeMlflowServer:
+    """
+    Threaded HTTP server backed by an in-memory MLflow store.
+    """
+    def __init__(self, seed=0):
+        """
+        :param seed: Seed of the random generator that decides which requests are throttled or failed.
+        """
+        self.store = _Store()
+        self.configs = {}
+        self.multipart_supported = True # else multipart upload requests fail like with a local artifact store
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._server = None
+        self._thread = None
+
+    @property
+    def uri(self):
+        return f"http://localhost:{self._server.server_address[1]}"
+
+    def start(self):
+        handler = type("_BoundHandler", (_Handler,), { "fake_server": self })
+        self._server = ThreadingHTTPServer(("localhost", 0), handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+    def configure(self, endpoint=DEFAULT_ENDPOINT, **kwargs):
+        """
+        Set the fault and load injection for an endpoint.
+        :param endpoint: Endpoint relative to 'api/2.0/mlflow' such as 'runs/get', ARTIFACTS_ENDPOINT
+            for artifact transfers or DEFAULT_ENDPOINT for all endpoints without their own configuration.
+        :param kwargs: EndpointConfig fields.
+        """
+        self.configs[endpoint] = EndpointConfig(**kwargs)
+
+    def reset(self):
+        """ Clear the endpoint configurations and statistics. """
+        with self._lock:
+            self.configs = {}
+            self._stats = {}
+            self._max_in_flight = self._in_flight
+
+    def get_stats(self):
+        """
+        :return: Dictionary with per-endpoint request, throttle and error counts and the maximum number of
+            concurrent requests seen by the server.
+        """
+        with self._lock:
+            return {
+                "endpoints": { k: dict(v) for k,v in self._stats.items() },
+                "max_concurrent_requests": self._max_in_flight
+            }
+
+    def get_num_requests(self, endpoint):
+        with self._lock:
+            return self._stats.get(endpoint, {}).get("requests", 0)
+
+
+    def populate(self, num_experiments=1, num_runs=10, num_params=5, num_metrics=3, num_steps=10,
+            num_tags=3, num_artifacts=1, artifact_size=100, experiment_name_prefix="fake_experiment"
+        ):
+        """
+        Create experiments and runs directly in the store.
+        :return: List of experiment IDs.
+        """
+        exp_ids = []
+        for j in range(num_experiments):
+            exp = self.store.create_experiment(f"{experiment_name_prefix}_{j}_{uuid.uuid4().hex[:8]}")
+            exp_ids.append(exp["experiment_id"])
+            for k in range(num_runs):
+                run = self.store.create_run(exp["experiment_id"], f"run_{k}", start_time=_now()-k)
+                run_id = run["info"]["run_id"]
+                self.store.log_batch(run_id,
+                    metrics = [ { "key": f"metric_{m}", "value": s*0.1, "timestamp": _now(), "step": s }
+                        for m in range(num_metrics) for s in range(num_steps) ],
+                    params = [ { "key": f"param_{p}", "value": f"value_{p}" } for p in range(num_params) ],
+                    tags = [ { "key": f"tag_{t}", "value": f"value_{t}" } for t in range(num_tags) ]
+                )
+                for a in range(num_artifacts):
+                    self.store.put_artifact(f"{run['info']['artifact_uri'].split(':/',1)[1]}/file_{a}.txt", b"x" * artifact_size)
+                self.store.update_run(run_id, status="FINISHED", end_time=_now())
+        return exp_ids
+
+
+    def _before_request(self, endpoint):
+        """
+        Apply the endpoint's injected latency and faults.
+        :return: Tuple of (status code, error body, headers) if the request must fail else None, and the config.
+        """
+        config = self.configs.get(endpoint) or self.configs.get(DEFAULT_ENDPOINT) or EndpointConfig()
+        with self._lock:
+            stats = self._stats.setdefault(endpoint, { "requests": 0, "throttled": 0, "errors": 0 })
+            stats["requests"] += 1
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+            draw = self._random.random()
+            delay = max(config.latency + self._random.uniform(-config.jitter, config.jitter), 0)
+        if delay:
+            time.sleep(delay)
+        if draw < config.throttle_rate:
+            with self._lock:
+                stats["throttled"] += 1
+            headers = { "Retry-After": str(config.retry_after) } if config.retry_after is not None else {}
+            return (429, { "error_code": "REQUEST_LIMIT_EXCEEDED", "message": "Too many requests" }, headers), config
+        if draw < config.throttle_rate + config.error_rate:
+            with self._lock:
+                stats["errors"] += 1
+            return (503, { "error_code": "TEMPORARILY_UNAVAILABLE", "message": "Injected error" }, {}), config
+        return None, config
+
+    def _after_request(self):
+        with self._lock:
+            self._in_flight -= 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    fake_server = None
+
+    def _handle(self):
+        url = urlsplit(self.path)
+        body = self._read_body()
+        if url.path.startswith(_ARTIFACTS_PREFIX):
+            endpoint = ARTIFACTS_ENDPOINT
+        elif url.path.startswith(_MULTIPART_PREFIX):
+            endpoint = MULTIPART_ENDPOINT
+        else:
+            endpoint = _strip_api_prefix(url.path)
+        if endpoint is None:
+            return self._reply_json(404, { "error_code": "ENDPOINT_NOT_FOUND", "message": f"No endpoint {url.path}" })
+        fault, config = self.fake_server._before_request(endpoint)
+        try:
+            if fault:
+                return self._reply_json(*fault)
+            if endpoint == ARTIFACTS_ENDPOINT:
+                return self._handle_artifacts(unquote(url.path[len(_ARTIFACTS_PREFIX):]).strip("/"), url.query, body)
+            if endpoint == MULTIPART_ENDPOINT:
+                return self._handle_multipart(unquote(url.path[len(_MULTIPART_PREFIX):]).strip("/"), body)
+            params = _parse_query(url.query)
+            if body and self.headers.get("Content-Type", "").startswith("application/json") or body[:1] == b"{":
+                params.update(json.loads(body))
+            method = _ROUTES.get((self.command, endpoint)) or _ROUTES.get(("*", endpoint))
+            if method is None:
+                raise FakeServerException("ENDPOINT_NOT_FOUND", f"No endpoint {self.command} {url.path}", 404)
+            rsp = method(self.fake_server.store, params)
+            if config.payload_size:
+                rsp["padding"] = "x" * config.payload_size # unknown fields are ignored by MLflow clients
+            self._reply_json(200, rsp)
+        except FakeServerException as e:
+            self._reply_json(e.http_status_code, { "error_code": e.error_code, "message": e.message })
+        finally:
+            self.fake_server._after_request()
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_PATCH = _handle
+    do_DELETE = _handle
+
+    def _handle_artifacts(self, path, query, body):
+        store = self.fake_server.store
+        if self.command == "PUT":
+            store.put_artifact(path, body)
+            return self._reply_json(200, {})
+        if self.command == "DELETE":
+            store.delete_artifacts(path)
+            return self._reply_json(200, {})
+        if not path: # list
+            list_path = _parse_query(query).get("path", "")
+            return self._reply_json(200, { "files": store.list_artifacts(list_path.strip("/")) })
+        content = store.get_artifact(path)
+        if content is None:
+            raise _not_found(f"Artifact '{path}' not found")
+        self._reply(200, content, "application/octet-stream")
+
+    def _handle_multipart(self, path, body):
+        """
+        Multipart upload protocol of the 'mlflow-artifacts' proxy: 'create/<dir>' returns one upload URL per part,
+        parts are PUT to 'parts/<upload_id>/<part_number>' and 'complete/<dir>' assembles them.
+        """
+        store = self.fake_server.store
+        action, _, path = path.partition("/")
+        if action == "parts":
+            upload_id, part_number = path.split("/")
+            etag = store.put_multipart_part(upload_id, int(part_number), body)
+            return self._reply_json(200, {}, { "ETag": etag })
+        if not self.fake_server.multipart_supported:
+            return self._reply_json(501, { "error_code": "NOT_IMPLEMENTED", "message": _UNSUPPORTED_MULTIPART_MESSAGE })
+        params = json.loads(body)
+        artifact_path = posixpath.join(path, posixpath.basename(params["path"]))
+        if action == "create":
+            upload_id = store.create_multipart_upload(artifact_path)
+            credentials = [ { "url": f"{self.fake_server.uri}{_MULTIPART_PREFIX}/parts/{upload_id}/{n}", "part_number": n }
+                for n in range(1, int(params["num_parts"]) + 1) ]
+            return self._reply_json(200, { "upload_id": upload_id, "credentials": credentials })
+        if action == "complete":
+            store.complete_multipart_upload(params["upload_id"], artifact_path, params["parts"])
+        elif action == "abort":
+            store.abort_multipart_upload(params["upload_id"])
+        else:
+            raise FakeServerException("ENDPOINT_NOT_FOUND", f"No multipart upload action '{action}'", 404)
+        return self._reply_json(200, {})
+
+    def _read_body(self):
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().strip(), 16)
+                chunk = self.rfile.read(size)
+                self.rfile.readline()
+                if size == 0:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+        length = int(self.headers.get("Content-Length", 0))
+        return self.rfile.read(length) if length else b""
+
+    def _reply_json(self, status, body, headers=None):
+        self._reply(status, json.dumps(body).encode(), "application/json", headers)
+
+    def _reply(self, status, payload, content_type, headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        for k,v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _strip_api_prefix(path):
+    for prefix in _API_PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix):]
+    return None
+
+
+def _parse_query(query):
+    params = {}
+    for k,v in parse_qs(query).items():
+        params[k] = v if len(v) > 1 or k in ("experiment_ids", "stages") else v[0]
+    return params
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def _to_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [ value ]
+
+
+def _tags_to_list(tags):
+    return [ { "key": k, "value": v } for k,v in tags.items() ]
+
+
+# == In-memory store
+
+class _Store:
+    """
+    Thread-safe in-memory store of MLflow objects in their REST JSON representation.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.experiments = {}
+        self.runs = {}
+        self.metric_histories = {} # run_id => key => list of metrics
+        self.artifacts = {} # path => bytes
+        self.multipart_uploads = {} # upload_id => part_number => bytes
+        self.registered_models = {}
+        self.model_versions = {} # name => version => model version
+        self._next_experiment_id = 1
+        self.create_experiment("Default", experiment_id="0")
+
+    # == Experiments
+
+    def create_experiment(self, name, tags=None, artifact_location=None, experiment_id=None):
+        with self._lock:
+            if not name:
+                raise _invalid("Experiment name cannot be empty")
+            if any(exp["name"] == name for exp in self.experiments.values()):
+                raise _already_exists(f"Experiment '{name}' already exists")
+            if experiment_id is None:
+                experiment_id = str(self._next_experiment_id)
+                self._next_experiment_id += 1
+            now = _now()
+            exp = {
+                "experiment_id": experiment_id,
+                "name": name,
+                "artifact_location": artifact_location or f"mlflow-artifacts:/{experiment_id}",
+                "lifecycle_stage": "active",
+                "creation_time": now,
+                "last_update_time": now,
+                "tags": { t["key"]: t["value"] for t in _to_list(tags) }
+            }
+            self.experiments[experiment_id] = exp
+            return exp
+
+    def get_experiment(self, experiment_id):
+        exp = self.experiments.get(str(experiment_id))
+        if exp is None:
+            raise _not_found(f"No Experiment with id={experiment_id} exists")
+        return exp
+
+    def get_experiment_by_name(self, name):
+        for exp in self.experiments.values():
+            if exp["name"] == name:
+                return exp
+        raise _not_found(f"Could not find experiment with name '{name}'")
+
+    # == Runs
+
+    def create_run(self, experiment_id, run_name=None, start_time=None, user_id=None, tags=None):
+        with self._lock:
+            exp = self.get_experiment(experiment_id)
+            run_id = uuid.uuid4().hex
+            tags = { t["key"]: t["value"] for t in _to_list(tags) }
+            run_name = run_name or tags.get("mlflow.runName") or f"run-{run_id[:8]}"
+            tags["mlflow.runName"] = run_name
+            run = {
+                "info": {
+                    "run_id": run_id,
+                    "run_uuid": run_id,
+                    "run_name": run_name,
+                    "experiment_id": exp["experiment_id"],
+                    "user_id": user_id or "",
+                    "status": "RUNNING",
+                    "start_time": start_time or _now(),
+                    "artifact_uri": f"{exp['artifact_location']}/{run_id}/artifacts",
+                    "lifecycle_stage": "active"
+                },
+                "data": { "metrics": {}, "params": {}, "tags": tags },
+                "inputs": { "dataset_inputs": [], "model_inputs": [] },
+                "outputs": {}
+            }
+            self.runs[run_id] = run
+            self.metric_histories[run_id] = {}
+            return run
+
+    def get_run(self, run_id):
+        run = self.runs.get(run_id)
+        if run is None:
+            raise _not_found(f"Run '{run_id}' not found")
+        return run
+
+    def update_run(self, run_id, status=None, end_time=None, run_name=None):
+        with self._lock:
+            info = self.get_run(run_id)["info"]
+            if status:
+                info["status"] = status if isinstance(status, str) else _RUN_STATUSES[status]
+            if end_time:
+                info["end_time"] = int(end_time)
+            if run_name:
+                info["run_name"] = run_name
+                self.runs[run_id]["data"]["tags"]["mlflow.runName"] = run_name
+            return info
+
+    def log_batch(self, run_id, metrics=None, params=None, tags=None):
+        with self._lock:
+            run = self.get_run(run_id)
+            data = run["data"]
+            for p in _to_list(params):
+                old = data["params"].get(p["key"])
+                if old is not None and old != p["value"]:
+                    raise _invalid(f"Changing param values is not allowed. Param with key='{p['key']}' was already logged")
+                data["params"][p["key"]] = p["value"]
+            for t in _to_list(tags):
+                data["tags"][t["key"]] = t["value"]
+                if t["key"] == "mlflow.runName":
+                    run["info"]["run_name"] = t["value"]
+            histories = self.metric_histories[run_id]
+            for m in _to_list(metrics):
+                metric = { "key": m["key"], "value": m["value"], "timestamp": int(m.get("timestamp", 0)), "step": int(m.get("step", 0)) }
+                histories.setdefault(m["key"], []).append(metric)
+                latest = data["metrics"].get(m["key"])
+                if latest is None or (metric["step"], metric["timestamp"]) >= (latest["step"], latest["timestamp"]):
+                    data["metrics"][m["key"]] = metric
+
+    def to_run_json(self, run):
+        data = run["data"]
+        return {
+            "info": run["info"],
+            "data": {
+                "metrics": list(data["metrics"].values()),
+                "params": _tags_to_list(data["params"]),
+                "tags": _tags_to_list(data["tags"])
+            },
+            "inputs": run["inputs"],
+            "outputs": run["outputs"]
+        }
+
+    # == Artifacts
+
+    def put_artifact(self, path, content):
+        with self._lock:
+            self.artifacts[path.strip("/")] = content
+
+    def get_artifact(self, path):
+        return self.artifacts.get(path.strip("/"))
+
+    def delete_artifacts(self, path):
+        with self._lock:
+            for p in [ p for p in self.artifacts if p == path or p.startswith(path + "/") ]:
+                del self.artifacts[p]
+
+    def create_multipart_upload(self, path):
+        upload_id = uuid.uuid4().hex
+        with self._lock:
+            self.multipart_uploads[upload_id] = {}
+        return upload_id
+
+    def put_multipart_part(self, upload_id, part_number, content):
+        with self._lock:
+            if upload_id not in self.multipart_uploads:
+                raise _not_found(f"Multipart upload '{upload_id}' not found")
+            self.multipart_uploads[upload_id][part_number] = content
+        return hashlib.md5(content).hexdigest()
+
+    def complete_multipart_upload(self, upload_id, path, parts):
+        with self._lock:
+            uploaded = self.multipart_uploads.pop(upload_id, None)
+            if uploaded is None:
+                raise _not_found(f"Multipart upload '{upload_id}' not found")
+            contents = []
+            for part in sorted(parts, key=lambda p: p["part_number"]):
+                content = uploaded.get(part["part_number"])
+                if content is None or hashlib.md5(content).hexdigest() != part["etag"]:
+                    raise _invalid(f"Part {part['part_number']} of multipart upload '{upload_id}' is missing or has a wrong ETag")
+                contents.append(content)
+            self.artifacts[path.strip("/")] = b"".join(contents)
+
+    def abort_multipart_upload(self, upload_id):
+        with self._lock:
+            self.multipart_uploads.pop(upload_id, None)
+
+    def list_artifacts(self, path):
+        """ List the direct children of a directory. Paths are relative to the directory. """
+        prefix = f"{path}/" if path else ""
+        files = {}
+        with self._lock:
+            for p, content in self.artifacts.items():
+                if not p.startswith(prefix):
+                    continue
+                name, _, rest = p[len(prefix):].partition("/")
+                if rest:
+                    files[name] = { "path": name, "is_dir": True }
+                else:
+                    files[name] = { "path": name, "is_dir": False, "file_size": len(content) }
+        return [ files[k] for k in sorted(files) ]
+
+    # == Model registry
+
+    def get_registered_model(self, name):
+        model = self.registered_models.get(name)
+        if model is None:
+            raise _not_found(f"Registered Model with name={name} not found")
+        return model
+
+    def get_model_version(self, name, version):
+        version = self.model_versions.get(name, {}).get(str(version))
+        if version is None:
+            raise _not_found(f"Model Version (name={name}, version={version}) not found")
+        return version
+
+    def to_registered_model_json(self, model):
+        versions = self.model_versions.get(model["name"], {}).values()
+        latest = {}
+        for vr in versions:
+            if int(vr["version"]) > int(latest.get(vr["current_stage"], { "version": 0 })["version"]):
+                latest[vr["current_stage"]] = vr
+        return { **model,
+            "tags": _tags_to_list(model["tags"]),
+            "aliases": [ { "alias": k, "version": v } for k,v in model["aliases"].items() ],
+            "latest_versions": [ self.to_model_version_json(vr) for vr in latest.values() ]
+        }
+
+    def to_model_version_json(self, vr):
+        aliases = self.registered_models[vr["name"]]["aliases"]
+        return { **vr,
+            "tags": _tags_to_list(vr["tags"]),
+            "aliases": [ k for k,v in aliases.items() if v == vr["version"] ]
+        }
+
+
+_RUN_STATUSES = { 1: "RUNNING", 2: "SCHEDULED", 3: "FINISHED", 4: "FAILED", 5: "KILLED" }
+
+
+# == Search filters
+
+_FILTER_CLAUSE = re.compile(r"""^\s*(?:(\w+)\.)?([`"]?)([\w.\-/ ]+?)\2\s*(!=|>=|<=|=|>|<|NOT\s+IN|IN|NOT\s+LIKE|ILIKE|LIKE)\s*(.+?)\s*$""", re.IGNORECASE)
+_AND = re.compile(r"\s+AND\s+(?=(?:[^']*'[^']*')*[^']*$)", re.IGNORECASE)
+
+
+def _parse_filter(filter_string):
+    """
+    Parse a search filter into a list of (entity type, key, operator, value) clauses joined by AND.
+    """
+    if not filter_string:
+        return []
+    clauses = []
+    for clause in _AND.split(filter_string.strip()):
+        m = _FILTER_CLAUSE.match(clause)
+        if not m:
+            raise _invalid(f"Invalid filter '{filter_string}'")
+        entity, _, key, op, value = m.groups()
+        clauses.append(((entity or "attributes").lower(), key, re.sub(r"\s+", " ", op.upper()), _parse_value(value)))
+    return clauses
+
+
+def _parse_value(value):
+    if value.startswith("("):
+        return [ _parse_value(v.strip()) for v in value.strip("()").split(",") if v.strip() ]
+    if value[:1] in ("'", '"'):
+        return value[1:-1]
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _matches(clauses, lookup):
+    """
+    :param lookup: Function of (entity type, key) returning the value to compare or None.
+    """
+    for entity, key, op, expected in clauses:
+        actual = lookup(entity, key)
+        if actual is None:
+            return False
+        if isinstance(expected, float) and not isinstance(actual, (int, float)):
+            try:
+                actual = float(actual)
+            except ValueError:
+                return False
+        if not _compare(actual, op, expected):
+            return False
+    return True
+
+
+def _compare(actual, op, expected):
+    if op == "=": return actual == expected
+    if op == "!=": return actual != expected
+    if op == ">": return actual > expected
+    if op == ">=": return actual >= expected
+    if op == "<": return actual < expected
+    if op == "<=": return actual <= expected
+    if op == "IN": return actual in expected
+    if op == "NOT IN": return actual not in expected
+    pattern = "^" + re.escape(str(expected)).replace("%", ".*").replace("_", ".") + "$"
+    flags = re.IGNORECASE if op == "ILIKE" else 0
+    is_match = re.match(pattern, str(actual), flags) is not None
+    return not is_match if op == "NOT LIKE" else is_match
+
+
+_RUN_ATTRIBUTES = { "run_id": "run_id", "id": "run_id", "run_name": "run_name", "status": "status",
+    "start_time": "start_time", "created": "start_time", "end_time": "end_time", "user_id": "user_id",
+    "artifact_uri": "artifact_uri", "lifecycle_stage": "lifecycle_stage" }
+
+
+def _run_lookup(run):
+    def lookup(entity, key):
+        if entity in ("attributes", "attribute", "attr", "run"):
+            return run["info"].get(_RUN_ATTRIBUTES.get(key, key))
+        if entity in ("tags", "tag"):
+            return run["data"]["tags"].get(key)
+        if entity in ("params", "param", "parameter", "parameters"):
+            return run["data"]["params"].get(key)
+        if entity in ("metrics", "metric"):
+            metric = run["data"]["metrics"].get(key)
+            return metric["value"] if metric else None
+        return None
+    return lookup
+
+
+def _named_lookup(obj):
+    """ Lookup for experiments, registered models and model versions. """
+    def lookup(entity, key):
+        if entity in ("tags", "tag"):
+            return obj["tags"].get(key)
+        return obj.get(key)
+    return lookup
+
+
+def _is_visible(lifecycle_stage, view_type):
+    view_type = _VIEW_TYPES.get(view_type, view_type) or "ACTIVE_ONLY"
+    if view_type == "ALL":
+        return True
+    return (lifecycle_stage == "deleted") == (view_type == "DELETED_ONLY")
+
+
+def _paginate(items, params, key, max_results=_MAX_RESULTS):
+    max_results = int(params.get("max_results") or max_results)
+    offset = int(params.get("page_token") or 0)
+    page = items[offset:offset+max_results]
+    rsp = { key: page }
+    if offset + max_results < len(items):
+        rsp["next_page_token"] = str(offset + max_results)
+    return rsp
+
+
+# == Experiment endpoints
+
+def _create_experiment(store, params):
+    exp = store.create_experiment(params.get("name"), params.get("tags"), params.get("artifact_location"))
+    return { "experiment_id": exp["experiment_id"] }
+
+
+def _get_experiment(store, params):
+    return { "experiment": _experiment_json(store.get_experiment(params.get("experiment_id"))) }
+
+
+def _get_experiment_by_name(store, params):
+    return { "experiment": _experiment_json(store.get_experiment_by_name(params.get("experiment_name"))) }
+
+
+def _search_experiments(store, params):
+    clauses = _parse_filter(params.get("filter"))
+    with store._lock:
+        exps = [ exp for exp in store.experiments.values()
+            if _is_visible(exp["lifecycle_stage"], params.get("view_type")) and _matches(clauses, _named_lookup(exp)) ]
+    exps.sort(key=lambda exp: (-exp["creation_time"], int(exp["experiment_id"])))
+    return _paginate([ _experiment_json(exp) for exp in exps ], params, "experiments")
+
+
+def _set_experiment_tag(store, params):
+    with store._lock:
+        store.get_experiment(params["experiment_id"])["tags"][params["key"]] = params["value"]
+    return {}
+
+
+def _update_experiment(store, params):
+    with store._lock:
+        exp = store.get_experiment(params["experiment_id"])
+        if params.get("new_name"):
+            exp["name"] = params["new_name"]
+    return {}
+
+
+def _delete_experiment(store, params):
+    return _set_experiment_lifecycle(store, params["experiment_id"], "deleted")
+
+
+def _restore_experiment(store, params):
+    return _set_experiment_lifecycle(store, params["experiment_id"], "active")
+
+
+def _set_experiment_lifecycle(store, experiment_id, lifecycle_stage):
+    with store._lock:
+        store.get_experiment(experiment_id)["lifecycle_stage"] = lifecycle_stage
+        for run in store.runs.values():
+            if run["info"]["experiment_id"] == str(experiment_id):
+                run["info"]["lifecycle_stage"] = lifecycle_stage
+    return {}
+
+
+def _experiment_json(exp):
+    return { **exp, "tags": _tags_to_list(exp["tags"]) }
+
+
+# == Run endpoints
+
+def _create_run(store, params):
+    run = store.create_run(params.get("experiment_id"), params.get("run_name"),
+        params.get("start_time"), params.get("user_id"), params.get("tags"))
+    return { "run": store.to_run_json(run) }
+
+
+def _get_run(store, params):
+    return { "run": store.to_run_json(store.get_run(params.get("run_id") or params.get("run_uuid"))) }
+
+
+def _search_runs(store, params):
+    exp_ids = [ str(exp_id) for exp_id in _to_list(params.get("experiment_ids")) ]
+    clauses = _parse_filter(params.get("filter"))
+    with store._lock:
+        runs = [ run for run in store.runs.values()
+            if run["info"]["experiment_id"] in exp_ids
+                and _is_visible(run["info"]["lifecycle_stage"], params.get("run_view_type"))
+                and _matches(clauses, _run_lookup(run)) ]
+        runs = [ store.to_run_json(run) for run in runs ]
+    runs.sort(key=lambda run: (-run["info"]["start_time"], run["info"]["run_id"]))
+    for order_by in reversed(_to_list(params.get("order_by"))):
+        m = re.match(r"^(?:attributes?\.)?(\w+)(?:\s+(ASC|DESC))?$", order_by.strip(), re.IGNORECASE)
+        if m and _RUN_ATTRIBUTES.get(m.group(1)):
+            attr = _RUN_ATTRIBUTES[m.group(1)]
+            runs.sort(key=lambda run: run["info"].get(attr) or 0, reverse=(m.group(2) or "ASC").upper() == "DESC")
+    return _paginate(runs, params, "runs")
+
+
+def _update_run(store, params):
+    info = store.update_run(params.get("run_id") or params.get("run_uuid"),
+        params.get("status"), params.get("end_time"), params.get("run_name"))
+    return { "run_info": info }
+
+
+def _log_batch(store, params):
+    store.log_batch(params["run_id"], params.get("metrics"), params.get("params"), params.get("tags"))
+    return {}
+
+
+def _log_metric(store, params):
+    store.log_batch(params.get("run_id") or params.get("run_uuid"), metrics=[ params ])
+    return {}
+
+
+def _log_param(store, params):
+    store.log_batch(params.get("run_id") or params.get("run_uuid"), params=[ params ])
+    return {}
+
+
+def _set_tag(store, params):
+    store.log_batch(params.get("run_id") or params.get("run_uuid"), tags=[ params ])
+    return {}
+
+
+def _delete_tag(store, params):
+    with store._lock:
+        store.get_run(params["run_id"])["data"]["tags"].pop(params["key"], None)
+    return {}
+
+
+def _log_inputs(store, params):
+    with store._lock:
+        inputs = store.get_run(params["run_id"])["inputs"]
+        inputs["dataset_inputs"] += _to_list(params.get("datasets"))
+        inputs["model_inputs"] += _to_list(params.get("models"))
+    return {}
+
+
+def _delete_run(store, params):
+    with store._lock:
+        store.get_run(params["run_id"])["info"]["lifecycle_stage"] = "deleted"
+    return {}
+
+
+def _restore_run(store, params):
+    with store._lock:
+        store.get_run(params["run_id"])["info"]["lifecycle_stage"] = "active"
+    return {}
+
+
+def _get_metric_history(store, params):
+    run_id = params.get("run_id") or params.get("run_uuid")
+    store.get_run(run_id)
+    history = list(store.metric_histories[run_id].get(params.get("metric_key"), []))
+    return _paginate(history, params, "metrics", max_results=len(history) or 1)
+
+
+def _list_artifacts(store, params):
+    run = store.get_run(params.get("run_id") or params.get("run_uuid"))
+    root_uri = run["info"]["artifact_uri"]
+    root = root_uri.split(":/", 1)[1].strip("/")
+    path = params.get("path", "")
+    files = store.list_artifacts(posixpath.join(root, path).strip("/") if path else root)
+    files = [ { **f, "path": posixpath.join(path, f["path"]) if path else f["path"] } for f in files ]
+    return { "root_uri": root_uri, "files": files }
+
+
+# == Registry endpoints
+
+def _create_registered_model(store, params):
+    name = params.get("name")
+    with store._lock:
+        if name in store.registered_models:
+            raise _already_exists(f"Registered Model (name={name}) already exists")
+        now = _now()
+        store.registered_models[name] = {
+            "name": name,
+            "creation_timestamp": now,
+            "last_updated_timestamp": now,
+            "description": params.get("description", ""),
+            "tags": { t["key"]: t["value"] for t in _to_list(params.get("tags")) },
+            "aliases": {}
+        }
+        store.model_versions[name] = {}
+        return { "registered_model": store.to_registered_model_json(store.registered_models[name]) }
+
+
+def _get_registered_model(store, params):
+    with store._lock:
+        return { "registered_model": store.to_registered_model_json(store.get_registered_model(params.get("name"))) }
+
+
+def _search_registered_models(store, params):
+    clauses = _parse_filter(params.get("filter"))
+    with store._lock:
+        models = [ store.to_registered_model_json(m) for m in store.registered_models.values()
+            if _matches(clauses, _named_lookup(m)) ]
+    models.sort(key=lambda m: m["name"])
+    return _paginate(models, params, "registered_models")
+
+
+def _update_registered_model(store, params):
+    with store._lock:
+        model = store.get_registered_model(params["name"])
+        if "description" in params:
+            model["description"] = params["description"]
+        model["last_updated_timestamp"] = _now()
+        return { "registered_model": store.to_registered_model_json(model) }
+
+
+def _delete_registered_model(store, params):
+    with store._lock:
+        store.get_registered_model(params["name"])
+        del store.registered_models[params["name"]]
+        del store.model_versions[params["name"]]
+    return {}
+
+
+def _set_registered_model_tag(store, params):
+    with store._lock:
+        store.get_registered_model(params["name"])["tags"][params["key"]] = params["value"]
+    return {}
+
+
+def _delete_registered_model_tag(store, params):
+    with store._lock:
+        store.get_registered_model(params["name"])["tags"].pop(params["key"], None)
+    return {}
+
+
+def _get_latest_versions(store, params):
+    with store._lock:
+        model = store.to_registered_model_json(store.get_registered_model(params["name"]))
+    stages = _to_list(params.get("stages"))
+    versions = [ vr for vr in model["latest_versions"] if not stages or vr["current_stage"] in stages ]
+    return { "model_versions": versions }
+
+
+def _set_alias(store, params):
+    with store._lock:
+        store.get_model_version(params["name"], params["version"])
+        store.get_registered_model(params["name"])["aliases"][params["alias"]] = str(params["version"])
+    return {}
+
+
+def _delete_alias(store, params):
+    with store._lock:
+        store.get_registered_model(params["name"])["aliases"].pop(params["alias"], None)
+    return {}
+
+
+def _get_model_version_by_alias(store, params):
+    with store._lock:
+        version = store.get_registered_model(params["name"])["aliases"].get(params["alias"])
+        if version is None:
+            raise _not_found(f"Alias '{params['alias']}' not found")
+        return { "model_version": store.to_model_version_json(store.get_model_version(params["name"], version)) }
+
+
+def _create_model_version(store, params):
+    name = params.get("name")
+    with store._lock:
+        store.get_registered_model(name)
+        versions = store.model_versions[name]
+        version = str(max([ int(v) for v in versions ] or [0]) + 1)
+        now = _now()
+        versions[version] = {
+            "name": name,
+            "version": version,
+            "creation_timestamp": now,
+            "last_updated_timestamp": now,
+            "current_stage": "None",
+            "description": params.get("description", ""),
+            "source": params.get("source", ""),
+            "run_id": params.get("run_id", ""),
+            "run_link": params.get("run_link", ""),
+            "model_id": params.get("model_id", ""),
+            "status": "READY",
+            "tags": { t["key"]: t["value"] for t in _to_list(params.get("tags")) }
+        }
+        return { "model_version": store.to_model_version_json(versions[version]) }
+
+
+def _get_model_version(store, params):
+    with store._lock:
+        return { "model_version": store.to_model_version_json(store.get_model_version(params["name"], params["version"])) }
+
+
+def _search_model_versions(store, params):
+    clauses = _parse_filter(params.get("filter"))
+    with store._lock:
+        versions = [ store.to_model_version_json(vr) for versions in store.model_versions.values()
+            for vr in versions.values() if _matches(clauses, _named_lookup(vr)) ]
+    versions.sort(key=lambda vr: (vr["name"], -int(vr["version"])))
+    return _paginate(versions, params, "model_versions")
+
+
+def _update_model_version(store, params):
+    with store._lock:
+        vr = store.get_model_version(params["name"], params["version"])
+        if "description" in params:
+            vr["description"] = params["description"]
+        vr["last_updated_timestamp"] = _now()
+        return { "model_version": store.to_model_version_json(vr) }
+
+
+def _transition_model_version_stage(store, params):
+    with store._lock:
+        vr = store.get_model_version(params["name"], params["version"])
+        stage = params["stage"]
+        if str(params.get("archive_existing_versions")).lower() == "true" and stage in ("Staging", "Production"):
+            for other in store.model_versions[params["name"]].values():
+                if other is not vr and other["current_stage"] == stage:
+                    other["current_stage"] = "Archived"
+        vr["current_stage"] = stage
+        vr["last_updated_timestamp"] = _now()
+        return { "model_version": store.to_model_version_json(vr) }
+
+
+def _delete_model_version(store, params):
+    with store._lock:
+        store.get_model_version(params["name"], params["version"])
+        del store.model_versions[params["name"]][str(params["version"])]
+    return {}
+
+
+def _set_model_version_tag(store, params):
+    with store._lock:
+        store.get_model_version(params["name"], params["version"])["tags"][params["key"]] = params["value"]
+    return {}
+
+
+def _delete_model_version_tag(store, params):
+    with store._lock:
+        store.get_model_version(params["name"], params["version"])["tags"].pop(params["key"], None)
+    return {}
+
+
+def _get_model_version_download_uri(store, params):
+    return { "artifact_uri": store.get_model_version(params["name"], params["version"])["source"] }
+
+
+def _search_empty(key):
+    return lambda store, params: { key: [] }
+
+
+_ROUTES = {
+    ("POST", "experiments/create"): _create_experiment,
+    ("GET", "experiments/get"): _get_experiment,
+    ("GET", "experiments/get-by-name"): _get_experiment_by_name,
+    ("*", "experiments/search"): _search_experiments,
+    ("POST", "experiments/set-experiment-tag"): _set_experiment_tag,
+    ("POST", "experiments/update"): _update_experiment,
+    ("POST", "experiments/delete"): _delete_experiment,
+    ("POST", "experiments/restore"): _restore_experiment,
+
+    ("POST", "runs/create"): _create_run,
+    ("GET", "runs/get"): _get_run,
+    ("*", "runs/search"): _search_runs,
+    ("POST", "runs/update"): _update_run,
+    ("POST", "runs/log-batch"): _log_batch,
+    ("POST", "runs/log-metric"): _log_metric,
+    ("POST", "runs/log-parameter"): _log_param,
+    ("POST", "runs/set-tag"): _set_tag,
+    ("POST", "runs/delete-tag"): _delete_tag,
+    ("POST", "runs/log-inputs"): _log_inputs,
+    ("POST", "runs/delete"): _delete_run,
+    ("POST", "runs/restore"): _restore_run,
+    ("GET", "metrics/get-history"): _get_metric_history,
+    ("GET", "artifacts/list"): _list_artifacts,
+
+    ("POST", "registered-models/create"): _create_registered_model,
+    ("GET", "registered-models/get"): _get_registered_model,
+    ("GET", "registered-models/search"): _search_registered_models,
+    ("PATCH", "registered-models/update"): _update_registered_model,
+    ("DELETE", "registered-models/delete"): _delete_registered_model,
+    ("POST", "registered-models/set-tag"): _set_registered_model_tag,
+    ("DELETE", "registered-models/delete-tag"): _delete_registered_model_tag,
+    ("*", "registered-models/get-latest-versions"): _get_latest_versions,
+    ("POST", "registered-models/alias"): _set_alias,
+    ("DELETE", "registered-models/alias"): _delete_alias,
+    ("GET", "registered-models/alias"): _get_model_version_by_alias,
+
+    ("POST", "model-versions/create"): _create_model_version,
+    ("GET", "model-versions/get"): _get_model_version,
+    ("GET", "model-versions/search"): _search_model_versions,
+    ("PATCH", "model-versions/update"): _update_model_version,
+    ("POST", "model-versions/transition-stage"): _transition_model_version_stage,
+    ("DELETE", "model-versions/delete"): _delete_model_version,
+    ("POST", "model-versions/set-tag"): _set_model_version_tag,
+    ("DELETE", "model-versions/delete-tag"): _delete_model_version_tag,
+    ("GET", "model-versions/get-download-uri"): _get_model_version_download_uri,
+
+    ("POST", "logged-models/search"): _search_empty("models"),
+    ("POST", "traces/search"): _search_empty("traces"),
+    ("GET", "traces"): _search_empty("traces"),
+}
+
+
+@pytest.fixture()
+def fake_server():
+    """ Started FakeMlflowServer that is stopped at the end of the test. """
+    with FakeMlflowServer() as server:
+        yield server
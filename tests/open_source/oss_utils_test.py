@@ -1,3 +1,5 @@
+import os
+import tempfile
 import time
 import mlflow
 from mlflow.utils.mlflow_tags import MLFLOW_RUN_NOTE # NOTE: ""mlflow.note.content" - used for Experiment Description too!
@@ -68,10 +70,12 @@ def _create_simple_run(client, run_name=None, model_artifact="model", use_metric
             mlflow.set_tag("my_tag", "my_val")
             mlflow.set_tag("my_uuid", utils_test.mk_uuid())
             mlflow.sklearn.log_model(model, model_artifact)
-            with open("info.txt", "w", encoding="utf-8") as f:
-                f.write("Hi artifact")
-            mlflow.log_artifact("info.txt")
-            mlflow.log_artifact("info.txt", "dir2")
+            with tempfile.TemporaryDirectory() as dir:
+                path = os.path.join(dir, "info.txt")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("Hi artifact")
+                mlflow.log_artifact(path)
+                mlflow.log_artifact(path, "dir2")
             mlflow.log_metric("m1", 0.1)
             mlflow.log_input(utils_test.create_iris_dataset(), context="test_training")
 
@@ -0,0 +1,281 @@
+"""
+Test the artifact download and upload engine against the fake tracking server.
+"""
+
+import os
+import time
+import pytest
+import requests
+import mlflow
+from mlflow.entities import FileInfo
+from mlflow.entities.multipart_upload import MultipartUploadCredential
+
+from mlflow_export_import.common import artifact_transfer
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.client import request_metrics
+from mlflow_export_import.run.export_run import export_run
+from mlflow_export_import.run.import_run import import_run
+from tests.open_source.fake_mlflow_server import fake_server, ARTIFACTS_ENDPOINT, MULTIPART_ENDPOINT
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(artifact_transfer, "_BACKOFF_SECONDS", 0)
+    monkeypatch.setenv("MLFLOW_HTTP_REQUEST_MAX_RETRIES", "0")
+
+
+def _mk_run(fake_server, tmpdir, num_files=10, num_dirs=2):
+    exp_id, = fake_server.populate(num_runs=1, num_metrics=0, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run = client.search_runs([exp_id])[0]
+    src_dir = tmpdir.mkdir("src")
+    for d in range(num_dirs):
+        sub_dir = src_dir.mkdir(f"dir_{d}").mkdir("nested")
+        for j in range(num_files):
+            sub_dir.join(f"file_{j}.txt").write(f"{d}-{j}-" + "x" * j)
+    src_dir.join("root.txt").write("root")
+    root = run.info.artifact_uri.split(":/", 1)[1]
+    for path, content in _files(str(src_dir)).items():
+        fake_server.store.put_artifact(f"{root}/{path}", content.encode())
+    return client, run, str(src_dir)
+
+
+def _files(root):
+    files = {}
+    for dir, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dir, name)
+            with open(path) as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def _download(fake_server, run, dst_path, **kwargs):
+    return artifact_transfer.download_artifacts(run.info.artifact_uri, dst_path, tracking_uri=fake_server.uri, **kwargs)
+
+
+def test_download_tree(fake_server, tmpdir):
+    _, run, src_dir = _mk_run(fake_server, tmpdir)
+    dst_path = str(tmpdir.join("dst"))
+    stats = _download(fake_server, run, dst_path)
+    assert _files(dst_path) == _files(src_dir)
+    assert stats.files == 21
+    assert stats.skipped_files == 0
+    assert stats.bytes == sum(len(v) for v in _files(src_dir).values())
+
+
+def test_resume(fake_server, tmpdir):
+    _, run, src_dir = _mk_run(fake_server, tmpdir)
+    dst_path = str(tmpdir.join("dst"))
+    _download(fake_server, run, dst_path)
+    os.remove(os.path.join(dst_path, "dir_0", "nested", "file_3.txt"))
+    with open(os.path.join(dst_path, "dir_1", "nested", "file_5.txt"), "w") as f:
+        f.write("1-5")
+    os.rename(os.path.join(dst_path, "root.txt"), os.path.join(dst_path, "root.txt.part")) # interrupted download
+    fake_server.reset()
+    stats = _download(fake_server, run, dst_path)
+    assert _files(dst_path) == _files(src_dir)
+    assert stats.skipped_files == 18
+    assert fake_server.get_num_requests(ARTIFACTS_ENDPOINT) == 5 + 3 # 5 listings and 3 downloads
+
+
+def test_retries(fake_server, tmpdir):
+    _, run, src_dir = _mk_run(fake_server, tmpdir)
+    fake_server.configure(ARTIFACTS_ENDPOINT, error_rate=0.3)
+    dst_path = str(tmpdir.join("dst"))
+    stats = _download(fake_server, run, dst_path, max_retries=10)
+    assert _files(dst_path) == _files(src_dir)
+    assert stats.retries > 0
+
+
+def test_failure_raises(fake_server, tmpdir):
+    _, run, _ = _mk_run(fake_server, tmpdir)
+    fake_server.configure(ARTIFACTS_ENDPOINT, error_rate=1.0)
+    with pytest.raises(Exception):
+        _download(fake_server, run, str(tmpdir.join("dst")), max_retries=1)
+
+
+def test_concurrent_downloads(fake_server, tmpdir):
+    _, run, _ = _mk_run(fake_server, tmpdir, num_files=8, num_dirs=1)
+    fake_server.configure(ARTIFACTS_ENDPOINT, latency=0.1)
+    start = time.time()
+    _download(fake_server, run, str(tmpdir.join("dst")), max_workers=8)
+    assert time.time() - start < 0.9 # 3 listings and 9 downloads take 1.2 seconds serially
+    assert fake_server.get_stats()["max_concurrent_requests"] > 1
+
+
+def _http_error(status_code):
+    rsp = requests.Response()
+    rsp.status_code = status_code
+    return requests.exceptions.HTTPError(f"{status_code} error", response=rsp)
+
+
+def test_size_verification(tmpdir):
+    class _Repo:
+        def _download_file(self, remote_file_path, local_path):
+            with open(local_path, "w") as f:
+                f.write("abc")
+    stats = artifact_transfer.TransferStats("test")
+    with pytest.raises(MlflowExportImportException):
+        artifact_transfer._download_file(_Repo(), FileInfo("a/b.txt", False, 10), str(tmpdir), 1, stats)
+    assert stats.retries == 1
+    assert not os.path.exists(os.path.join(tmpdir, "a", "b.txt"))
+    artifact_transfer._download_file(_Repo(), FileInfo("a/b.txt", False, 3), str(tmpdir), 1, stats)
+    assert stats.files == 1
+
+
+@pytest.mark.parametrize("error, retried", [
+    (_http_error(503), True),
+    (_http_error(429), True),
+    (_http_error(404), False),
+    (requests.exceptions.ConnectionError("reset"), True),
+    (requests.exceptions.ReadTimeout("timed out"), True),
+    (PermissionError("read-only"), False),
+])
+def test_retried_errors(error, retried):
+    calls = []
+    def func():
+        calls.append(1)
+        raise error
+    stats = artifact_transfer.TransferStats("test")
+    with pytest.raises(type(error)):
+        artifact_transfer._with_retries(func, "a.txt", 2, stats)
+    assert len(calls) == (3 if retried else 1)
+
+
+def test_upload_part_timeout(tmpdir, monkeypatch):
+    class _Session:
+        def put(self, url, **kwargs):
+            self.kwargs = kwargs
+            rsp = requests.Response()
+            rsp.status_code = 200
+            rsp.headers["ETag"] = "etag"
+            return rsp
+    session = _Session()
+    monkeypatch.setattr(artifact_transfer.http_session, "get_session", lambda: session)
+    monkeypatch.setenv("MLFLOW_HTTP_REQUEST_TIMEOUT", "42")
+    path = tmpdir.join("file.bin")
+    path.write_binary(b"x" * 10)
+    credential = MultipartUploadCredential(url="http://localhost/part", part_number=1, headers={})
+    part = artifact_transfer._upload_part(credential, str(path), 0, 10)
+    assert part.etag == "etag"
+    assert session.kwargs["timeout"] == (artifact_transfer._CONNECT_TIMEOUT_SECONDS, 42)
+
+
+def test_export_run(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run, src_dir = _mk_run(fake_server, tmpdir)
+    request_metrics.reset()
+    output_dir = str(tmpdir.join("run"))
+    assert export_run(run.info.run_id, output_dir, mlflow_client=client, raise_exception=True)
+    assert _files(os.path.join(output_dir, "artifacts")) == _files(src_dir)
+    downloads = request_metrics.get_summary()["artifacts/download"]
+    assert downloads["count"] == 1
+    assert downloads["bytes_received"] == sum(len(v) for v in _files(src_dir).values())
+
+
+def test_mk_dst_path():
+    assert artifact_transfer.mk_dst_path("out", "mlflow-artifacts:/1/models/m-1/artifacts/") == os.path.join("out", "artifacts")
+
+
+# == Uploads
+
+def _mk_upload_dir(tmpdir, sizes):
+    src_dir = tmpdir.mkdir("upload")
+    for j, size in enumerate(sizes):
+        sub_dir = src_dir.join(f"dir_{j % 3}")
+        sub_dir.ensure(dir=True)
+        sub_dir.join(f"file_{j}.bin").write_binary(bytes(j % 256 for j in range(size)))
+    return str(src_dir)
+
+
+def _local_files(root):
+    files = {}
+    for dir, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(dir, name)
+            with open(path, "rb") as f:
+                files[os.path.relpath(path, root)] = f.read()
+    return files
+
+
+def _stored_files(fake_server, artifact_uri):
+    root = artifact_uri.split(":/", 1)[1].strip("/") + "/"
+    return { os.path.join(*p[len(root):].split("/")): content
+        for p, content in fake_server.store.artifacts.items() if p.startswith(root) }
+
+
+def _upload(fake_server, src_dir, **kwargs):
+    run = mlflow.MlflowClient(fake_server.uri).create_run("0")
+    stats = artifact_transfer.upload_artifacts(src_dir, run.info.artifact_uri, tracking_uri=fake_server.uri, **kwargs)
+    return run, stats
+
+
+@pytest.fixture()
+def small_multipart(monkeypatch):
+    monkeypatch.setenv("MLFLOW_MULTIPART_UPLOAD_MINIMUM_FILE_SIZE", "1000")
+    monkeypatch.setenv("MLFLOW_MULTIPART_UPLOAD_CHUNK_SIZE", "300")
+
+
+def test_upload_tree(fake_server, tmpdir):
+    src_dir = _mk_upload_dir(tmpdir, range(0, 2000, 100))
+    run, stats = _upload(fake_server, src_dir)
+    assert _stored_files(fake_server, run.info.artifact_uri) == _local_files(src_dir)
+    assert stats.files == 20
+    assert stats.multipart_files == 0
+    assert stats.bytes == sum(range(0, 2000, 100))
+    assert fake_server.get_num_requests(MULTIPART_ENDPOINT) == 0
+
+
+def test_upload_multipart(fake_server, tmpdir, small_multipart):
+    src_dir = _mk_upload_dir(tmpdir, [10, 999, 1000, 2500])
+    run, stats = _upload(fake_server, src_dir)
+    assert _stored_files(fake_server, run.info.artifact_uri) == _local_files(src_dir)
+    assert stats.multipart_files == 2
+    assert fake_server.get_num_requests(MULTIPART_ENDPOINT) == (1 + 4 + 1) + (1 + 9 + 1) # create, parts and complete
+    assert fake_server.get_num_requests(ARTIFACTS_ENDPOINT) == 2
+    assert not fake_server.store.multipart_uploads
+
+
+def test_upload_multipart_unsupported(fake_server, tmpdir, small_multipart):
+    fake_server.multipart_supported = False
+    src_dir = _mk_upload_dir(tmpdir, [1000, 2000, 3000])
+    run, stats = _upload(fake_server, src_dir, max_workers=1)
+    assert _stored_files(fake_server, run.info.artifact_uri) == _local_files(src_dir)
+    assert stats.multipart_files == 0
+    assert fake_server.get_num_requests(MULTIPART_ENDPOINT) == 1 # not retried for the other files
+    assert stats.retries == 0
+
+
+def test_upload_retries(fake_server, tmpdir, small_multipart):
+    src_dir = _mk_upload_dir(tmpdir, [100, 200, 3000, 4000])
+    fake_server.configure(ARTIFACTS_ENDPOINT, error_rate=0.3)
+    fake_server.configure(MULTIPART_ENDPOINT, error_rate=0.2)
+    run, stats = _upload(fake_server, src_dir, max_retries=10)
+    assert _stored_files(fake_server, run.info.artifact_uri) == _local_files(src_dir)
+    errors = sum(fake_server.get_stats()["endpoints"][endpoint]["errors"] for endpoint in (ARTIFACTS_ENDPOINT, MULTIPART_ENDPOINT))
+    assert errors > 0 # part uploads are also retried by the pooled HTTP session, so stats.retries may be 0
+
+
+def test_concurrent_uploads(fake_server, tmpdir):
+    src_dir = _mk_upload_dir(tmpdir, [10] * 8)
+    fake_server.configure(ARTIFACTS_ENDPOINT, latency=0.1)
+    start = time.time()
+    _upload(fake_server, src_dir, max_workers=8)
+    assert time.time() - start < 0.6 # 8 uploads take 0.8 seconds serially
+    assert fake_server.get_stats()["max_concurrent_requests"] > 1
+
+
+def test_import_run(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run, src_dir = _mk_run(fake_server, tmpdir)
+    output_dir = str(tmpdir.join("run"))
+    assert export_run(run.info.run_id, output_dir, mlflow_client=client, raise_exception=True)
+    request_metrics.reset()
+    artifact_transfer.reset_stats()
+    dst_run, _ = import_run(output_dir, "imported", mlflow_client=client)
+    assert _stored_files(fake_server, dst_run.info.artifact_uri) == _local_files(src_dir)
+    size = sum(len(v) for v in _files(src_dir).values())
+    assert request_metrics.get_summary()["artifacts/upload"]["bytes_sent"] == size
+    uploads = artifact_transfer.get_stats()["upload"]
+    assert (uploads["trees"], uploads["files"], uploads["bytes"]) == (1, 21, size)
@@ -0,0 +1,131 @@
+"""
+Test the content-addressed artifact store against the fake tracking server.
+"""
+
+import os
+import pytest
+import mlflow
+
+from mlflow_export_import.common import blob_store, io_utils
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.run.export_run import export_run
+from mlflow_export_import.run.import_run import import_run
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from tests.open_source.fake_mlflow_server import fake_server, ARTIFACTS_ENDPOINT
+
+
+def _populate(fake_server, num_runs=3):
+    exp_id, = fake_server.populate(num_runs=num_runs, num_metrics=1, num_artifacts=2)
+    client = mlflow.MlflowClient(fake_server.uri)
+    return client, client.search_runs([exp_id])
+
+
+def _stored_files(fake_server, artifact_uri):
+    root = artifact_uri.split(":/", 1)[1].strip("/") + "/"
+    return { p[len(root):]: content for p, content in fake_server.store.artifacts.items() if p.startswith(root) }
+
+
+def _num_blobs(output_dir):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(output_dir, blob_store.BLOBS_DIR, "sha256")))
+
+
+def test_dedup_identical_files(fake_server, tmpdir):
+    client, runs = _populate(fake_server)
+    output_dir = str(tmpdir)
+    with blob_store.activate(output_dir) as store:
+        for run in runs:
+            assert export_run(run.info.run_id, os.path.join(output_dir, run.info.run_id), mlflow_client=client, raise_exception=True)
+    for run in runs:
+        run_dir = os.path.join(output_dir, run.info.run_id)
+        assert not os.path.exists(os.path.join(run_dir, "artifacts"))
+        manifest = io_utils.read_file_mlflow(os.path.join(run_dir, blob_store.MANIFEST_FILE))
+        assert manifest["blob_store"] == ".."
+        assert [ f["path"] for f in manifest["files"] ] == [ "file_0.txt", "file_1.txt" ]
+    assert _num_blobs(output_dir) == 1 # all populated artifacts have the same content
+    stats = store.get_stats()
+    assert (stats["blobs"], stats["duplicate_files"]) == (1, 5)
+    assert not os.path.exists(os.path.join(output_dir, blob_store.BLOBS_DIR, "tmp"))
+
+
+def test_reuse_manifest(fake_server, tmpdir):
+    client, runs = _populate(fake_server, num_runs=1)
+    run_id = runs[0].info.run_id
+    output_dir = str(tmpdir)
+    with blob_store.activate(output_dir) as store:
+        export_run(run_id, os.path.join(output_dir, "models", run_id), mlflow_client=client, raise_exception=True)
+        fake_server.reset()
+        export_run(run_id, os.path.join(output_dir, "experiments", "1", run_id), mlflow_client=client, raise_exception=True)
+    assert fake_server.get_num_requests(ARTIFACTS_ENDPOINT) == 1 # export_run's has-artifacts listing
+    assert store.get_stats()["reused_manifests"] == 1
+    manifest = io_utils.read_file_mlflow(os.path.join(output_dir, "experiments", "1", run_id, blob_store.MANIFEST_FILE))
+    assert manifest["blob_store"] == "../../.."
+
+
+def test_import_run(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, runs = _populate(fake_server, num_runs=1)
+    run = runs[0]
+    output_dir = str(tmpdir.join("export"))
+    run_dir = os.path.join(output_dir, "experiments", run.info.run_id)
+    with blob_store.activate(output_dir):
+        export_run(run.info.run_id, run_dir, mlflow_client=client, raise_exception=True)
+    dst_run, _ = import_run(run_dir, "imported", mlflow_client=client)
+    assert _stored_files(fake_server, dst_run.info.artifact_uri) == _stored_files(fake_server, run.info.artifact_uri)
+
+
+def test_export_experiments(fake_server, tmpdir):
+    client, runs = _populate(fake_server)
+    output_dir = str(tmpdir)
+    export_experiments([runs[0].info.experiment_id], output_dir, dedup_artifacts=True, mlflow_client=client)
+    for run in runs:
+        run_dir = os.path.join(output_dir, run.info.experiment_id, "runs", run.info.run_id)
+        assert os.path.exists(os.path.join(run_dir, blob_store.MANIFEST_FILE))
+    assert _num_blobs(output_dir) == 1
+    info = io_utils.read_file(os.path.join(output_dir, "experiments.json"))["info"]
+    assert info["status"]["artifact_store"]["duplicate_files"] == 5
+    assert blob_store.get_store() is None
+
+
+def test_nested_activate(tmpdir):
+    with blob_store.activate(str(tmpdir.join("all"))) as outer:
+        with blob_store.activate(str(tmpdir.join("all", "experiments"))) as inner:
+            assert inner is outer
+        assert blob_store.get_store() is outer
+    with blob_store.activate(str(tmpdir), enabled=False) as store:
+        assert store is None
+
+
+def test_ingest_and_local_artifacts(tmpdir):
+    model_dir = tmpdir.mkdir("export").mkdir("version_models").mkdir("1")
+    model_dir.mkdir("model").join("MLmodel").write("flavors: {}")
+    model_dir.join("model").join("model.pkl").write("pickle")
+    with blob_store.activate(str(tmpdir.join("export"))) as store:
+        store.ingest(str(model_dir), "models:/m/1")
+    assert os.listdir(str(model_dir)) == [ blob_store.MANIFEST_FILE ]
+    with blob_store.local_artifacts(str(model_dir)) as path:
+        with open(os.path.join(path, "model", "MLmodel")) as f:
+            assert f.read() == "flavors: {}"
+        with open(os.path.join(path, "model", "model.pkl")) as f:
+            assert f.read() == "pickle"
+    assert not os.path.exists(path)
+
+
+def test_local_artifacts_plain_layout(tmpdir):
+    with blob_store.local_artifacts(str(tmpdir)) as path:
+        assert path is None
+    tmpdir.mkdir("artifacts")
+    with blob_store.local_artifacts(str(tmpdir)) as path:
+        assert path == os.path.join(str(tmpdir), "artifacts")
+
+
+def test_missing_blob(tmpdir):
+    run_dir = tmpdir.mkdir("export").mkdir("run")
+    run_dir.mkdir("artifacts").join("a.txt").write("a")
+    with blob_store.activate(str(tmpdir.join("export"))) as store:
+        store.ingest(str(run_dir.join("artifacts")))
+    for dir, _, files in os.walk(str(tmpdir.join("export", blob_store.BLOBS_DIR))):
+        for file in files:
+            os.remove(os.path.join(dir, file))
+    with pytest.raises(MlflowExportImportException):
+        with blob_store.local_artifacts(str(run_dir.join("artifacts")), artifacts_dir="none"):
+            pass
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import mlflow
 
 from mlflow.entities import ViewType
@@ -28,10 +29,12 @@ def _create_simple_run(idx=0):
         mlflow.set_tag("my_uuid" ,mk_uuid())
         mlflow.set_tag("run_index", idx)
         mlflow.sklearn.log_model(model, "model")
-        with open("info.txt", "wt", encoding="utf-8") as f:
-            f.write("Hi artifact")
-        mlflow.log_artifact("info.txt")
-        mlflow.log_artifact("info.txt", "dir2")
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "info.txt")
+            with open(path, "wt", encoding="utf-8") as f:
+                f.write("Hi artifact")
+            mlflow.log_artifact(path)
+            mlflow.log_artifact(path, "dir2")
         mlflow.log_metric("m1", idx)
 
 
@@ -68,7 +71,7 @@ def compare_experiments(mlflow_context, compare_func=compare_runs):
 
 # == Export/import Experiments tests
 
-def _run_test(mlflow_context, compare_func, use_threads=False):
+def _run_test(mlflow_context, compare_func, use_threads=False, use_async=False):
     delete_experiments_and_models(mlflow_context)
     exps = [ _create_test_experiment(mlflow_context.client_src, 3), _create_test_experiment(mlflow_context.client_src, 4) ]
     exp_names = [ exp.name for exp in exps ]
@@ -77,7 +80,8 @@ def _run_test(mlflow_context, compare_func, use_threads=False):
         experiments = exp_names,
         output_dir = mlflow_context.output_dir,
         notebook_formats = _notebook_formats,
-        use_threads = use_threads)
+        use_threads = use_threads,
+        use_async = use_async)
     import_experiments(
         mlflow_client = mlflow_context.client_dst,
         input_dir = mlflow_context.output_dir)
@@ -92,6 +96,10 @@ def test_exp_basic_threads(mlflow_context):
     _run_test(mlflow_context, compare_runs, use_threads=True)
 
 
+def test_exp_basic_async(mlflow_context):
+    _run_test(mlflow_context, compare_runs, use_threads=True, use_async=True)
+
+
 def test_get_experiment_ids_from_comma_delimited_string(mlflow_context):
     exp_ids = bulk_utils.get_experiment_ids(mlflow_context.client_src, "exp1,exp2,exp3")
     assert len(exp_ids) == 3
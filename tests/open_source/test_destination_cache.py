@@ -0,0 +1,109 @@
+"""
+Test that imports resolve each destination experiment and workspace directory once.
+"""
+
+import threading
+import mlflow
+
+from mlflow_export_import.common import mlflow_utils, destination_cache
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from mlflow_export_import.bulk.export_models import export_models
+from mlflow_export_import.bulk.import_experiments import import_experiments
+from mlflow_export_import.bulk.import_models import import_models
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def _experiment_requests(fake_server):
+    endpoints = fake_server.get_stats()["endpoints"]
+    return { k: v["requests"] for k,v in endpoints.items() if k.startswith("experiments/") and k != "experiments/search" }
+
+
+def _export(fake_server, output_dir, num_experiments=2, num_runs=5):
+    exp_ids = fake_server.populate(num_experiments=num_experiments, num_runs=num_runs, num_metrics=1, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_experiments(exp_ids, output_dir, mlflow_client=client)
+    return client
+
+
+def test_import_experiments_resolves_once(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client = _export(fake_server, str(tmpdir))
+    fake_server.reset()
+    import_experiments(str(tmpdir), mlflow_client=client) # existing experiments
+    assert _experiment_requests(fake_server) == { "experiments/create": 2, "experiments/get-by-name": 2 }
+    assert destination_cache.get_cache() is None
+
+
+def test_import_into_new_experiments(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client = _export(fake_server, str(tmpdir))
+    for exp in client.search_experiments():
+        client.delete_experiment(exp.experiment_id)
+    fake_server.reset()
+    renames = { exp.name: f"new_{exp.name}" for exp in client.search_experiments(view_type=mlflow.entities.ViewType.ALL) }
+    res = import_experiments(str(tmpdir), experiment_renames=renames, use_threads=True, mlflow_client=client)
+    assert sum(len(run_info_map) for _, run_info_map in res) == 10
+    assert _experiment_requests(fake_server) == { "experiments/create": 2, "experiments/get": 2 }
+
+
+def test_import_models(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp_id, = fake_server.populate(num_runs=3, num_metrics=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    client.create_registered_model("model")
+    for run in client.search_runs([exp_id]):
+        client.create_model_version("model", f"{run.info.artifact_uri}/model", run.info.run_id)
+    export_models(["model"], str(tmpdir), mlflow_client=client)
+    fake_server.reset()
+    res = import_models(str(tmpdir), delete_model=True, mlflow_client=client)
+    assert _experiment_requests(fake_server) == { "experiments/create": 1, "experiments/get-by-name": 1 }
+    assert res["destination_cache"]["misses"] == 1
+
+
+def test_concurrent_resolution(fake_server):
+    client = mlflow.MlflowClient(fake_server.uri)
+    fake_server.configure("experiments/create", latency=0.2)
+    exps = []
+    with destination_cache.activate() as cache:
+        threads = [ threading.Thread(target=lambda: exps.append(mlflow_utils.set_experiment(client, None, "shared")))
+            for _ in range(8) ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert cache.get_stats()["misses"] == 1
+    assert len({ exp.experiment_id for exp in exps }) == 1
+    assert _experiment_requests(fake_server) == { "experiments/create": 1, "experiments/get": 1 }
+
+
+def test_cache_scoped_to_import(fake_server):
+    client = mlflow.MlflowClient(fake_server.uri)
+    with destination_cache.activate() as cache:
+        mlflow_utils.set_experiment(client, None, "scoped")
+        mlflow_utils.set_experiment(client, None, "scoped")
+        mlflow_utils.delete_experiment(client, "scoped")
+        mlflow_utils.set_experiment(client, None, "scoped") # resolved again once deleted
+        assert (cache.get_stats()["hits"], cache.get_stats()["misses"]) == (1, 2)
+    fake_server.reset()
+    mlflow_utils.set_experiment(client, None, "scoped")
+    mlflow_utils.set_experiment(client, None, "scoped")
+    assert _experiment_requests(fake_server)["experiments/create"] == 2
+
+
+class _DbxClient:
+    host = "https://workspace"
+    def __init__(self):
+        self.posts = []
+    def post(self, resource, data):
+        self.posts.append((resource, data["path"]))
+
+
+def test_workspace_dirs():
+    dbx_client = _DbxClient()
+    with destination_cache.activate():
+        for _ in range(3):
+            mlflow_utils.create_workspace_dir(dbx_client, "/Users/me/exps")
+        mlflow_utils.create_workspace_dir(dbx_client, "/Users/me/other")
+    assert dbx_client.posts == [ ("workspace/mkdirs", "/Users/me/exps"), ("workspace/mkdirs", "/Users/me/other") ]
+    mlflow_utils.create_workspace_dir(dbx_client, "/Users/me/exps")
+    assert len(dbx_client.posts) == 3
@@ -0,0 +1,51 @@
+"""
+Test the asyncio export engine against the fake tracking server.
+"""
+
+import os
+import mlflow
+
+from mlflow_export_import.common import io_utils
+from mlflow_export_import.bulk import export_experiments_async
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def test_bounded_run_tasks(fake_server, tmpdir, monkeypatch):
+    exp_id, = fake_server.populate(num_runs=40, num_metrics=1, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_run = export_experiments_async._export_run
+    num_tasks, max_tasks = 0, 0
+    async def _export_run(*args):
+        nonlocal num_tasks, max_tasks
+        num_tasks += 1
+        max_tasks = max(max_tasks, num_tasks)
+        try:
+            return await export_run(*args)
+        finally:
+            num_tasks -= 1
+    monkeypatch.setattr(export_experiments_async, "_export_run", _export_run)
+
+    export_experiments([exp_id], str(tmpdir), use_async=True, max_concurrent_requests=2, mlflow_client=client)
+    assert 1 < max_tasks <= 2 * export_experiments_async._RUN_WINDOW_FACTOR
+    runs = io_utils.read_file_mlflow(os.path.join(str(tmpdir), exp_id, "experiment.json"))["runs"]
+    assert runs == [ run.info.run_id for run in client.search_runs([exp_id]) ] # search order is kept
+
+
+def test_same_export_as_threaded(fake_server, tmpdir):
+    exp_id, = fake_server.populate(num_runs=3, num_metrics=2, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    client.delete_run(client.search_runs([exp_id])[0].info.run_id)
+    threaded_dir, async_dir = str(tmpdir.join("threaded")), str(tmpdir.join("async"))
+    export_experiments([exp_id], threaded_dir, export_deleted_runs=True, mlflow_client=client)
+    export_experiments([exp_id], async_dir, export_deleted_runs=True, use_async=True, mlflow_client=client)
+    runs_dir = os.path.join(exp_id, "runs")
+    run_ids = sorted(os.listdir(os.path.join(threaded_dir, runs_dir)))
+    assert len(run_ids) == 3
+    assert sorted(os.listdir(os.path.join(async_dir, runs_dir))) == run_ids
+    for run_id in run_ids:
+        threaded, asynced = [ io_utils.read_file(os.path.join(output_dir, runs_dir, run_id, "run.json"))
+            for output_dir in [ threaded_dir, async_dir ] ]
+        assert asynced["mlflow"] == threaded["mlflow"]
+        assert asynced["system"]["script"] == threaded["system"]["script"]
+        assert os.listdir(os.path.join(async_dir, runs_dir, run_id, "artifacts")) == ["file_0.txt"]
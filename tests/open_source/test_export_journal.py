@@ -0,0 +1,100 @@
+"""
+Test resumable bulk exports with the completion journal against the fake tracking server.
+"""
+
+import os
+import json
+import mlflow
+
+from mlflow_export_import.common import io_utils, export_journal
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from mlflow_export_import.bulk.export_models import export_models
+from tests.open_source.fake_mlflow_server import fake_server, ARTIFACTS_ENDPOINT
+
+
+def _populate(fake_server, num_runs=3):
+    exp_id, = fake_server.populate(num_runs=num_runs, num_metrics=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    return client, exp_id
+
+
+def _read_journal(output_dir):
+    with open(os.path.join(output_dir, export_journal.JOURNAL_FILE)) as f:
+        return f.read().splitlines()
+
+
+def _read_runs(output_dir, exp_id):
+    return io_utils.read_file_mlflow(os.path.join(output_dir, exp_id, "experiment.json"))["runs"]
+
+
+def test_resume_completed_export(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server)
+    output_dir = str(tmpdir)
+    export_experiments([exp_id], output_dir, mlflow_client=client)
+    entries = [ json.loads(line) for line in _read_journal(output_dir) ]
+    assert sorted(e["path"] for e in entries) == sorted(f"{exp_id}/runs/{run_id}" for run_id in _read_runs(output_dir, exp_id))
+    assert { e["kind"] for e in entries } == { "run" }
+
+    fake_server.reset()
+    info = export_experiments([exp_id], output_dir, resume=True, mlflow_client=client)
+    assert fake_server.get_num_requests(ARTIFACTS_ENDPOINT) == 0
+    assert info["status"]["export_journal"]["skipped_units"] == 3
+    assert info["status"]["ok_runs"] == 3
+    assert len(_read_runs(output_dir, exp_id)) == 3
+    assert export_journal.get_journal() is None
+
+
+def test_resume_interrupted_export(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server)
+    output_dir = str(tmpdir)
+    export_experiments([exp_id], output_dir, mlflow_client=client)
+    lines = _read_journal(output_dir)
+    with open(os.path.join(output_dir, export_journal.JOURNAL_FILE), "w") as f: # crash while recording the 2nd run
+        f.write(lines[0] + "\n" + lines[1][:20])
+
+    info = export_experiments([exp_id], output_dir, resume=True, mlflow_client=client)
+    stats = info["status"]["export_journal"]
+    assert (stats["resumed_units"], stats["skipped_units"], stats["recorded_units"]) == (1, 1, 2)
+    assert len(_read_runs(output_dir, exp_id)) == 3
+
+
+def test_resume_async(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server)
+    output_dir = str(tmpdir)
+    export_experiments([exp_id], output_dir, use_async=True, mlflow_client=client)
+    assert len(_read_journal(output_dir)) == 3
+    fake_server.reset()
+    export_experiments([exp_id], output_dir, use_async=True, resume=True, mlflow_client=client)
+    assert fake_server.get_num_requests("runs/get") == 0
+    assert len(_read_runs(output_dir, exp_id)) == 3
+
+
+def test_no_resume_starts_afresh(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server)
+    output_dir = str(tmpdir)
+    export_experiments([exp_id], output_dir, mlflow_client=client)
+    info = export_experiments([exp_id], output_dir, mlflow_client=client)
+    assert info["status"]["export_journal"]["skipped_units"] == 0
+    assert len(_read_journal(output_dir)) == 3
+
+
+def test_resume_model_versions(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server, num_runs=2)
+    runs = client.search_runs([exp_id])
+    client.create_registered_model("model")
+    for run in runs:
+        client.create_model_version("model", f"{run.info.artifact_uri}/model", run.info.run_id)
+    output_dir = str(tmpdir)
+    export_models(["model"], output_dir, mlflow_client=client)
+    model_path = os.path.join(output_dir, "models", "model", "model.json")
+    versions = io_utils.read_file_mlflow(model_path)["registered_model"]["versions"]
+
+    info = export_models(["model"], output_dir, resume=True, mlflow_client=client)
+    assert info["export_journal"]["skipped_units"] == 4 # 2 runs and 2 versions
+    assert io_utils.read_file_mlflow(model_path)["registered_model"]["versions"] == versions
+
+
+def test_journal_outside_bulk_export(tmpdir):
+    assert export_journal.get_completed("run", str(tmpdir), "123") is None
+    export_journal.record("run", str(tmpdir), "123")
+    assert not os.path.exists(os.path.join(str(tmpdir), export_journal.JOURNAL_FILE))
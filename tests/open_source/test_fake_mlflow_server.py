@@ -0,0 +1,136 @@
+"""
+Test the fake MLflow tracking server and run export/import against it without real tracking servers.
+"""
+
+import os
+import time
+import json
+import threading
+import pytest
+import mlflow
+
+from mlflow_export_import.client import http_session, rate_limiter
+from mlflow_export_import.client.rate_limited_mlflow_client import RateLimitedMlflowClient
+from mlflow_export_import.client.http_client import MlflowHttpClient
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.common.iterators import SearchRunsIterator
+from mlflow_export_import.experiment.export_experiment import export_experiment
+from mlflow_export_import.experiment.import_experiment import import_experiment
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from tests.open_source.fake_mlflow_server import FakeMlflowServer, fake_server
+
+
+@pytest.fixture()
+def retries():
+    http_session.configure(retry_policy=http_session.RetryPolicy(max_retries=5, backoff_factor=0))
+    rate_limiter.configure(max_rate=0, min_rate=1, ramp_up=10)
+    yield
+    http_session.configure()
+    rate_limiter.configure()
+
+
+# == Server
+
+def test_mlflow_client(fake_server):
+    exp_id, = fake_server.populate(num_runs=3, num_metrics=2, num_steps=5)
+    client = mlflow.MlflowClient(fake_server.uri)
+    runs = client.search_runs([exp_id])
+    assert len(runs) == 3
+    run = runs[0]
+    assert len(run.data.params) == 5
+    assert run.data.metrics["metric_0"] == pytest.approx(0.4)
+    assert len(client.get_metric_history(run.info.run_id, "metric_0")) == 5
+    assert [ f.path for f in client.list_artifacts(run.info.run_id) ] == ["file_0.txt"]
+
+
+def test_search_filter_and_pagination(fake_server):
+    exp_id, = fake_server.populate(num_runs=25, num_metrics=0, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    assert len(list(SearchRunsIterator(client, exp_id, max_results=10))) == 25
+    assert fake_server.get_num_requests("runs/search") == 3
+    runs = client.search_runs([exp_id], "tags.mlflow.runName = 'run_3'")
+    assert [ run.info.run_name for run in runs ] == ["run_3"]
+    run_ids = [ run.info.run_id for run in runs ]
+    assert len(client.search_runs([exp_id], f"attributes.run_id IN ('{run_ids[0]}')")) == 1
+
+
+def test_latency(fake_server):
+    fake_server.populate(num_runs=1)
+    fake_server.configure("experiments/get", latency=0.3)
+    client = MlflowHttpClient(fake_server.uri)
+    start = time.time()
+    client.get("experiments/get", { "experiment_id": "0" })
+    assert time.time() - start >= 0.3
+    start = time.time()
+    client.get("experiments/get-by-name", { "experiment_name": "Default" })
+    assert time.time() - start < 0.3
+
+
+def test_throttling(fake_server, retries):
+    fake_server.configure("experiments/get", throttle_rate=0.5, retry_after=0.05)
+    client = MlflowHttpClient(fake_server.uri)
+    for _ in range(10):
+        assert client.get("experiments/get", { "experiment_id": "0" })["experiment"]["name"] == "Default"
+    stats = fake_server.get_stats()["endpoints"]["experiments/get"]
+    assert stats["throttled"] > 0
+    assert stats["requests"] == 10 + stats["throttled"]
+    assert rate_limiter.get_stats()["throttles"] == stats["throttled"]
+
+
+def test_errors(fake_server):
+    fake_server.configure(error_rate=1.0)
+    http_session.configure(retry_policy=http_session.RetryPolicy(max_retries=0))
+    try:
+        with pytest.raises(MlflowExportImportException) as e:
+            MlflowHttpClient(fake_server.uri).get("experiments/get", { "experiment_id": "0" })
+        assert e.value.http_status_code == 503
+    finally:
+        http_session.configure()
+
+
+def test_payload_size(fake_server):
+    fake_server.configure("experiments/get", payload_size=100_000)
+    rsp = MlflowHttpClient(fake_server.uri)._get("experiments/get", json.dumps({ "experiment_id": "0" }))
+    assert len(rsp.content) > 100_000
+
+
+def test_max_concurrent_requests(fake_server):
+    fake_server.configure(latency=0.2)
+    client = MlflowHttpClient(fake_server.uri)
+    threads = [ threading.Thread(target=client.get, args=("experiments/get", { "experiment_id": "0" })) for _ in range(4) ]
+    [ t.start() for t in threads ]
+    [ t.join() for t in threads ]
+    assert fake_server.get_stats()["max_concurrent_requests"] == 4
+
+
+# == Export and import
+
+def test_export_import_experiment(tmpdir, monkeypatch):
+    with FakeMlflowServer() as src, FakeMlflowServer() as dst:
+        exp_id, = src.populate(num_runs=3)
+        monkeypatch.setenv("MLFLOW_TRACKING_URI", src.uri)
+        num_ok, num_failed = export_experiment(exp_id, str(tmpdir), mlflow_client=mlflow.MlflowClient(src.uri))
+        assert (num_ok, num_failed) == (3, 0)
+
+        monkeypatch.setenv("MLFLOW_TRACKING_URI", dst.uri)
+        client_dst = mlflow.MlflowClient(dst.uri)
+        import_experiment("imported_experiment", str(tmpdir), mlflow_client=client_dst)
+        exp = client_dst.get_experiment_by_name("imported_experiment")
+        runs_src = mlflow.MlflowClient(src.uri).search_runs([exp_id])
+        runs_dst = client_dst.search_runs([exp.experiment_id])
+        assert sorted(run.info.run_name for run in runs_src) == sorted(run.info.run_name for run in runs_dst)
+        for run in runs_dst:
+            assert run.data.params == runs_src[0].data.params
+            assert len(client_dst.get_metric_history(run.info.run_id, "metric_0")) == 10
+            assert [ f.path for f in client_dst.list_artifacts(run.info.run_id) ] == ["file_0.txt"]
+
+
+def test_bulk_export_with_latency(tmpdir, monkeypatch, fake_server, retries):
+    exp_ids = fake_server.populate(num_experiments=2, num_runs=5, num_artifacts=0)
+    fake_server.configure(latency=0.01, jitter=0.01, throttle_rate=0.05, retry_after=0.01)
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    monkeypatch.setenv("MLFLOW_HTTP_REQUEST_MAX_RETRIES", "0")
+    export_experiments(exp_ids, str(tmpdir), use_threads=True, mlflow_client=RateLimitedMlflowClient(fake_server.uri))
+    for exp_id in exp_ids:
+        assert len(os.listdir(os.path.join(tmpdir, exp_id, "runs"))) == 5
+    assert sum(stats["throttled"] for stats in fake_server.get_stats()["endpoints"].values()) > 0
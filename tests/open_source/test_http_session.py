@@ -0,0 +1,103 @@
+"""
+Test pooled keep-alive sessions and the retry policy of HttpClient against a local stub HTTP server.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from mlflow_export_import.client import http_session
+from mlflow_export_import.client.http_client import MlflowHttpClient
+from mlflow_export_import.common import MlflowExportImportException
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # keep-alive
+    num_failures = {} # path => number of 503 responses to return before succeeding
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        remaining = self.num_failures.get(self.path, 0)
+        if remaining > 0:
+            self.num_failures[self.path] = remaining - 1
+            self._reply(503, { "error_code": "TEMPORARILY_UNAVAILABLE" })
+        else:
+            self._reply(200, { "path": self.path, "method": self.command })
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def client():
+    server = ThreadingHTTPServer(("localhost", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_session.configure(retry_policy=http_session.RetryPolicy(max_retries=2, backoff_factor=0))
+    yield MlflowHttpClient(f"http://localhost:{server.server_address[1]}")
+    server.shutdown()
+
+
+def test_connection_reuse(client):
+    stats1 = http_session.get_stats()
+    for _ in range(5):
+        assert client.get("experiments/get")["method"] == "GET"
+    stats2 = http_session.get_stats()
+    assert stats2["requests"] - stats1["requests"] == 5
+    assert stats2["reused_connections"] - stats1["reused_connections"] >= 4
+
+
+def test_session_per_thread():
+    sessions = []
+    def _get():
+        sessions.append(http_session.get_session())
+    threads = [ threading.Thread(target=_get) for _ in range(3) ]
+    [ t.start() for t in threads ]
+    [ t.join() for t in threads ]
+    assert len(set(id(s) for s in sessions)) == 3
+    assert len(set(id(s.get_adapter("http://localhost")) for s in sessions)) == 1
+
+
+def test_retry_idempotent(client):
+    _Handler.num_failures["/api/2.0/mlflow/runs/get"] = 2
+    assert client.get("runs/get")["path"] == "/api/2.0/mlflow/runs/get"
+
+
+def test_retry_exhausted(client):
+    _Handler.num_failures["/api/2.0/mlflow/runs/get-2"] = 5
+    with pytest.raises(MlflowExportImportException) as ex:
+        client.get("runs/get-2")
+    assert ex.value.http_status_code == 503
+
+
+def test_no_retry_non_idempotent(client):
+    _Handler.num_failures["/api/2.0/mlflow/runs/create"] = 1
+    with pytest.raises(MlflowExportImportException):
+        client.post("runs/create", { "experiment_id": "1" })
+
+
+def test_replaced_adapter_is_closed(client):
+    client.get("experiments/get")
+    adapter = http_session.get_session().get_adapter("http://localhost")
+    stats1 = http_session.get_stats()
+    http_session.configure(pool_size=stats1["pool_size"] + 1)
+    assert not adapter.poolmanager.pools # closed
+    assert http_session.get_session().get_adapter("http://localhost") is not adapter
+    client.get("experiments/get")
+    stats2 = http_session.get_stats()
+    assert stats2["requests"] - stats1["requests"] == 1
+    assert stats2["new_connections"] == stats1["new_connections"] + 1 # statistics of the closed adapter are kept
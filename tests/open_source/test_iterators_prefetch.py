@@ -0,0 +1,99 @@
+"""
+Test the prefetching mode of the search iterators.
+"""
+
+import gc
+import time
+import pytest
+import mlflow
+from mlflow.store.entities.paged_list import PagedList
+
+from mlflow_export_import.common.iterators import BaseIterator, SearchRunsIterator
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+class _SearchMethod:
+    """ Search method returning num_pages pages of page_size integers. """
+    def __init__(self, num_pages, page_size=10, delay=0, fail_on_page=None):
+        self.num_pages = num_pages
+        self.page_size = page_size
+        self.delay = delay
+        self.fail_on_page = fail_on_page
+        self.num_calls = 0
+
+    def __call__(self, filter_string=None, page_token=None, max_results=None):
+        self.num_calls += 1
+        time.sleep(self.delay)
+        page = int(page_token or 0)
+        if page == self.fail_on_page:
+            raise ValueError(f"Page {page} failed")
+        items = list(range(page*self.page_size, (page+1)*self.page_size))
+        token = str(page+1) if page+1 < self.num_pages else None
+        return PagedList(items, token)
+
+
+@pytest.mark.parametrize("prefetch", [0, 1, 3])
+def test_all_items_in_order(prefetch):
+    search_method = _SearchMethod(num_pages=5)
+    assert list(BaseIterator(search_method, prefetch=prefetch)) == list(range(50))
+    assert search_method.num_calls == 5
+
+
+def test_overlaps_fetching_and_consuming():
+    def consume(iterator):
+        start = time.time()
+        for j, _ in enumerate(iterator):
+            if j % 10 == 0:
+                time.sleep(0.2) # process a page
+        return time.time() - start
+    sequential = consume(BaseIterator(_SearchMethod(num_pages=4, delay=0.2), prefetch=0))
+    prefetched = consume(BaseIterator(_SearchMethod(num_pages=4, delay=0.2), prefetch=2))
+    assert sequential >= 1.6
+    assert prefetched < 1.3
+
+
+def test_depth_bounds_fetched_pages():
+    search_method = _SearchMethod(num_pages=100)
+    iterator = iter(BaseIterator(search_method, prefetch=2))
+    next(iterator)
+    time.sleep(0.3)
+    assert search_method.num_calls <= 4 # current page, two queued pages and one in flight
+    iterator.close()
+
+
+def test_exception_is_raised_by_consumer():
+    iterator = BaseIterator(_SearchMethod(num_pages=5, fail_on_page=2), prefetch=1)
+    items = []
+    with pytest.raises(ValueError):
+        for item in iterator:
+            items.append(item)
+    assert items == list(range(20))
+
+
+def test_abandoned_iterator_stops_thread():
+    iterator = BaseIterator(_SearchMethod(num_pages=100), prefetch=1)
+    for item in iterator:
+        break
+    thread = iterator._thread
+    del iterator
+    gc.collect()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_env_defaults(monkeypatch):
+    monkeypatch.setenv("MLFLOW_EXPORT_IMPORT_PREFETCH_PAGES", "2")
+    monkeypatch.setenv("MLFLOW_EXPORT_IMPORT_PAGE_SIZE", "7")
+    iterator = BaseIterator(_SearchMethod(num_pages=1))
+    assert iterator.prefetch == 2
+    assert iterator.kwargs["max_results"] == 7
+
+
+def test_search_runs_iterator(fake_server):
+    exp_id, = fake_server.populate(num_runs=25, num_metrics=0, num_artifacts=0)
+    fake_server.configure("runs/search", latency=0.05)
+    client = mlflow.MlflowClient(fake_server.uri)
+    runs1 = [ run.info.run_id for run in SearchRunsIterator(client, exp_id, max_results=10) ]
+    runs2 = [ run.info.run_id for run in SearchRunsIterator(client, exp_id, max_results=10, prefetch=2) ]
+    assert len(runs1) == 25
+    assert runs1 == runs2
@@ -0,0 +1,117 @@
+"""
+Test the time-sharded parallel run enumeration against the fake tracking server.
+"""
+
+import time
+import queue
+import threading
+import pytest
+import mlflow
+from mlflow.entities import ViewType
+
+from mlflow_export_import.common import iterators
+from mlflow_export_import.common.iterators import (
+    SearchRunsIterator,
+    ShardedSearchRunsIterator,
+    mk_search_runs_iterator
+)
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def _populate(fake_server, num_runs):
+    exp_id, = fake_server.populate(num_runs=num_runs, num_metrics=0, num_params=0, num_artifacts=0)
+    for j, run in enumerate(fake_server.store.runs.values()):
+        run["info"]["start_time"] = 1_000_000 + j * 1000
+    return exp_id
+
+
+def _run_ids(iterator):
+    return sorted(run.info.run_id for run in iterator)
+
+
+@pytest.mark.parametrize("num_shards", [1, 3, 8, 100])
+def test_same_runs_as_search_runs_iterator(fake_server, num_shards):
+    exp_id = _populate(fake_server, 50)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run_ids = _run_ids(SearchRunsIterator(client, exp_id))
+    assert len(run_ids) == 50
+    assert _run_ids(ShardedSearchRunsIterator(client, exp_id, max_results=7, num_shards=num_shards)) == run_ids
+
+
+def test_windows(fake_server):
+    exp_id = _populate(fake_server, 10)
+    windows = ShardedSearchRunsIterator(mlflow.MlflowClient(fake_server.uri), exp_id, num_shards=4).get_windows()
+    assert windows[0][0] == 1_000_000
+    assert windows[-1][1] == 1_009_001
+    assert all(w1[1] == w2[0] for w1, w2 in zip(windows, windows[1:])) # disjoint and contiguous
+
+
+def test_filter_and_view_type(fake_server):
+    exp_id = _populate(fake_server, 20)
+    client = mlflow.MlflowClient(fake_server.uri)
+    deleted_run_id = client.search_runs([exp_id])[0].info.run_id
+    client.delete_run(deleted_run_id)
+    filter = "start_time > 1005000 AND start_time < 1015000"
+    expected = _run_ids(SearchRunsIterator(client, exp_id, filter=filter, view_type=ViewType.ALL))
+    assert len(expected) == 9
+    assert _run_ids(ShardedSearchRunsIterator(client, exp_id, filter=filter, view_type=ViewType.ALL, num_shards=4)) == expected
+    assert deleted_run_id not in _run_ids(ShardedSearchRunsIterator(client, exp_id, num_shards=4))
+
+
+def test_empty_experiment(fake_server):
+    exp_id = _populate(fake_server, 0)
+    assert list(ShardedSearchRunsIterator(mlflow.MlflowClient(fake_server.uri), exp_id, num_shards=4)) == []
+
+
+def test_parallel_enumeration_is_faster(fake_server):
+    exp_id = _populate(fake_server, 100)
+    fake_server.configure("runs/search", latency=0.1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    start = time.time()
+    assert len(list(SearchRunsIterator(client, exp_id, max_results=10))) == 100
+    serial = time.time() - start
+    start = time.time()
+    assert len(list(ShardedSearchRunsIterator(client, exp_id, max_results=10, num_shards=10))) == 100
+    sharded = time.time() - start
+    assert sharded < serial / 2
+
+
+def test_error_is_raised_by_consumer(fake_server, monkeypatch):
+    monkeypatch.setenv("MLFLOW_HTTP_REQUEST_MAX_RETRIES", "0")
+    exp_id = _populate(fake_server, 20)
+    iterator = iter(ShardedSearchRunsIterator(mlflow.MlflowClient(fake_server.uri), exp_id, num_shards=4))
+    fake_server.configure("runs/search", error_rate=1.0)
+    with pytest.raises(Exception):
+        list(iterator)
+
+
+def test_late_shard_error_stops_other_shards():
+    num_runs = []
+    def slow_shard():
+        for j in range(200):
+            time.sleep(0.01)
+            num_runs.append(j)
+            yield j
+    def failing_shard():
+        time.sleep(0.2)
+        yield from []
+        raise ValueError("shard failed")
+    runs = queue.Queue()
+    start = time.time()
+    thread = threading.Thread(target=iterators._enumerate_shards, args=([slow_shard(), failing_shard()], 2, runs, threading.Event()))
+    thread.start()
+    while not isinstance(item := runs.get(), Exception):
+        pass
+    assert str(item) == "shard failed"
+    assert time.time() - start < 1 # not only after the slow shard is done
+    thread.join()
+    assert len(num_runs) < 100
+
+
+def test_mk_search_runs_iterator(fake_server, monkeypatch):
+    client = mlflow.MlflowClient(fake_server.uri)
+    assert isinstance(mk_search_runs_iterator(client, "0"), SearchRunsIterator)
+    monkeypatch.setenv("MLFLOW_EXPORT_IMPORT_RUN_SEARCH_SHARDS", "4")
+    iterator = mk_search_runs_iterator(client, "0")
+    assert isinstance(iterator, ShardedSearchRunsIterator)
+    assert iterator.num_shards == 4
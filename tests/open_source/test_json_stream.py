@@ -0,0 +1,149 @@
+"""
+Test the streaming JSON writer and reader.
+"""
+
+import os
+import json
+import tracemalloc
+import pytest
+
+from mlflow_export_import.common import io_utils, json_stream
+from mlflow_export_import.common import MlflowExportImportException
+
+
+_content = {
+    "system": { "export_file_version": "2", "platform": { "python_version": "3.11" } },
+    "mlflow": {
+        "info": { "run_id": "abc", "name": "résumé \"[{\" ]}", "status": None, "deleted": False },
+        "params": {},
+        "metrics": { "m1": [ { "value": 0.5, "timestamp": 1, "step": 0 } ], "m2": [], "m3": [ 1e300, -2, float("nan") ] },
+        "tags": { "a\\\"b": "x", 1: "int key", 2.5: "float key", False: "bool key" },
+        "inputs": [],
+        "traces": [ "t1", [ "t2", {} ] ]
+    }
+}
+
+
+def _write(tmpdir, content):
+    path = str(tmpdir.join("file.json"))
+    io_utils.write_file(path, content)
+    with open(path) as f:
+        return path, f.read()
+
+
+@pytest.fixture(params=[7, 1 << 16], ids=["tiny_chunks", "default_chunks"])
+def chunk_size(request, monkeypatch):
+    monkeypatch.setattr(json_stream, "_CHUNK_SIZE", request.param)
+
+
+# == Writer
+
+def test_same_as_json_dumps(tmpdir):
+    _, text = _write(tmpdir, _content)
+    assert text == json.dumps(_content, indent=2) + "\n"
+
+
+def test_streamed_same_as_materialized(tmpdir):
+    mlflow = _content["mlflow"]
+    streamed = { **_content, "mlflow": {
+        **mlflow,
+        "metrics": json_stream.StreamedObject((k, (x for x in v)) for k, v in mlflow["metrics"].items()),
+        "traces": iter(mlflow["traces"]),
+        "inputs": (x for x in []),
+    }}
+    _, text = _write(tmpdir, streamed)
+    assert text == json.dumps(_content, indent=2) + "\n"
+
+
+def test_empty_streams(tmpdir):
+    _, text = _write(tmpdir, { "a": json_stream.StreamedObject([]), "b": iter([]) })
+    assert json.loads(text) == { "a": {}, "b": [] }
+
+
+# == Reader
+
+def test_iter_json(tmpdir, chunk_size):
+    path, _ = _write(tmpdir, _content)
+    assert [ k for k, _ in json_stream.iter_json(path, "mlflow", "metrics") ] == ["m1", "m2", "m3"]
+    assert list(json_stream.iter_json(path, "mlflow", "traces")) == [ "t1", [ "t2", {} ] ]
+    assert dict(json_stream.iter_json(path, "mlflow", "tags")) == { "a\\\"b": "x", "1": "int key", "2.5": "float key", "false": "bool key" }
+    assert list(json_stream.iter_json(path, "mlflow", "inputs")) == []
+
+
+def test_read_file_with_stream_keys(tmpdir, chunk_size):
+    path, text = _write(tmpdir, _content)
+    dct = io_utils.read_file(path, stream_keys=[["mlflow", "metrics"], ["mlflow", "traces"]])
+    expected = json.loads(text)
+    assert isinstance(dct["mlflow"]["metrics"], io_utils.JsonStream)
+    assert list(dct["mlflow"]["metrics"]) == ["m1", "m2", "m3"]
+    assert json.dumps(dict(dct["mlflow"]["metrics"].items())) == json.dumps(expected["mlflow"]["metrics"])
+    assert list(dct["mlflow"]["traces"]) == expected["mlflow"]["traces"]
+    assert dct["mlflow"]["info"] == expected["mlflow"]["info"]
+    assert dct["system"] == expected["system"]
+
+
+def test_flat_items(tmpdir, chunk_size):
+    path, text = _write(tmpdir, _content)
+    expected = json.loads(text)["mlflow"]["metrics"]
+    stream = io_utils.read_file(path, stream_keys=[["mlflow", "metrics"]])["mlflow"]["metrics"]
+    assert json.dumps(list(stream.flat_items())) == json.dumps([ (k, item) for k, items in expected.items() for item in items ])
+
+
+def test_stream_offsets(tmpdir, chunk_size):
+    path = str(tmpdir.join("file.json"))
+    text = json.dumps(_content["mlflow"], indent=2, ensure_ascii=False).replace("\n", "\r\n")
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    dct = io_utils.read_file(path, stream_keys=[["metrics"], ["traces"]])
+    with open(path, "rb") as f:
+        data = f.read()
+    for key in ["metrics", "traces"]:
+        stream = dct[key]
+        value, _ = json.JSONDecoder().raw_decode(data[stream.offset:].decode("utf-8"))
+        assert json.dumps(value) == json.dumps(json.loads(text)[key])
+        assert list(stream.items()) == list(json_stream.JsonStream(path, [key]).items())
+    assert json.dumps(list(dct["metrics"].flat_items())) == \
+        json.dumps([ (k, item) for k, items in json.loads(text)["metrics"].items() for item in items ])
+
+
+def test_read_file_mlflow_with_missing_stream_key(tmpdir):
+    path, _ = _write(tmpdir, _content)
+    dct = io_utils.read_file_mlflow(path, stream_keys=[["metrics_file"]])
+    assert dct == io_utils.read_file_mlflow(path)
+
+
+def test_errors(tmpdir, chunk_size):
+    path, _ = _write(tmpdir, _content)
+    with pytest.raises(MlflowExportImportException):
+        list(json_stream.iter_json(path, "mlflow", "no_such_key"))
+    with pytest.raises(MlflowExportImportException):
+        list(json_stream.iter_json(path, "mlflow", "info", "run_id"))
+    path = str(tmpdir.join("truncated.json"))
+    with open(path, "w") as f:
+        f.write('{"mlflow": {"metrics": {"m1": [1, 2], "m2": [3,')
+    with pytest.raises(MlflowExportImportException):
+        list(json_stream.iter_json(path, "mlflow", "metrics"))
+    with pytest.raises(MlflowExportImportException):
+        io_utils.read_file(path, stream_keys=[["mlflow", "metrics"]])
+
+
+def test_bounded_memory(tmpdir):
+    num_keys, num_steps = 50, 2000
+    history = lambda: ( { "value": 0.1*j, "timestamp": 1700000000000 + j, "step": j } for j in range(num_steps) )
+    content = { "mlflow": { "info": {}, "metrics": json_stream.StreamedObject((f"metric_{k}", history()) for k in range(num_keys)) } }
+    path = str(tmpdir.join("file.json"))
+    tracemalloc.start()
+    try:
+        io_utils.write_file(path, content)
+        _, write_peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        dct = io_utils.read_file_mlflow(path, stream_keys=[["metrics"]])
+        num_points = sum(len(steps) for _, steps in dct["metrics"].items())
+        _, read_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert num_points == num_keys * num_steps
+    size = os.path.getsize(path)
+    assert size > 5_000_000
+    assert write_peak < size / 5 # one metric point at a time
+    assert read_peak < size / 3 # one metric history at a time
@@ -0,0 +1,131 @@
+"""
+Test the LRU/TTL metadata cache and its single-flight request coalescing.
+"""
+
+import time
+import threading
+import pytest
+
+from mlflow_export_import.client import metadata_cache
+from mlflow_export_import.client.metadata_cache import MetadataCache
+
+
+class _Loader:
+    def __init__(self, value="value", delay=0, exception=None):
+        self.value = value
+        self.delay = delay
+        self.exception = exception
+        self.num_calls = 0
+
+    def __call__(self):
+        self.num_calls += 1
+        time.sleep(self.delay)
+        if self.exception:
+            raise self.exception
+        return self.value
+
+
+def test_hit_and_miss():
+    cache = MetadataCache(max_size=10, ttl=60)
+    loader = _Loader()
+    assert cache.get("k", loader) == "value"
+    assert cache.get("k", loader) == "value"
+    assert loader.num_calls == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_lru_eviction():
+    cache = MetadataCache(max_size=2, ttl=60)
+    cache.get("k1", _Loader(1))
+    cache.get("k2", _Loader(2))
+    cache.get("k1", _Loader(1)) # k1 becomes most recently used
+    cache.get("k3", _Loader(3))
+    loader = _Loader(2)
+    assert cache.get("k2", loader) == 2
+    assert loader.num_calls == 1
+    assert cache.get_stats()["evictions"] == 2
+
+
+def test_ttl():
+    cache = MetadataCache(max_size=10, ttl=0.1)
+    loader = _Loader()
+    cache.get("k", loader)
+    time.sleep(0.2)
+    cache.get("k", loader)
+    assert loader.num_calls == 2
+
+
+def test_none_and_exceptions_not_cached():
+    cache = MetadataCache(max_size=10, ttl=60)
+    loader = _Loader(value=None)
+    cache.get("k", loader)
+    cache.get("k", loader)
+    assert loader.num_calls == 2
+    loader = _Loader(exception=ValueError("boom"))
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get("k2", loader)
+    assert loader.num_calls == 2
+
+
+def test_single_flight():
+    cache = MetadataCache(max_size=10, ttl=60)
+    loader = _Loader(delay=0.3)
+    results = []
+    threads = [ threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(8) ]
+    [ t.start() for t in threads ]
+    [ t.join() for t in threads ]
+    assert results == ["value"] * 8
+    assert loader.num_calls == 1
+    stats = cache.get_stats()
+    assert stats["misses"] == 1
+    assert stats["coalesced"] == 7
+
+
+def test_single_flight_exception():
+    cache = MetadataCache(max_size=10, ttl=60)
+    loader = _Loader(delay=0.3, exception=ValueError("boom"))
+    errors = []
+    def _get():
+        try:
+            cache.get("k", loader)
+        except ValueError as e:
+            errors.append(e)
+    threads = [ threading.Thread(target=_get) for _ in range(4) ]
+    [ t.start() for t in threads ]
+    [ t.join() for t in threads ]
+    assert len(errors) == 4
+    assert loader.num_calls == 1
+
+
+def test_disabled():
+    cache = MetadataCache(max_size=0, ttl=60)
+    loader = _Loader()
+    cache.get("k", loader)
+    cache.get("k", loader)
+    assert loader.num_calls == 2
+
+
+class _Client:
+    def __init__(self, tracking_uri):
+        self.tracking_uri = tracking_uri
+        self.num_calls = 0
+
+    def get_run(self, run_id):
+        self.num_calls += 1
+        return f"{self.tracking_uri}/{run_id}"
+
+
+def test_keyed_by_tracking_uri():
+    metadata_cache.configure(max_size=10, ttl=60)
+    client1, client2 = _Client("http://src"), _Client("http://dst")
+    assert metadata_cache.get_run(client1, "r1") == "http://src/r1"
+    assert metadata_cache.get_run(client2, "r1") == "http://dst/r1"
+    assert metadata_cache.get_run(client1, "r1") == "http://src/r1"
+    assert client1.num_calls == 1
+    metadata_cache.invalidate_run(client1, "r1")
+    metadata_cache.get_run(client1, "r1")
+    assert client1.num_calls == 2
+    metadata_cache.configure()
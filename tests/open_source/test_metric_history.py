@@ -0,0 +1,144 @@
+"""
+Test the concurrent metric history fetcher and the metrics sidecar file against the fake tracking server.
+"""
+
+import os
+import time
+import pytest
+import mlflow
+from mlflow.entities import Metric
+from mlflow.tracking._tracking_service import client as tracking_service_client
+
+from mlflow_export_import.common import utils, io_utils
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.run import metric_history
+from mlflow_export_import.run.export_run import export_run
+from mlflow_export_import.run.import_run import import_run
+from tests.open_source.fake_mlflow_server import FakeMlflowServer, fake_server
+
+
+def _populate(fake_server, num_metrics=10, num_steps=20):
+    exp_id, = fake_server.populate(num_runs=1, num_metrics=num_metrics, num_steps=num_steps, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    return client, client.search_runs([exp_id])[0]
+
+
+def _expected(client, run):
+    expected = {}
+    for key in run.data.metrics.keys():
+        expected[key] = [ utils.strip_underscores(m) for m in client.get_metric_history(run.info.run_id, key) ]
+        for m in expected[key]:
+            del m["key"]
+    return expected
+
+
+def test_same_as_serial_fetch(fake_server):
+    client, run = _populate(fake_server)
+    histories = metric_history.get_metric_histories(client, run.info.run_id, run.data.metrics.keys())
+    assert histories == _expected(client, run)
+    assert list(histories.keys()) == list(run.data.metrics.keys())
+    assert len(histories["metric_0"]) == 20
+
+
+def test_concurrent(fake_server):
+    client, run = _populate(fake_server, num_metrics=8, num_steps=2)
+    fake_server.configure("metrics/get-history", latency=0.1)
+    start = time.time()
+    metric_history.get_metric_histories(client, run.info.run_id, run.data.metrics.keys(), max_workers=8)
+    assert time.time() - start < 0.5
+    assert fake_server.get_stats()["max_concurrent_requests"] > 1
+
+
+def test_pagination(fake_server, monkeypatch):
+    client, run = _populate(fake_server, num_metrics=2, num_steps=25)
+    monkeypatch.setattr(tracking_service_client, "GET_METRIC_HISTORY_MAX_RESULTS", 10)
+    fake_server.reset()
+    histories = metric_history.get_metric_histories(client, run.info.run_id, run.data.metrics.keys())
+    assert [ len(h) for h in histories.values() ] == [25, 25]
+    assert [ m["step"] for m in histories["metric_0"] ] == list(range(25))
+    assert fake_server.get_num_requests("metrics/get-history") == 6
+
+
+def test_iter_fetches_ahead_by_max_workers(fake_server):
+    client, run = _populate(fake_server, num_metrics=10, num_steps=2)
+    fake_server.reset()
+    histories = metric_history.iter_metric_histories(client, run.info.run_id, run.data.metrics.keys(), max_workers=2)
+    key, history = next(histories)
+    assert key == "metric_0" and len(history) == 2
+    time.sleep(0.2)
+    assert fake_server.get_num_requests("metrics/get-history") <= 3
+    assert [ key for key, _ in histories ] == list(run.data.metrics.keys())[1:]
+
+
+def test_env_max_workers_and_no_metrics(fake_server, monkeypatch):
+    monkeypatch.setenv("MLFLOW_EXPORT_IMPORT_METRIC_HISTORY_THREADS", "3")
+    assert metric_history.get_max_workers() == 3
+    client, run = _populate(fake_server, num_metrics=0)
+    assert metric_history.get_metric_histories(client, run.info.run_id, []) == {}
+
+
+# == Metrics sidecar file
+
+def _export_import_run(tmpdir, src, dst, metrics_format):
+    exp_id, = src.populate(num_runs=1, num_metrics=3, num_steps=15, num_artifacts=0)
+    client_src = mlflow.MlflowClient(src.uri)
+    run = client_src.search_runs([exp_id])[0]
+    output_dir = str(tmpdir.join(metrics_format))
+    assert export_run(run.info.run_id, output_dir, mlflow_client=client_src, metrics_format=metrics_format, raise_exception=True)
+    client_dst = mlflow.MlflowClient(dst.uri)
+    dst_run, _ = import_run(output_dir, "imported", mlflow_client=client_dst)
+    for key in run.data.metrics.keys():
+        history_src = [ (m.value, m.timestamp, m.step) for m in client_src.get_metric_history(run.info.run_id, key) ]
+        history_dst = [ (m.value, m.timestamp, m.step) for m in client_dst.get_metric_history(dst_run.info.run_id, key) ]
+        assert history_dst == history_src
+    return io_utils.read_file(os.path.join(output_dir, "run.json"))
+
+
+@pytest.mark.parametrize("metrics_format", ["npz", "parquet"])
+def test_sidecar_export_import(tmpdir, monkeypatch, metrics_format):
+    with FakeMlflowServer() as src, FakeMlflowServer() as dst:
+        monkeypatch.setenv("MLFLOW_TRACKING_URI", dst.uri)
+        dct = _export_import_run(tmpdir, src, dst, metrics_format)
+        mlflow_attr = dct["mlflow"]
+        assert "metrics" not in mlflow_attr
+        assert mlflow_attr["metrics_file"]["path"] == f"metrics.{metrics_format}"
+        assert mlflow_attr["metrics_file"]["keys"] == { "metric_0": 15, "metric_1": 15, "metric_2": 15 }
+        assert dct["system"]["export_file_version"] == "3"
+
+
+def test_json_export_import(tmpdir, monkeypatch):
+    with FakeMlflowServer() as src, FakeMlflowServer() as dst:
+        monkeypatch.setenv("MLFLOW_TRACKING_URI", dst.uri)
+        dct = _export_import_run(tmpdir, src, dst, "json")
+        assert len(dct["mlflow"]["metrics"]["metric_0"]) == 15
+        assert "metrics_file" not in dct["mlflow"]
+        assert dct["system"]["export_file_version"] == "2"
+
+
+def test_read_empty_metrics_file(tmpdir):
+    metrics_file = metric_history.write_metrics_file(str(tmpdir), [], "npz")
+    assert list(metric_history.iter_metrics_file(str(tmpdir), metrics_file)) == []
+
+
+@pytest.mark.parametrize("metrics_format", ["npz", "parquet"])
+def test_iter_metrics_file(tmpdir, metrics_format):
+    mk_history = lambda key, n: [ Metric(key, 0.5*j, 1000+j, j) for j in range(n) ]
+    histories = { "a": mk_history("a", 7), "b": [], "c": mk_history("c", 12) }
+    metrics_file = metric_history.write_metrics_file(str(tmpdir), histories.items(), metrics_format)
+    points = list(metric_history.iter_metrics_file(str(tmpdir), metrics_file, chunk_size=5))
+    assert points == [ (m.key, m.value, m.timestamp, m.step) for history in histories.values() for m in history ]
+
+
+def test_metrics_format(monkeypatch):
+    assert metric_history.get_metrics_format() == "json"
+    monkeypatch.setenv("MLFLOW_EXPORT_IMPORT_METRICS_FORMAT", "Parquet")
+    assert metric_history.get_metrics_format() == "parquet"
+    with pytest.raises(MlflowExportImportException):
+        metric_history.get_metrics_format("csv")
+
+
+def test_newer_export_file_version():
+    io_utils.check_export_file_version({ "system": { "export_file_version": "2" }}, "run.json")
+    io_utils.check_export_file_version({}, "run.json")
+    with pytest.raises(MlflowExportImportException):
+        io_utils.check_export_file_version({ "system": { "export_file_version": "4" }}, "run.json")
@@ -0,0 +1,83 @@
+"""
+Test that imports patch the run ID of MLmodel files locally while uploading the artifacts.
+"""
+
+import os
+import yaml
+import pytest
+import mlflow
+
+from mlflow_export_import.common import blob_store
+from mlflow_export_import.run import run_utils
+from mlflow_export_import.run.export_run import export_run
+from mlflow_export_import.run.import_run import import_run
+from tests.open_source.fake_mlflow_server import fake_server, ARTIFACTS_ENDPOINT
+
+_MLMODEL_PATHS = [ "MLmodel", "model/MLmodel", "nested/dir/model/MLmodel", "model/metadata/MLmodel" ]
+
+
+def _populate(fake_server):
+    exp_id, = fake_server.populate(num_runs=1, num_metrics=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run = client.search_runs([exp_id])[0]
+    root = run.info.artifact_uri.split(":/", 1)[1].strip("/")
+    for path in _MLMODEL_PATHS:
+        fake_server.store.put_artifact(f"{root}/{path}", yaml.safe_dump({ "run_id": run.info.run_id, "flavors": {} }).encode())
+    return client, run
+
+
+def _read_mlmodel(fake_server, artifact_uri, path):
+    root = artifact_uri.split(":/", 1)[1].strip("/")
+    return yaml.safe_load(fake_server.store.artifacts[f"{root}/{path}"])
+
+
+def _read_local_mlmodels(dir):
+    mlmodels = {}
+    for path in _MLMODEL_PATHS:
+        with open(os.path.join(dir, *path.split("/"))) as f:
+            mlmodels[path] = f.read()
+    return mlmodels
+
+
+@pytest.mark.parametrize("dedup_artifacts", [False, True])
+def test_import_patches_mlmodel(fake_server, tmpdir, monkeypatch, dedup_artifacts):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run = _populate(fake_server)
+    output_dir = str(tmpdir)
+    run_dir = os.path.join(output_dir, run.info.run_id)
+    with blob_store.activate(output_dir, dedup_artifacts):
+        export_run(run.info.run_id, run_dir, mlflow_client=client, raise_exception=True)
+    with blob_store.local_artifacts(run_dir) as path:
+        exported = _read_local_mlmodels(path)
+
+    fake_server.reset()
+    dst_run, _ = import_run(run_dir, "imported", mlflow_client=client)
+    assert fake_server.get_num_requests(ARTIFACTS_ENDPOINT) == len(_MLMODEL_PATHS) + 1 # only the file uploads
+    dst_run_id = dst_run.info.run_id
+    for path in _MLMODEL_PATHS[:-1]:
+        assert _read_mlmodel(fake_server, dst_run.info.artifact_uri, path)["run_id"] == dst_run_id
+    assert _read_mlmodel(fake_server, dst_run.info.artifact_uri, "model/metadata/MLmodel")["run_id"] == run.info.run_id
+    with blob_store.local_artifacts(run_dir) as path:
+        assert _read_local_mlmodels(path) == exported # neither the export nor its blobs are modified
+
+
+def test_import_without_mlmodel_fix(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run = _populate(fake_server)
+    run_dir = str(tmpdir)
+    export_run(run.info.run_id, run_dir, mlflow_client=client, raise_exception=True)
+    dst_run, _ = import_run(run_dir, "imported", mlmodel_fix=False, mlflow_client=client)
+    assert _read_mlmodel(fake_server, dst_run.info.artifact_uri, "model/MLmodel")["run_id"] == run.info.run_id
+
+
+def test_patch_mlmodel_run_ids(tmpdir):
+    local_dir = tmpdir.mkdir("artifacts")
+    local_dir.join("MLmodel").write(yaml.safe_dump({ "run_id": "src" }))
+    local_dir.mkdir("current").join("MLmodel").write(yaml.safe_dump({ "run_id": "dst" }))
+    local_dir.mkdir("other").join("data.txt").write("x")
+    staging_dir = str(tmpdir.mkdir("staging"))
+    replacements = run_utils.patch_mlmodel_run_ids(str(local_dir), "dst", staging_dir)
+    assert list(replacements) == [ "MLmodel" ] # already patched MLmodel files are uploaded as is
+    with open(replacements["MLmodel"]) as f:
+        assert yaml.safe_load(f)["run_id"] == "dst"
+    assert yaml.safe_load(local_dir.join("MLmodel").read())["run_id"] == "src"
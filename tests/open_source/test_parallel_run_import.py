@@ -0,0 +1,178 @@
+"""
+Test that import_experiment imports runs in parallel, parent runs before their nested runs.
+"""
+
+import os
+import shutil
+import time
+import logging
+import mlflow
+from mlflow.utils.mlflow_tags import MLFLOW_PARENT_RUN_ID
+
+from mlflow_export_import.common import MlflowExportImportException, worker_pool
+from mlflow_export_import.experiment import import_experiment as import_experiment_module
+from mlflow_export_import.experiment.export_experiment import export_experiment
+from mlflow_export_import.experiment.import_experiment import import_experiment
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from mlflow_export_import.bulk.import_experiments import import_experiments
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def _create_runs(fake_server, exp_id, parents):
+    """
+    Create runs with their parent links. Nested runs are created newer than their parents so that they are
+    exported first.
+
+    :param parents: Dictionary of run name (key) to parent run name or None (value).
+    :return: Dictionary of run name (key) to run ID (value).
+    """
+    store = fake_server.store
+    run_ids = {}
+    start_time = int(time.time() * 1000)
+    for j, name in enumerate(parents):
+        run_ids[name] = store.create_run(exp_id, name, start_time=start_time + j)["info"]["run_id"]
+    for name, parent in parents.items():
+        run_id = run_ids[name]
+        tags = [ { "key": "tag", "value": name } ]
+        if parent:
+            tags.append({ "key": MLFLOW_PARENT_RUN_ID, "value": run_ids[parent] })
+        store.log_batch(run_id, tags=tags,
+            metrics=[ { "key": "metric", "value": 0.1, "timestamp": start_time, "step": 0 } ])
+        store.update_run(run_id, status="FINISHED", end_time=start_time + 100)
+    return run_ids
+
+
+_tree = { "root": None, "child_1": "root", "child_2": "root", "grandchild": "child_1", "other_root": None }
+
+
+def _export(fake_server, output_dir, parents=_tree):
+    exp = fake_server.store.create_experiment("nested_runs")
+    run_ids = _create_runs(fake_server, exp["experiment_id"], parents)
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_experiment(exp["experiment_id"], output_dir, mlflow_client=client)
+    return client, run_ids
+
+
+def _assert_parents(client, run_info_map, run_ids, parents):
+    src_names = { run_id: name for name, run_id in run_ids.items() }
+    for src_run_id, dst_run_info in run_info_map.items():
+        parent = parents[src_names[src_run_id]]
+        tags = client.get_run(dst_run_info.run_id).data.tags
+        if parent:
+            assert tags[MLFLOW_PARENT_RUN_ID] == run_info_map[run_ids[parent]].run_id
+        else:
+            assert MLFLOW_PARENT_RUN_ID not in tags
+
+
+def test_sequential(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run_ids = _export(fake_server, str(tmpdir))
+    fake_server.reset()
+    run_info_map = import_experiment("imported", str(tmpdir), mlflow_client=client)
+    assert len(run_info_map) == len(_tree)
+    _assert_parents(client, run_info_map, run_ids, _tree)
+    assert fake_server.get_num_requests("runs/set-tag") == 0 # parent links are logged with the run's tags
+
+
+def test_parallel(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    parents = { **_tree, **{ f"root_{j}": None for j in range(8) } }
+    client, run_ids = _export(fake_server, str(tmpdir), parents)
+    fake_server.reset()
+    fake_server.configure("runs/create", latency=0.2)
+    run_info_map = import_experiment("imported", str(tmpdir), use_threads=True, mlflow_client=client)
+    assert len(run_info_map) == len(parents)
+    _assert_parents(client, run_info_map, run_ids, parents)
+    assert fake_server.get_num_requests("runs/set-tag") == 0
+    assert fake_server.get_stats()["max_concurrent_requests"] > 1
+    assert worker_pool.get_pool() is None
+
+
+def test_parent_tag_on_create(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    parents = { "root": None, "child": "root" }
+    exp = fake_server.store.create_experiment("many_params")
+    run_ids = _create_runs(fake_server, exp["experiment_id"], parents)
+    fake_server.store.log_batch(run_ids["child"], params=[ { "key": f"param_{j}", "value": str(j) } for j in range(150) ])
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_experiment(exp["experiment_id"], str(tmpdir), mlflow_client=client)
+
+    create_run = fake_server.store.create_run
+    created_tags = []
+    def _create_run(experiment_id, run_name=None, start_time=None, user_id=None, tags=None):
+        created_tags.append({ t["key"]: t["value"] for t in tags or [] })
+        return create_run(experiment_id, run_name, start_time, user_id, tags)
+    monkeypatch.setattr(fake_server.store, "create_run", _create_run)
+    run_info_map = import_experiment("imported", str(tmpdir), mlflow_client=client)
+    _assert_parents(client, run_info_map, run_ids, parents)
+    dst_root_run_id = run_info_map[run_ids["root"]].run_id
+    assert { MLFLOW_PARENT_RUN_ID: dst_root_run_id } in created_tags
+    assert client.get_run(run_info_map[run_ids["child"]].run_id).data.params["param_149"] == "149"
+
+
+def test_parent_cycle(fake_server, tmpdir, monkeypatch, caplog):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp = fake_server.store.create_experiment("cycle")
+    run_ids = _create_runs(fake_server, exp["experiment_id"], { "a": None, "b": "a" })
+    fake_server.store.log_batch(run_ids["a"], tags=[ { "key": MLFLOW_PARENT_RUN_ID, "value": run_ids["b"] } ])
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_experiment(exp["experiment_id"], str(tmpdir), mlflow_client=client)
+    with caplog.at_level(logging.WARNING):
+        run_info_map = import_experiment("imported", str(tmpdir), mlflow_client=client)
+    assert sorted(run_info_map) == sorted(run_ids.values())
+    assert "form a cycle" in caplog.text
+
+
+def test_missing_parent(fake_server, tmpdir, monkeypatch, caplog):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run_ids = _export(fake_server, str(tmpdir))
+    shutil.rmtree(os.path.join(str(tmpdir), "runs", run_ids["child_1"]))
+    with caplog.at_level(logging.WARNING):
+        run_info_map = import_experiment("imported", str(tmpdir), mlflow_client=client)
+    assert sorted(run_info_map) == sorted(run_id for name, run_id in run_ids.items() if name != "child_1")
+    assert f"1 runs could not be imported into experiment 'imported': ['{run_ids['child_1']}']" in caplog.text
+    assert f"Importing run {run_ids['grandchild']} without its parent run link since parent run {run_ids['child_1']} is missing from the export" in caplog.text
+    assert "form a cycle" not in caplog.text
+    dst_runs = client.search_runs([client.get_experiment_by_name("imported").experiment_id])
+    assert len(dst_runs) == len(_tree) - 1
+
+
+def test_failed_parent(fake_server, tmpdir, monkeypatch, caplog):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, run_ids = _export(fake_server, str(tmpdir))
+    import_run = import_experiment_module.import_run
+    def _import_run(**kwargs):
+        if kwargs["input_dir"].endswith(run_ids["root"]):
+            raise MlflowExportImportException("Cannot create run")
+        return import_run(**kwargs)
+    monkeypatch.setattr(import_experiment_module, "import_run", _import_run)
+    with caplog.at_level(logging.WARNING):
+        run_info_map = import_experiment("imported", str(tmpdir), mlflow_client=client)
+    assert sorted(run_info_map) == sorted(run_id for name, run_id in run_ids.items() if name != "root")
+    for child in [ "child_1", "child_2" ]:
+        assert f"Importing run {run_ids[child]} without its parent run link since parent run {run_ids['root']} failed to import" in caplog.text
+    assert "form a cycle" not in caplog.text
+    dst_runs = client.search_runs([client.get_experiment_by_name("imported").experiment_id])
+    assert len(dst_runs) == len(_tree) - 1
+
+
+def test_import_experiments_shared_pool(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    client = mlflow.MlflowClient(fake_server.uri)
+    exp_ids, run_ids = [], {}
+    for j in range(2):
+        exp = fake_server.store.create_experiment(f"nested_runs_{j}")
+        exp_ids.append(exp["experiment_id"])
+        run_ids[exp["experiment_id"]] = _create_runs(fake_server, exp["experiment_id"], _tree)
+    export_experiments(exp_ids, str(tmpdir), mlflow_client=client)
+    for exp_id in exp_ids:
+        client.delete_experiment(exp_id)
+    renames = { f"nested_runs_{j}": f"imported_{j}" for j in range(2) }
+    fake_server.reset()
+    res = import_experiments(str(tmpdir), experiment_renames=renames, use_threads=True, mlflow_client=client)
+    for exp_id, run_info_map in res:
+        assert len(run_info_map) == len(_tree)
+        _assert_parents(client, run_info_map, run_ids[exp_id], _tree)
+    assert fake_server.get_num_requests("runs/set-tag") == 0
@@ -0,0 +1,170 @@
+"""
+Test the process-wide rate limiter and its use by HttpClient and RateLimitedMlflowClient against a local stub HTTP server.
+"""
+
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from mlflow.exceptions import RestException
+
+from mlflow_export_import.client import http_session, rate_limiter
+from mlflow_export_import.client.rate_limiter import RateLimiter, parse_retry_after
+from mlflow_export_import.client.http_client import MlflowHttpClient
+from mlflow_export_import.client.rate_limited_mlflow_client import RateLimitedMlflowClient, is_throttle_exception
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    num_throttles = {} # path => number of 429 responses to return before succeeding
+    num_errors = {} # path => number of 503 responses to return before succeeding
+
+    def _reply(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for k,v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        path = self.path.split("?")[0]
+        remaining = self.num_throttles.get(path, 0)
+        if remaining > 0:
+            self.num_throttles[path] = remaining - 1
+            self._reply(429, { "error_code": "REQUEST_LIMIT_EXCEEDED", "message": "Too many requests" }, { "Retry-After": "0.2" })
+        elif self.num_errors.get(path, 0) > 0:
+            self.num_errors[path] -= 1
+            self._reply(503, { "error_code": "TEMPORARILY_UNAVAILABLE", "message": "Unavailable" })
+        elif path.endswith("experiments/get"):
+            self._reply(200, { "experiment": { "experiment_id": "1", "name": "exp", "lifecycle_stage": "active" }})
+        else:
+            self._reply(200, { "path": path, "method": self.command })
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def host():
+    server = ThreadingHTTPServer(("localhost", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_session.configure(retry_policy=http_session.RetryPolicy(max_retries=2, backoff_factor=0))
+    yield f"http://localhost:{server.server_address[1]}"
+    server.shutdown()
+
+
+@pytest.fixture()
+def limiter():
+    rate_limiter.configure(max_rate=0, min_rate=1, ramp_up=1)
+    yield rate_limiter.get_rate_limiter()
+    rate_limiter.configure()
+
+
+# == RateLimiter
+
+def test_unlimited_until_throttled():
+    limiter = RateLimiter(max_rate=0)
+    assert sum(limiter.reserve() for _ in range(100)) == 0
+    limiter.on_throttle("0")
+    stats = limiter.get_stats()
+    assert stats["throttles"] == 1
+    assert stats["rate"] is not None
+
+
+def test_rate():
+    limiter = RateLimiter(max_rate=10)
+    delays = [ limiter.reserve() for _ in range(30) ]
+    assert delays[9] == pytest.approx(0, abs=0.01) # one second of burst
+    assert delays[29] == pytest.approx(2, abs=0.05)
+
+
+def test_throttle_pauses_and_decreases_rate():
+    limiter = RateLimiter(max_rate=10, min_rate=1, ramp_up=0)
+    limiter.on_throttle("2")
+    assert limiter.reserve() == pytest.approx(2, abs=0.05)
+    assert limiter.get_stats()["rate"] == 5
+
+
+def test_concurrent_throttles_decrease_once():
+    limiter = RateLimiter(max_rate=16, min_rate=1, ramp_up=0)
+    for _ in range(5):
+        limiter.on_throttle("0")
+    assert limiter.get_stats()["rate"] == 8
+    assert limiter.get_stats()["throttles"] == 5
+
+
+def test_ramp_up():
+    limiter = RateLimiter(max_rate=10, min_rate=1, ramp_up=20)
+    limiter.on_throttle("0")
+    assert limiter.get_stats()["rate"] == 5
+    time.sleep(0.3)
+    limiter.reserve()
+    assert limiter.get_stats()["rate"] == 10 # capped at max_rate
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("3") == 3
+    assert parse_retry_after("-1") == 0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("foo") is None
+
+
+# == Clients
+
+def test_http_client_retries_throttled_post(host, limiter):
+    _Handler.num_throttles["/api/2.0/mlflow/runs/create"] = 2
+    client = MlflowHttpClient(host)
+    start = time.time()
+    assert client.post("runs/create", { "experiment_id": "1" })["method"] == "POST"
+    assert time.time() - start >= 0.4
+    assert limiter.get_stats()["throttles"] == 2
+
+
+@pytest.fixture()
+def mlflow_max_retries(monkeypatch):
+    """ Unset MLFLOW_HTTP_REQUEST_MAX_RETRIES and restore it afterwards. """
+    monkeypatch.setenv("MLFLOW_HTTP_REQUEST_MAX_RETRIES", "7")
+    monkeypatch.delenv("MLFLOW_HTTP_REQUEST_MAX_RETRIES")
+
+
+def test_mlflow_client_retries_throttled_call(host, limiter, mlflow_max_retries):
+    _Handler.num_throttles["/api/2.0/mlflow/experiments/get"] = 1
+    client = RateLimitedMlflowClient(host)
+    start = time.time()
+    assert client.get_experiment("1").name == "exp"
+    assert limiter.get_stats()["throttles"] == 1 # first 429 reaches the limiter without MLflow's retries
+    assert time.time() - start < 5
+    assert os.environ["MLFLOW_HTTP_REQUEST_MAX_RETRIES"] == "0"
+
+
+def test_mlflow_client_retries_transient_error(host, limiter, mlflow_max_retries):
+    _Handler.num_errors["/api/2.0/mlflow/experiments/get"] = 2
+    client = RateLimitedMlflowClient(host)
+    assert client.get_experiment("1").name == "exp"
+    assert limiter.get_stats()["throttles"] == 0
+
+
+def test_mlflow_client_methods_are_cached(host, monkeypatch):
+    client = RateLimitedMlflowClient(host)
+    assert client.get_experiment is client.get_experiment
+    get_experiment = lambda experiment_id: "replaced"
+    monkeypatch.setattr(client, "get_experiment", get_experiment)
+    assert client.get_experiment("1") == "replaced"
+
+
+def test_is_throttle_exception():
+    assert is_throttle_exception(RestException({ "error_code": "REQUEST_LIMIT_EXCEEDED", "message": "" }))
+    assert not is_throttle_exception(RestException({ "error_code": "RESOURCE_DOES_NOT_EXIST", "message": "" }))
@@ -0,0 +1,135 @@
+"""
+Test the per-endpoint request metrics and their recording by HttpClient against a local stub HTTP server.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from mlflow_export_import.client import http_session, request_metrics
+from mlflow_export_import.client.request_metrics import RequestMetrics, mk_endpoint
+from mlflow_export_import.client.http_client import MlflowHttpClient
+from mlflow_export_import.common import MlflowExportImportException
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    num_failures = {} # path => number of 503 responses to return before succeeding
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _handle(self):
+        length = int(self.headers.get("Content-Length", 0))
+        if length:
+            self.rfile.read(length)
+        path = self.path.split("?")[0]
+        remaining = self.num_failures.get(path, 0)
+        if remaining > 0:
+            self.num_failures[path] = remaining - 1
+            self._reply(503, { "error_code": "TEMPORARILY_UNAVAILABLE" })
+        elif path.endswith("missing"):
+            self._reply(404, { "error_code": "RESOURCE_DOES_NOT_EXIST" })
+        else:
+            self._reply(200, { "path": path })
+
+    do_GET = _handle
+    do_POST = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def client():
+    server = ThreadingHTTPServer(("localhost", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    http_session.configure(retry_policy=http_session.RetryPolicy(max_retries=2, backoff_factor=0))
+    yield MlflowHttpClient(f"http://localhost:{server.server_address[1]}")
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    request_metrics.reset()
+    yield
+    request_metrics.reset()
+
+
+# == RequestMetrics
+
+def test_summary():
+    metrics = RequestMetrics()
+    for millis in range(1, 101):
+        metrics.record("fast", millis / 1000, bytes_sent=10, bytes_received=100)
+    metrics.record("slow", 60, retries=2, error=True)
+    summary = metrics.get_summary()
+    assert list(summary.keys()) == ["slow", "fast"]
+    fast = summary["fast"]
+    assert fast["count"] == 100
+    assert fast["errors"] == 0
+    assert fast["bytes_sent"] == 1000
+    assert fast["bytes_received"] == 10000
+    latency = fast["latency_millis"]
+    assert latency["mean"] == pytest.approx(50.5)
+    assert latency["max"] == 100
+    assert latency["p50"] == pytest.approx(50, rel=0.1)
+    assert latency["p95"] == pytest.approx(95, rel=0.1)
+    assert latency["p99"] == pytest.approx(99, rel=0.1)
+    slow = summary["slow"]
+    assert slow["errors"] == 1
+    assert slow["retries"] == 2
+
+
+def test_measure():
+    with request_metrics.measure("artifacts/download") as m:
+        m.bytes_received = 123
+    with pytest.raises(ValueError):
+        with request_metrics.measure("artifacts/download"):
+            raise ValueError("boom")
+    stats = request_metrics.get_summary()["artifacts/download"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 1
+    assert stats["bytes_received"] == 123
+
+
+def test_mk_endpoint():
+    assert mk_endpoint("GET", "api/2.0/mlflow", "runs/get") == "GET api/2.0/mlflow/runs/get"
+    assert mk_endpoint("GET", "api/2.0", "permissions/experiments/123") == "GET api/2.0/permissions/experiments/{id}"
+    assert mk_endpoint("POST", "api/2.0/mlflow", "experiments/search?max_results=10") == "POST api/2.0/mlflow/experiments/search"
+
+
+# == HttpClient
+
+def test_http_client_records_calls(client):
+    data = { "experiment_ids": ["1"] }
+    client.post("runs/search", data)
+    client.post("runs/search", data)
+    stats = request_metrics.get_summary()["POST api/2.0/mlflow/runs/search"]
+    assert stats["count"] == 2
+    assert stats["errors"] == 0
+    assert stats["bytes_sent"] == 2 * len(json.dumps(data))
+    assert stats["bytes_received"] > 0
+
+
+def test_http_client_records_retries(client):
+    _Handler.num_failures["/api/2.0/mlflow/runs/get"] = 2
+    client.get("runs/get", { "run_id": "1" })
+    stats = request_metrics.get_summary()["GET api/2.0/mlflow/runs/get"]
+    assert stats["count"] == 1
+    assert stats["retries"] == 2
+
+
+def test_http_client_records_errors(client):
+    with pytest.raises(MlflowExportImportException):
+        client.get("runs/missing")
+    stats = request_metrics.get_summary()["GET api/2.0/mlflow/runs/missing"]
+    assert stats["count"] == 1
+    assert stats["errors"] == 1
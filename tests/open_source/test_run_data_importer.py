@@ -0,0 +1,220 @@
+"""
+Test the packing of run data into 'log_batch' requests and the number of requests of a run import.
+"""
+
+import os
+import time
+import threading
+import pytest
+import mlflow
+from mlflow.entities import Metric, Param, RunTag
+from mlflow.utils.validation import MAX_PARAMS_TAGS_PER_BATCH, MAX_ENTITIES_PER_BATCH
+
+from mlflow_export_import.common import MlflowExportImportException
+from mlflow_export_import.run import run_data_importer, run_utils
+from mlflow_export_import.run.export_run import export_run
+from mlflow_export_import.run.import_run import import_run
+from tests.open_source.fake_mlflow_server import fake_server
+from tests.open_source import benchmark_run_data_import
+
+
+def _mk_data(num_params, num_metrics, num_tags):
+    params = [ Param(f"p{j}", "pval") for j in range(num_params) ]
+    metrics = [ Metric("m", j, 1000 + j, j) for j in range(num_metrics) ]
+    tags = [ RunTag(f"t{j}", "tval") for j in range(num_tags) ]
+    return params, metrics, tags
+
+
+def _pack(params, metrics, tags, **kwargs):
+    return list(run_data_importer.pack_batches(params, metrics, tags, **kwargs))
+
+
+def _check_limits(batches):
+    for params, metrics, tags in batches:
+        assert len(params) + len(tags) <= MAX_PARAMS_TAGS_PER_BATCH
+        assert len(params) + len(metrics) + len(tags) <= MAX_ENTITIES_PER_BATCH
+        assert params or metrics or tags
+
+
+def test_pack_small_run():
+    params, metrics, tags = _mk_data(5, 30, 5)
+    batches = _pack(params, metrics, tags)
+    assert batches == [ (params, metrics, tags) ]
+
+
+def test_pack_empty_run():
+    assert _pack([], [], []) == []
+
+
+def test_pack_fewest_batches():
+    params, metrics, tags = _mk_data(150, 2500, 120)
+    batches = _pack(params, metrics, tags)
+    _check_limits(batches)
+    assert len(batches) == 3 # 270 params and tags need 3 batches, which also hold the 2500 metrics
+    assert [ p for b in batches for p in b[0] ] == params
+    assert [ m for b in batches for m in b[1] ] == metrics
+    assert [ t for b in batches for t in b[2] ] == tags
+
+
+def test_pack_many_metrics():
+    params, metrics, tags = _mk_data(10, 4500, 10)
+    batches = _pack(params, metrics, tags)
+    _check_limits(batches)
+    assert len(batches) == 5
+    assert [ len(b[1]) for b in batches ] == [ 980, 1000, 1000, 1000, 520 ]
+
+
+def test_pack_max_bytes():
+    params = [ Param(f"p{j}", "x" * 6000) for j in range(50) ]
+    batches = _pack(params, [], [], max_bytes=62000)
+    assert [ len(b[0]) for b in batches ] == [ 10, 10, 10, 10, 10 ]
+
+
+def test_import_run_requests(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp_id, = fake_server.populate(num_runs=1, num_params=5, num_metrics=3, num_steps=10, num_tags=3, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run = client.search_runs([exp_id])[0]
+    run_dir = str(tmpdir.join("run"))
+    export_run(run.info.run_id, run_dir, mlflow_client=client)
+
+    import_run(run_dir, "imported", mlmodel_fix=False, mlflow_client=client)
+    fake_server.reset()
+    dst_run, _ = import_run(run_dir, "imported", mlmodel_fix=False, mlflow_client=client)
+    endpoints = fake_server.get_stats()["endpoints"]
+    assert { k: v["requests"] for k,v in endpoints.items() if k.startswith("runs/") } == \
+        { "runs/create": 1, "runs/log-batch": 1, "runs/update": 1, "runs/get": 2 } # set_terminated fetches the run to print its URL
+    dst_run = client.get_run(dst_run.info.run_id)
+    assert dst_run.data.params == run.data.params
+    assert dst_run.data.metrics == run.data.metrics
+    assert len(client.get_metric_history(dst_run.info.run_id, "metric_0")) == 10
+
+
+def test_set_terminated_through_client(fake_server, monkeypatch):
+    exp_id, = fake_server.populate(num_runs=1, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run_id = client.search_runs([exp_id])[0].info.run_id
+    calls = []
+    set_terminated = client.set_terminated
+    def _set_terminated(*args):
+        calls.append(args)
+        set_terminated(*args)
+    monkeypatch.setattr(client, "set_terminated", _set_terminated)
+    run_utils.set_terminated(client, run_id, "KILLED", 1234)
+    assert calls == [ (run_id, "KILLED", 1234) ]
+    run = client.get_run(run_id)
+    assert (run.info.status, run.info.end_time) == ("KILLED", 1234)
+
+
+def test_import_run_without_fetch(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp_id, = fake_server.populate(num_runs=1, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run = client.search_runs([exp_id])[0]
+    run_dir = str(tmpdir.join("run"))
+    export_run(run.info.run_id, run_dir, mlflow_client=client)
+
+    fake_server.reset()
+    dst_run, _ = import_run(run_dir, "imported", mlmodel_fix=False, fetch_run=False, mlflow_client=client)
+    assert fake_server.get_num_requests("runs/get") == 1 # only by set_terminated
+    fetched_run = client.get_run(dst_run.info.run_id)
+    assert dst_run.info.status == fetched_run.info.status == run.info.status
+    assert dst_run.info.end_time == fetched_run.info.end_time
+    assert dst_run.info.artifact_uri == fetched_run.info.artifact_uri
+    assert os.path.exists(os.path.join(run_dir, "run.json"))
+
+
+@pytest.mark.parametrize("metrics_format", ["json", "npz", "parquet"])
+def test_import_long_history(metrics_format):
+    res = benchmark_run_data_import.run_benchmark(50_000, metrics_format, trace_memory=False)
+    assert res["log_batch_requests"] == 51 # the first batch also holds the 20 params and tags
+
+
+def test_import_long_history_bounded_memory():
+    benchmark_run_data_import.run_benchmark(1000, "json", trace_memory=False) # warm up lazy imports
+    small = benchmark_run_data_import.run_benchmark(20_000, "json", trace_memory=True)
+    large = benchmark_run_data_import.run_benchmark(200_000, "json", trace_memory=True)
+    assert large["peak_mb"] < 1.5 * small["peak_mb"] + 0.5
+
+
+class _SlowClient:
+    """ Records the batches in flight when each log_batch request starts. """
+    def __init__(self, latency=0.02, fail_at=None):
+        self.latency = latency
+        self.fail_at = fail_at
+        self.lock = threading.Lock()
+        self.in_flight = []
+        self.calls = []
+
+    def log_batch(self, run_id, metrics=(), params=(), tags=()):
+        keys = { m.key for m in metrics }
+        with self.lock:
+            self.calls.append((keys, [ other for other in self.in_flight ]))
+            num_call = len(self.calls)
+            self.in_flight.append(keys)
+        try:
+            time.sleep(self.latency)
+            if num_call == self.fail_at:
+                raise ValueError(f"call {num_call} failed")
+        finally:
+            with self.lock:
+                self.in_flight.remove(keys)
+
+
+def _mk_batches(num_keys, num_steps):
+    metrics = [ Metric(f"m{k}", j, 1000 + j, j) for k in range(num_keys) for j in range(num_steps) ]
+    return run_data_importer.pack_batches([], metrics, [])
+
+
+def test_logger_concurrent_batches():
+    client = _SlowClient()
+    data_logger = run_data_importer.RunDataLogger(client, "run", max_workers=4)
+    data_logger.start(_mk_batches(2, 6000))
+    data_logger.wait()
+    assert data_logger.num_requests == len(client.calls) == 12
+    assert max(len(others) for _, others in client.calls) > 1
+    seen = set()
+    for keys, others in client.calls:
+        if keys - seen: # first points of a key are sent alone
+            assert others == []
+        seen |= keys
+
+
+def test_logger_sequential():
+    client = _SlowClient()
+    data_logger = run_data_importer.RunDataLogger(client, "run", max_workers=1)
+    data_logger.start(_mk_batches(1, 3000))
+    assert data_logger.num_requests == 3 # sent before start() returns
+    data_logger.wait()
+    assert all(others == [] for _, others in client.calls)
+
+
+def test_logger_errors():
+    client = _SlowClient(fail_at=3)
+    data_logger = run_data_importer.RunDataLogger(client, "run", max_workers=4)
+    data_logger.start(_mk_batches(1, 20000))
+    with pytest.raises(MlflowExportImportException) as e:
+        data_logger.wait()
+    assert e.value.kwargs["num_errors"] == 1
+    assert "call 3 failed" in e.value.kwargs["src_message"]
+    assert len(client.calls) < 20 # stopped after the error
+
+
+def test_import_run_concurrent_log_batch(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp_id, = fake_server.populate(num_runs=1, num_params=1, num_metrics=1, num_steps=8000, num_tags=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    run = client.search_runs([exp_id])[0]
+    run_dir = str(tmpdir.join("run"))
+    export_run(run.info.run_id, run_dir, mlflow_client=client)
+
+    fake_server.configure("runs/log-batch", latency=0.4) # dominates the fixed cost of a run import
+    durations = {}
+    for max_workers in [ 1, 4 ]:
+        monkeypatch.setenv("MLFLOW_EXPORT_IMPORT_LOG_BATCH_THREADS", str(max_workers))
+        start = time.time()
+        dst_run, _ = import_run(run_dir, f"imported_{max_workers}", mlmodel_fix=False, mlflow_client=client)
+        durations[max_workers] = time.time() - start
+        assert len(client.get_metric_history(dst_run.info.run_id, "metric_0")) == 8000
+        assert dst_run.info.status == run.info.status
+    assert durations[4] < durations[1] / 2
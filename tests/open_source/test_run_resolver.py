@@ -0,0 +1,102 @@
+"""
+Test the batched run lookup against the fake tracking server.
+"""
+
+import pytest
+import mlflow
+
+from mlflow_export_import.client import metadata_cache
+from mlflow_export_import.common import run_resolver
+from mlflow_export_import.bulk.model_utils import get_experiments_runs_of_models
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+@pytest.fixture(autouse=True)
+def cache():
+    metadata_cache.configure(max_size=1000, ttl=60)
+    yield
+    metadata_cache.configure()
+
+
+def _populate(fake_server, num_experiments=3, num_runs=10):
+    exp_ids = fake_server.populate(num_experiments=num_experiments, num_runs=num_runs, num_metrics=0, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    return client, { run.info.run_id: run.info.experiment_id for run in client.search_runs(exp_ids) }
+
+
+def test_batched_searches(fake_server, monkeypatch):
+    monkeypatch.setenv("MLFLOW_HTTP_REQUEST_MAX_RETRIES", "0")
+    client, run_exps = _populate(fake_server)
+    fake_server.reset()
+    runs, errors = run_resolver.get_runs(client, list(run_exps.keys()) + ["bad_run_id"],
+        experiment_ids=set(run_exps.values()), batch_size=7)
+    assert { run_id: run.info.experiment_id for run_id, run in runs.items() } == run_exps
+    assert list(errors.keys()) == ["bad_run_id"]
+    assert errors["bad_run_id"].error_code == "RESOURCE_DOES_NOT_EXIST"
+    assert fake_server.get_num_requests("runs/search") == 5 # 30 runs in batches of 7
+    assert fake_server.get_num_requests("runs/get") == 1 # bad_run_id
+
+
+def test_run_experiment_ids(fake_server):
+    client, run_exps = _populate(fake_server)
+    fake_server.reset()
+    runs, errors = run_resolver.get_runs(client, list(run_exps.keys()), run_experiment_ids=run_exps, batch_size=12)
+    assert { run_id: run.info.experiment_id for run_id, run in runs.items() } == run_exps
+    assert not errors
+    assert fake_server.get_num_requests("runs/search") == 3 # 30 runs in batches of 12
+    assert fake_server.get_num_requests("runs/get") == 0
+
+
+def test_unknown_experiments(fake_server):
+    client, run_exps = _populate(fake_server)
+    fake_server.reset()
+    fake_server.configure("runs/get", latency=0.1)
+    runs, errors = run_resolver.get_runs(client, list(run_exps.keys()), max_workers=8)
+    assert len(runs) == len(run_exps)
+    assert not errors
+    assert fake_server.get_num_requests("experiments/search") == 0 # experiments are not enumerated
+    assert fake_server.get_num_requests("runs/search") == 0
+    assert fake_server.get_num_requests("runs/get") == 30
+    assert fake_server.get_stats()["max_concurrent_requests"] > 1
+
+
+def test_cached(fake_server):
+    client, run_exps = _populate(fake_server)
+    run_resolver.get_runs(client, list(run_exps.keys()), run_experiment_ids=run_exps)
+    fake_server.reset()
+    runs, _ = run_resolver.get_runs(client, list(run_exps.keys()))
+    assert len(runs) == len(run_exps)
+    assert fake_server.get_num_requests("runs/search") == 0
+    assert fake_server.get_num_requests("runs/get") == 0
+
+
+def test_run_outside_of_experiments(fake_server):
+    client, run_exps = _populate(fake_server, num_experiments=2)
+    exp_id = list(run_exps.values())[0]
+    runs, errors = run_resolver.get_runs(client, list(run_exps.keys()), experiment_ids=[exp_id])
+    assert len(runs) == len(run_exps) # others fetched with get_run
+    assert not errors
+    assert fake_server.get_num_requests("runs/get") == 10
+
+
+def test_experiments_runs_of_models(fake_server):
+    client, run_exps = _populate(fake_server, num_experiments=2, num_runs=3)
+    client.create_registered_model("model")
+    for run_id in run_exps:
+        client.create_model_version("model", f"{client.get_run(run_id).info.artifact_uri}/model", run_id)
+    client.create_registered_model("model_runs_uri")
+    run_id = list(run_exps)[0]
+    client.create_model_version("model_runs_uri", f"runs:/{run_id}/model", run_id)
+    fake_server.reset()
+    exps_and_runs = get_experiments_runs_of_models(client, ["model"])
+    assert { exp_id: sorted(run_ids) for exp_id, run_ids in exps_and_runs.items() } == \
+        { exp_id: sorted(r for r,e in run_exps.items() if e == exp_id) for exp_id in set(run_exps.values()) }
+    assert fake_server.get_num_requests("runs/get") == 0
+    assert fake_server.get_num_requests("runs/search") == 1
+    assert fake_server.get_num_requests("experiments/search") == 0
+
+    metadata_cache.configure(max_size=1000, ttl=60)
+    fake_server.reset()
+    exps_and_runs = get_experiments_runs_of_models(client, ["model_runs_uri"])
+    assert exps_and_runs == { run_exps[run_id]: [ run_id ] }
+    assert fake_server.get_num_requests("runs/get") == 1 # no experiment in the source
@@ -0,0 +1,75 @@
+"""
+Test that importers read each manifest of an export directory once (single-read manifests).
+"""
+
+import os
+import collections
+import mlflow
+
+from mlflow_export_import.common import io_utils
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from mlflow_export_import.bulk.export_models import export_models
+from mlflow_export_import.bulk.import_experiments import import_experiments
+from mlflow_export_import.bulk.import_models import import_models
+from mlflow_export_import.experiment.import_experiment import import_experiment
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def _count_reads(monkeypatch):
+    reads = collections.Counter()
+    read_file = io_utils.read_file
+    def _read_file(path, *args, **kwargs):
+        reads[os.path.relpath(path)] += 1
+        return read_file(path, *args, **kwargs)
+    monkeypatch.setattr(io_utils, "read_file", _read_file)
+    return reads
+
+
+def _export_models(fake_server, output_dir):
+    exp_id, = fake_server.populate(num_runs=4, num_metrics=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    runs = client.search_runs([exp_id])
+    for name, model_runs in [ ("model_a", runs[:2]), ("model_b", runs[2:]) ]:
+        client.create_registered_model(name)
+        for run in model_runs:
+            client.create_model_version(name, f"{run.info.artifact_uri}/model", run.info.run_id)
+    export_models([ "model_a", "model_b" ], output_dir, mlflow_client=client)
+    return client, exp_id, runs
+
+
+def test_import_models_reads_files_once(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    output_dir = str(tmpdir)
+    client, _, _ = _export_models(fake_server, output_dir)
+    reads = _count_reads(monkeypatch)
+    import_models(output_dir, delete_model=True, mlflow_client=client)
+    json_reads = { path: n for path, n in reads.items() if path.endswith(".json") and "artifacts" not in path }
+    assert len(json_reads) == 9 # manifests and run.json files
+    assert set(json_reads.values()) == { 1 }, json_reads
+
+
+def test_import_experiment_reads_runs_once(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp_id, = fake_server.populate(num_runs=3, num_metrics=2, num_steps=5, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_experiments([exp_id], str(tmpdir), mlflow_client=client)
+    reads = _count_reads(monkeypatch)
+    run_info_map = import_experiment("imported", os.path.join(str(tmpdir), exp_id), mlflow_client=client)
+    run_reads = { path: n for path, n in reads.items() if path.endswith("run.json") }
+    assert len(run_reads) == 3
+    assert set(run_reads.values()) == { 1 }
+    for src_run_id, dst_run_info in run_info_map.items():
+        assert len(client.get_metric_history(dst_run_info.run_id, "metric_0")) == 5
+
+
+def test_import_experiments_reads_manifests_once(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    exp_ids = fake_server.populate(num_experiments=2, num_runs=2, num_metrics=1, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    export_experiments(exp_ids, str(tmpdir), mlflow_client=client)
+    reads = _count_reads(monkeypatch)
+    res = import_experiments(str(tmpdir), mlflow_client=client)
+    assert all(run_info_map for _, run_info_map in res)
+    manifest_reads = { path: n for path, n in reads.items() if path.endswith(("experiment.json", "experiments.json")) }
+    assert len(manifest_reads) == 3
+    assert set(manifest_reads.values()) == { 1 }
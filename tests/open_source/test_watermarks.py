@@ -0,0 +1,142 @@
+"""
+Test incremental (delta) exports with watermark files against the fake tracking server.
+"""
+
+import os
+from types import SimpleNamespace
+import mlflow
+
+from mlflow_export_import.common import io_utils, watermarks
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from mlflow_export_import.bulk.export_models import export_models
+from mlflow_export_import.experiment.import_experiment import import_experiment
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def _populate(fake_server, num_runs=3):
+    exp_id, = fake_server.populate(num_runs=num_runs, num_metrics=1, num_artifacts=0)
+    client = mlflow.MlflowClient(fake_server.uri)
+    return client, exp_id
+
+
+def _export(client, exp_id, output_dir, watermark_file):
+    export_experiments([exp_id], output_dir, watermark_file=watermark_file, mlflow_client=client)
+    return io_utils.read_file(os.path.join(output_dir, exp_id, "experiment.json"))
+
+
+def test_unchanged_runs_not_exported(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server)
+    watermark_file = str(tmpdir.join("watermarks.json"))
+    root = _export(client, exp_id, str(tmpdir.join("full")), watermark_file)
+    assert len(root["mlflow"]["runs"]) == 3
+    assert len(root["info"]["delta"]["new_runs"]) == 3
+
+    root = _export(client, exp_id, str(tmpdir.join("delta")), watermark_file)
+    assert root["mlflow"]["runs"] == []
+    assert root["info"]["delta"] == { "new_runs": [], "changed_runs": [], "deleted_runs": [] }
+    info = io_utils.read_file(os.path.join(str(tmpdir.join("delta")), "experiments.json"))["info"]
+    assert info["status"]["watermarks"]["unchanged_runs"] == 3
+    assert watermarks.get_watermarks() is None
+
+
+def test_new_changed_and_deleted_runs(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server)
+    run_ids = [ run.info.run_id for run in client.search_runs([exp_id]) ]
+    watermark_file = str(tmpdir.join("watermarks.json"))
+    _export(client, exp_id, str(tmpdir.join("full")), watermark_file)
+
+    client.set_tag(run_ids[0], "changed", "yes")
+    client.delete_run(run_ids[1])
+    new_run = client.create_run(exp_id)
+    root = _export(client, exp_id, str(tmpdir.join("delta")), watermark_file)
+    assert sorted(root["mlflow"]["runs"]) == sorted([ run_ids[0], new_run.info.run_id ])
+    assert root["info"]["delta"] == {
+        "new_runs": [ new_run.info.run_id ], "changed_runs": [ run_ids[0] ], "deleted_runs": [ run_ids[1] ] }
+    assert os.path.exists(os.path.join(str(tmpdir.join("delta")), exp_id, "runs", run_ids[0]))
+    assert not os.path.exists(os.path.join(str(tmpdir.join("delta")), exp_id, "runs", run_ids[2]))
+
+    state = io_utils.read_file(watermark_file)
+    assert set(state["experiments"][exp_id]["runs"]) == { run_ids[0], run_ids[2], new_run.info.run_id }
+
+
+def test_failed_run_exported_again(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server, num_runs=2)
+    run_ids = [ run.info.run_id for run in client.search_runs([exp_id]) ]
+    marks = watermarks.Watermarks(str(tmpdir.join("watermarks.json")))
+    exp = client.get_experiment(exp_id)
+    assert sorted(marks.select_runs(client, [exp_id])[exp_id]) == sorted(run_ids)
+    marks.commit_runs(exp, run_ids[:1])
+    marks.save()
+
+    marks = watermarks.Watermarks(str(tmpdir.join("watermarks.json")))
+    assert marks.select_runs(client, [exp_id])[exp_id] == run_ids[1:]
+
+
+def test_import_delta(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", fake_server.uri)
+    client, exp_id = _populate(fake_server)
+    run_ids = [ run.info.run_id for run in client.search_runs([exp_id]) ]
+    watermark_file = str(tmpdir.join("watermarks.json"))
+    full_dir, delta_dir = str(tmpdir.join("full")), str(tmpdir.join("delta"))
+    _export(client, exp_id, full_dir, watermark_file)
+    import_experiment("imported", os.path.join(full_dir, exp_id), import_source_tags=True, mlflow_client=client)
+
+    client.set_tag(run_ids[0], "changed", "yes")
+    client.delete_run(run_ids[1])
+    _export(client, exp_id, delta_dir, watermark_file)
+    import_experiment("imported", os.path.join(delta_dir, exp_id), import_source_tags=True, mlflow_client=client)
+
+    dst_exp = client.get_experiment_by_name("imported")
+    dst_runs = client.search_runs([dst_exp.experiment_id])
+    src_run_ids = sorted(run.data.tags["mlflow_exim.run_info.run_id"] for run in dst_runs)
+    assert src_run_ids == sorted([ run_ids[0], run_ids[2] ])
+    dst_run = next(run for run in dst_runs if run.data.tags["mlflow_exim.run_info.run_id"] == run_ids[0])
+    assert dst_run.data.tags["changed"] == "yes"
+
+
+def test_model_versions(fake_server, tmpdir):
+    client, exp_id = _populate(fake_server, num_runs=2)
+    runs = client.search_runs([exp_id])
+    client.create_registered_model("model")
+    client.create_model_version("model", f"{runs[0].info.artifact_uri}/model", runs[0].info.run_id)
+    watermark_file = str(tmpdir.join("watermarks.json"))
+    export_models(["model"], str(tmpdir.join("full")), watermark_file=watermark_file, mlflow_client=client)
+
+    info = export_models(["model"], str(tmpdir.join("unchanged")), watermark_file=watermark_file, mlflow_client=client)
+    assert info["watermarks"]["unchanged_models"] == 1
+    assert info["models"]["model_names"] == []
+
+    client.create_model_version("model", f"{runs[1].info.artifact_uri}/model", runs[1].info.run_id)
+    output_dir = str(tmpdir.join("delta"))
+    info = export_models(["model"], output_dir, watermark_file=watermark_file, mlflow_client=client)
+    model = io_utils.read_file_mlflow(os.path.join(output_dir, "models", "model", "model.json"))["registered_model"]
+    assert [ vr["version"] for vr in model["versions"] ] == [ "2" ]
+    exp_root = io_utils.read_file(os.path.join(output_dir, "experiments", exp_id, "experiment.json"))
+    assert exp_root["mlflow"]["runs"] == [ runs[1].info.run_id ]
+
+
+def _trace(request_id, timestamp_ms):
+    return SimpleNamespace(info=SimpleNamespace(request_id=request_id, experiment_id="1", timestamp_ms=timestamp_ms))
+
+
+def test_traces(tmpdir):
+    path = str(tmpdir.join("watermarks.json"))
+    marks = watermarks.Watermarks(path)
+    traces = [ _trace("t1", 100), _trace("t2", 200), _trace("t3", 300) ]
+    marks.commit_traces(traces, [ "t1", "t3" ]) # t2 failed
+    marks.save()
+    marks = watermarks.Watermarks(path)
+    assert [ t.info.request_id for t in marks.filter_traces(traces) ] == [ "t2", "t3" ]
+
+
+def test_logged_models(tmpdir):
+    def _logged_model(model_id, ts, source_run_id=None):
+        return SimpleNamespace(model_id=model_id, experiment_id="1", last_updated_timestamp=ts, source_run_id=source_run_id)
+    path = str(tmpdir.join("watermarks.json"))
+    marks = watermarks.Watermarks(path)
+    marks.commit_logged_models([ _logged_model("m1", 1), _logged_model("m2", 1), _logged_model("m3", 1) ], [ "m1", "m2", "m3" ])
+    marks.save()
+    marks = watermarks.Watermarks(path)
+    marks._pending["1"] = { "selected": { "run-1" } }
+    logged_models = [ _logged_model("m1", 1), _logged_model("m2", 2), _logged_model("m3", 1, "run-1"), _logged_model("m4", 1) ]
+    assert [ m.model_id for m in marks.filter_logged_models(logged_models) ] == [ "m2", "m3", "m4" ]
@@ -0,0 +1,108 @@
+"""
+Test the shared run export pool against the fake tracking server.
+"""
+
+import os
+import time
+import threading
+import mlflow
+
+from mlflow_export_import.common import utils, io_utils, worker_pool
+from mlflow_export_import.client import http_session
+from mlflow_export_import.bulk.export_experiments import export_experiments
+from mlflow_export_import.experiment.export_experiment import export_experiment
+from tests.open_source.fake_mlflow_server import fake_server
+
+
+def test_imap_ordered():
+    with worker_pool.activate(4) as pool:
+        def square(x):
+            time.sleep(0.001 * (x % 3))
+            return x * x
+        assert list(worker_pool.imap(square, range(50))) == [ x * x for x in range(50) ]
+        assert pool.get_stats() == { "max_workers": 4, "tasks": 50 }
+    assert worker_pool.get_pool() is None
+
+
+def test_imap_bounded_window():
+    consumed = []
+    def items():
+        for j in range(100):
+            consumed.append(j)
+            yield j
+    with worker_pool.activate(2):
+        it = worker_pool.imap(lambda x: x, items())
+        next(it)
+        assert len(consumed) <= 2 * worker_pool._WINDOW_FACTOR
+        assert list(it) == list(range(1, 100))
+
+
+def test_imap_nested_in_worker():
+    with worker_pool.activate(2):
+        def outer(x):
+            return sum(worker_pool.imap(lambda y: y, range(x)))
+        assert list(worker_pool.imap(outer, [3, 4, 5, 6])) == [3, 6, 10, 15]
+
+
+def test_activate_nested_and_sequential():
+    with worker_pool.activate(1) as pool:
+        assert pool is None
+        assert list(worker_pool.imap(lambda x: x + 1, [1, 2])) == [2, 3]
+    with worker_pool.activate(3) as outer:
+        with worker_pool.activate(8) as inner:
+            assert inner is outer
+            assert inner.max_workers == 3
+        assert worker_pool.get_pool() is outer
+
+
+def test_activate_sizes_http_pool(monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 48)
+    pool_size = http_session.get_stats()["pool_size"]
+    assert utils.get_threads(True) == 48
+    assert http_session.get_stats()["pool_size"] == pool_size # get_threads() has no side effect
+    with worker_pool.activate(utils.get_threads(True)):
+        assert http_session.get_stats()["pool_size"] == 48
+
+
+def test_imap_propagates_exception():
+    def fail(x):
+        if x == 2:
+            raise ValueError(x)
+        return x
+    with worker_pool.activate(2):
+        try:
+            list(worker_pool.imap(fail, range(5)))
+            assert False
+        except ValueError:
+            pass
+
+
+def test_export_experiment_parallel_runs(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    exp_id, = fake_server.populate(num_runs=8, num_metrics=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    fake_server.reset()
+    fake_server.configure("runs/get", latency=0.2)
+    ok_runs, failed_runs = export_experiment(exp_id, str(tmpdir), use_threads=True, mlflow_client=client)
+    assert (ok_runs, failed_runs) == (8, 0)
+    assert fake_server.get_stats()["max_concurrent_requests"] > 1
+    runs = io_utils.read_file_mlflow(os.path.join(str(tmpdir), "experiment.json"))["runs"]
+    assert sorted(runs) == sorted(run.info.run_id for run in client.search_runs([exp_id]))
+
+
+def test_bulk_export_shares_pool(fake_server, tmpdir, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)
+    exp_ids = fake_server.populate(num_experiments=2, num_runs=6, num_metrics=1, num_artifacts=1)
+    client = mlflow.MlflowClient(fake_server.uri)
+    threads = set()
+    from mlflow_export_import.experiment import export_experiment as export_experiment_module
+    export_run = export_experiment_module._export_run
+    def _export_run(*args, **kwargs):
+        threads.add(threading.current_thread().name)
+        return export_run(*args, **kwargs)
+    monkeypatch.setattr(export_experiment_module, "_export_run", _export_run)
+    info = export_experiments(exp_ids, str(tmpdir), use_threads=True, mlflow_client=client)
+    assert info["status"]["ok_runs"] == 12
+    assert info["status"]["worker_pool"]["tasks"] == 12
+    assert threads and all(name.startswith("run-worker") for name in threads)
+    assert worker_pool.get_pool() is None